@@ -127,7 +127,8 @@ export async function GET(request: NextRequest) {
             product_price: doc.product_price,
             timestamp: doc.timestamp,
             created_at: doc.created_at,
-            comment_date: doc.comment_date
+            comment_date: doc.comment_date,
+            comment_datetime: doc.comment_datetime
           })),
           platformStats,
           productStats: products
@@ -55,7 +55,9 @@ export async function POST(request: NextRequest) {
       }, { status: 503 });
     }
 
-    const { url, platform, maxPages, searchTerm, searchType } = await request.json();
+    const { url, platform, maxPages, searchTerm, searchType, stream, refresh, profile } = await request.json();
+    // profile: true | 'sample' → scraper profillenir, dosya yolları sonucun profile alanında döner
+    const profileMode = profile === true ? 'cprofile' : (typeof profile === 'string' ? profile : undefined);
 
     // Eğer search türü ise
     if (searchType === 'product_search') {
@@ -69,7 +71,11 @@ export async function POST(request: NextRequest) {
       let scriptPath: string;
       let args: string[];
 
-      if (platform.toLowerCase() === 'trendyol') {
+      if (platform.toLowerCase() === 'all') {
+        // Tüm platformlarda aynı anda arama; ortak süre bütçesi istek zaman aşımının biraz altında
+        scriptPath = path.join(process.cwd(), 'scripts', 'all_platforms_search_scraper.py');
+        args = [searchTerm, '5', (SCRAPE_TIMEOUT_SECONDS - FANOUT_BUDGET_MARGIN_SECONDS).toString()];
+      } else if (platform.toLowerCase() === 'trendyol') {
         // Trendyol ürün adı ile arama
         scriptPath = path.join(process.cwd(), 'scripts', 'trendyol_search_scraper.py');
         args = [searchTerm, '5']; // 5 ürün
@@ -91,12 +97,17 @@ export async function POST(request: NextRequest) {
         args = [searchTerm, '5', '3']; // 5 ürün, her birinden 3 sayfa yorum
       } else {
         return NextResponse.json(
-          { success: false, error: 'Ürün arama için Trendyol, Hepsiburada, N11, AliExpress ve Amazon destekleniyor' },
+          { success: false, error: 'Ürün arama için Trendyol, Hepsiburada, N11, AliExpress, Amazon ve all (tüm platformlar) destekleniyor' },
           { status: 400 }
         );
       }
 
-      const result = await runPythonScript(scriptPath, args);
+      // refresh: true → arama sonucu önbelleği atlanır, arama sayfası yeniden açılır
+      if (stream) {
+        return streamScraper(scriptPath, args, { refresh: Boolean(refresh), profile: profileMode });
+      }
+
+      const result = await runScraper(scriptPath, args, undefined, { refresh: Boolean(refresh), profile: profileMode });
       
       // Sonuçları local storage'a kaydet
       if (result.success) {
@@ -154,8 +165,12 @@ export async function POST(request: NextRequest) {
       );
     }
 
+    if (stream) {
+      return streamScraper(scriptPath, args, { profile: profileMode });
+    }
+
     // Python script'ini çalıştır
-    const result = await runPythonScript(scriptPath, args);
+    const result = await runScraper(scriptPath, args, undefined, { profile: profileMode });
     
     // Sonuçları local storage'a kaydet
     if (result.success) {
@@ -177,16 +192,187 @@ export async function POST(request: NextRequest) {
   }
 }
 
-async function runPythonScript(scriptPath: string, args: string[]): Promise<any> {
+// Kalıcı scrape worker'ı (scripts/scrape_worker.py) tanımlıysa işi ona gönder,
+// erişilemezse her istekte yeni python3 süreci başlatan eski yola dön
+const SCRAPER_WORKER_URL = process.env.SCRAPER_WORKER_URL;
+const SCRAPE_TIMEOUT_SECONDS = 300;
+// "all" aramasında bütçeyi aşan platformlar beklenmez; özetin zaman aşımından önce gelmesi için pay
+const FANOUT_BUDGET_MARGIN_SECONDS = 20;
+
+// Scraper'lar stdout'a satır başına bir JSON olay yazar (scripts/scrape_events.py):
+// job_started, product_discovered, page_scraped, product_done ve en sonda summary
+type ScrapeEventHandler = (event: any) => void;
+
+// refresh: arama sonucu önbelleğini atla; profile: 'cprofile' | 'sample' ile işi profille (scripts/scrape_profiler.py)
+type ScrapeOptions = { refresh?: boolean; profile?: string };
+
+function logScrapeEvent(event: any) {
+  if (event.event === 'page_scraped') {
+    console.log(`Scrape olayı: page_scraped ${event.platform} sayfa ${event.page} (${event.reviews?.length ?? 0} yorum)`);
+  } else if (event.event !== 'summary') {
+    console.log(`Scrape olayı: ${event.event} ${event.platform ?? ''} ${event.product_url ?? ''}`.trim());
+  }
+}
+
+// { stream: true } isteklerinde olayları istemciye NDJSON olarak aktar; son satır summary olur
+function streamScraper(scriptPath: string, args: string[], options: ScrapeOptions = {}): Response {
+  const encoder = new TextEncoder();
+  let cancelled = false;
+  const body = new ReadableStream({
+    async start(controller) {
+      // İstemci bağlantıyı kapattıysa olaylar atılır; iş arka planda tamamlanıp kaydedilir
+      const send = (event: any) => {
+        if (cancelled) return;
+        try {
+          controller.enqueue(encoder.encode(JSON.stringify(event) + '\n'));
+        } catch {
+          cancelled = true;
+        }
+      };
+      let result: any;
+      try {
+        result = await runScraper(scriptPath, args, (event) => {
+          if (event.event !== 'summary') send(event);
+        }, options);
+        if (result.success) {
+          await parseAndSaveResults(result);
+        }
+      } catch (error) {
+        console.error('Scrape akışı hatası:', error);
+        result = { success: false, error: (error as Error).message || 'Sunucu hatası oluştu' };
+      } finally {
+        send({ event: 'summary', result });
+        if (!cancelled) {
+          try {
+            controller.close();
+          } catch {
+            // Akış zaten kapanmış
+          }
+        }
+      }
+    },
+    cancel() {
+      cancelled = true;
+      console.log('Scrape akışı istemci tarafından kapatıldı');
+    }
+  });
+
+  return new Response(body, {
+    headers: { 'Content-Type': 'application/x-ndjson; charset=utf-8', 'Cache-Control': 'no-cache' }
+  });
+}
+
+async function runScraper(scriptPath: string, args: string[], onEvent?: ScrapeEventHandler, options: ScrapeOptions = {}): Promise<any> {
+  if (SCRAPER_WORKER_URL) {
+    let response: Response;
+    try {
+      response = await fetch(`${SCRAPER_WORKER_URL}/jobs/run`, {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify({
+          script: path.basename(scriptPath, '.py'),
+          args,
+          timeout: SCRAPE_TIMEOUT_SECONDS,
+          refresh: Boolean(options.refresh),
+          profile: options.profile
+        })
+      });
+    } catch (error) {
+      console.log('Scrape worker erişilemedi, python3 süreci başlatılıyor:', (error as Error).message);
+      return runPythonScript(scriptPath, args, onEvent, options);
+    }
+    return readWorkerStream(response, onEvent);
+  }
+  return runPythonScript(scriptPath, args, onEvent, options);
+}
+
+async function readWorkerStream(response: Response, onEvent?: ScrapeEventHandler): Promise<any> {
+  if (!response.ok || !response.body) {
+    const text = await response.text();
+    try {
+      return JSON.parse(text);
+    } catch {
+      return { success: false, error: `Scrape worker hatası (HTTP ${response.status})` };
+    }
+  }
+
+  const reader = response.body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = '';
+  let result: any = null;
+
+  while (true) {
+    const { done, value } = await reader.read();
+    if (done) break;
+    buffer += decoder.decode(value, { stream: true });
+
+    let newlineIndex: number;
+    while ((newlineIndex = buffer.indexOf('\n')) >= 0) {
+      const line = buffer.slice(0, newlineIndex).trim();
+      buffer = buffer.slice(newlineIndex + 1);
+      if (!line) continue;
+      let event: any;
+      try {
+        event = JSON.parse(line);
+      } catch {
+        console.log('Scrape worker geçersiz olay satırı atlandı:', line.slice(0, 200));
+        continue;
+      }
+      if (!event || typeof event.event !== 'string') continue;
+      logScrapeEvent(event);
+      onEvent?.(event);
+      if (event.event === 'summary') {
+        result = event.result;
+      }
+    }
+  }
+
+  return result ?? { success: false, error: 'Scrape worker sonuç döndürmedi' };
+}
+
+async function runPythonScript(scriptPath: string, args: string[], onEvent?: ScrapeEventHandler, options: ScrapeOptions = {}): Promise<any> {
   return new Promise((resolve) => {
+    // Tüm stdout yalnızca olay satırı gelmeyen eski tek-JSON çıktısı için tutulur;
+    // ilk olayla birlikte bırakılır, büyük sonuçlar bellekte ikinci kez birikmez
     let stdout = '';
+    let sawEvents = false;
     let stderr = '';
+    let lineBuffer = '';
+    let summary: any = null;
+
+    // Olay satırlarını geldikçe işle; summary sonucu kapanışta döndürülür
+    const handleLine = (line: string) => {
+      if (!line.trim()) return;
+      let event: any;
+      try {
+        event = JSON.parse(line);
+      } catch {
+        return; // Eski tek-JSON çıktısının parçası olabilir, kapanışta ele alınır
+      }
+      if (!event || typeof event.event !== 'string') return;
+      if (!sawEvents) {
+        sawEvents = true;
+        stdout = '';
+      }
+      logScrapeEvent(event);
+      onEvent?.(event);
+      if (event.event === 'summary') {
+        summary = event.result;
+        // Süreç bütçeyi aşan arka plan işleri yüzünden açık kalabilir; sonucu beklemeden döndür
+        resolve(summary);
+      }
+    };
 
     console.log(`Starting Python script: ${scriptPath} with args:`, args);
 
     const pythonProcess = spawn('python3', [scriptPath, ...args], {
       stdio: ['pipe', 'pipe', 'pipe'],
-      cwd: process.cwd()
+      cwd: process.cwd(),
+      env: {
+        ...process.env,
+        ...(options.refresh ? { SCRAPER_SEARCH_REFRESH: '1' } : {}),
+        ...(options.profile ? { SCRAPER_PROFILE: options.profile } : {})
+      }
     });
 
     // Timeout mekanizması (5 dakika)
@@ -202,19 +388,42 @@ async function runPythonScript(scriptPath: string, args: string[]): Promise<any>
 
     pythonProcess.stdout.on('data', (data) => {
       const chunk = data.toString();
-      stdout += chunk;
-      console.log('Python stdout chunk:', chunk);
+      if (!sawEvents) stdout += chunk;
+      lineBuffer += chunk;
+      let newlineIndex: number;
+      while ((newlineIndex = lineBuffer.indexOf('\n')) >= 0) {
+        handleLine(lineBuffer.slice(0, newlineIndex));
+        lineBuffer = lineBuffer.slice(newlineIndex + 1);
+      }
     });
 
     pythonProcess.stderr.on('data', (data) => {
       const chunk = data.toString();
-      stderr += chunk;
+      // Hata yanıtında yalnızca ilk 500 karakter kullanılır
+      if (stderr.length < 500) stderr += chunk;
       console.log('Python stderr chunk:', chunk);
     });
 
     pythonProcess.on('close', (code) => {
       clearTimeout(timeout);
       console.log(`Python script exited with code: ${code}`);
+      handleLine(lineBuffer);
+
+      if (summary) {
+        resolve(summary);
+        return;
+      }
+
+      if (sawEvents) {
+        resolve({
+          success: false,
+          error: `Scraper summary olayı göndermeden kapandı (çıkış kodu ${code})`,
+          stderr: stderr.substring(0, 500)
+        });
+        return;
+      }
+
+      console.log('Summary olayı bulunamadı, eski JSON çıktısı deneniyor...');
       console.log('Raw stdout length:', stdout.length);
       console.log('Stdout last 500 chars:', stdout.slice(-500));
 
@@ -12,6 +12,7 @@ interface Review {
   product_name: string;
   comment: string;
   comment_date?: string;
+  comment_datetime?: string;
   timestamp: string;
   rating?: number;
   price?: number;
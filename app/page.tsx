@@ -26,14 +26,71 @@ interface ScrapeResult {
   error?: string;
 }
 
+interface ScrapeProgress {
+  products: number;
+  pages: number;
+  reviews: number;
+}
+
+const EMPTY_PROGRESS: ScrapeProgress = { products: 0, pages: 0, reviews: 0 };
+
+// /api/scrape { stream: true } yanıtını satır satır oku: ara olaylar onEvent'e gider,
+// son satırdaki summary sonucu döner. Hata yanıtları (400/503) düz JSON gelir.
+async function readScrapeStream(response: Response, onEvent: (event: any) => void): Promise<ScrapeResult> {
+  if (!response.body || !(response.headers.get('Content-Type') || '').includes('application/x-ndjson')) {
+    return response.json();
+  }
+
+  const reader = response.body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = '';
+  let result: ScrapeResult | null = null;
+
+  while (true) {
+    const { done, value } = await reader.read();
+    if (done) break;
+    buffer += decoder.decode(value, { stream: true });
+
+    let newlineIndex: number;
+    while ((newlineIndex = buffer.indexOf('\n')) >= 0) {
+      const line = buffer.slice(0, newlineIndex).trim();
+      buffer = buffer.slice(newlineIndex + 1);
+      if (!line) continue;
+      const event = JSON.parse(line);
+      if (event.event === 'summary') {
+        result = event.result;
+      } else {
+        onEvent(event);
+      }
+    }
+  }
+
+  return result ?? { success: false, error: 'Scraper sonuç döndürmedi' };
+}
+
 export default function Home() {
   const [isLoading, setIsLoading] = useState(false);
   const [reviews, setReviews] = useState<Review[]>([]);
   const [lastScrapeResult, setLastScrapeResult] = useState<ScrapeResult | null>(null);
+  const [progress, setProgress] = useState<ScrapeProgress>(EMPTY_PROGRESS);
+
+  // Ara olaylardan ilerleme sayaçlarını güncelle
+  const trackProgress = (event: any) => {
+    if (event.event === 'product_discovered') {
+      setProgress((current) => ({ ...current, products: current.products + 1 }));
+    } else if (event.event === 'page_scraped') {
+      setProgress((current) => ({
+        ...current,
+        pages: current.pages + 1,
+        reviews: current.reviews + (event.reviews?.length ?? 0)
+      }));
+    }
+  };
 
   const handleScrape = async (url: string, platform: string, maxPages: number) => {
     setIsLoading(true);
     setLastScrapeResult(null);
+    setProgress(EMPTY_PROGRESS);
 
     try {
       const response = await fetch('/api/scrape', {
@@ -45,10 +102,11 @@ export default function Home() {
           url,
           platform,
           maxPages,
+          stream: true,
         }),
       });
 
-      const result: ScrapeResult = await response.json();
+      const result = await readScrapeStream(response, trackProgress);
       setLastScrapeResult(result);
 
       if (result.success) {
@@ -69,6 +127,7 @@ export default function Home() {
   const handleProductSearch = async (searchTerm: string, platform: string) => {
     setIsLoading(true);
     setLastScrapeResult(null);
+    setProgress(EMPTY_PROGRESS);
 
     try {
       const response = await fetch('/api/scrape', {
@@ -80,10 +139,11 @@ export default function Home() {
           searchTerm,
           platform,
           searchType: 'product_search',
+          stream: true,
         }),
       });
 
-      const result: ScrapeResult = await response.json();
+      const result = await readScrapeStream(response, trackProgress);
       setLastScrapeResult(result);
 
       if (result.success) {
@@ -241,7 +301,9 @@ export default function Home() {
                         Yorumlar çekiliyor...
                       </p>
                       <p className="text-gray-500 text-sm">
-                        Bu işlem birkaç dakika sürebilir, lütfen bekleyin
+                        {progress.pages > 0
+                          ? `${progress.products > 0 ? `${progress.products} ürün, ` : ''}${progress.pages} sayfa tarandı, ${progress.reviews} yorum bulundu`
+                          : 'Bu işlem birkaç dakika sürebilir, lütfen bekleyin'}
                       </p>
                       <div className="flex justify-center items-center gap-1 mt-4">
                         <div className="w-2 h-2 bg-blue-500 rounded-full animate-bounce"></div>
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Yorum kartı sayısına bakarak duran ortak scroll rutini.
+
+Sabit sayıda scroll + time.sleep yerine her scroll'dan sonra tarayıcı içinde bir
+MutationObserver kurulur ve yalnızca yeni kart eklenene kadar (en fazla wait_ms)
+beklenir. Art arda `patience` scroll boyunca kart sayısı artmazsa durulur; üç
+yorumlu bir ürün 40 sabit scroll yerine `patience` boş scroll'da (varsayılan
+3 × 2.5 sn ≈ 7.5 sn) biter, yeni kart gelen scroll'lar ise kart eklenir eklenmez
+döner. Yükseltilen script zaman aşımı dönüşte eski değerine alınır.
+
+Kullanım:
+    scrolls, cards = scroll_until_stable(driver, ".comment", max_scrolls=40)
+    scrolls, cards = scroll_until_stable(driver, sel, max_scrolls=10, container=modal_body)
+"""
+
+import sys
+
+from scrape_timing import span
+
+DEFAULT_PATIENCE = 3
+DEFAULT_WAIT_MS = 2500
+
+# Tek execute_async_script: scroll et, kart sayısı artana ya da wait_ms dolana kadar bekle
+_SCROLL_AND_WAIT_JS = """
+const selector = arguments[0];
+const container = arguments[1];
+const step = arguments[2];
+const waitMs = arguments[3];
+const done = arguments[arguments.length - 1];
+
+const count = () => document.querySelectorAll(selector).length;
+const before = count();
+
+if (container) {
+    container.scrollTop = container.scrollHeight;
+} else if (step) {
+    window.scrollBy(0, step);
+} else {
+    window.scrollTo(0, document.body.scrollHeight);
+}
+
+let finished = false;
+let timer = null;
+const observer = new MutationObserver(() => {
+    if (count() > before) finish();
+});
+const finish = () => {
+    if (finished) return;
+    finished = true;
+    observer.disconnect();
+    clearTimeout(timer);
+    done({before: before, after: count()});
+};
+observer.observe(container || document.body, {childList: true, subtree: true});
+timer = setTimeout(finish, waitMs);
+if (count() > before) finish();
+"""
+
+def scroll_until_stable(driver, card_selector, max_scrolls=40, patience=DEFAULT_PATIENCE,
+                        container=None, step=None, wait_ms=DEFAULT_WAIT_MS, on_scroll=None):
+    """Kart sayısı `patience` scroll boyunca artmayana kadar scroll et
+
+    container verilirse o elemanın içi, yoksa pencere scroll edilir (step yoksa sayfa sonuna).
+    on_scroll(scroll_no, card_count) her scroll'dan sonra çağrılır; True dönerse scroll durur
+    (ör. artımlı çekimde bilinen yorumlara ulaşıldığında).
+    (kullanılan scroll sayısı, son kart sayısı) döndürür.
+    """
+    previous_timeout = driver.timeouts.script
+    driver.set_script_timeout(wait_ms / 1000 + 10)
+    idle = 0
+    scrolls = 0
+    cards = 0
+
+    try:
+        for scrolls in range(1, max_scrolls + 1):
+            with span("scroll_batch"):
+                state = driver.execute_async_script(_SCROLL_AND_WAIT_JS, card_selector, container, step, wait_ms)
+            cards = state["after"]
+            if on_scroll and on_scroll(scrolls, cards):
+                break
+
+            if cards > state["before"]:
+                idle = 0
+            else:
+                idle += 1
+                if idle >= patience:
+                    break
+    finally:
+        # Havuzdaki oturumun sonraki işlerine yükseltilmiş zaman aşımı sızmasın
+        driver.set_script_timeout(previous_timeout)
+
+    print(f"📜 {scrolls}/{max_scrolls} scroll yeterli oldu ({cards} kart)", file=sys.stderr)
+    return scrolls, cards
@@ -1,19 +1,24 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
-from webdriver_manager.chrome import ChromeDriverManager
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 import pandas as pd
 from pymongo import MongoClient
+from mongo_writer import BulkWriter
+from driver_pool import acquire_driver, release_driver
+from adaptive_scroll import scroll_until_stable
+from review_extractors import read_card_texts
+from network_capture import NetworkCapture
+from page_waits import wait_ready
+from product_metadata import first_price
+from selector_stats import match_first
+from scrape_timing import timed_job
+from scrape_profiler import profile_from_argv
+from scrape_events import emit_job_started, emit_page_scraped, emit_product_done, emit_summary
 from datetime import datetime
-import time
 import sys
-import json
 import re
 
 def create_safe_collection_name(product_name, platform):
@@ -69,44 +74,30 @@ def extract_product_name_from_url(url):
         print(f"⚠️ URL'den ürün adı çıkarılamadı: {e}", file=sys.stderr)
         return "aliexpress_product"
 
+PRICE_SELECTORS = [
+    ".notranslate",
+    "[class*='price']",
+    "[class*='Price']",
+    ".price",
+    ".product-price"
+]
+
 def extract_price_from_product_page(driver, product_url):
     """AliExpress ürün sayfasından fiyat bilgisini çıkar"""
     price = None
     try:
-        # Ana sayfadan fiyat çıkarma denemeleri
-        price_selectors = [
-            ".notranslate",
-            "[class*='price']",
-            "[class*='Price']",
-            ".price",
-            ".product-price"
-        ]
-        
-        for selector in price_selectors:
-            try:
-                price_elements = driver.find_elements(By.CSS_SELECTOR, selector)
-                for elem in price_elements:
-                    text = elem.text.strip()
-                    # Fiyat pattern'ini ara (TL, $ veya sadece rakam)
-                    price_match = re.search(r'([\d.,]+)\s*(?:TL|₺|\$|)', text)
-                    if price_match:
-                        price_str = price_match.group(1).replace('.', '').replace(',', '.')
-                        try:
-                            price = float(price_str)
-                            print(f"    💰 Fiyat bulundu ({selector}): {price}", file=sys.stderr)
-                            break
-                        except ValueError:
-                            continue
-                if price:
-                    break
-            except Exception:
-                continue
-        
+        # Ana sayfadan fiyat (TL, $ veya sadece rakam); sıra selector_stats ile öğrenilir
+        price = match_first(driver, 'aliexpress', 'price', PRICE_SELECTORS,
+                            lambda texts: first_price(texts, r'([\d.,]+)\s*(?:TL|₺|\$|)'))
+        if price is not None:
+            print(f"    💰 Fiyat bulundu: {price}", file=sys.stderr)
+
     except Exception as e:
         print(f"    ⚠️ Fiyat çıkarma hatası: {e}", file=sys.stderr)
     
     return price
 
+@timed_job('aliexpress')
 def scrape_aliexpress_product(product_url, max_scrolls=10):
     """AliExpress ürününden yorumları çek"""
     
@@ -123,38 +114,17 @@ def scrape_aliexpress_product(product_url, max_scrolls=10):
         print(f"❌ MongoDB bağlantı hatası: {e}", file=sys.stderr)
         return {"success": False, "error": f"MongoDB bağlantı hatası: {e}"}
 
-    # ChromeDriver ayarları (Apple Silicon M1/M2 optimizasyonu)
-    options = Options()
-    options.add_argument("--disable-gpu")
-    options.add_argument("--window-size=1920,1080")
-    options.add_argument("--no-sandbox")
-    options.add_argument("--disable-dev-shm-usage")
-    options.add_argument("--disable-blink-features=AutomationControlled")
-    options.add_argument("--disable-web-security")
-    options.add_argument("--allow-running-insecure-content")
-    options.add_argument("--disable-extensions")
-    options.add_argument("--disable-plugins")
-    options.add_experimental_option("excludeSwitches", ["enable-automation"])
-    options.add_experimental_option('useAutomationExtension', False)
-
+    # Havuzdan sıcak bir Chrome oturumu al (ağ yakalama için performance log açık profil)
     try:
-        service = Service(ChromeDriverManager().install())
-        driver = webdriver.Chrome(service=service, options=options)
-        driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
-        print("✅ ChromeDriver başlatıldı (Apple Silicon)", file=sys.stderr)
+        driver = acquire_driver("capture")
     except Exception as e:
         print(f"❌ ChromeDriver hatası: {e}", file=sys.stderr)
-        try:
-            print("🔄 Sistem Chrome'u deneniyor...", file=sys.stderr)
-            options.binary_location = "/Applications/Google Chrome.app/Contents/MacOS/Google Chrome"
-            service = Service("/usr/local/bin/chromedriver")
-            driver = webdriver.Chrome(service=service, options=options)
-            print("✅ Sistem Chrome'u başarılı", file=sys.stderr)
-        except Exception as e2:
-            print(f"❌ Sistem Chrome hatası: {e2}", file=sys.stderr)
-            return {"success": False, "error": f"ChromeDriver hatası: {e} | Sistem Chrome hatası: {e2}"}
+        return {"success": False, "error": str(e)}
 
     yorumlar = set()
+    api_kartlari = {}  # yorum metni → API kartı (tarih, puan, beğeni)
+    scrolls_used = 0
+    writer = None
     
     try:
         # Ürün adını URL'den çıkar
@@ -168,11 +138,15 @@ def scrape_aliexpress_product(product_url, max_scrolls=10):
         # Koleksiyonu temizle
         collection = db[collection_name]
         collection.delete_many({})
+        writer = BulkWriter([collection])
         print(f"🗑️ Eski veriler temizlendi", file=sys.stderr)
+        emit_job_started('aliexpress', product_url=product_url, product_name=product_name,
+                         collection_name=collection_name)
         
         # Sayfayı aç
+        capture = NetworkCapture(driver, 'aliexpress')
         driver.get(product_url)
-        time.sleep(4)
+        wait_ready(driver, 'aliexpress', 'product', timeout=4)
         
         # Fiyat bilgisini al
         price = extract_price_from_product_page(driver, product_url)
@@ -183,91 +157,112 @@ def scrape_aliexpress_product(product_url, max_scrolls=10):
                 EC.presence_of_element_located((By.XPATH, "//button[contains(@class,'v3--btn--KaygomA')]"))
             )
             driver.execute_script("arguments[0].click();", btn)
-            time.sleep(3)
+            wait_ready(driver, 'aliexpress', 'reviews', timeout=3)
             print("✅ 'Daha fazla' butonuna tıklandı", file=sys.stderr)
         except:
             print("ℹ️ 'Daha fazla' butonu bulunamadı, doğrudan devam ediliyor.", file=sys.stderr)
 
-        # Scroll yapılacak yorum alanı bulunuyor
-        try:
-            container = WebDriverWait(driver, 10).until(
-                EC.presence_of_element_located((By.CLASS_NAME, "comet-v2-modal-body"))
-            )
-            print("✅ Scroll yapılacak alan bulundu.", file=sys.stderr)
-        except:
-            print("❌ Scroll konteyneri bulunamadı. Sayfa yapısı değişmiş olabilir.", file=sys.stderr)
-            # Alternatif scroll container'ları dene
+        kayitlar = []
+
+        def kaydet(yorum_metinleri, scroll_no):
+            """Yeni yorumları yazıcıya ekle ve bu grubu hemen page_scraped olarak gönder"""
+            grup = []
+            for yorum_text in yorum_metinleri:
+                if len(yorum_text) <= 10 or yorum_text in yorumlar:
+                    continue
+                yorumlar.add(yorum_text)
+                kart = api_kartlari.get(yorum_text, {})
+                review_data = {
+                    'platform': 'aliexpress',
+                    'comment': yorum_text,
+                    'timestamp': datetime.now(),
+                    'product_url': product_url,
+                    'product_name': product_name,
+                    'scroll_number': scroll_no,
+                    'review_index': len(kayitlar) + 1,
+                    'price': price,
+                    'comment_date': kart.get('date'),
+                    'rating': kart.get('rating'),
+                    'likes': kart.get('likes') or 0  # DOM yolunda beğeni okunmuyor, 0 kalır
+                }
+                writer.add(review_data)
+                kayitlar.append(review_data)
+                grup.append(review_data)
+            # AliExpress sayfalamak yerine modal içinde scroll ediyor; her scroll grubu bir sayfa sayılır
+            if grup:
+                emit_page_scraped('aliexpress', product_url, scroll_no, grup)
+
+        def api_sayfasi(sayfa, kartlar):
+            for kart in kartlar:
+                api_kartlari.setdefault(kart['text'], kart)
+            kaydet([kart['text'] for kart in kartlar], sayfa)
+
+        # Yorum API yanıtları yakalandıysa kalan sayfalar HTTP ile alınır, modal scroll edilmez
+        capture.collect_reviews(max_pages=max_scrolls, on_page=api_sayfasi)
+
+        if not yorumlar:
+            # Scroll yapılacak yorum alanı bulunuyor
             try:
-                container = driver.find_element(By.TAG_NAME, "body")
-                print("✅ Body ile scroll yapılacak", file=sys.stderr)
+                container = WebDriverWait(driver, 10).until(
+                    EC.presence_of_element_located((By.CLASS_NAME, "comet-v2-modal-body"))
+                )
+                print("✅ Scroll yapılacak alan bulundu.", file=sys.stderr)
             except:
-                driver.quit()
-                return {"success": False, "error": "Scroll konteyneri bulunamadı"}
+                print("❌ Scroll konteyneri bulunamadı. Sayfa yapısı değişmiş olabilir.", file=sys.stderr)
+                # Alternatif scroll container'ları dene
+                try:
+                    container = driver.find_element(By.TAG_NAME, "body")
+                    print("✅ Body ile scroll yapılacak", file=sys.stderr)
+                except:
+                    return {"success": False, "error": "Scroll konteyneri bulunamadı"}
 
-        # Olası yorum kutusu class'ları
-        css_list = [
-            "div[class^='list--itemBox--']",
-            "div[class^='list--itemReview--']",
-            "div.product-review-item",
-            "div.eva-card-review"
-        ]
+            # Olası yorum kutusu class'ları
+            css_list = [
+                "div[class^='list--itemBox--']",
+                "div[class^='list--itemReview--']",
+                "div.product-review-item",
+                "div.eva-card-review"
+            ]
         
-        sel = None
-        for css in css_list:
-            if driver.find_elements(By.CSS_SELECTOR, css):
-                sel = css
-                break
+            sel = None
+            for css in css_list:
+                if driver.find_elements(By.CSS_SELECTOR, css):
+                    sel = css
+                    break
         
-        if not sel:
-            print("⚠️ Yorum kutusu bulunamadı.", file=sys.stderr)
-            driver.quit()
-            return {"success": False, "error": "Yorum kutusu bulunamadı"}
+            if not sel:
+                print("⚠️ Yorum kutusu bulunamadı.", file=sys.stderr)
+                return {"success": False, "error": "Yorum kutusu bulunamadı"}
 
-        print(f"🔍 Yorum selector bulundu: {sel}", file=sys.stderr)
+            print(f"🔍 Yorum selector bulundu: {sel}", file=sys.stderr)
 
-        # Scroll yaparak yorumları topla
-        for i in range(max_scrolls):
-            driver.execute_script("arguments[0].scrollTop = arguments[0].scrollHeight", container)
-            time.sleep(1.5)
+            # Scroll yaparak yorumları topla; yeni yorum gelmeyince dur (max_scrolls üst sınır)
+            okunan_kart = 0  # Önceki scroll'larda okunmuş kart sayısı
 
-            for e in driver.find_elements(By.CSS_SELECTOR, sel):
-                txt = e.text.strip()
-                if len(txt) > 10:
-                    yorumlar.add(txt)
+            def yorumlari_topla(scroll_no, kart_sayisi):
+                # Yalnızca bu scroll'da eklenen kartlar okunur ve hemen gönderilir
+                nonlocal okunan_kart
+                if kart_sayisi > okunan_kart:
+                    kaydet(read_card_texts(driver, sel, start=okunan_kart), scroll_no)
+                    okunan_kart = kart_sayisi
 
-            print(f"📦 Scroll {i+1}: {len(yorumlar)} yorum toplandı", file=sys.stderr)
+                print(f"📦 Scroll {scroll_no}: {len(yorumlar)} yorum toplandı", file=sys.stderr)
             
-            if len(yorumlar) % 50 == 0 and len(yorumlar) > 0:
-                print(f"    💾 {len(yorumlar)} yorum işlendi...", file=sys.stderr)
+                if len(yorumlar) % 50 == 0 and len(yorumlar) > 0:
+                    print(f"    💾 {len(yorumlar)} yorum işlendi...", file=sys.stderr)
 
-        # MongoDB'ye kaydet
-        review_index = 1
-        for yorum_text in yorumlar:
-            review_data = {
-                'platform': 'aliexpress',
-                'comment': yorum_text,
-                'timestamp': datetime.now(),
-                'product_url': product_url,
-                'product_name': product_name,
-                'scroll_number': max_scrolls,
-                'review_index': review_index,
-                'price': price,
-                'likes': 0  # AliExpress'te beğeni sistemi farklı, şimdilik 0
-            }
-            
-            collection.insert_one(review_data)
-            review_index += 1
+            scrolls_used, _ = scroll_until_stable(driver, sel, max_scrolls=max_scrolls,
+                                                  container=container, on_scroll=yorumlari_topla)
 
     except Exception as e:
         print(f"❌ Genel hata: {e}", file=sys.stderr)
         return {"success": False, "error": str(e)}
     
     finally:
-        try:
-            driver.quit()
-            print("🔒 Driver kapatıldı", file=sys.stderr)
-        except:
-            pass
+        if writer is not None:
+            writer.close()
+        release_driver(driver, "capture")
+        print("🔒 Driver havuza bırakıldı", file=sys.stderr)
 
     # Excel çıktısı oluştur
     try:
@@ -282,6 +277,7 @@ def scrape_aliexpress_product(product_url, max_scrolls=10):
     print(f"\n✅ AliExpress scraping tamamlandı!", file=sys.stderr)
     print(f"📊 Toplam yorum: {len(yorumlar)}", file=sys.stderr)
     print(f"🗄️ Koleksiyon: {collection_name}", file=sys.stderr)
+    emit_product_done('aliexpress', product_url, product_name, len(yorumlar), price=price)
     
     return {
         "success": True,
@@ -289,10 +285,12 @@ def scrape_aliexpress_product(product_url, max_scrolls=10):
         "collection_name": collection_name,
         "product_name": product_name,
         "platform": "aliexpress",
-        "price": price
+        "price": price,
+        "scrolls_used": scrolls_used
     }
 
 if __name__ == "__main__":
+    sys.argv[1:] = profile_from_argv(sys.argv[1:])
     # Test için örnek URL
     if len(sys.argv) > 1:
         test_url = sys.argv[1]
@@ -301,4 +299,5 @@ if __name__ == "__main__":
         test_url = "https://tr.aliexpress.com/item/1005006728027200.html"
         max_scrolls = 10
     
-    result = scrape_aliexpress_product(test_url, max_scrolls)
\ No newline at end of file
+    result = scrape_aliexpress_product(test_url, max_scrolls)
+    emit_summary(result)
@@ -1,20 +1,28 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
-from webdriver_manager.chrome import ChromeDriverManager
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.common.keys import Keys
 import pandas as pd
 from pymongo import MongoClient
+from mongo_writer import BulkWriter
+from scrape_state import ProductWatermark
+from driver_pool import acquire_driver, release_driver
+from adaptive_scroll import scroll_until_stable
+from review_extractors import read_card_texts
+from page_waits import wait_ready
+from product_metadata import first_price
+from selector_stats import match_first
+from parallel_scrape import scrape_products_parallel
+from search_cache import cached_search
+from scrape_timing import timed_job
+from scrape_profiler import profile_from_argv
+from site_urls import site_url
+from scrape_events import emit_job_started, emit_product_discovered, emit_page_scraped, emit_product_done, emit_summary
 from datetime import datetime
-import time
 import sys
-import json
 import re
 from urllib.parse import quote
 
@@ -78,6 +86,21 @@ def extract_price_from_product_element(element):
     
     return price
 
+PRODUCT_LINK_SELECTORS = [
+    "a[href*='/item/']",
+    "a[href*='aliexpress.com/item']",
+    ".product-item a",
+    ".item-link"
+]
+
+PRICE_SELECTORS = [
+    ".notranslate",
+    "[class*='price']",
+    "[class*='Price']",
+    ".price",
+    ".product-price"
+]
+
 def get_product_links_from_search(driver, search_term, max_products=5):
     """AliExpress'te arama yaparak ürün linklerini al"""
     
@@ -85,42 +108,25 @@ def get_product_links_from_search(driver, search_term, max_products=5):
     
     try:
         # AliExpress TR arama sayfasına git
-        search_url = f"https://tr.aliexpress.com/w/wholesale-{quote(search_term)}.html"
+        search_url = site_url('aliexpress', f"/w/wholesale-{quote(search_term)}.html")
         driver.get(search_url)
-        time.sleep(3)
-        
-        # Ürün linklerini topla
-        product_links = []
-        product_selectors = [
-            "a[href*='/item/']",
-            "a[href*='aliexpress.com/item']",
-            ".product-item a",
-            ".item-link"
-        ]
-        
-        for selector in product_selectors:
-            try:
-                elements = driver.find_elements(By.CSS_SELECTOR, selector)
-                for element in elements:
-                    href = element.get_attribute('href')
-                    if href and '/item/' in href and 'aliexpress.com' in href:
-                        # URL'yi temizle
-                        if '?' in href:
-                            href = href.split('?')[0]
-                        if href not in product_links:
-                            product_links.append(href)
-                            print(f"    📦 Ürün bulundu: {href[:80]}...", file=sys.stderr)
-                        
-                        if len(product_links) >= max_products:
-                            break
-                
-                if len(product_links) >= max_products:
-                    break
-                    
-            except Exception as e:
-                print(f"    ⚠️ Selector {selector} hatası: {e}", file=sys.stderr)
-                continue
+        wait_ready(driver, 'aliexpress', 'search', timeout=3)
         
+        # Ürün linklerini topla: ürün linki veren ilk seçicinin href'leri (sıra öğrenilir)
+        def item_links(hrefs):
+            links = []
+            for href in hrefs:
+                if href and '/item/' in href and 'aliexpress.com' in href:
+                    href = href.split('?')[0]  # URL'yi temizle
+                    if href not in links:
+                        links.append(href)
+            return links[:max_products] or None
+
+        product_links = match_first(driver, 'aliexpress', 'search_links', PRODUCT_LINK_SELECTORS,
+                                    item_links, read='href', limit=200) or []
+        for href in product_links:
+            print(f"    📦 Ürün bulundu: {href[:80]}...", file=sys.stderr)
+
         print(f"✅ {len(product_links)} ürün linki toplandı", file=sys.stderr)
         return product_links[:max_products]
         
@@ -133,36 +139,12 @@ def scrape_aliexpress_product_reviews(product_url, max_scrolls=10, shared_collec
     
     print(f"🚀 AliExpress ürün scraping: {product_url[:60]}...", file=sys.stderr)
     
-    # ChromeDriver ayarları (Apple Silicon M1/M2 optimizasyonu)
-    options = Options()
-    options.add_argument("--disable-gpu")
-    options.add_argument("--window-size=1920,1080")
-    options.add_argument("--no-sandbox")
-    options.add_argument("--disable-dev-shm-usage")
-    options.add_argument("--disable-blink-features=AutomationControlled")
-    options.add_argument("--disable-web-security")
-    options.add_argument("--allow-running-insecure-content")
-    options.add_argument("--disable-extensions")
-    options.add_argument("--disable-plugins")
-    options.add_experimental_option("excludeSwitches", ["enable-automation"])
-    options.add_experimental_option('useAutomationExtension', False)
-
+    # Havuzdan sıcak bir Chrome oturumu al
     try:
-        service = Service(ChromeDriverManager().install())
-        driver = webdriver.Chrome(service=service, options=options)
-        driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
-        print("✅ ChromeDriver başlatıldı (Apple Silicon)", file=sys.stderr)
+        driver = acquire_driver()
     except Exception as e:
         print(f"❌ ChromeDriver hatası: {e}", file=sys.stderr)
-        try:
-            print("🔄 Sistem Chrome'u deneniyor...", file=sys.stderr)
-            options.binary_location = "/Applications/Google Chrome.app/Contents/MacOS/Google Chrome"
-            service = Service("/usr/local/bin/chromedriver")
-            driver = webdriver.Chrome(service=service, options=options)
-            print("✅ Sistem Chrome'u başarılı", file=sys.stderr)
-        except Exception as e2:
-            print(f"❌ Sistem Chrome hatası: {e2}", file=sys.stderr)
-            return {"success": False, "error": f"ChromeDriver hatası: {e} | Sistem Chrome hatası: {e2}"}
+        return {"success": False, "error": str(e)}
 
     yorumlar = set()
     product_name = None
@@ -171,7 +153,7 @@ def scrape_aliexpress_product_reviews(product_url, max_scrolls=10, shared_collec
     try:
         # Sayfayı aç
         driver.get(product_url)
-        time.sleep(4)
+        wait_ready(driver, 'aliexpress', 'product', timeout=4)
         
         # Ürün adını sayfadan çıkar
         try:
@@ -204,34 +186,12 @@ def scrape_aliexpress_product_reviews(product_url, max_scrolls=10, shared_collec
             print(f"⚠️ Ürün adı çıkarma hatası: {e}", file=sys.stderr)
             product_name = "aliexpress_product"
         
-        # Fiyat bilgisini al
+        # Fiyat bilgisini al (para birimi zorunlu; sıra selector_stats ile öğrenilir)
         try:
-            price_selectors = [
-                ".notranslate",
-                "[class*='price']",
-                "[class*='Price']",
-                ".price",
-                ".product-price"
-            ]
-            
-            for selector in price_selectors:
-                try:
-                    price_elements = driver.find_elements(By.CSS_SELECTOR, selector)
-                    for elem in price_elements:
-                        text = elem.text.strip()
-                        price_match = re.search(r'([\d.,]+)\s*(?:TL|₺|\$)', text)
-                        if price_match:
-                            price_str = price_match.group(1).replace('.', '').replace(',', '.')
-                            try:
-                                price = float(price_str)
-                                print(f"    💰 Fiyat: {price}", file=sys.stderr)
-                                break
-                            except ValueError:
-                                continue
-                    if price:
-                        break
-                except Exception:
-                    continue
+            price = match_first(driver, 'aliexpress', 'price', PRICE_SELECTORS,
+                                lambda texts: first_price(texts, r'([\d.,]+)\s*(?:TL|₺|\$)'))
+            if price is not None:
+                print(f"    💰 Fiyat: {price}", file=sys.stderr)
         except Exception as e:
             print(f"    ⚠️ Fiyat çıkarma hatası: {e}", file=sys.stderr)
         
@@ -241,7 +201,7 @@ def scrape_aliexpress_product_reviews(product_url, max_scrolls=10, shared_collec
                 EC.presence_of_element_located((By.XPATH, "//button[contains(@class,'v3--btn--KaygomA')]"))
             )
             driver.execute_script("arguments[0].click();", btn)
-            time.sleep(3)
+            wait_ready(driver, 'aliexpress', 'reviews', timeout=3)
             print("✅ 'Daha fazla' butonuna tıklandı", file=sys.stderr)
         except:
             print("ℹ️ 'Daha fazla' butonu bulunamadı", file=sys.stderr)
@@ -257,7 +217,6 @@ def scrape_aliexpress_product_reviews(product_url, max_scrolls=10, shared_collec
                 container = driver.find_element(By.TAG_NAME, "body")
                 print("✅ Body ile scroll yapılacak", file=sys.stderr)
             except:
-                driver.quit()
                 return {"success": False, "error": "Scroll konteyneri bulunamadı"}
 
         # Olası yorum kutusu class'ları
@@ -276,26 +235,32 @@ def scrape_aliexpress_product_reviews(product_url, max_scrolls=10, shared_collec
         
         if not sel:
             print("⚠️ Yorum kutusu bulunamadı", file=sys.stderr)
-            driver.quit()
             return {"success": False, "error": "Yorum kutusu bulunamadı"}
 
         print(f"🔍 Yorum selector: {sel}", file=sys.stderr)
 
-        # Scroll yaparak yorumları topla
-        for i in range(max_scrolls):
-            driver.execute_script("arguments[0].scrollTop = arguments[0].scrollHeight", container)
-            time.sleep(1.5)
+        # Daha önce çekilmiş üründe bilinen yoruma ulaşınca scroll bırakılır
+        watermark = ProductWatermark('aliexpress', product_url, product_name)
 
-            for e in driver.find_elements(By.CSS_SELECTOR, sel):
-                txt = e.text.strip()
-                if len(txt) > 10:
+        # Scroll yaparak yorumları topla; yeni yorum gelmeyince dur (max_scrolls üst sınır)
+        def yorumlari_topla(scroll_no, kart_sayisi):
+            yeni = []
+            for txt in read_card_texts(driver, sel):
+                if len(txt) > 10 and txt not in yorumlar:
                     yorumlar.add(txt)
+                    yeni.append(watermark.fingerprint(txt))
+
+            if scroll_no % 3 == 1:  # Her 3 scroll'da bir rapor et
+                print(f"📦 Scroll {scroll_no}/{max_scrolls}: {len(yorumlar)} yorum", file=sys.stderr)
+            return watermark.observe(yeni)
 
-            if i % 3 == 0:  # Her 3 scroll'da bir rapor et
-                print(f"📦 Scroll {i+1}/{max_scrolls}: {len(yorumlar)} yorum", file=sys.stderr)
+        scrolls_used, _ = scroll_until_stable(driver, sel, max_scrolls=max_scrolls,
+                                              container=container, on_scroll=yorumlari_topla)
 
         # MongoDB'ye kaydet (paylaşılan koleksiyona)
+        kayitlar = []
         if shared_collection is not None and shared_db is not None:
+            writer = BulkWriter([shared_collection])
             review_index = 1
             for yorum_text in yorumlar:
                 review_data = {
@@ -305,26 +270,31 @@ def scrape_aliexpress_product_reviews(product_url, max_scrolls=10, shared_collec
                     'product_url': product_url,
                     'product_name': product_name,
                     'search_term': search_term,  # Arama terimi eklendi
-                    'scroll_number': max_scrolls,
+                    'scroll_number': scrolls_used,
                     'review_index': review_index,
                     'price': price,
                     'likes': 0
                 }
                 
-                shared_collection.insert_one(review_data)
+                writer.add(review_data)
+                kayitlar.append(review_data)
                 review_index += 1
+            writer.close()
+            # Yorumlar yazıldı; sonraki çekim bu noktadan sonrasını çeker
+            if not writer.errors:
+                watermark.save()
+
+        emit_page_scraped('aliexpress', product_url, 1, kayitlar)
 
     except Exception as e:
         print(f"❌ Scraping hatası: {e}", file=sys.stderr)
         return {"success": False, "error": str(e)}
     
     finally:
-        try:
-            driver.quit()
-        except:
-            pass
+        release_driver(driver)
 
     print(f"✅ {len(yorumlar)} yorum toplandı: {product_name[:50]}...", file=sys.stderr)
+    emit_product_done('aliexpress', product_url, product_name, len(yorumlar), price=price)
     
     return {
         "success": True,
@@ -334,6 +304,7 @@ def scrape_aliexpress_product_reviews(product_url, max_scrolls=10, shared_collec
         "price": price
     }
 
+@timed_job('aliexpress')
 def scrape_aliexpress_by_search_term(search_term, max_products=5, max_scrolls=10):
     """AliExpress'te arama terimi ile çoklu ürün scraping"""
     
@@ -355,67 +326,51 @@ def scrape_aliexpress_by_search_term(search_term, max_products=5, max_scrolls=10
     collection_name = create_safe_collection_name(search_term, "aliexpress")
     collection = db[collection_name]
     
-    # Koleksiyonu temizle
-    collection.delete_many({})
+    # Koleksiyon temizlenmez: yorumlar parmak izi üzerinden upsert edilir, ürünler artımlı çekilir
     print(f"🗄️ Koleksiyon hazırlandı: {collection_name}", file=sys.stderr)
+    emit_job_started('aliexpress', search_term=search_term, max_products=max_products,
+                     max_scrolls=max_scrolls, collection_name=collection_name)
     
-    # ChromeDriver ayarları (Apple Silicon M1/M2 optimizasyonu)
-    options = Options()
-    options.add_argument("--disable-gpu")
-    options.add_argument("--window-size=1920,1080")
-    options.add_argument("--no-sandbox")
-    options.add_argument("--disable-dev-shm-usage")
-    options.add_argument("--disable-blink-features=AutomationControlled")
-    options.add_argument("--disable-web-security")
-    options.add_argument("--allow-running-insecure-content")
-    options.add_argument("--disable-extensions")
-    options.add_argument("--disable-plugins")
-    options.add_experimental_option("excludeSwitches", ["enable-automation"])
-    options.add_experimental_option('useAutomationExtension', False)
-
+    # Havuzdan sıcak bir Chrome oturumu al
     try:
-        service = Service(ChromeDriverManager().install())
-        driver = webdriver.Chrome(service=service, options=options)
-        driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
-        print("✅ ChromeDriver başlatıldı (Apple Silicon)", file=sys.stderr)
+        driver = acquire_driver()
     except Exception as e:
         print(f"❌ ChromeDriver hatası: {e}", file=sys.stderr)
-        try:
-            print("🔄 Sistem Chrome'u deneniyor...", file=sys.stderr)
-            options.binary_location = "/Applications/Google Chrome.app/Contents/MacOS/Google Chrome"
-            service = Service("/usr/local/bin/chromedriver")
-            driver = webdriver.Chrome(service=service, options=options)
-            print("✅ Sistem Chrome'u başarılı", file=sys.stderr)
-        except Exception as e2:
-            print(f"❌ Sistem Chrome hatası: {e2}", file=sys.stderr)
-            return {"success": False, "error": f"ChromeDriver hatası: {e} | Sistem Chrome hatası: {e2}"}
+        return {"success": False, "error": str(e)}
 
     try:
-        # Ürün linklerini al
-        product_links = get_product_links_from_search(driver, search_term, max_products)
+        # Ürün linklerini al (aynı arama yakın zamanda yapıldıysa önbellekten)
+        product_links = cached_search('aliexpress', search_term, max_products,
+                                      lambda: get_product_links_from_search(driver, search_term, max_products))
         
         if not product_links:
             return {"success": False, "error": "Hiç ürün bulunamadı"}
         
-        driver.quit()  # Arama driver'ını kapat
-        
-        # Her ürün için yorumları çek
-        total_reviews = 0
-        results = []
+        # Arama oturumunu havuza bırak; ürünler paralel olarak kendi oturumlarında çekilir
+        release_driver(driver)
+        driver = None
         
         for i, product_url in enumerate(product_links, 1):
+            emit_product_discovered('aliexpress', product_url, index=i)
+        
+        # Her ürün için yorumları paralel çek (aynı koleksiyona kaydedilir)
+        def urun_cek(i, product_url):
             print(f"\n{'='*50}", file=sys.stderr)
             print(f"🎯 Ürün {i}/{len(product_links)} işleniyor", file=sys.stderr)
             print(f"🔗 URL: {product_url[:80]}...", file=sys.stderr)
-            
-            result = scrape_aliexpress_product_reviews(
+            return scrape_aliexpress_product_reviews(
                 product_url, 
                 max_scrolls, 
                 shared_collection=collection,
                 shared_db=db,
                 search_term=search_term
             )
-            
+
+        total_reviews = 0
+        results = []
+        
+        for i, (product_url, result) in enumerate(
+                zip(product_links, scrape_products_parallel(product_links, urun_cek)), 1):
             if result["success"]:
                 total_reviews += result["total_reviews"]
                 results.append({
@@ -436,20 +391,13 @@ def scrape_aliexpress_by_search_term(search_term, max_products=5, max_scrolls=10
                     "product_name": product_url,
                     "platform": "aliexpress"
                 })
-            
-            # Ürünler arası kısa bekleme
-            if i < len(product_links):
-                time.sleep(2)
 
     except Exception as e:
         print(f"❌ Genel hata: {e}", file=sys.stderr)
         return {"success": False, "error": str(e)}
     
     finally:
-        try:
-            driver.quit()
-        except:
-            pass
+        release_driver(driver)
 
     print(f"\n🎉 AliExpress arama scraping tamamlandı!", file=sys.stderr)
     print(f"📊 Toplam yorum: {total_reviews}", file=sys.stderr)
@@ -467,6 +415,7 @@ def scrape_aliexpress_by_search_term(search_term, max_products=5, max_scrolls=10
     }
 
 if __name__ == "__main__":
+    sys.argv[1:] = profile_from_argv(sys.argv[1:])
     # Test için
     if len(sys.argv) > 1:
         search_term = sys.argv[1]
@@ -477,4 +426,5 @@ if __name__ == "__main__":
         max_products = 3
         max_scrolls = 8
     
-    result = scrape_aliexpress_by_search_term(search_term, max_products, max_scrolls)
\ No newline at end of file
+    result = scrape_aliexpress_by_search_term(search_term, max_products, max_scrolls)
+    emit_summary(result)
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Tek arama terimini tüm platformlarda aynı anda çeken "her yerde ara" işi.
+
+Trendyol, Hepsiburada, n11, AliExpress ve Amazon arama scraper'ları ayrı
+thread'lerde paralel çalışır ve ortak bir süre bütçesini paylaşır. Her platform
+kendi koleksiyonlarına yazmaya devam eder; bu iş yalnızca sonuçları tek bir
+özet halinde birleştirir. Bütçe dolduğunda bitmemiş platformlar "timeout"
+olarak işaretlenir ve o ana kadar bitenlerin sonucu döner (thread'ler
+durdurulamaz, bitmemiş platformlar arka planda tamamlanır).
+
+Kullanım:
+    python3 all_platforms_search_scraper.py "iphone 15" 5 280
+"""
+
+from concurrent.futures import ThreadPoolExecutor, wait
+import contextvars
+import importlib
+import time
+import sys
+import os
+
+from scrape_timing import timed_job
+from scrape_profiler import profile_from_argv, profile_thread
+from scrape_events import emit_job_started, emit_summary
+
+DEFAULT_BUDGET_SEC = int(os.getenv("SCRAPER_BUDGET_SEC", "300"))
+
+# platform → (modül, fonksiyon, arama terimi ve ürün sayısından sonraki argümanlar)
+# Argümanlar /api/scrape'in tek platform aramasında kullandıklarıyla aynıdır
+PLATFORM_SEARCHES = {
+    'trendyol': ('trendyol_search_scraper', 'scrape_trendyol_by_product_name', []),
+    'hepsiburada': ('hepsiburada_search_scraper', 'scrape_hepsiburada_by_product_name', [6]),
+    'n11': ('n11_search_scraper', 'scrape_n11_by_product_name', [8]),
+    'aliexpress': ('aliexpress_search_scraper', 'scrape_aliexpress_by_search_term', [10]),
+    'amazon': ('amazon_search_scraper', 'amazon_search_scrape', [3]),
+}
+
+@profile_thread
+def run_platform_search(platform, search_term, max_products, deadline):
+    """Tek platformun arama scraper'ını çalıştır; hata olursa başarısız sonuç döndür"""
+    module_name, func_name, extra_args = PLATFORM_SEARCHES[platform]
+    args = [search_term, max_products, *extra_args]
+    if platform == 'hepsiburada':
+        # Hepsiburada kendi süre bütçesini destekler; kalan ortak bütçeyi ver
+        args.append(max(int(deadline - time.time()), 1))
+
+    started = time.time()
+    print(f"▶️ {platform} araması başladı", file=sys.stderr)
+    try:
+        func = getattr(importlib.import_module(module_name), func_name)
+        result = func(*args) or {"success": False, "error": "Scraper sonuç döndürmedi"}
+    except Exception as e:
+        print(f"❌ {platform} arama hatası: {e}", file=sys.stderr)
+        result = {"success": False, "error": str(e)}
+    print(f"⏹️ {platform} araması bitti ({time.time() - started:.1f} sn)", file=sys.stderr)
+    return result
+
+def summarize_platform(platform, result):
+    """Platform sonucunu yorum listeleri olmadan özetle"""
+    summary = {key: value for key, value in result.items() if key not in ('all_reviews', 'results')}
+    summary['platform'] = platform
+    summary['results'] = [
+        {key: value for key, value in product.items() if key != 'reviews'}
+        for product in result.get('results') or []
+    ]
+    return summary
+
+@timed_job('all')
+def scrape_all_platforms_by_search_term(search_term, max_products=5, max_seconds=DEFAULT_BUDGET_SEC):
+    """Arama terimini tüm platformlarda paralel çek ve sonuçları birleştir"""
+    started_at = time.time()
+    deadline = started_at + max_seconds
+    platforms = list(PLATFORM_SEARCHES)
+
+    print("🚀 Tüm platformlarda arama başlatılıyor...", file=sys.stderr)
+    print(f"🔍 Arama terimi: {search_term}", file=sys.stderr)
+    print(f"📦 Platform başına ürün: {max_products}", file=sys.stderr)
+    print(f"⏰ Ortak süre bütçesi: {max_seconds} saniye", file=sys.stderr)
+    emit_job_started('all', search_term=search_term, max_products=max_products,
+                     platforms=platforms, max_seconds=max_seconds)
+
+    executor = ThreadPoolExecutor(max_workers=len(platforms), thread_name_prefix="platform")
+    # Her platform çağıranın context kopyasında çalışır; olaylar worker akışına ulaşır
+    futures = {
+        platform: executor.submit(contextvars.copy_context().run, run_platform_search,
+                                  platform, search_term, max_products, deadline)
+        for platform in platforms
+    }
+    wait(futures.values(), timeout=max(deadline - time.time(), 0))
+    # Bütçeyi aşan platformları bekleme; thread'ler arka planda biter
+    executor.shutdown(wait=False)
+
+    platform_results = {}
+    results = []
+    total_reviews = 0
+    timed_out = []
+    for platform, future in futures.items():
+        if not future.done():
+            timed_out.append(platform)
+            print(f"⏰ {platform} süre bütçesine sığmadı", file=sys.stderr)
+            platform_results[platform] = {"success": False, "platform": platform, "timeout": True,
+                                          "error": f"Süre bütçesi doldu ({max_seconds} saniye)"}
+            continue
+
+        summary = summarize_platform(platform, future.result())
+        platform_results[platform] = summary
+        if summary.get("success"):
+            total_reviews += summary.get("total_reviews") or 0
+            for product in summary['results']:
+                results.append({**product, "platform": product.get("platform") or platform})
+
+    succeeded = [platform for platform, summary in platform_results.items() if summary.get("success")]
+    elapsed = time.time() - started_at
+    print(f"\n✅ Tüm platformlarda arama tamamlandı ({elapsed:.1f} sn)", file=sys.stderr)
+    print(f"📊 Toplam yorum: {total_reviews}", file=sys.stderr)
+    print(f"🏁 Başarılı platform: {len(succeeded)}/{len(platforms)}", file=sys.stderr)
+
+    return {
+        "success": bool(succeeded),
+        "partial": bool(timed_out) or len(succeeded) < len(platforms),
+        "platform": "all",
+        "search_term": search_term,
+        "total_reviews": total_reviews,
+        "platforms_succeeded": succeeded,
+        "platforms_timed_out": timed_out,
+        "elapsed_seconds": round(elapsed, 1),
+        "platforms": platform_results,
+        "results": results,
+    }
+
+if __name__ == "__main__":
+    sys.argv[1:] = profile_from_argv(sys.argv[1:])
+    if len(sys.argv) < 2:
+        emit_summary({"success": False, "error": "Arama terimi parametresi gerekli"})
+        sys.exit(1)
+
+    search_term = sys.argv[1]
+    max_products = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    max_seconds = int(sys.argv[3]) if len(sys.argv) > 3 else DEFAULT_BUDGET_SEC
+
+    result = scrape_all_platforms_by_search_term(search_term, max_products, max_seconds)
+    emit_summary(result)
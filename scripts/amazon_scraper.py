@@ -1,20 +1,23 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
-import json
 import sys
-import time
 import re
 import pandas as pd
 from datetime import datetime
 from pymongo import MongoClient
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
+from mongo_writer import BulkWriter
+from review_fingerprint import fingerprint_review
 from selenium.webdriver.common.by import By
-from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from webdriver_manager.chrome import ChromeDriverManager
+from driver_pool import acquire_driver, release_driver
+from page_waits import wait_ready
+from selector_stats import match_first
+from metadata_cache import cached_metadata
+from scrape_timing import timed_job
+from scrape_profiler import profile_from_argv
+from scrape_events import emit_job_started, emit_page_scraped, emit_product_done, emit_summary
 
 def create_safe_collection_name(product_name, platform):
     """Güvenli koleksiyon adı oluştur"""
@@ -72,6 +75,37 @@ def extract_asin_from_url(url):
         return asin_match.group(1)
     return None
 
+PRICE_SELECTORS = [
+    ".a-price-whole",
+    ".a-price .a-offscreen",
+    ".a-color-price",
+    "[data-testid='price-current']"
+]
+
+def amazon_price(texts):
+    """Seçicinin ilk elemanının metninden fiyat ("1.299,00" → 1299.0); yoksa None"""
+    price_match = re.search(r'[\d.,]+', texts[0].replace('.', '').replace(',', '.'))
+    if not price_match:
+        return None
+    try:
+        return float(price_match.group(0))
+    except ValueError:
+        return None
+
+def extract_amazon_price(driver, product_url):
+    """Amazon ürün sayfasından fiyat bilgisini çıkar"""
+    price = None
+    try:
+        driver.get(product_url)
+        wait_ready(driver, 'amazon', 'product', timeout=2)
+        price = match_first(driver, 'amazon', 'price', PRICE_SELECTORS, amazon_price, limit=1)
+        if price is not None:
+            print(f"💰 Fiyat bulundu: {price} TL", file=sys.stderr)
+    except Exception as price_error:
+        print(f"⚠️ Fiyat alma hatası: {price_error}", file=sys.stderr)
+    return price
+
+@timed_job('amazon')
 def scrape_amazon_product(product_url, max_pages=10, enable_login=True):
     """Amazon ürününden yorumları çek"""
     
@@ -96,24 +130,16 @@ def scrape_amazon_product(product_url, max_pages=10, enable_login=True):
         print(f"❌ MongoDB bağlantı hatası: {e}", file=sys.stderr)
         return {"success": False, "error": f"MongoDB bağlantı hatası: {e}"}
 
-    # Chrome ayarları
-    options = Options()
-    options.add_argument("--window-size=1920,1080")
-    options.add_argument("--disable-gpu")
-    options.add_argument("--disable-blink-features=AutomationControlled")
-    options.add_experimental_option("excludeSwitches", ["enable-automation"])
-    options.add_experimental_option("useAutomationExtension", False)
-
+    # Havuzdan sıcak bir Chrome oturumu al
     try:
-        service = Service(ChromeDriverManager().install())
-        driver = webdriver.Chrome(service=service, options=options)
-        driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
-        print("✅ ChromeDriver başlatıldı", file=sys.stderr)
+        driver = acquire_driver()
     except Exception as e:
         print(f"❌ ChromeDriver hatası: {e}", file=sys.stderr)
         return {"success": False, "error": f"ChromeDriver hatası: {e}"}
 
     yorumlar = []
+    gorulen_yorumlar = set()
+    writer = None
     
     try:
         # Amazon'a giriş yap (isteğe bağlı)
@@ -140,7 +166,7 @@ def scrape_amazon_product(product_url, max_pages=10, enable_login=True):
                 driver.find_element(By.ID, "signInSubmit").click()
                 
                 # Giriş başarılı mı kontrol et
-                time.sleep(3)
+                wait_ready(driver, 'amazon', 'signed_in', timeout=3)
                 driver.switch_to.window(driver.window_handles[-1])
                 print("✅ Amazon girişi başarılı", file=sys.stderr)
                 
@@ -159,36 +185,18 @@ def scrape_amazon_product(product_url, max_pages=10, enable_login=True):
         # Koleksiyonu temizle
         collection = db[collection_name]
         collection.delete_many({})
+        writer = BulkWriter([collection])
         print(f"🗑️ Eski veriler temizlendi", file=sys.stderr)
+        emit_job_started('amazon', product_url=product_url, product_name=product_name,
+                         asin=asin, collection_name=collection_name)
         
         # Yorum URL'sini oluştur
         base_url = f"https://www.amazon.com.tr/product-reviews/{asin}/?ie=UTF8&reviewerType=all_reviews&pageNumber="
         
-        # Fiyat bilgisini almaya çalış
-        price = None
-        try:
-            driver.get(product_url)
-            time.sleep(2)
-            price_selectors = [
-                ".a-price-whole",
-                ".a-price .a-offscreen",
-                ".a-color-price",
-                "[data-testid='price-current']"
-            ]
-            
-            for selector in price_selectors:
-                try:
-                    price_element = driver.find_element(By.CSS_SELECTOR, selector)
-                    price_text = price_element.text.strip()
-                    price_match = re.search(r'[\d.,]+', price_text.replace('.', '').replace(',', '.'))
-                    if price_match:
-                        price = float(price_match.group(0))
-                        print(f"💰 Fiyat bulundu: {price} TL", file=sys.stderr)
-                        break
-                except:
-                    continue
-        except Exception as price_error:
-            print(f"⚠️ Fiyat alma hatası: {price_error}", file=sys.stderr)
+        # Fiyat bilgisini almaya çalış (ASIN bazında önbellekte tazeyse ürün sayfası açılmaz)
+        price = cached_metadata(driver, 'amazon', product_url,
+                                lambda d: {'price': extract_amazon_price(d, product_url)},
+                                fields=('price',))['price']
         
         # Sayfa sayfa yorumları çek
         for page in range(1, max_pages + 1):
@@ -197,7 +205,7 @@ def scrape_amazon_product(product_url, max_pages=10, enable_login=True):
             
             try:
                 driver.get(url)
-                time.sleep(2)
+                wait_ready(driver, 'amazon', 'reviews', timeout=2)
                 
                 # Yorumları bekle - Amazon yapısı değiştiği için farklı selector'lar dene
                 page_loaded = False
@@ -238,6 +246,7 @@ def scrape_amazon_product(product_url, max_pages=10, enable_login=True):
                     continue
                 
                 yeni_yorumlar = 0
+                sayfa_kayitlari = []
                 
                 # Amazon yorumlar için tüm yorum container'larını al
                 review_containers = driver.find_elements(By.CSS_SELECTOR, '[data-hook="review"]')
@@ -273,51 +282,54 @@ def scrape_amazon_product(product_url, max_pages=10, enable_login=True):
                                     continue
                             
                         if yorum_text and len(yorum_text) > 5:
-                            # Tekrar eden yorumları kontrol et
-                            if yorum_text not in [y for y in yorumlar]:
-                                
-                                # Amazon yorum tarihini çek
-                                comment_date = None
-                                try:
-                                    date_element = container.find_element(By.CSS_SELECTOR, '[data-hook="review-date"]')
-                                    if date_element:
-                                        date_text = date_element.text.strip()
-                                        if date_text:
-                                            # "Türkiye'de 26 Haziran 2025 tarihinde değerlendirildi" formatından tarihi çıkar
-                                            date_match = re.search(r'(\d{1,2}\s+\w+\s+\d{4})', date_text)
-                                            if date_match:
-                                                comment_date = date_match.group(1)
-                                                print(f"📅 Amazon yorum tarihi bulundu: {comment_date}", file=sys.stderr)
-                                            else:
-                                                comment_date = date_text  # Tam metni kaydet
-                                except:
-                                    pass  # Tarih bulunamazsa devam et
-                                
-                                yorumlar.append(yorum_text)
-                                yeni_yorumlar += 1
-                                
-                                # MongoDB'ye kaydet
-                                review_data = {
-                                    'platform': 'amazon',
-                                    'comment': yorum_text,
-                                    'comment_date': comment_date,
-                                    'timestamp': datetime.now(),
-                                    'product_url': product_url,
-                                    'product_name': product_name,
-                                    'asin': asin,
-                                    'page_number': page,
-                                    'review_index': idx + 1,
-                                    'price': price,
-                                    'likes': 0
-                                }
-                                
-                                collection.insert_one(review_data)
+                            # Amazon yorum tarihini çek
+                            comment_date = None
+                            try:
+                                date_element = container.find_element(By.CSS_SELECTOR, '[data-hook="review-date"]')
+                                if date_element:
+                                    date_text = date_element.text.strip()
+                                    if date_text:
+                                        # "Türkiye'de 26 Haziran 2025 tarihinde değerlendirildi" formatından tarihi çıkar
+                                        date_match = re.search(r'(\d{1,2}\s+\w+\s+\d{4})', date_text)
+                                        if date_match:
+                                            comment_date = date_match.group(1)
+                                            print(f"📅 Amazon yorum tarihi bulundu: {comment_date}", file=sys.stderr)
+                                        else:
+                                            comment_date = date_text  # Tam metni kaydet
+                            except:
+                                pass  # Tarih bulunamazsa devam et
+                            
+                            # MongoDB'ye kaydet
+                            review_data = {
+                                'platform': 'amazon',
+                                'comment': yorum_text,
+                                'comment_date': comment_date,
+                                'timestamp': datetime.now(),
+                                'product_url': product_url,
+                                'product_name': product_name,
+                                'asin': asin,
+                                'page_number': page,
+                                'review_index': idx + 1,
+                                'price': price,
+                                'likes': 0
+                            }
+                            
+                            # Tekrar eden yorumları parmak iziyle (platform + ASIN + metin + tarih) kontrol et
+                            parmak_izi = fingerprint_review(review_data)
+                            if parmak_izi in gorulen_yorumlar:
+                                continue
+                            gorulen_yorumlar.add(parmak_izi)
+                            yorumlar.append(yorum_text)
+                            yeni_yorumlar += 1
+                            writer.add(review_data)
+                            sayfa_kayitlari.append(review_data)
                                 
                     except Exception as inner_e:
                         print(f"    ⚠️ Yorum işleme hatası: {inner_e}", file=sys.stderr)
                         continue
                 
                 print(f"✅ Sayfa {page}: {yeni_yorumlar} yeni yorum eklendi", file=sys.stderr)
+                emit_page_scraped('amazon', product_url, page, sayfa_kayitlari)
                 
                 # Son sayfa kontrolü
                 if driver.find_elements(By.CSS_SELECTOR, "li.a-disabled.a-last"):
@@ -333,11 +345,10 @@ def scrape_amazon_product(product_url, max_pages=10, enable_login=True):
         return {"success": False, "error": str(e)}
     
     finally:
-        try:
-            driver.quit()
-            print("🔒 Driver kapatıldı", file=sys.stderr)
-        except:
-            pass
+        if writer is not None:
+            writer.close()
+        release_driver(driver)
+        print("🔒 Driver havuza bırakıldı", file=sys.stderr)
 
     # Excel çıktısı oluştur
     try:
@@ -352,6 +363,7 @@ def scrape_amazon_product(product_url, max_pages=10, enable_login=True):
     print(f"\n✅ Amazon scraping tamamlandı!", file=sys.stderr)
     print(f"📊 Toplam yorum: {len(yorumlar)}", file=sys.stderr)
     print(f"🗄️ Koleksiyon: {collection_name}", file=sys.stderr)
+    emit_product_done('amazon', product_url, product_name, len(yorumlar), asin=asin, price=price)
     
     return {
         "success": True,
@@ -364,6 +376,7 @@ def scrape_amazon_product(product_url, max_pages=10, enable_login=True):
     }
 
 if __name__ == "__main__":
+    sys.argv[1:] = profile_from_argv(sys.argv[1:])
     if len(sys.argv) > 1:
         test_url = sys.argv[1]
         max_pages = int(sys.argv[2]) if len(sys.argv) > 2 else 10
@@ -374,4 +387,4 @@ if __name__ == "__main__":
         enable_login = True
     
     result = scrape_amazon_product(test_url, max_pages, enable_login)
-    print(json.dumps(result, ensure_ascii=False, indent=2)) 
\ No newline at end of file
+    emit_summary(result) 
\ No newline at end of file
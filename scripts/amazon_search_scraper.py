@@ -1,21 +1,28 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
-import json
 import sys
 import time
 import re
 import pandas as pd
 from datetime import datetime
 from pymongo import MongoClient
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
+from mongo_writer import BulkWriter
+from review_fingerprint import fingerprint_review
+from scrape_state import ProductWatermark, save_watermarks
 from selenium.webdriver.common.by import By
-from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.common.keys import Keys
-from webdriver_manager.chrome import ChromeDriverManager
+from driver_pool import acquire_driver, release_driver
+from page_waits import wait_ready, wait_until
+from selector_stats import match_first
+from metadata_cache import cached_metadata
+from search_cache import cached_search
+from parallel_scrape import scrape_products_parallel
+from scrape_timing import timed_job
+from scrape_profiler import profile_from_argv
+from scrape_events import emit_job_started, emit_product_discovered, emit_page_scraped, emit_product_done, emit_summary
 
 def create_safe_collection_name(product_name, platform):
     """Güvenli koleksiyon adı oluştur"""
@@ -57,7 +64,7 @@ def convert_to_real_amazon_url(driver, raw_link):
         # Backup: Linke git ve gerçek URL'yi al
         current_url = driver.current_url
         driver.get(raw_link)
-        time.sleep(1)
+        wait_until(driver, lambda d: '/dp/' in d.current_url, 1, 'amazon.redirect')
         
         real_url = driver.current_url
         if '/dp/' in real_url:
@@ -102,7 +109,7 @@ def amazon_login(driver, email="ay3738176@gmail.com", password="theclico2134"):
         driver.find_element(By.ID, "signInSubmit").click()
         
         # Giriş başarılı mı kontrol et
-        time.sleep(1)
+        wait_ready(driver, 'amazon', 'signed_in', timeout=1)
         
         # Yeni pencere açıldıysa geç
         if len(driver.window_handles) > 1:
@@ -115,12 +122,33 @@ def amazon_login(driver, email="ay3738176@gmail.com", password="theclico2134"):
         print(f"⚠️ Amazon giriş hatası: {e}", file=sys.stderr)
         return False
 
+PRODUCT_SELECTORS = [
+    "[data-component-type='s-search-result']",
+    ".s-result-item",
+    ".s-card-container"
+]
+
+RESULT_PRICE_SELECTORS = [
+    ".a-price-whole",
+    ".a-price .a-offscreen",
+    ".a-color-price"
+]
+
+def amazon_price(texts):
+    """Seçicinin ilk elemanının metninden fiyat ("1.299,00" → 1299.0); yoksa None"""
+    price_match = re.search(r'[\d.,]+', texts[0].replace('.', '').replace(',', '.'))
+    if not price_match:
+        return None
+    try:
+        return float(price_match.group(0))
+    except ValueError:
+        return None
+
 def search_products_on_amazon(driver, search_term, max_products=5):
     """Amazon'da ürün arama ve sonuçları çek"""
     try:
         # Ana sayfaya git
         driver.get("https://www.amazon.com.tr")
-        time.sleep(1)
         
         # Arama kutusunu bul ve arama yap
         search_box = WebDriverWait(driver, 10).until(
@@ -130,7 +158,7 @@ def search_products_on_amazon(driver, search_term, max_products=5):
         search_box.send_keys(search_term)
         search_box.send_keys(Keys.RETURN)
         
-        time.sleep(1)
+        wait_ready(driver, 'amazon', 'search', timeout=3)
         print(f"🔍 '{search_term}' aranıyor...", file=sys.stderr)
         
         # Ürün sonuçlarını bul
@@ -138,22 +166,9 @@ def search_products_on_amazon(driver, search_term, max_products=5):
         product_names = []
         product_prices = []
         
-        # Farklı ürün selector'ları dene
-        product_selectors = [
-            "[data-component-type='s-search-result']",
-            ".s-result-item",
-            ".s-card-container"
-        ]
-        
-        products_found = []
-        for selector in product_selectors:
-            try:
-                products = driver.find_elements(By.CSS_SELECTOR, selector)
-                if products:
-                    products_found = products
-                    break
-            except:
-                continue
+        # Farklı ürün selector'ları dene (sıra öğrenilir, kalanlar tek çağrıda okunur)
+        products_found = match_first(driver, 'amazon', 'search_results', PRODUCT_SELECTORS,
+                                     lambda products: products, read='element') or []
         
         if not products_found:
             print("❌ Ürün bulunamadı", file=sys.stderr)
@@ -178,24 +193,9 @@ def search_products_on_amazon(driver, search_term, max_products=5):
                 except:
                     product_name = f"Amazon Ürün {i+1}"
                 
-                # Fiyatı bul
-                price = None
-                price_selectors = [
-                    ".a-price-whole",
-                    ".a-price .a-offscreen",
-                    ".a-color-price"
-                ]
-                
-                for price_selector in price_selectors:
-                    try:
-                        price_element = product.find_element(By.CSS_SELECTOR, price_selector)
-                        price_text = price_element.text.strip()
-                        price_match = re.search(r'[\d.,]+', price_text.replace('.', '').replace(',', '.'))
-                        if price_match:
-                            price = float(price_match.group(0))
-                            break
-                    except:
-                        continue
+                # Fiyatı bul (kart içinde)
+                price = match_first(driver, 'amazon', 'search_price', RESULT_PRICE_SELECTORS,
+                                    amazon_price, root=product, limit=1)
                 
                 if product_link and product_name:
                     product_links.append(product_link)
@@ -221,7 +221,7 @@ def extract_amazon_product_rating(driver, product_url):
     try:
         # Ana ürün sayfasına git
         driver.get(product_url)
-        time.sleep(2)
+        wait_ready(driver, 'amazon', 'product', timeout=2)
         
         # Rating çıkarma denemeleri (öncelik sırasına göre)
         rating_selectors = [
@@ -300,8 +300,13 @@ def extract_amazon_product_rating(driver, product_url):
     
     return rating
 
-def scrape_product_reviews(driver, product_url, product_name, price, max_pages=3):
-    """Tek üründen yorumları çek"""
+def scrape_product_reviews(driver, product_url, product_name, price, max_pages=3, search_term=None, product_rating=0,
+                           watermark=None, writer=None):
+    """Tek üründen yorumları çek; her sayfa bitince page_scraped olayı gönderir
+
+    watermark verilirse bilinen yorumlara ulaşılan sayfadan sonra durulur; writer verilirse
+    her sayfanın kayıtları sayfa bitince ona (arama koleksiyonunun BulkWriter'ı) eklenir.
+    """
     try:
         # ASIN kodunu çıkar
         asin_match = re.search(r'/dp/([A-Z0-9]{10})', product_url)
@@ -315,9 +320,9 @@ def scrape_product_reviews(driver, product_url, product_name, price, max_pages=3
         # Yorum sayfasına git
         review_url = f"https://www.amazon.com.tr/product-reviews/{asin}/?ie=UTF8&reviewerType=all_reviews&pageNumber=1"
         driver.get(review_url)
-        time.sleep(1)
         
         reviews = []
+        gorulen_yorumlar = set()
         page = 1
         
         while page <= max_pages:
@@ -334,39 +339,49 @@ def scrape_product_reviews(driver, product_url, product_name, price, max_pages=3
                     try:
                         review_text = review_element.text.strip()
                         if review_text and len(review_text) > 10:
-                            # Tekrar kontrolü için sadece text kısmını kontrol et
-                            existing_texts = [r['comment'] if isinstance(r, dict) else r for r in reviews]
-                            if review_text not in existing_texts:
-                                # MongoDB için format oluştur
-                                review_data = {
-                                    'platform': 'amazon',
-                                    'comment': review_text,
-                                    'comment_date': None,  # Amazon'da yorum tarihi zor çekilir
-                                    'rating': 0,  # Amazon'da individual rating zor çekilir
-                                    'likes_count': 0,
-                                    'timestamp': datetime.now(),
-                                    'product_url': product_url,
-                                    'product_name': product_name,
-                                    'page_number': page,
-                                    'review_index': len(reviews) + 1,
-                                    'price': price,
-                                    'search_term': None  # Ana fonksiyonda eklenecek
-                                }
-                                
+                            # MongoDB için format oluştur
+                            review_data = {
+                                'platform': 'amazon',
+                                'comment': review_text,
+                                'comment_date': None,  # Amazon'da yorum tarihi zor çekilir
+                                'rating': product_rating,  # Amazon'da individual rating zor çekilir, ürün rating'i kullanılır
+                                'likes_count': 0,
+                                'timestamp': datetime.now(),
+                                'product_url': product_url,
+                                'product_name': product_name,
+                                'page_number': page,
+                                'review_index': len(reviews) + 1,
+                                'price': price,
+                                'search_term': search_term,
+                                'id': f"amazon_{len(reviews)}_{int(time.time())}"
+                            }
+                            
+                            # Tekrar kontrolü parmak iziyle (platform + ASIN + normalize metin)
+                            parmak_izi = fingerprint_review(review_data)
+                            if parmak_izi not in gorulen_yorumlar:
+                                gorulen_yorumlar.add(parmak_izi)
                                 reviews.append(review_data)
                                 page_reviews += 1
                     except:
                         continue
                 
                 print(f"    📄 Sayfa {page}: {page_reviews} yorum", file=sys.stderr)
+                sayfa_kayitlari = reviews[len(reviews) - page_reviews:]
+                bilinene_ulasildi = watermark is not None and watermark.observe_records(sayfa_kayitlari)
+                if writer is not None:
+                    writer.extend(sayfa_kayitlari)
+                emit_page_scraped('amazon', product_url, page, sayfa_kayitlari)
                 
                 # Sonraki sayfa var mı kontrol et
+                if bilinene_ulasildi:
+                    break
                 if page < max_pages:
                     try:
                         next_button = driver.find_element(By.CSS_SELECTOR, "li.a-last:not(.a-disabled) a")
                         if next_button:
                             driver.execute_script("arguments[0].click();", next_button)
-                            time.sleep(1)
+                            # Eski sayfanın yorumları DOM'dan kalkana kadar bekle (yeni sayfa yüklendi)
+                            wait_until(driver, EC.staleness_of(review_elements[0]), 1, 'amazon.next_page')
                             page += 1
                         else:
                             break
@@ -386,6 +401,68 @@ def scrape_product_reviews(driver, product_url, product_name, price, max_pages=3
         print(f"  ❌ Yorum çekme hatası: {e}", file=sys.stderr)
         return []
 
+def restore_login_cookies(driver, cookies):
+    """Arama oturumundaki giriş çerezlerini yeni oturuma aktar"""
+    if not cookies:
+        return
+    driver.get("https://www.amazon.com.tr")
+    for cookie in cookies:
+        try:
+            # Çerez listesi thread'ler arasında ortak; kopyası üzerinden ekle
+            driver.add_cookie({key: value for key, value in cookie.items() if key != 'sameSite'})
+        except Exception:
+            continue
+
+def scrape_amazon_search_product(i, product, total_products, max_pages, search_term, login_cookies, watermarks=None,
+                                 writer=None):
+    """Arama sonucundaki tek ürünü kendi havuz oturumunda çek"""
+    product_url, product_name, price = product
+    # Bilinen yorumlara ulaşınca kalan sayfalar atlanır; watermark yorumlar yazıldıktan sonra kaydedilir
+    watermark = ProductWatermark('amazon', product_url, product_name)
+    if watermarks is not None:
+        watermarks.append(watermark)
+    driver = acquire_driver()
+    try:
+        print(f"\n📱 Ürün {i}/{total_products}: {product_name[:50]}...", file=sys.stderr)
+        restore_login_cookies(driver, login_cookies)
+        
+        # Koleksiyon adını oluştur
+        collection_name = create_safe_collection_name(product_name, "amazon")
+        
+        # Ürün rating'ini çek (ASIN bazında önbellekte tazeyse ürün sayfası açılmaz)
+        product_rating = cached_metadata(driver, 'amazon', product_url,
+                                         lambda d: {'rating': extract_amazon_product_rating(d, product_url)},
+                                         fields=('rating',))['rating']
+        
+        # Yorumları çek
+        reviews = scrape_product_reviews(driver, product_url, product_name, price, max_pages,
+                                         search_term=search_term, product_rating=product_rating,
+                                         watermark=watermark, writer=writer)
+    finally:
+        release_driver(driver)
+    
+    # Sonuçları topla (URL'yi güvenli hale getir)
+    safe_product_url = product_url.split('?')[0] if '?' in product_url else product_url
+    # Ürün adını da güvenli hale getir
+    safe_product_name = product_name.replace('"', '').replace('\n', ' ').replace('\r', '').strip()
+    if len(safe_product_name) > 100:
+        safe_product_name = safe_product_name[:100] + "..."
+    
+    print(f"  ✅ {len(reviews)} yorum çekildi", file=sys.stderr)
+    emit_product_done('amazon', safe_product_url, safe_product_name, len(reviews),
+                      price=price, product_rating=product_rating)
+    
+    return {
+        "success": True,
+        "total_reviews": len(reviews),
+        "collection_name": collection_name,
+        "product_name": safe_product_name,
+        "platform": "amazon",
+        "price": price,
+        "product_url": safe_product_url
+    }
+
+@timed_job('amazon')
 def amazon_search_scrape(search_term, max_products=5, max_pages_per_product=3):
     """Amazon arama yapıp çoklu ürün yorumları çek"""
     
@@ -393,34 +470,25 @@ def amazon_search_scrape(search_term, max_products=5, max_pages_per_product=3):
     print(f"🔍 Arama terimi: {search_term}", file=sys.stderr)
     print(f"📦 Maksimum ürün: {max_products}", file=sys.stderr)
     print(f"📄 Ürün başına maksimum sayfa: {max_pages_per_product}", file=sys.stderr)
+    emit_job_started('amazon', search_term=search_term, max_products=max_products,
+                     pages_per_product=max_pages_per_product)
     
-    # Chrome ayarları
-    options = Options()
-    options.add_argument("--window-size=1920,1080")
-    options.add_argument("--disable-gpu")
-    options.add_argument("--disable-blink-features=AutomationControlled")
-    options.add_experimental_option("excludeSwitches", ["enable-automation"])
-    options.add_experimental_option("useAutomationExtension", False)
-
+    # Havuzdan sıcak bir Chrome oturumu al
     try:
-        # Önce manuel path dene, sonra otomatik
-        try:
-            driver_path = "/opt/homebrew/bin/chromedriver"
-            driver = webdriver.Chrome(service=Service(driver_path), options=options)
-            driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
-            print(f"✅ ChromeDriver başlatıldı: {driver_path}", file=sys.stderr)
-        except Exception as e:
-            print(f"❌ Manuel path başarısız, otomatik indirme deneniyor: {e}", file=sys.stderr)
-            service = Service(ChromeDriverManager().install())
-            driver = webdriver.Chrome(service=service, options=options)
-            driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
-            print("✅ ChromeDriver otomatik başlatıldı", file=sys.stderr)
+        driver = acquire_driver()
     except Exception as e:
         print(f"❌ ChromeDriver hatası: {e}", file=sys.stderr)
         return {"success": False, "error": f"ChromeDriver hatası: {e}"}
 
     results = []
     total_reviews = 0
+    watermarks = []  # ürün watermark'ları; yorumlar yazıldıktan sonra kaydedilir
+
+    # Yorumlar sayfa sayfa arama koleksiyonuna yazılır; iş sonunda bellekte tutulmaz
+    client = MongoClient('mongodb://localhost:27017/')
+    safe_search_term = re.sub(r'[^a-zA-Z0-9]', '_', search_term.lower())
+    collection_name = f"amazon_reviews_{safe_search_term}"
+    coll = client['ecommerce_analytics'][collection_name]
     
     try:
         # Amazon'a giriş yap
@@ -428,100 +496,51 @@ def amazon_search_scrape(search_term, max_products=5, max_pages_per_product=3):
         if not login_success:
             print("⚠️ Giriş başarısız, giriş yapmadan devam ediliyor", file=sys.stderr)
         
-        # Ürün arama
-        products = search_products_on_amazon(driver, search_term, max_products)
+        # Ürün arama (aynı arama yakın zamanda yapıldıysa önbellekten)
+        products = cached_search('amazon', search_term, max_products,
+                                 lambda: search_products_on_amazon(driver, search_term, max_products))
         
         if not products:
             return {"success": False, "error": "Ürün bulunamadı"}
         
-        # Her ürün için yorumları çek
-        for i, (product_url, product_name, price) in enumerate(products):
-            print(f"\n📱 Ürün {i+1}/{len(products)}: {product_name[:50]}...", file=sys.stderr)
-            
-            # Koleksiyon adını oluştur
-            collection_name = create_safe_collection_name(product_name, "amazon")
-            
-            # Ürün rating'ini çek
-            product_rating = extract_amazon_product_rating(driver, product_url)
-            
-            # Yorumları çek
-            reviews = scrape_product_reviews(driver, product_url, product_name, price, max_pages_per_product)
-            
-            # Search term ve rating'i her yoruma ekle
-            for review in reviews:
-                if isinstance(review, dict):
-                    review['search_term'] = search_term
-                    review['rating'] = product_rating  # Ürün rating'ini yorumlara ekle
-            
-            # Sonuçları topla (URL'yi güvenli hale getir)
-            safe_product_url = product_url.split('?')[0] if '?' in product_url else product_url
-            # Ürün adını da güvenli hale getir
-            safe_product_name = product_name.replace('"', '').replace('\n', ' ').replace('\r', '').strip()
-            if len(safe_product_name) > 100:
-                safe_product_name = safe_product_name[:100] + "..."
-                
-            product_result = {
-                "success": True,
-                "total_reviews": len(reviews),
-                "collection_name": collection_name,
-                "product_name": safe_product_name,
-                "platform": "amazon",
-                "price": price,
-                "product_url": safe_product_url,
-                "reviews": reviews  # Yorumları da ekle
-            }
-            
-            results.append(product_result)
-            total_reviews += len(reviews)
-            
-            print(f"  ✅ {len(reviews)} yorum çekildi", file=sys.stderr)
+        for i, (product_url, product_name, price) in enumerate(products, 1):
+            emit_product_discovered('amazon', product_url, product_name, i)
+        
+        # Giriş çerezlerini al ve arama oturumunu havuza bırak (havuz bırakılan oturumun çerezlerini siler);
+        # ürünler paralel olarak kendi oturumlarında, aynı çerezlerle çekilir
+        login_cookies = driver.get_cookies() if login_success else []
+        release_driver(driver)
+        driver = None
+
+        # Parmak izi üzerinden upsert: tekrar çekimde yalnızca yeni yorumlar eklenir
+        with BulkWriter([coll]) as writer:
+            def urun_cek(i, product):
+                return scrape_amazon_search_product(i, product, len(products), max_pages_per_product,
+                                                    search_term, login_cookies, watermarks, writer)
+
+            for product_result in scrape_products_parallel(products, urun_cek, url_of=lambda product: product[0]):
+                if product_result["success"]:
+                    results.append(product_result)
+                    total_reviews += product_result["total_reviews"]
 
     except Exception as e:
         print(f"❌ Genel hata: {e}", file=sys.stderr)
         return {"success": False, "error": str(e)}
     
     finally:
-        try:
-            driver.quit()
-            print("🔒 Driver kapatıldı", file=sys.stderr)
-        except:
-            pass
+        release_driver(driver)
+        print("🔒 Driver havuza bırakıldı", file=sys.stderr)
+        client.close()
 
     print(f"\n✅ Amazon arama scraping tamamlandı!", file=sys.stderr)
     print(f"📊 Toplam ürün: {len(results)}", file=sys.stderr)
     print(f"💬 Toplam yorum: {total_reviews}", file=sys.stderr)
     
-    # Tüm yorumları tek listede topla ve MongoDB'ye kaydet
-    all_reviews = []
-    for result in results:
-        if "reviews" in result:
-            all_reviews.extend(result["reviews"])
+    print(f"    ✅ {writer.written} yeni yorum MongoDB'ye ({collection_name}) kaydedildi ({writer.existing} zaten vardı)", file=sys.stderr)
     
-    # MongoDB'ye kaydet
-    try:
-        print(f"💾 MongoDB'ye kaydediliyor...", file=sys.stderr)
-        client = MongoClient('mongodb://localhost:27017/')
-        db = client['ecommerce_analytics']
-        
-        # Güvenli koleksiyon adı oluştur
-        safe_search_term = re.sub(r'[^a-zA-Z0-9]', '_', search_term.lower())
-        collection_name = f"amazon_reviews_{safe_search_term}"
-        coll = db[collection_name]
-        
-        if all_reviews:
-            # Basit ID üret
-            for idx, review in enumerate(all_reviews):
-                if 'id' not in review:
-                    review['id'] = f"amazon_{idx}_{int(time.time())}"
-                    
-            coll.insert_many(all_reviews, ordered=False)
-            print(f"    ✅ {len(all_reviews)} yorum MongoDB'ye kaydedildi", file=sys.stderr)
-        else:
-            print(f"    ⚠️ Kaydedilecek yorum yok", file=sys.stderr)
-            
-        client.close()
-    except Exception as e:
-        print(f"    ❌ MongoDB kaydetme hatası: {e}", file=sys.stderr)
+    # Yorumlar yazıldı; sonraki çekim bu noktadan sonrasını çeker
+    if not writer.errors:
+        save_watermarks(watermarks)
     
     return {
         "success": True,
@@ -529,11 +548,11 @@ def amazon_search_scrape(search_term, max_products=5, max_pages_per_product=3):
         "products_processed": len(results),
         "platform": "amazon",
         "search_term": search_term,
-        "results": results,
-        "all_reviews": all_reviews
+        "results": results
     }
 
 if __name__ == "__main__":
+    sys.argv[1:] = profile_from_argv(sys.argv[1:])
     if len(sys.argv) > 1:
         search_term = sys.argv[1]
         max_products = int(sys.argv[2]) if len(sys.argv) > 2 else 5
@@ -558,5 +577,4 @@ if __name__ == "__main__":
         else:
             return obj
     
-    cleaned_result = clean_json_strings(result)
-    print(json.dumps(cleaned_result, ensure_ascii=False, indent=2, default=str)) 
\ No newline at end of file
+    emit_summary(clean_json_strings(result)) 
\ No newline at end of file
@@ -0,0 +1,481 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Ağ bağlantısı gerektirmeyen scraper benchmark'ı.
+
+Her platform için yerel bir HTTP sunucusu (sahte mağaza) arama, ürün ve yorum
+sayfalarını platformun gerçek işaretlemesini taklit eden şablonlarla sunar:
+scraper'ların okuduğu seçiciler (Trendyol .p-card-wrppr / .comment, Hepsiburada
+data-test-id='review-card', n11 li.comment), JSON-LD ürün bilgisi ve sayfalama
+(Trendyol scroll ile parça parça, Hepsiburada ?sayfa=, n11 ?pg=) aynıdır.
+Scraper'lar site_urls üzerinden bu sunuculara yönlendirilir ve gerçek scraper
+fonksiyonları değiştirilmeden çalıştırılır; yani Chrome, sürücü havuzu, HTTP
+hızlı yolu ve MongoDB yazımı ölçüme dahildir.
+
+Ölçülenler: süre, yorum/sn, sunulan sayfa/sn, Python sürecinin ve Chrome
+süreçlerinin en yüksek RSS'i, Chrome süreçlerinin CPU süresi (/proc örneklenerek)
+ve scrape_timing'in aşama dökümü. Sonuç JSON olarak yazılır; --compare ile
+önceki bir çalıştırmanın JSON'ına göre değişim yüzdeleri gösterilir.
+
+Tekrarlanabilirlik için arama/ürün önbellekleri, öğrenilen seçici sırası ve artımlı çekim kapatılır
+(ortamda verilmişse ona dokunulmaz). Yorumlar yerel MongoDB'ye "bench" arama
+terimli koleksiyonlara yazılır; çalışan bir mongod, Chrome ve chromedriver
+gerekir. AliExpress (modal yorum penceresi) ve Amazon (giriş akışı) henüz
+sahte mağazada yoktur.
+
+Ayarlar (ortam değişkenleri, CLI seçenekleriyle ezilebilir):
+    SCRAPER_BENCH_LATENCY_MS  Sahte mağazanın her yanıttan önce beklediği süre, ms (varsayılan 50)
+
+Kullanım:
+    python3 benchmark_scrape.py                          # trendyol, hepsiburada, n11
+    python3 benchmark_scrape.py n11 --products 3 --pages 4 --per-page 20 --latency 120
+    python3 benchmark_scrape.py --output once.json
+    python3 benchmark_scrape.py --output sonra.json --compare once.json
+"""
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from concurrent.futures import ProcessPoolExecutor
+from urllib.parse import urlsplit, parse_qs
+from html import escape
+import multiprocessing
+import importlib
+import argparse
+import threading
+import json
+import time
+import sys
+import os
+
+from scrape_events import event_sink
+
+DEFAULT_LATENCY_MS = float(os.getenv("SCRAPER_BENCH_LATENCY_MS", "50"))
+BENCH_SEARCH_TERM = "bench urun"
+SAMPLE_SECONDS = 0.25
+
+# Ölçümün canlı ortam farklarından etkilenmemesi için kapatılan özellikler
+BENCH_ENV = {
+    "SCRAPER_SEARCH_CACHE": "0",
+    "SCRAPER_METADATA_CACHE": "0",
+    "SCRAPER_INCREMENTAL": "0",
+    "SCRAPER_SELECTOR_STATS": "0",
+}
+
+MONTHS = ("Ocak", "Şubat", "Mart", "Nisan", "Mayıs", "Haziran",
+          "Temmuz", "Ağustos", "Eylül", "Ekim", "Kasım", "Aralık")
+
+REVIEW_PHRASES = (
+    "ürün beklediğim gibi geldi, paketleme özenliydi",
+    "kargo hızlıydı ama kutu biraz ezilmişti",
+    "fiyat performans açısından gayet başarılı",
+    "iki haftadır kullanıyorum, şu ana kadar sorun yok",
+    "renk fotoğraftakinden biraz daha koyu",
+)
+
+# -------------------- Sahte katalog --------------------
+
+def product_name(index):
+    return f"Bench Ürün {index} Kablosuz Kulaklık"
+
+def product_slug(index):
+    return f"bench-urun-{index}-kablosuz-kulaklik"
+
+def review(product_index, review_index):
+    """Ürün ve sıra numarasından belirlenen (her çalıştırmada aynı) yorum"""
+    seed = product_index * 7919 + review_index * 104729
+    return {
+        "text": f"Benchmark yorumu {product_index}-{review_index}: {REVIEW_PHRASES[seed % len(REVIEW_PHRASES)]}.",
+        "date": f"{seed % 28 + 1} {MONTHS[seed % 12]} {2023 + seed % 3}",
+        "iso_date": f"{2023 + seed % 3}-{seed % 12 + 1:02d}-{seed % 28 + 1:02d}",
+        "rating": seed % 5 + 1,
+        "likes": seed % 9,
+        "author": f"{'ABCDEFGH'[seed % 8]}*** {'KLMNOPRS'[seed % 8]}***",
+    }
+
+def page_reviews(product_index, page, per_page, pages):
+    if not 1 <= page <= pages:
+        return []
+    start = (page - 1) * per_page
+    return [review(product_index, start + offset) for offset in range(per_page)]
+
+def json_ld(index):
+    data = {
+        "@context": "https://schema.org",
+        "@type": "Product",
+        "name": product_name(index),
+        "offers": {"@type": "Offer", "price": f"{999 + index * 100}.90", "priceCurrency": "TRY",
+                   "seller": {"@type": "Organization", "name": f"Bench Mağaza {index}"}},
+        "aggregateRating": {"@type": "AggregateRating", "ratingValue": f"4.{index % 10}", "ratingCount": 100 + index},
+    }
+    return f'<script type="application/ld+json">{json.dumps(data, ensure_ascii=False)}</script>'
+
+def html_page(title, body, head=""):
+    return (f'<!DOCTYPE html><html lang="tr"><head><meta charset="utf-8"><title>{escape(title)}</title>'
+            f'<meta property="og:title" content="{escape(title)}">{head}</head><body>{body}</body></html>')
+
+def product_body(index, price_html):
+    return (f'<h1>{escape(product_name(index))}</h1>{price_html}'
+            f'<div class="seller">Bench Mağaza {index}</div>')
+
+# -------------------- Platform şablonları --------------------
+
+class TrendyolStore:
+    """/sr?q= arama, /bench/<slug>-p-<id> ürün, .../yorumlar scroll ile yüklenen yorumlar"""
+
+    def __init__(self, options):
+        self.options = options
+
+    def card(self, item):
+        stars = "".join('<div class="full" style="width:100%"></div>' for _ in range(item["rating"]))
+        return (f'<div class="comment" style="min-height:180px"><div class="comment-rating">{stars}</div>'
+                f'<div class="comment-text"><p>{escape(item["text"])}</p></div>'
+                f'<div class="comment-info"><span class="comment-info-item">{escape(item["author"])}</span>'
+                f'<span class="comment-info-item">{escape(item["date"])}</span></div></div>')
+
+    def render(self, path, query):
+        options = self.options
+        if path == '/sr':
+            links = "".join(
+                f'<div class="p-card-wrppr"><a href="/bench/{product_slug(i)}-p-{1000 + i}">'
+                f'<span class="prdct-desc-cntnr-name">{escape(product_name(i))}</span></a></div>'
+                for i in range(1, options.products + 1))
+            return html_page("Arama", links)
+        parts = path.strip('/').split('/')
+        if len(parts) < 2 or '-p-' not in parts[1]:
+            return None
+        index = int(parts[1].rsplit('-p-', 1)[1]) - 1000
+        if len(parts) == 2:
+            price = f'<div class="product-price-container"><span class="prc-dsc">{999 + index * 100},90 TL</span></div>'
+            return html_page(product_name(index), product_body(index, price), json_ld(index))
+        if parts[2] != 'yorumlar':
+            return None
+        # Her scroll bir sonraki "sayfayı" (?batch=N) parça HTML olarak ister
+        batch = int(query.get('batch', ['1'])[0])
+        cards = "".join(self.card(item) for item in page_reviews(index, batch, options.per_page, options.pages))
+        if 'batch' in query:
+            return cards
+        script = f"""<script>
+let batch = 1, loading = false;
+window.addEventListener('scroll', () => {{
+    if (loading || batch >= {options.pages}) return;
+    if (window.innerHeight + window.scrollY < document.body.scrollHeight - 50) return;
+    loading = true;
+    fetch(location.pathname + '?batch=' + (batch + 1)).then(r => r.text()).then(html => {{
+        document.getElementById('comments').insertAdjacentHTML('beforeend', html);
+        batch += 1;
+        loading = false;
+    }});
+}});
+</script>"""
+        return html_page(product_name(index), f'<div id="comments">{cards}</div>{script}')
+
+class HepsiburadaStore:
+    """/ara?q= arama, /<slug>-p-<id> ürün, /<slug>-p-<id>-yorumlari?sayfa=N yorumlar"""
+
+    def __init__(self, options):
+        self.options = options
+
+    def card(self, item):
+        return (f'<div data-test-id="review-card">'
+                f'<span itemprop="author">{escape(item["author"])}</span>'
+                f'<span class="hermes-ReviewCard-module-date" content="{item["iso_date"]}">{escape(item["date"])}</span>'
+                f'<span itemprop="ratingValue" content="{item["rating"]}"></span>'
+                f'<p>{escape(item["text"])}</p>'
+                f'<button class="helpful">Evet ({item["likes"]})</button></div>')
+
+    def render(self, path, query):
+        options = self.options
+        if path == '/ara':
+            links = "".join(
+                f'<li class="productListContent-item"><a href="/{product_slug(i)}-p-HBCV{i:08d}" '
+                f'title="{escape(product_name(i))}">{escape(product_name(i))}</a></li>'
+                for i in range(1, options.products + 1))
+            return html_page("Arama", f'<ul>{links}</ul>')
+        if '-p-HBCV' not in path:
+            return None
+        reviews = path.endswith('-yorumlari')
+        index = int(path.rsplit('-p-HBCV', 1)[1].replace('-yorumlari', ''))
+        if not reviews:
+            price = f'<div data-test-id="price-current-price">{999 + index * 100},90 TL</div>'
+            return html_page(product_name(index), product_body(index, price), json_ld(index))
+        page = int(query.get('sayfa', ['1'])[0])
+        cards = "".join(self.card(item) for item in page_reviews(index, page, options.per_page, options.pages))
+        return html_page(product_name(index), cards)
+
+class N11Store:
+    """/arama?q= arama, /urun/<slug>-<id> ürün; aynı sayfa ?pg=N ile yorumları listeler"""
+
+    def __init__(self, options):
+        self.options = options
+
+    def card(self, item):
+        return (f'<li class="comment"><div class="rating r{item["rating"] * 20}"></div>'
+                f'<span class="userName">{escape(item["author"])}</span>'
+                f'<span class="commentDate">{escape(item["date"])}</span>'
+                f'<p>{escape(item["text"])}</p></li>')
+
+    def render(self, path, query):
+        options = self.options
+        if path == '/arama':
+            links = "".join(
+                f'<div class="column"><a href="/urun/{product_slug(i)}-{100 + i}">{escape(product_name(i))}</a></div>'
+                for i in range(1, options.products + 1))
+            return html_page("Arama", f'<div class="productList">{links}</div>')
+        if not path.startswith('/urun/'):
+            return None
+        index = int(path.rsplit('-', 1)[1]) - 100
+        page = int(query.get('pg', ['1'])[0])
+        cards = "".join(self.card(item) for item in page_reviews(index, page, options.per_page, options.pages))
+        price = f'<div class="priceContainer"><ins class="newPrice">{999 + index * 100},90 TL</ins></div>'
+        return html_page(product_name(index), product_body(index, price) + f'<ul class="comments">{cards}</ul>',
+                         json_ld(index))
+
+STORES = {
+    'trendyol': TrendyolStore,
+    'hepsiburada': HepsiburadaStore,
+    'n11': N11Store,
+}
+
+# platform → (modül, fonksiyon, arama terimi ve ürün sayısından sonraki argümanlar)
+SCRAPERS = {
+    'trendyol': ('trendyol_search_scraper', 'scrape_trendyol_by_product_name', lambda options: []),
+    'hepsiburada': ('hepsiburada_search_scraper', 'scrape_hepsiburada_by_product_name',
+                    lambda options: [options.pages, 3600]),
+    'n11': ('n11_search_scraper', 'scrape_n11_by_product_name', lambda options: [options.pages]),
+}
+
+# -------------------- Sahte mağaza sunucusu --------------------
+
+class FakeStorefront:
+    """Bir platformun şablonlarını yerel portta sunan, istekleri sayan HTTP sunucusu"""
+
+    def __init__(self, platform, options):
+        self.platform = platform
+        self.store = STORES[platform](options)
+        self.latency = options.latency / 1000
+        self.pages = 0
+        self._lock = threading.Lock()
+        storefront = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):
+                pass
+
+            def do_GET(self):
+                storefront.handle(self)
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def handle(self, handler):
+        if self.latency:
+            time.sleep(self.latency)
+        parts = urlsplit(handler.path)
+        try:
+            page = self.store.render(parts.path, parse_qs(parts.query))
+        except ValueError:
+            page = None
+        if page is None:
+            status, body = 404, b"<html><body>Not found</body></html>"
+        else:
+            status, body = 200, page.encode('utf-8')
+            with self._lock:
+                self.pages += 1
+        handler.send_response(status)
+        handler.send_header("Content-Type", "text/html; charset=utf-8")
+        handler.send_header("Content-Length", str(len(body)))
+        handler.end_headers()
+        handler.wfile.write(body)
+
+    def reset_counter(self):
+        with self._lock:
+            self.pages = 0
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.server.shutdown()
+        self.server.server_close()
+        return False
+
+# -------------------- Kaynak örnekleme --------------------
+
+CLOCK_TICKS = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
+PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+def read_process_table():
+    """/proc'tan {pid: (ppid, cpu saniyesi, rss bayt)}; /proc yoksa boş"""
+    table = {}
+    try:
+        pids = [name for name in os.listdir('/proc') if name.isdigit()]
+    except OSError:
+        return table
+    for pid in pids:
+        try:
+            with open(f'/proc/{pid}/stat', 'r') as f:
+                stat = f.read()
+        except OSError:
+            continue
+        # comm alanı boşluk içerebilir; ayrıştırma son ')' karakterinden sonra başlar
+        fields = stat[stat.rfind(')') + 2:].split()
+        table[int(pid)] = (int(fields[1]), (int(fields[11]) + int(fields[12])) / CLOCK_TICKS,
+                           int(fields[21]) * PAGE_SIZE)
+    return table
+
+def descendants(table, root):
+    children = {}
+    for pid, (ppid, _, _) in table.items():
+        children.setdefault(ppid, []).append(pid)
+    found, stack = [], list(children.get(root, []))
+    while stack:
+        pid = stack.pop()
+        found.append(pid)
+        stack.extend(children.get(pid, []))
+    return found
+
+class ResourceSampler:
+    """Çalışma boyunca kendi sürecini ve alt süreçlerini (chromedriver, Chrome) örnekler"""
+
+    def __init__(self, interval=SAMPLE_SECONDS):
+        self.interval = interval
+        self.root = os.getpid()
+        self.peak_self_rss = 0
+        self.peak_children_rss = 0
+        self._start_cpu = {}
+        self._last_cpu = {}
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _sample(self, first=False):
+        table = read_process_table()
+        if self.root in table:
+            self.peak_self_rss = max(self.peak_self_rss, table[self.root][2])
+        pids = descendants(table, self.root)
+        self.peak_children_rss = max(self.peak_children_rss, sum(table[pid][2] for pid in pids))
+        for pid in pids:
+            if first:
+                self._start_cpu[pid] = table[pid][1]
+            self._last_cpu[pid] = table[pid][1]
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self._sample()
+
+    @property
+    def children_cpu(self):
+        return sum(cpu - self._start_cpu.get(pid, 0.0) for pid, cpu in self._last_cpu.items())
+
+    def __enter__(self):
+        self._sample(first=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._stop.set()
+        self._thread.join()
+        self._sample()
+        return False
+
+# -------------------- Çalıştırma --------------------
+
+def run_platform(platform, options):
+    module_name, func_name, extra_args = SCRAPERS[platform]
+    with FakeStorefront(platform, options) as storefront:
+        os.environ[f"SCRAPER_SITE_URL_{platform.upper()}"] = storefront.url
+        func = getattr(importlib.import_module(module_name), func_name)
+        print(f"🏁 {platform} benchmark: {options.products} ürün × {options.pages} sayfa × "
+              f"{options.per_page} yorum, {options.latency:g} ms gecikme ({storefront.url})", file=sys.stderr)
+
+        storefront.reset_counter()
+        started = time.perf_counter()
+        # Scraper olayları benchmark çıktısına karışmasın
+        with ResourceSampler() as sampler, event_sink(lambda payload: None):
+            try:
+                result = func(BENCH_SEARCH_TERM, options.products, *extra_args(options)) or {}
+            finally:
+                elapsed = time.perf_counter() - started
+                # Alt süreçte atexit çalışmaz; Chrome oturumları burada kapatılır (CPU ölçümüne dahil)
+                importlib.import_module("driver_pool").close_all_pools()
+
+    reviews = result.get("total_reviews") or 0
+    return {
+        "platform": platform,
+        "success": bool(result.get("success")),
+        "elapsed_seconds": round(elapsed, 2),
+        "reviews": reviews,
+        "expected_reviews": options.products * options.pages * options.per_page,
+        "reviews_per_second": round(reviews / elapsed, 2) if elapsed else 0.0,
+        "pages": storefront.pages,
+        "pages_per_second": round(storefront.pages / elapsed, 2) if elapsed else 0.0,
+        "python_peak_rss_mb": round(sampler.peak_self_rss / 1024 / 1024, 1),
+        "chrome_peak_rss_mb": round(sampler.peak_children_rss / 1024 / 1024, 1),
+        "chrome_cpu_seconds": round(sampler.children_cpu, 2),
+        "phases": {phase: stat["seconds"] for phase, stat in (result.get("timing") or {}).get("phases", {}).items()},
+    }
+
+def print_report(runs, baseline=None):
+    previous = {run["platform"]: run for run in (baseline or {}).get("runs", [])}
+    print("\n📊 Benchmark sonuçları:", file=sys.stderr)
+    for run in runs:
+        print(f"  {run['platform']}: {run['elapsed_seconds']} sn | {run['reviews']}/{run['expected_reviews']} yorum "
+              f"({run['reviews_per_second']}/sn) | {run['pages']} sayfa ({run['pages_per_second']}/sn) | "
+              f"Python RSS {run['python_peak_rss_mb']} MB | Chrome RSS {run['chrome_peak_rss_mb']} MB, "
+              f"CPU {run['chrome_cpu_seconds']} sn", file=sys.stderr)
+        before = previous.get(run["platform"])
+        if before:
+            changes = []
+            for key in ("elapsed_seconds", "reviews_per_second", "pages_per_second", "chrome_cpu_seconds"):
+                if before.get(key):
+                    changes.append(f"{key} {(run[key] - before[key]) / before[key] * 100:+.1f}%")
+            print(f"      önceki çalıştırmaya göre: {', '.join(changes)}", file=sys.stderr)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Sahte mağazaya karşı çevrimdışı scraper benchmark'ı")
+    parser.add_argument("platforms", nargs="*", help=f"platformlar (varsayılan: {', '.join(STORES)})")
+    parser.add_argument("--products", type=int, default=3, help="arama sonucundaki ürün sayısı")
+    parser.add_argument("--pages", type=int, default=3, help="ürün başına yorum sayfası (Trendyol'da scroll parçası)")
+    parser.add_argument("--per-page", type=int, default=10, help="sayfa başına yorum")
+    parser.add_argument("--latency", type=float, default=DEFAULT_LATENCY_MS, help="yanıt başına gecikme, ms")
+    parser.add_argument("--output", help="sonuç JSON dosyası (verilmezse stdout)")
+    parser.add_argument("--compare", help="karşılaştırılacak önceki sonuç JSON dosyası")
+    options = parser.parse_args(argv)
+    unknown = [platform for platform in options.platforms if platform not in STORES]
+    if unknown:
+        parser.error(f"sahte mağazası olmayan platform: {', '.join(unknown)}")
+
+    for key, value in BENCH_ENV.items():
+        os.environ.setdefault(key, value)
+
+    # Her platform ayrı süreçte çalışır: Chrome oturumları ve bellek bir öncekinden devralınmaz
+    runs = []
+    for platform in options.platforms or list(STORES):
+        with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn")) as executor:
+            runs.append(executor.submit(run_platform, platform, options).result())
+    report = {
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "options": {"products": options.products, "pages": options.pages,
+                    "per_page": options.per_page, "latency_ms": options.latency},
+        "runs": runs,
+    }
+
+    baseline = None
+    if options.compare:
+        with open(options.compare, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+    print_report(runs, baseline)
+
+    output = json.dumps(report, ensure_ascii=False, indent=2)
+    if options.output:
+        with open(options.output, 'w', encoding='utf-8') as f:
+            f.write(output + "\n")
+        print(f"💾 Sonuçlar {options.output} dosyasına yazıldı", file=sys.stderr)
+    else:
+        print(output)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,433 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Paylaşılan Chrome sürücü havuzu.
+
+Scraper'lar ChromeDriver'ı kendileri başlatmak yerine oturumları buradan ödünç
+alır. Havuz N oturumu sıcak tutar, işler arasında sekmeleri ve (CDP ile, gezilen
+tüm alan adları için) çerezleri ve storage'ı temizler ve belirli sayıda sayfadan
+sonra oturumu yeniden başlatır.
+
+Yalın tarayıcı modunda (SCRAPER_LEAN_BROWSER=1) her profil headless ve eager
+yükleme ile açılır, gereksiz Chrome özellikleri kapatılır ve resim, font, medya
+dosyaları ile bilinen takip/reklam alan adları CDP Network.setBlockedURLs ile
+engellenir. Mod isteğe bağlıdır: AliExpress ve Amazon akışları görünür pencere ve
+tam sayfa yüklemesiyle doğrulanmıştır, headless açılışta bot korumasına daha sık
+takılır. Her sayfadan ayrılırken o sayfada aktarılan bayt, istek sayısı ve DOM hazır olma
+süresi loglanır; tasarruf buradan izlenebilir.
+
+Ayarlar (ortam değişkenleri):
+    SCRAPER_POOL_SIZE       Profil başına en fazla oturum sayısı (varsayılan 1)
+    SCRAPER_POOL_MAX_PAGES  Bir oturumun yeniden başlatılmadan önce açacağı sayfa sayısı (varsayılan 200)
+    SCRAPER_LEAN_BROWSER    1 ise oturumlar headless, eager yükleme ve kaynak engellemeyle açılır (varsayılan 0)
+    SCRAPER_PAGE_STATS      0 ise sayfa başına aktarım istatistikleri loglanmaz (varsayılan 1)
+"""
+
+from selenium import webdriver
+from selenium.webdriver.chrome.service import Service
+from selenium.webdriver.chrome.options import Options
+from webdriver_manager.chrome import ChromeDriverManager
+from contextlib import contextmanager
+import threading
+import random
+import atexit
+import time
+import sys
+import os
+
+from scrape_timing import span
+
+POOL_SIZE = int(os.getenv("SCRAPER_POOL_SIZE", "1"))
+MAX_PAGES_PER_SESSION = int(os.getenv("SCRAPER_POOL_MAX_PAGES", "200"))
+LEAN_BROWSER = os.getenv("SCRAPER_LEAN_BROWSER", "0") == "1"
+PAGE_STATS = os.getenv("SCRAPER_PAGE_STATS", "1") != "0"
+
+HOMEBREW_CHROMEDRIVER = "/opt/homebrew/bin/chromedriver"
+SYSTEM_CHROMEDRIVER = "/usr/local/bin/chromedriver"
+SYSTEM_CHROME_BINARY = "/Applications/Google Chrome.app/Contents/MacOS/Google Chrome"
+
+# ChromeDriver'ın varsayılan sayfa yükleme ve script zaman aşımları; safe_get, scroll ve
+# bekleme yardımcıları değiştirebilir, oturum havuza dönerken bu değerlere alınır
+DEFAULT_PAGE_LOAD_TIMEOUT = 300
+DEFAULT_SCRIPT_TIMEOUT = 30
+
+USER_AGENTS = [
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/123.0.0.0 Safari/537.36",
+    "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/122.0.0.0 Safari/537.36",
+]
+
+# -------------------- Chrome profilleri --------------------
+
+def build_default_options():
+    """Scraper'ların ortak kullandığı görünür Chrome ayarları"""
+    options = Options()
+    options.add_argument("--disable-gpu")
+    options.add_argument("--window-size=1920,1080")
+    options.add_argument("--no-sandbox")
+    options.add_argument("--disable-dev-shm-usage")
+    options.add_argument("--disable-blink-features=AutomationControlled")
+    # AliExpress, n11 ve Hepsiburada ürün sayfalarının karışık içerikli/çapraz kaynaklı yorum
+    # kaynakları için; havuzdan önceki scraper ayarlarından korunur
+    options.add_argument("--disable-web-security")
+    options.add_argument("--allow-running-insecure-content")
+    options.add_argument("--disable-extensions")
+    options.add_argument("--disable-plugins")
+    options.add_experimental_option("excludeSwitches", ["enable-automation"])
+    options.add_experimental_option('useAutomationExtension', False)
+    return options
+
+def build_fast_options():
+    """Headless, resimsiz ve eager yükleme (Hepsiburada arama ayarları)"""
+    options = build_default_options()
+    options.add_argument("--headless=new")
+    options.add_argument("--blink-settings=imagesEnabled=false")
+    options.add_argument(f"--user-agent={random.choice(USER_AGENTS)}")
+    options.page_load_strategy = "eager"
+    return options
+
+def build_capture_options():
+    """Varsayılan ayarlar + CDP ağ olayları için performance log (network_capture)"""
+    options = build_default_options()
+    options.set_capability("goog:loggingPrefs", {"performance": "ALL"})
+    return options
+
+PROFILES = {
+    "default": build_default_options,
+    "fast": build_fast_options,
+    "capture": build_capture_options,
+}
+
+# -------------------- Yalın tarayıcı modu --------------------
+
+# Network.setBlockedURLs desenleri ('*' joker): resim, font, medya ve takip/reklam alan adları
+BLOCKED_URL_PATTERNS = [
+    "*.jpg*", "*.jpeg*", "*.png*", "*.gif*", "*.webp*", "*.avif*", "*.svg*", "*.ico",
+    "*.woff*", "*.ttf*", "*.otf*", "*.eot*",
+    "*.mp4*", "*.webm*", "*.m3u8*", "*.mp3*",
+    "*google-analytics.com*", "*googletagmanager.com*", "*googlesyndication.com*",
+    "*doubleclick.net*", "*adservice.google.*", "*connect.facebook.net*",
+    "*hotjar.com*", "*clarity.ms*", "*criteo.com*", "*criteo.net*",
+    "*useinsider.com*", "*mc.yandex.ru*", "*analytics.tiktok.com*", "*segment.io*",
+]
+
+LEAN_DISABLED_FEATURES = "Translate,MediaRouter,OptimizationHints,AutofillServerCommunication,InterestFeedContentSuggestions"
+
+def apply_lean_options(options):
+    """Profil ayarlarına headless, eager yükleme ve kapatılmış arka plan özellikleri ekle"""
+    arguments = set(options.arguments)
+    for argument in ("--headless=new", "--blink-settings=imagesEnabled=false", "--mute-audio",
+                     "--no-first-run", "--disable-sync", "--disable-default-apps",
+                     "--disable-notifications", "--disable-background-networking",
+                     "--disable-component-update", f"--disable-features={LEAN_DISABLED_FEATURES}"):
+        if argument not in arguments:
+            options.add_argument(argument)
+    # Headless Chrome'un varsayılan user agent'ı "HeadlessChrome" içerir
+    if not any(argument.startswith("--user-agent=") for argument in arguments):
+        options.add_argument(f"--user-agent={random.choice(USER_AGENTS)}")
+    options.page_load_strategy = "eager"
+    return options
+
+def enable_resource_blocking(driver):
+    """Resim/font/medya ve takipçi isteklerini CDP ile engelle"""
+    try:
+        driver.execute_cdp_cmd("Network.enable", {})
+        driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": BLOCKED_URL_PATTERNS})
+    except Exception as e:
+        print(f"⚠️ Kaynak engelleme açılamadı: {e}", file=sys.stderr)
+
+# Sayfada şu ana kadar aktarılan bayt (Resource Timing; Timing-Allow-Origin vermeyen
+# çapraz kaynaklar 0 sayılır, bu yüzden değer alt sınırdır)
+_PAGE_STATS_JS = """
+const nav = performance.getEntriesByType('navigation')[0];
+const resources = performance.getEntriesByType('resource');
+let bytes = nav ? nav.transferSize : 0;
+for (const r of resources) bytes += r.transferSize || 0;
+return {url: location.href, bytes: bytes, requests: resources.length + (nav ? 1 : 0),
+        dom_ms: nav ? Math.round(nav.domContentLoadedEventEnd) : null};
+"""
+
+def page_transfer_stats(driver):
+    """Açık sayfanın aktarım istatistikleri: {url, bytes, requests, dom_ms}; boş sayfada None"""
+    try:
+        stats = driver.execute_script(_PAGE_STATS_JS)
+    except Exception:
+        return None
+    if not stats or not str(stats.get("url", "")).startswith("http"):
+        return None
+    return stats
+
+def log_page_stats(driver):
+    """Sayfadan ayrılmadan önce o sayfanın aktarım istatistiklerini logla ve oturum toplamına ekle"""
+    stats = page_transfer_stats(driver)
+    if stats is None:
+        return
+    driver.pool_bytes = getattr(driver, "pool_bytes", 0) + stats["bytes"]
+    print(f"📶 {stats['url'][:80]}: {stats['bytes'] / 1024:.0f} KB, {stats['requests']} istek, "
+          f"DOM {stats['dom_ms']} ms", file=sys.stderr)
+
+# -------------------- Sürücü başlatma --------------------
+
+_driver_path = None
+_driver_path_lock = threading.Lock()
+
+def _resolve_driver_path():
+    """ChromeDriver yolunu bir kez çöz (ChromeDriverManager her çağrıda sürüm kontrolü yapar)"""
+    global _driver_path
+    with _driver_path_lock:
+        if _driver_path is None:
+            if os.path.exists(HOMEBREW_CHROMEDRIVER):
+                _driver_path = HOMEBREW_CHROMEDRIVER
+            else:
+                _driver_path = ChromeDriverManager().install()
+        return _driver_path
+
+def start_chrome_driver(options=None):
+    """Tek bir Chrome oturumu başlat (önce çözülmüş path, sonra sistem Chrome'u)"""
+    if options is None:
+        options = build_default_options()
+
+    try:
+        driver = webdriver.Chrome(service=Service(_resolve_driver_path()), options=options)
+    except Exception as e:
+        print(f"❌ ChromeDriver hatası: {e}", file=sys.stderr)
+        print("🔄 Sistem Chrome'u deneniyor...", file=sys.stderr)
+        try:
+            options.binary_location = SYSTEM_CHROME_BINARY
+            driver = webdriver.Chrome(service=Service(SYSTEM_CHROMEDRIVER), options=options)
+        except Exception as e2:
+            raise Exception(f"ChromeDriver hatası: {e} | Sistem Chrome hatası: {e2}")
+
+    driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
+    return driver
+
+# -------------------- Havuz --------------------
+
+class DriverPool:
+    """Aynı profildeki Chrome oturumlarını sıcak tutan thread-safe havuz"""
+
+    def __init__(self, profile="default", size=POOL_SIZE, max_pages=MAX_PAGES_PER_SESSION):
+        if profile not in PROFILES:
+            raise ValueError(f"Bilinmeyen Chrome profili: {profile}")
+        self.profile = profile
+        self.size = max(1, size)
+        self.max_pages = max_pages
+        self._idle = []
+        self._created = 0
+        self._keep_warm = False
+        self._closed = False
+        self._cond = threading.Condition()
+
+    def _launch(self):
+        options = PROFILES[self.profile]()
+        if LEAN_BROWSER:
+            apply_lean_options(options)
+        driver = start_chrome_driver(options)
+        if LEAN_BROWSER:
+            enable_resource_blocking(driver)
+
+        # Sayfa sayacı: her driver.get bir sayfa sayılır, limit dolunca oturum yenilenir
+        driver.pool_page_count = 0
+        driver.pool_bytes = 0
+        raw_get = driver.get
+
+        def counting_get(url):
+            driver.pool_page_count += 1
+            if PAGE_STATS:
+                log_page_stats(driver)
+            with span("page_load"):
+                return raw_get(url)
+
+        driver.get = counting_get
+        driver.pool_raw_get = raw_get
+        mode = "yalın" if LEAN_BROWSER else "tam"
+        print(f"✅ ChromeDriver başlatıldı (havuz: {self.profile}, {mode})", file=sys.stderr)
+        return driver
+
+    def ensure_size(self, size):
+        """Havuz sınırını en az size oturuma çıkar (paralel ürün scraping'i için)"""
+        with self._cond:
+            if size > self.size:
+                self.size = size
+                self._cond.notify_all()
+
+    def _reserve_slot(self):
+        """Yeni oturum için yer ayır; havuz doluysa False döner (kilit altında çağrılır)"""
+        if self._created < self.size:
+            self._created += 1
+            return True
+        return False
+
+    def _launch_into_slot(self):
+        try:
+            return self._launch()
+        except Exception:
+            with self._cond:
+                self._created -= 1
+                self._cond.notify()
+            raise
+
+    def warm(self, count=None):
+        """count kadar oturumu önceden başlat ve sonraki geri dönüşümlerde sıcak tut"""
+        target = min(self.size, count or self.size)
+        self._keep_warm = True
+        while True:
+            with self._cond:
+                if self._closed or self._created >= target or not self._reserve_slot():
+                    return
+            driver = self._launch_into_slot()
+            with self._cond:
+                self._idle.append(driver)
+                self._cond.notify()
+
+    def acquire(self, timeout=None):
+        """Boşta bir oturum al; yoksa yenisini başlat ya da biri serbest kalana kadar bekle"""
+        deadline = None if timeout is None else time.time() + timeout
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise RuntimeError("Sürücü havuzu kapatıldı")
+                if self._idle:
+                    return self._idle.pop()
+                if self._reserve_slot():
+                    break
+                remaining = None if deadline is None else deadline - time.time()
+                if remaining is not None and remaining <= 0:
+                    raise TimeoutError("Boşta Chrome oturumu bulunamadı")
+                self._cond.wait(remaining)
+        return self._launch_into_slot()
+
+    def _reset(self, driver):
+        """Sonraki iş için oturumu temizle: fazla sekmeler, çerezler, storage"""
+        handles = driver.window_handles
+        for handle in handles[1:]:
+            driver.switch_to.window(handle)
+            driver.close()
+        driver.switch_to.window(handles[0])
+        if PAGE_STATS:
+            log_page_stats(driver)
+        # delete_all_cookies ve storage.clear() yalnızca açık sayfanın alan adını temizler;
+        # CDP ile oturumun gezdiği tüm alan adlarının çerezleri ve storage'ı silinir
+        try:
+            driver.execute_cdp_cmd("Network.clearBrowserCookies", {})
+            driver.execute_cdp_cmd("Storage.clearDataForOrigin", {"origin": "*", "storageTypes": "all"})
+        except Exception as e:
+            print(f"    ⚠️ Tarayıcı verisi CDP ile temizlenemedi, yalnızca açık sayfa temizleniyor: {e}", file=sys.stderr)
+            try:
+                driver.execute_script("window.localStorage.clear(); window.sessionStorage.clear();")
+            except Exception:
+                pass
+            driver.delete_all_cookies()
+        driver.set_page_load_timeout(DEFAULT_PAGE_LOAD_TIMEOUT)
+        driver.set_script_timeout(DEFAULT_SCRIPT_TIMEOUT)
+        driver.pool_raw_get("about:blank")
+
+    def _discard(self, driver):
+        try:
+            driver.quit()
+        except Exception:
+            pass
+        with self._cond:
+            self._created -= 1
+            self._cond.notify()
+            relaunch = self._keep_warm and not self._closed
+        if relaunch:
+            threading.Thread(target=self._safe_warm, daemon=True).start()
+
+    def _safe_warm(self):
+        try:
+            self.warm()
+        except Exception as e:
+            print(f"⚠️ Havuz ısıtma hatası: {e}", file=sys.stderr)
+
+    def release(self, driver, discard=False):
+        """Oturumu havuza geri ver; bozuksa veya sayfa limiti dolduysa kapat"""
+        if driver is None:
+            return
+        if not discard and getattr(driver, "pool_page_count", 0) >= self.max_pages:
+            print(f"♻️ Oturum {driver.pool_page_count} sayfadan sonra yenileniyor "
+                  f"({getattr(driver, 'pool_bytes', 0) / 1024 / 1024:.1f} MB aktarıldı)", file=sys.stderr)
+            discard = True
+        if not discard:
+            try:
+                self._reset(driver)
+            except Exception as e:
+                print(f"⚠️ Oturum sıfırlanamadı, kapatılıyor: {e}", file=sys.stderr)
+                discard = True
+        if discard or self._closed:
+            self._discard(driver)
+            return
+        with self._cond:
+            self._idle.append(driver)
+            self._cond.notify()
+
+    @contextmanager
+    def session(self, timeout=None):
+        """with pool.session() as driver: ... kalıbı için"""
+        driver = self.acquire(timeout)
+        try:
+            yield driver
+        finally:
+            self.release(driver)
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._cond.notify_all()
+        for driver in idle:
+            try:
+                driver.quit()
+            except Exception:
+                pass
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+def get_driver_pool(profile="default"):
+    """Profil başına süreç genelinde tek havuz döndür"""
+    with _pools_lock:
+        pool = _pools.get(profile)
+        if pool is None:
+            pool = DriverPool(profile)
+            _pools[profile] = pool
+        return pool
+
+def acquire_driver(profile="default", timeout=None):
+    with span("driver_start"):
+        return get_driver_pool(profile).acquire(timeout)
+
+def release_driver(driver, profile="default", discard=False):
+    get_driver_pool(profile).release(driver, discard=discard)
+
+class LazyDriver:
+    """Havuzdan oturumu ilk kullanımda alan sürücü vekili
+
+    Sayfaları HTTP ile çekilen ürünlerde Chrome hiç gerekmeyebilir; oturum yalnızca
+    bir özelliğine (get, execute_script, ...) ilk erişildiğinde alınır. release()
+    alınmış oturumu havuza geri verir, alınmadıysa bir şey yapmaz.
+    """
+
+    def __init__(self, profile="default", timeout=None):
+        self._profile = profile
+        self._timeout = timeout
+        self._driver = None
+
+    @property
+    def acquired(self):
+        return self._driver is not None
+
+    def __getattr__(self, name):
+        if self._driver is None:
+            self._driver = acquire_driver(self._profile, self._timeout)
+        return getattr(self._driver, name)
+
+    def release(self, discard=False):
+        driver, self._driver = self._driver, None
+        release_driver(driver, self._profile, discard=discard)
+
+@atexit.register
+def close_all_pools():
+    with _pools_lock:
+        pools = list(_pools.values())
+    for pool in pools:
+        pool.close()
@@ -1,18 +1,20 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from webdriver_manager.chrome import ChromeDriverManager
-import time
 from pymongo import MongoClient
+from mongo_writer import BulkWriter
+from driver_pool import acquire_driver, release_driver
+from review_extractors import extract_review_cards
+from http_fetcher import fetch_review_pages
+from page_waits import wait_network_idle
+from scrape_timing import timed_job
+from scrape_profiler import profile_from_argv
+from scrape_events import emit_job_started, emit_page_scraped, emit_product_done, emit_summary
 from datetime import datetime
 import sys
-import json
 import re
 
 def extract_product_name_from_url(url):
@@ -70,49 +72,18 @@ def create_safe_collection_name(product_name, platform):
     
     return collection_name
 
+@timed_job('hepsiburada')
 def scrape_hepsiburada_reviews(product_url, max_pages=10):
     # MongoDB bağlantısı
     client = MongoClient('mongodb://localhost:27017/')
     db = client['ecommerce_analytics']
     
-    # ChromeDriver ayarları (Apple Silicon M1/M2 optimizasyonu)
-    options = Options()
-    options.add_argument("--disable-gpu")
-    options.add_argument("--window-size=1920,1080")
-    options.add_argument("--no-sandbox")
-    options.add_argument("--disable-dev-shm-usage")
-    options.add_argument("--disable-blink-features=AutomationControlled")
-    options.add_argument("--disable-web-security")
-    options.add_argument("--allow-running-insecure-content")
-    options.add_argument("--disable-extensions")
-    options.add_argument("--disable-plugins")
-    options.add_experimental_option("excludeSwitches", ["enable-automation"])
-    options.add_experimental_option('useAutomationExtension', False)
-    
-    # WebDriver başlat (Apple Silicon için güvenli metod)
+    # Havuzdan sıcak bir Chrome oturumu al
     try:
-        service = Service(ChromeDriverManager().install())
-        driver = webdriver.Chrome(service=service, options=options)
-        driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
-        print("✅ ChromeDriver başlatıldı (Apple Silicon)", file=sys.stderr)
+        driver = acquire_driver()
     except Exception as e:
         print(f"❌ ChromeDriver hatası: {e}", file=sys.stderr)
-        try:
-            print("🔄 Sistem Chrome'u deneniyor...", file=sys.stderr)
-            options.binary_location = "/Applications/Google Chrome.app/Contents/MacOS/Google Chrome"
-            service = Service("/usr/local/bin/chromedriver")
-            driver = webdriver.Chrome(service=service, options=options)
-            print("✅ Sistem Chrome'u başarılı", file=sys.stderr)
-        except Exception as e2:
-            print(f"❌ Sistem Chrome hatası: {e2}", file=sys.stderr)
-            # Son çare olarak eski manuel path'i dene
-            try:
-                driver_path = "/Users/helinaydin/Desktop/chromedriver"
-                service = Service(driver_path)
-                driver = webdriver.Chrome(service=service, options=options)
-                print("✅ Manuel path başarılı", file=sys.stderr)
-            except Exception as e3:
-                return {"success": False, "error": f"ChromeDriver hatası: {e} | Sistem Chrome: {e2} | Manuel: {e3}"}
+        return {"success": False, "error": str(e)}
     
     yorumlar = []
     product_name = extract_product_name_from_url(product_url)
@@ -125,7 +96,12 @@ def scrape_hepsiburada_reviews(product_url, max_pages=10):
     hepsiburada_collection = db['hepsiburada_reviews']
     all_reviews_collection = db['all_reviews']
     
+    # Her yorum 3 koleksiyona gider; tek tek insert_one yerine toplu yazılır
+    writer = BulkWriter([product_collection, hepsiburada_collection, all_reviews_collection])
+    
     print(f"📦 Koleksiyon adı: {collection_name}", file=sys.stderr)
+    emit_job_started('Hepsiburada', product_url=product_url, product_name=product_name,
+                     collection_name=collection_name)
     
     try:
         # URL transformasyonu - Jupyter mantığı kullan
@@ -144,56 +120,42 @@ def scrape_hepsiburada_reviews(product_url, max_pages=10):
         print(f"📝 Ürün adı: {product_name}", file=sys.stderr)
         print(f"🔗 Base URL: {base_url}", file=sys.stderr)
             
+        # Sayfaları önce HTTP ile eşzamanlı çek; bot duvarına takılanlar tarayıcıyla çekilir
+        http_sayfalari = fetch_review_pages('hepsiburada', [f"{base_url}?sayfa={page}" for page in range(1, max_pages + 1)])
+            
         for page in range(1, max_pages + 1):
             print(f"📄 Sayfa {page} yükleniyor...", file=sys.stderr)
             # Jupyter ile aynı URL formatı
             url = f"{base_url}?sayfa={page}"
-            driver.get(url)
             
             try:
-                # Yorum container'ları yüklenene kadar bekle
-                WebDriverWait(driver, 10).until(
-                    EC.presence_of_element_located((By.CLASS_NAME, "hermes-ReviewCard-module-dY_oaYMIo0DJcUiSeaVW"))
-                )
-                
-                # Scroll ile yükleme tetikle (Jupyter ile aynı)
-                for _ in range(4):
-                    driver.execute_script("window.scrollBy(0, 500);")
-                    time.sleep(0.5)
-                
-                # Yorumları bul (Jupyter ile aynı)
-                yorum_elements = driver.find_elements(By.CLASS_NAME, "hermes-ReviewCard-module-dY_oaYMIo0DJcUiSeaVW")
+                yorum_kartlari = http_sayfalari.get(url)
+                if yorum_kartlari is None:
+                    driver.get(url)
+
+                    # Yorum container'ları yüklenene kadar bekle
+                    WebDriverWait(driver, 10).until(
+                        EC.presence_of_element_located((By.CLASS_NAME, "hermes-ReviewCard-module-dY_oaYMIo0DJcUiSeaVW"))
+                    )
+                    
+                    # Scroll ile yükleme tetikle (Jupyter ile aynı)
+                    for _ in range(4):
+                        driver.execute_script("window.scrollBy(0, 500);")
+                        wait_network_idle(driver, timeout=0.5, label="hepsiburada.scroll")
+                    
+                    # Yorumları tek execute_script ile oku
+                    yorum_kartlari = extract_review_cards(driver, 'hepsiburada', selector=".hermes-ReviewCard-module-dY_oaYMIo0DJcUiSeaVW")
                 
                 page_reviews = []
-                for element in yorum_elements:
+                page_docs = []
+                for kart in yorum_kartlari:
                     try:
-                        metin = element.text.strip()
+                        metin = kart['text']
                         if not metin or len(metin) <= 10:  # çok kısa boş blokları ayıkla
                             continue
                             
-                        # Yorum tarihini al (hermes-ReviewCard-module- ile başlayan span'dan)
-                        yorum_tarihi = None
-                        try:
-                            # hermes-ReviewCard-module- ile başlayan class'ları ara
-                            tarih_spans = element.find_elements(By.CSS_SELECTOR, "span[class*='hermes-ReviewCard-module-']")
-                            for span in tarih_spans:
-                                # content attribute'unu kontrol et (ISO format: 2024-09-11)
-                                content_attr = span.get_attribute('content')
-                                if content_attr and re.match(r'\d{4}-\d{2}-\d{2}', content_attr):
-                                    yorum_tarihi = span.text.strip()  # Türkçe format: "11 Eylül 2024, Çarşamba"
-                                    break
-                                
-                                # Eğer content yoksa, span text'ini kontrol et
-                                span_text = span.text.strip()
-                                if span_text and any(keyword in span_text.lower() for keyword in 
-                                    ['ocak', 'şubat', 'mart', 'nisan', 'mayıs', 'haziran', 
-                                     'temmuz', 'ağustos', 'eylül', 'ekim', 'kasım', 'aralık',
-                                     'gün önce', 'hafta önce', 'ay önce', 'yıl önce']):
-                                    yorum_tarihi = span_text
-                                    break
-                        except Exception as tarih_hatasi:
-                            print(f"⚠️ Tarih çekme hatası: {tarih_hatasi}", file=sys.stderr)
-                            yorum_tarihi = None
+                        # Yorum tarihi (hermes-ReviewCard-module- span'ı; content ISO, metin Türkçe)
+                        yorum_tarihi = kart['date']
                         
                         yorumlar.append(metin)
                         page_reviews.append(metin)
@@ -211,14 +173,9 @@ def scrape_hepsiburada_reviews(product_url, max_pages=10):
                             'collection_name': collection_name
                         }
                         
-                        # 1. Ürüne özel koleksiyon
-                        product_collection.insert_one(review_data.copy())
-                        
-                        # 2. Genel Hepsiburada koleksiyonu (eski sistem uyumluluğu)
-                        hepsiburada_collection.insert_one(review_data.copy())
-                        
-                        # 3. Tüm yorumlar koleksiyonu
-                        all_reviews_collection.insert_one(review_data.copy())
+                        # Ürüne özel, genel Hepsiburada (eski sistem uyumluluğu) ve tüm yorumlar koleksiyonları
+                        writer.add(review_data)
+                        page_docs.append(review_data)
                         
                         # Debug: Tarih bilgisini yazdır
                         if yorum_tarihi:
@@ -229,6 +186,7 @@ def scrape_hepsiburada_reviews(product_url, max_pages=10):
                         continue
                 
                 print(f"✅ Sayfa {page}'da {len(page_reviews)} yorum bulundu", file=sys.stderr)
+                emit_page_scraped('Hepsiburada', product_url, page, page_docs)
                 
                 if not page_reviews:
                     print(f"🛑 Sayfa {page}'da yorum bulunamadı, durduriliyor.", file=sys.stderr)
@@ -242,8 +200,10 @@ def scrape_hepsiburada_reviews(product_url, max_pages=10):
         print(f"❌ Genel hata: {e}", file=sys.stderr)
         return {"success": False, "error": str(e)}
     finally:
-        driver.quit()
+        writer.close()
+        release_driver(driver)
     
+    emit_product_done('Hepsiburada', product_url, product_name, len(yorumlar))
     return {
         "success": True,
         "product_name": product_name,
@@ -253,11 +213,13 @@ def scrape_hepsiburada_reviews(product_url, max_pages=10):
     }
 
 if __name__ == "__main__":
+    sys.argv[1:] = profile_from_argv(sys.argv[1:])
     if len(sys.argv) < 2:
-        print(json.dumps({"success": False, "error": "URL parametresi gerekli"}))
+        emit_summary({"success": False, "error": "URL parametresi gerekli"})
         sys.exit(1)
     
     url = sys.argv[1]
     max_pages = int(sys.argv[2]) if len(sys.argv) > 2 else 5
     
-    result = scrape_hepsiburada_reviews(url, max_pages)
\ No newline at end of file
+    result = scrape_hepsiburada_reviews(url, max_pages)
+    emit_summary(result)
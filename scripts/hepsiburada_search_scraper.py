@@ -3,25 +3,37 @@
 
 # --- EN ÜSTE EKLE ---
 import os, time
-START_TIME = time.time()
 
-def time_left(sec_budget):
-    return sec_budget - (time.time() - START_TIME)
+# Süre bütçesi her çağrının kendi başlangıcından ölçülür (kalıcı worker'da süreç başlangıcından değil)
+def time_left(sec_budget, started_at):
+    return sec_budget - (time.time() - started_at)
 
-def time_is_up(sec_budget, margin=3):
+def time_is_up(sec_budget, started_at, margin=3):
     # margin: güvenlik payı, bitişten birkaç sn önce çık
-    return time_left(sec_budget) <= margin
+    return time_left(sec_budget, started_at) <= margin
 
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from webdriver_manager.chrome import ChromeDriverManager
 from selenium.common.exceptions import TimeoutException
-import random, sys, json, re
+import random, sys, re
 from pymongo import MongoClient
+from mongo_writer import BulkWriter
+from review_fingerprint import fingerprint_review
+from scrape_state import ProductWatermark, save_watermarks
+from driver_pool import LazyDriver, acquire_driver, release_driver
+from review_extractors import extract_review_cards
+from http_fetcher import fetch_review_pages, is_challenge_html
+from page_waits import wait_ready, wait_document_ready, wait_network_idle
+from product_metadata import extract_product_metadata, first_price
+from selector_stats import match_first
+from rating_resolver import resolve_rating
+from search_cache import cached_search
+from parallel_scrape import scrape_products_parallel
+from scrape_timing import timed, timed_job
+from scrape_profiler import profile_from_argv
+from site_urls import site_url
+from scrape_events import emit_job_started, emit_product_discovered, emit_page_scraped, emit_product_done, emit_summary
 from datetime import datetime
 
 # -------------------- Yardımcılar --------------------
@@ -43,8 +55,7 @@ def create_safe_collection_name(product_name, platform):
     return collection_name
 
 def is_challenge_page(driver):
-    src = driver.page_source.lower()
-    return ("captcha" in src) or ("doğrulama" in src) or ("dogrulama" in src) or ("perimeterx" in src) or ("hcaptcha" in src)
+    return is_challenge_html(driver.page_source)
 
 def safe_get(driver, url, hard_timeout=5):  # 8 → 5 saniye
     driver.set_page_load_timeout(hard_timeout)
@@ -54,6 +65,7 @@ def safe_get(driver, url, hard_timeout=5):  # 8 → 5 saniye
         # Tam yükleme takıldıysa yüklemeyi kes ve devam et
         driver.execute_script("window.stop();")
 
+@timed("page_wait")
 def wait_reviews(driver, timeout=4):  # 6 → 4 saniye
     wait = WebDriverWait(driver, timeout)
     try:
@@ -85,121 +97,78 @@ def wait_reviews(driver, timeout=4):  # 6 → 4 saniye
 def lazy_scroll(driver, times=3, step=1000, pause=0.2):  # 4→3, 800→1000, 0.3→0.2
     for s in range(times):  # i yerine s: dıştaki i'yi gölgelemeyelim
         driver.execute_script(f"window.scrollBy(0,{step});")
-        time.sleep(pause)
-
-def extract_likes_from_review(element):
-    likes = 0
-    try:
-        like_elements = element.find_elements(By.XPATH, ".//button[contains(@class, 'helpful')] | .//span[contains(@class, 'helpful')]")
-        for like_elem in like_elements:
-            text = like_elem.text.strip()
-            numbers = re.findall(r'\d+', text)
-            if numbers:
-                likes = int(numbers[0]); break
-        if likes == 0:
-            rating_elements = element.find_elements(By.CLASS_NAME, "hermes-AverageRateBox-module-hA0lI9riLKFi7OKbEnBV")
-            for rating_elem in rating_elements:
-                text = rating_elem.text.strip()
-                numbers = re.findall(r'\d+', text)
-                if numbers:
-                    likes = int(numbers[0]); break
-        if likes == 0:
-            full_text = element.text
-            bildir_match = re.search(r'(\d+)\s*\n\s*\d+\s*\n\s*Bildir', full_text)
-            if bildir_match:
-                likes = int(bildir_match.group(1))
-    except Exception:
-        likes = 0
-    return likes
-
-def extract_price_from_product_page(driver, product_url):
-    price = None
+        wait_network_idle(driver, timeout=pause, idle_ms=100, label="hepsiburada.scroll")
+
+GENERIC_REVIEW_SELECTORS = [
+    "[data-test-id*='review']",
+    "[class*='ReviewCard']",
+    "[class*='review']",
+    "[class*='comment']",
+    ".review", ".comment", "[id*='review']"
+]
+
+@timed("review_page")
+def read_page_with_browser(driver, full_url, max_per_page=15):
+    """HTTP hızlı yolu başarısız olduğunda sayfayı Chrome ile açıp kartları oku"""
+    safe_get(driver, full_url, hard_timeout=5)  # 8 → 5
+    wait_document_ready(driver, timeout=0.5, label="hepsiburada.reviews")
+    if is_challenge_page(driver):
+        time.sleep(1 + random.random())  # Bot duvarı: yenilemeden önce nezaket beklemesi (koşul değil)
+        driver.refresh()
+        wait_document_ready(driver, timeout=0.6, label="hepsiburada.challenge")
+
+    yorum_elements = wait_reviews(driver, timeout=4)  # 6 → 4
+
+    if not yorum_elements:
+        # Generic fallback: en az 5 kart veren ilk seçici (sıra öğrenilir, kalanlar tek çağrıda denenir)
+        yorum_elements = match_first(driver, 'hepsiburada', 'review_cards', GENERIC_REVIEW_SELECTORS,
+                                     lambda elems: elems if len(elems) >= 5 else None,
+                                     read='element', limit=max(max_per_page, 5))
+
+    if yorum_elements:
+        lazy_scroll(driver, times=3, step=1000, pause=0.2)  # Daha agresif
+        driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
+        wait_network_idle(driver, timeout=0.3, idle_ms=100, label="hepsiburada.scroll")
+
+    # Kartları tek execute_script ile oku (metin, tarih, beğeni, yazar)
+    return extract_review_cards(driver, 'hepsiburada', cards=(yorum_elements or [])[:max_per_page])
+
+def load_product_page(driver, url):
+    safe_get(driver, url, hard_timeout=6)  # 12 → 6
+
+PRICE_SELECTORS = [
+    ".z7kokklsVwh0K5zFWjIO",
+    ".price-current", ".price", ".product-price",
+    ".notranslate", "[data-test-id='price-current-price']",
+    ".hermes-PriceBox-module", ".price-box"
+]
+
+def read_price_from_page(driver):
+    """Açık ürün sayfasından fiyat (yapısal veri yoksa)"""
+    return match_first(driver, 'hepsiburada', 'price', PRICE_SELECTORS, first_price)
+
+RATING_SELECTORS = [
+    ".JYHIcZ8Z_Gz7VXzxFB96",
+    ".JHvKSZxdcgryD4RxfgqS .JYHIcZ8Z_Gz7VXzxFB96",
+    ".hermes-AverageRateBox-module-hA0lI9riLKFi7OKbEnBV",
+    ".rating-score",".product-rating",".rate-point",".rating-value",
+    "[data-testid='rating-score']",".rating",".score",".star-rating",
+    ".review-score",".product-score",".rating-text",".rate-value",
+    ".puan","[class*='rating']","[class*='score']","[class*='puan']","[class*='rate']"
+]
+
+def read_rating_from_page(driver):
+    """Açık ürün sayfasından ortalama rating (yapısal veri yoksa)"""
+    rating_score = resolve_rating(driver, 'hepsiburada', RATING_SELECTORS, loose=True)
+    if rating_score:
+        return rating_score
     try:
-        main_product_url = product_url.replace('-yorumlari', '').split('?')[0]
-        driver.execute_script("window.open('');")
-        driver.switch_to.window(driver.window_handles[1])
-        safe_get(driver, main_product_url, hard_timeout=6)  # 12 → 6
-        time.sleep(0.4)  # 0.8 → 0.4
-
-        price_selectors = [
-            ".z7kokklsVwh0K5zFWjIO",
-            ".price-current", ".price", ".product-price",
-            ".notranslate", "[data-test-id='price-current-price']",
-            ".hermes-PriceBox-module", ".price-box"
-        ]
-        for sel in price_selectors:
-            try:
-                for elem in driver.find_elements(By.CSS_SELECTOR, sel):
-                    text = (elem.text or "").strip()
-                    m = re.search(r'([\d.,]+)\s*(?:TL|₺|)', text)
-                    if m:
-                        price_str = m.group(1).replace('.', '').replace(',', '.')
-                        price = float(price_str)
-                        break
-                if price is not None: break
-            except Exception:
-                continue
+        page_html = driver.page_source[:4000]
+        m = re.search(r'\b([1-5]\.[0-9])\b', page_html)
+        if m:
+            rating_score = float(m.group(1))
     except Exception:
         pass
-    finally:
-        try:
-            if len(driver.window_handles) > 1:
-                driver.close()
-            driver.switch_to.window(driver.window_handles[0])
-        except Exception:
-            pass
-    return price
-
-def extract_product_rating_from_page(driver, product_url):
-    rating_score = 0.0
-    try:
-        main_product_url = product_url.replace('-yorumlari', '').split('?')[0]
-        driver.execute_script("window.open('');")
-        driver.switch_to.window(driver.window_handles[1])
-        safe_get(driver, main_product_url, hard_timeout=6)  # 12 → 6
-        time.sleep(0.4)  # 0.8 → 0.4
-
-        rating_selectors = [
-            ".JYHIcZ8Z_Gz7VXzxFB96",
-            ".JHvKSZxdcgryD4RxfgqS .JYHIcZ8Z_Gz7VXzxFB96",
-            ".hermes-AverageRateBox-module-hA0lI9riLKFi7OKbEnBV",
-            ".rating-score",".product-rating",".rate-point",".rating-value",
-            "[data-testid='rating-score']",".rating",".score",".star-rating",
-            ".review-score",".product-score",".rating-text",".rate-value",
-            ".puan","[class*='rating']","[class*='score']","[class*='puan']","[class*='rate']"
-        ]
-        for sel in rating_selectors:
-            try:
-                elems = driver.find_elements(By.CSS_SELECTOR, sel)
-                for elem in elems:
-                    text = (elem.text or "").strip()
-                    m = re.search(r'^(\d+\.?\d*)$', text) or re.search(r'\b([1-5]\.[0-9])\b', text)
-                    if m:
-                        val = float(m.group(1))
-                        if 1.0 <= val <= 5.0:
-                            rating_score = val; break
-                    m2 = re.search(r'^(\d+),(\d+)$', text)
-                    if m2:
-                        val = float(f"{m2.group(1)}.{m2.group(2)}")
-                        if 1.0 <= val <= 5.0:
-                            rating_score = val; break
-                if rating_score > 0: break
-            except Exception:
-                continue
-        if rating_score == 0:
-            page_html = driver.page_source[:4000]
-            m = re.search(r'\b([1-5]\.[0-9])\b', page_html)
-            if m:
-                rating_score = float(m.group(1))
-    except Exception:
-        pass
-    finally:
-        try:
-            if len(driver.window_handles) > 1:
-                driver.close()
-            driver.switch_to.window(driver.window_handles[0])
-        except Exception:
-            pass
     return rating_score
 
 def extract_product_name_from_url(url):
@@ -251,32 +220,14 @@ def extract_real_product_name_from_page(driver, url):
         except:
             pass
 
-        # Ürün sayfasına git (son çare)
+        # Ürün sayfasına git (son çare): JSON-LD / og:title / H1 tek ziyarette okunur
         if '-yorumlari' in url:
-            product_url = url.replace('-yorumlari', '')
-            print(f"    🔄 Ürün sayfasına gidiliyor: {product_url}", file=sys.stderr)
-            safe_get(driver, product_url, hard_timeout=8)
-            time.sleep(1)
-            
-            # Ürün sayfasında H1 dene
-            try:
-                h1_element = driver.find_element(By.TAG_NAME, "h1")
-                product_name = h1_element.text.strip()
-                if product_name and len(product_name) > 15:
-                    print(f"    ✅ Ürün sayfası H1'den: {product_name}", file=sys.stderr)
-                    return product_name
-            except:
-                pass
-                
-            # Meta tag dene
-            try:
-                meta_element = driver.find_element(By.CSS_SELECTOR, 'meta[property="og:title"]')
-                product_name = meta_element.get_attribute('content').strip()
-                if product_name and len(product_name) > 15:
-                    print(f"    ✅ Meta tag'den ürün adı: {product_name}", file=sys.stderr)
-                    return product_name
-            except:
-                pass
+            print(f"    🔄 Ürün sayfasına gidiliyor: {url.replace('-yorumlari', '')}", file=sys.stderr)
+            product_name = extract_product_metadata(driver, 'hepsiburada', url, timeout=1,
+                                                    load=load_product_page)['name']
+            if product_name and len(product_name) > 15:
+                print(f"    ✅ Ürün sayfasından ürün adı: {product_name}", file=sys.stderr)
+                return product_name
             
     except Exception as e:
         print(f"    ⚠️ Gerçek ürün adı çekilemedi: {e}", file=sys.stderr)
@@ -286,9 +237,249 @@ def extract_real_product_name_from_page(driver, url):
     print(f"    🔄 Fallback URL'den: {fallback_name}", file=sys.stderr)
     return fallback_name
 
+# -------------------- Ürün --------------------
+
+def scrape_hepsiburada_search_product(product_idx, base_url, real_product_name, total_products, search_term,
+                                      search_collection_name, pages_per_product, max_seconds, started_at,
+                                      watermarks=None, writer=None):
+    """Arama sonucundaki tek ürünün yorumlarını kendi "fast" oturumunda çek (aramanın süre bütçesiyle)
+
+    Daha önce çekilmiş üründe bilinen yorumlara ulaşınca kalan sayfalar atlanır; watermark
+    watermarks listesine eklenir ve yorumlar yazıldıktan sonra kaydedilir. Ürün bitince
+    kayıtları (total_reviews doldurularak) writer'a eklenir; ürün özeti döner.
+    """
+    urun_kayitlari = []
+    product_price = None
+    if time_is_up(max_seconds, started_at):  # Süre kontrolü
+        return {"success": True, "total_reviews": 0, "product_name": real_product_name}
+    # Oturum yalnızca ürün sayfası (önbellekte yoksa) ya da HTTP'nin okuyamadığı bir sayfa için alınır
+    driver = LazyDriver("fast")
+    try:
+        print(f"\n📦 Ürün {product_idx+1}/{total_products}: {real_product_name}", file=sys.stderr)
+
+        # Fiyat, rating, satıcı (ve gerekirse ad) tek ürün sayfası ziyaretinde
+        urun_bilgisi = extract_product_metadata(driver, 'hepsiburada', base_url, timeout=0.4, load=load_product_page,
+                                                readers={'price': read_price_from_page, 'rating': read_rating_from_page})
+        product_price = urun_bilgisi['price']
+        product_rating = urun_bilgisi['rating'] or 0.0
+        if urun_bilgisi['name'] and real_product_name.startswith(("Hepsiburada Ürünü", "Ürün ")):
+            real_product_name = urun_bilgisi['name']
+        print(f"    💰 Fiyat: {product_price} | ⭐ Rating: {product_rating}", file=sys.stderr)
+
+        total_reviews_for_product = 0
+        gorulen_parmak_izleri = set()  # Ürünün tüm sayfaları için tekrar kontrolü
+
+        watermark = ProductWatermark('hepsiburada', base_url, real_product_name)
+        if watermarks is not None:
+            watermarks.append(watermark)
+
+        # Sayfalar: önce HTTP ile eşzamanlı, bot duvarına takılanlar tarayıcıyla.
+        # Artımlı çekimde sayfalar sırayla tek tek indirilir (çoğuna gerek kalmaz)
+        if watermark.incremental:
+            http_sayfalari = {}
+        else:
+            http_sayfalari = fetch_review_pages(
+                'hepsiburada', [f"{base_url}?sayfa={page}" for page in range(1, pages_per_product + 1)])
+
+        for page in range(1, pages_per_product + 1):
+            if time_is_up(max_seconds, started_at): break  # Süre kontrolü
+            full_url = f"{base_url}?sayfa={page}"
+            print(f"  📄 Sayfa {page} yükleniyor: {full_url}", file=sys.stderr)
+            try:
+                # Sayfa başına maksimum 15 yorum
+                max_per_page = 15
+                if watermark.incremental and full_url not in http_sayfalari:
+                    http_sayfalari.update(fetch_review_pages('hepsiburada', [full_url], first_page=page == 1))
+                yorum_kartlari = http_sayfalari.get(full_url)
+                if yorum_kartlari is None:
+                    yorum_kartlari = read_page_with_browser(driver, full_url, max_per_page)
+                yorum_kartlari = yorum_kartlari[:max_per_page]
+
+                sayfa_yorum_sayisi = 0
+                sayfa_kayitlari = []
+            
+                for j, kart in enumerate(yorum_kartlari):
+                    if time_is_up(max_seconds, started_at): break  # Süre kontrolü
+                    if sayfa_yorum_sayisi >= max_per_page: break  # Sayfa limiti
+                
+                    try:
+                        metin = (kart['text'] or "").strip()
+                        if not metin or len(metin) <= 10:
+                            continue
+                    
+                        likes = kart['likes'] or 0
+                        yorum_tarihi = kart['date']
+
+                        review_data = {
+                            'id': f"hepsiburada_{product_idx}_{page}_{j}",
+                            'collection_name': search_collection_name,
+                            'platform': 'hepsiburada',
+                            'product_name': real_product_name,
+                            'comment': metin,
+                            'comment_date': yorum_tarihi,
+                            'rating': product_rating,
+                            'timestamp': datetime.now().isoformat(),
+                            'product_url': base_url,
+                            'product_price': product_price,
+                            'total_reviews': None,
+                            'search_term': search_term,
+                            'page_number': page,
+                            'review_index': j,
+                            'likes': likes,
+                            'user_name': kart['author'],
+                            'rating_count': urun_bilgisi['rating_count'],
+                            'seller': urun_bilgisi['seller'],
+                            'verified_purchase': None,
+                            'created_at': datetime.now().isoformat(),
+                            'last_updated': datetime.now().isoformat()
+                        }
+
+                        # Tekrar kontrolü parmak iziyle (platform + ürün kodu + normalize metin + tarih)
+                        parmak_izi = fingerprint_review(review_data)
+                        if parmak_izi in gorulen_parmak_izleri:
+                            continue
+                        gorulen_parmak_izleri.add(parmak_izi)
+                        urun_kayitlari.append(review_data)
+                        sayfa_kayitlari.append(review_data)
+                        sayfa_yorum_sayisi += 1
+                        total_reviews_for_product += 1
+                    except Exception:
+                        continue
+
+                print(f"    ✅ Sayfa {page}: {sayfa_yorum_sayisi} yorum (max: {max_per_page})", file=sys.stderr)
+                bilinene_ulasildi = watermark.observe_records(sayfa_kayitlari)
+                emit_page_scraped('hepsiburada', base_url, page, sayfa_kayitlari)
+
+                if sayfa_yorum_sayisi == 0:
+                    print(f"    🛑 Sayfa {page}'da yorum yok → sonraki ürüne geç", file=sys.stderr)
+                    break
+                if bilinene_ulasildi:
+                    break
+
+                if page < pages_per_product:
+                    time.sleep(0.05 + random.random()*0.1)  # 0.1-0.3 → 0.05-0.15
+
+            except Exception as e:
+                print(f"    ❌ Sayfa {page} atlandı: {e}", file=sys.stderr)
+                if "timeout" in str(e).lower() or "timeoutexception" in str(e).lower():
+                    print(f"    ⏰ Timeout! Kalan sayfalar atlanıyor…", file=sys.stderr)
+                    break
+                time.sleep(0.5)  # 1.5 → 0.5
+                continue
+
+        print(f"  ✅ Ürün toplam yorum: {total_reviews_for_product}", file=sys.stderr)
+        emit_product_done('hepsiburada', base_url, real_product_name, total_reviews_for_product,
+                          product_price=product_price, product_rating=product_rating,
+                          rating_count=urun_bilgisi['rating_count'], seller=urun_bilgisi['seller'])
+    finally:
+        driver.release()
+
+    for review_data in urun_kayitlari:
+        review_data['total_reviews'] = len(urun_kayitlari)
+    if writer is not None:
+        writer.extend(urun_kayitlari)
+
+    return {
+        "success": True,
+        "total_reviews": len(urun_kayitlari),
+        "collection_name": search_collection_name,
+        "product_name": real_product_name,
+        "platform": "hepsiburada",
+        "price": product_price
+    }
+
+def find_hepsiburada_products(driver, product_name, max_products, max_seconds, started_at):
+    """Hepsiburada arama sayfasından PID bazında benzersiz (yorum URL'si, ürün adı) çiftlerini topla"""
+    # Arama
+    clean_search_term = product_name.strip().replace(' ', '+')
+    search_url = site_url('hepsiburada', f"/ara?q={clean_search_term}")
+    print(f"🔍 Hepsiburada'da arama: {search_url}", file=sys.stderr)
+    print(f"🔍 Temizlenmiş arama terimi: '{clean_search_term}'", file=sys.stderr)
+    safe_get(driver, search_url, hard_timeout=5)  # 8 → 5
+    wait_ready(driver, 'hepsiburada', 'search', timeout=0.6)
+
+    # 🎯 PID bazlı DEDUPE sistemi - "tek ürünün çoğalması" sorununu çözer
+    # Tüm ürün linklerini topla
+    links = driver.find_elements(By.XPATH, "//a[contains(@href, '-p-')]")
+    print(f"📦 {len(links)} potansiyel ürün linki bulundu", file=sys.stderr)
+    
+    seen, items = set(), []
+    for a in links:
+        if time_is_up(max_seconds, started_at): break  # Süre kontrolü
+        
+        href = (a.get_attribute("href") or "").split("?")[0]
+        if not href or 'adservice' in href or '/event/' in href:
+            continue
+            
+        # Ürün ID'sini çıkar (p-XXXXX formatı)
+        m = re.search(r"-p-([A-Z0-9]+)", href, re.I)
+        if not m:
+            continue
+            
+        pid = m.group(1).upper()
+        if pid in seen:  # 🔑 Aynı ürün ID'si zaten var, atla
+            continue
+        seen.add(pid)
+        
+        # URL'yi temizle ve yorum sayfası linkini oluştur
+        if not href.startswith('http'):
+            href = site_url('hepsiburada', href)
+        yorum_url = href if href.endswith("-yorumlari") else href + "-yorumlari"
+        
+        # Gelişmiş ürün adı çıkarma
+        name = ""
+        
+        # 1) title attribute'u dene
+        title = a.get_attribute("title")
+        if title and len(title.strip()) > 10 and not any(x in title.lower() for x in ["kampanya", "taksit", "fiyat", "puan"]):
+            name = title.strip()
+        
+        # 2) link text'i dene (temizlenmiş)
+        if not name:
+            text = (a.text or "").strip()
+            # Çok uzun veya karışık HTML içeriklerini filtrele
+            if text and len(text) < 200 and not any(x in text.lower() for x in ["kampanya", "taksit", "fiyat", "puan", "değerlendirme"]):
+                # Sadece ürün adı benzeri metinleri al
+                clean_text = text.split('\n')[0].strip()  # İlk satırı al
+                if len(clean_text) > 10:
+                    name = clean_text
+        
+        # 3) Parent element'ten ürün adı bul
+        if not name:
+            try:
+                parent = a.find_element(By.XPATH, './ancestor::*[contains(@class,"product") or contains(@data-test-id,"product")]')
+                name_els = parent.find_elements(By.CSS_SELECTOR, '[data-test-id*="product-name"], [class*="product-name"], [class*="productName"], h3, .title')
+                for el in name_els:
+                    candidate = (el.text or "").strip()
+                    if candidate and len(candidate) > 10 and len(candidate) < 150:
+                        name = candidate
+                        break
+            except Exception:
+                pass
+        
+        # 4) URL'den çıkar (fallback)
+        if not name:
+            name = extract_product_name_from_url(href)
+        
+        # 5) Son fallback
+        if not name or len(name) < 5:
+            name = f"Hepsiburada Ürünü {len(items)+1}"
+        
+        items.append((yorum_url, name))
+        print(f"✅ Benzersiz Ürün {len(items)}: {name} (PID: {pid})", file=sys.stderr)
+        print(f"    🔗 URL: {yorum_url}", file=sys.stderr)
+        
+        if len(items) == max_products:
+            break
+    
+    print(f"🎯 DEDUPE sonucu: {len(items)} benzersiz ürün (hedef: {max_products})", file=sys.stderr)
+    return items
+
 # -------------------- Ana İşlev --------------------
 
+@timed_job('hepsiburada')
 def scrape_hepsiburada_by_product_name(product_name, max_products=5, pages_per_product=3, max_seconds=180):
+    started_at = time.time()
     print(f"🚀 Hepsiburada arama scraping başlatılıyor...", file=sys.stderr)
     print(f"🔍 Arama terimi: {product_name}", file=sys.stderr)
     print(f"📦 Maksimum ürün: {max_products}", file=sys.stderr)
@@ -297,42 +488,25 @@ def scrape_hepsiburada_by_product_name(product_name, max_products=5, pages_per_p
 
     search_collection_name = create_safe_collection_name(product_name, "hepsiburada")
     print(f"🗄️ Arama koleksiyonu: {search_collection_name}", file=sys.stderr)
+    emit_job_started('hepsiburada', search_term=product_name, max_products=max_products,
+                     pages_per_product=pages_per_product, collection_name=search_collection_name)
+
+    results_by_product, bulunan_urunler = [], []
+    total_reviews = 0
+    watermarks = []  # ürün watermark'ları; yorumlar yazıldıktan sonra kaydedilir
 
-    all_results, bulunan_urunler = [], []
-
-    # --- Chrome Options - headless ve hızlı ---
-    options = Options()
-    options.add_argument("--headless=new")
-    options.add_argument("--disable-extensions")
-    options.add_argument("--blink-settings=imagesEnabled=false")
-    options.add_argument("--disable-gpu")
-    options.add_argument("--window-size=1920,1080")
-    options.add_argument("--no-sandbox")
-    options.add_argument("--disable-dev-shm-usage")
-    options.add_experimental_option("excludeSwitches", ["enable-automation"])
-    options.add_experimental_option('useAutomationExtension', False)
-    options.page_load_strategy = "eager"  # kritik
-
-    UAS = [
-      "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/123.0.0.0 Safari/537.36",
-      "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/122.0.0.0 Safari/537.36",
-    ]
-    options.add_argument(f"--user-agent={random.choice(UAS)}")
-
-    # WebDriver (güncellenmiş ChromeDriver path)
+    # Yorumlar ürün ürün arama koleksiyonuna yazılır; iş sonunda bellekte tutulmaz
+    client = MongoClient('mongodb://localhost:27017/')
+    safe_search_term = re.sub(r'[^a-zA-Z0-9]', '_', product_name.lower())
+    collection_name = f"hepsiburada_reviews_{safe_search_term}"
+    collection = client['ecommerce_analytics'][collection_name]
+
+    # --- Havuzdan headless ve hızlı ("fast" profil) Chrome oturumu ---
     try:
-        driver_path = "/opt/homebrew/bin/chromedriver"
-        driver = webdriver.Chrome(service=Service(driver_path), options=options)
-        driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
-        print(f"✅ ChromeDriver başlatıldı: {driver_path}", file=sys.stderr)
+        driver = acquire_driver("fast")
     except Exception as e:
-        print(f"❌ Manuel path başarısız, otomatik indirme deneniyor: {e}", file=sys.stderr)
-        try:
-            driver = webdriver.Chrome(service=Service(ChromeDriverManager().install()), options=options)
-            driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
-        except Exception as e2:
-            print(f"❌ Otomatik indirme de başarısız: {e2}", file=sys.stderr)
-            raise Exception("ChromeDriver başlatılamadı")
+        print(f"❌ ChromeDriver başlatılamadı: {e}", file=sys.stderr)
+        raise Exception("ChromeDriver başlatılamadı")
 
     try:
         # Arama terimi kontrol
@@ -340,329 +514,81 @@ def scrape_hepsiburada_by_product_name(product_name, max_products=5, pages_per_p
             print(f"❌ Geçersiz arama terimi: '{product_name}'", file=sys.stderr)
             return {"success": False, "error": f"Geçersiz arama terimi: '{product_name}'"}
         
-        # Arama
-        clean_search_term = product_name.strip().replace(' ', '+')
-        search_url = f"https://www.hepsiburada.com/ara?q={clean_search_term}"
-        print(f"🔍 Hepsiburada'da arama: {search_url}", file=sys.stderr)
-        print(f"🔍 Temizlenmiş arama terimi: '{clean_search_term}'", file=sys.stderr)
-        safe_get(driver, search_url, hard_timeout=5)  # 8 → 5
-        time.sleep(0.3 + random.random()*0.3)  # 0.5-1.0 → 0.3-0.6
-
-        # 🎯 PID bazlı DEDUPE sistemi - "tek ürünün çoğalması" sorununu çözer
+        # Arama (aynı arama yakın zamanda yapıldıysa ürün listesi önbellekten gelir)
         try:
-            # Tüm ürün linklerini topla
-            links = driver.find_elements(By.XPATH, "//a[contains(@href, '-p-')]")
-            print(f"📦 {len(links)} potansiyel ürün linki bulundu", file=sys.stderr)
-            
-            seen, items = set(), []
-            for a in links:
-                if time_is_up(max_seconds): break  # Süre kontrolü
-                
-                href = (a.get_attribute("href") or "").split("?")[0]
-                if not href or 'adservice' in href or '/event/' in href:
-                    continue
-                    
-                # Ürün ID'sini çıkar (p-XXXXX formatı)
-                m = re.search(r"-p-([A-Z0-9]+)", href, re.I)
-                if not m:
-                    continue
-                    
-                pid = m.group(1).upper()
-                if pid in seen:  # 🔑 Aynı ürün ID'si zaten var, atla
-                    continue
-                seen.add(pid)
-                
-                # URL'yi temizle ve yorum sayfası linkini oluştur
-                if not href.startswith('http'):
-                    href = f"https://www.hepsiburada.com{href}"
-                yorum_url = href if href.endswith("-yorumlari") else href + "-yorumlari"
-                
-                # Gelişmiş ürün adı çıkarma
-                name = ""
-                
-                # 1) title attribute'u dene
-                title = a.get_attribute("title")
-                if title and len(title.strip()) > 10 and not any(x in title.lower() for x in ["kampanya", "taksit", "fiyat", "puan"]):
-                    name = title.strip()
-                
-                # 2) link text'i dene (temizlenmiş)
-                if not name:
-                    text = (a.text or "").strip()
-                    # Çok uzun veya karışık HTML içeriklerini filtrele
-                    if text and len(text) < 200 and not any(x in text.lower() for x in ["kampanya", "taksit", "fiyat", "puan", "değerlendirme"]):
-                        # Sadece ürün adı benzeri metinleri al
-                        clean_text = text.split('\n')[0].strip()  # İlk satırı al
-                        if len(clean_text) > 10:
-                            name = clean_text
-                
-                # 3) Parent element'ten ürün adı bul
-                if not name:
-                    try:
-                        parent = a.find_element(By.XPATH, './ancestor::*[contains(@class,"product") or contains(@data-test-id,"product")]')
-                        name_els = parent.find_elements(By.CSS_SELECTOR, '[data-test-id*="product-name"], [class*="product-name"], [class*="productName"], h3, .title')
-                        for el in name_els:
-                            candidate = (el.text or "").strip()
-                            if candidate and len(candidate) > 10 and len(candidate) < 150:
-                                name = candidate
-                                break
-                    except Exception:
-                        pass
-                
-                # 4) URL'den çıkar (fallback)
-                if not name:
-                    name = extract_product_name_from_url(href)
-                
-                # 5) Son fallback
-                if not name or len(name) < 5:
-                    name = f"Hepsiburada Ürünü {len(items)+1}"
-                
-                items.append((yorum_url, name))
-                print(f"✅ Benzersiz Ürün {len(items)}: {name} (PID: {pid})", file=sys.stderr)
-                print(f"    🔗 URL: {yorum_url}", file=sys.stderr)
-                
-                if len(items) == max_products:
-                    break
-            
-            # Sonuçları ayır
-            yorum_sayfalari = [u for u, _ in items]
-            bulunan_urunler = [n for _, n in items]
-            
-            print(f"🎯 DEDUPE sonucu: {len(yorum_sayfalari)} benzersiz ürün (hedef: {max_products})", file=sys.stderr)
+            items = cached_search('hepsiburada', product_name, max_products,
+                                  lambda: find_hepsiburada_products(driver, product_name, max_products,
+                                                                    max_seconds, started_at))
         except Exception as e:
             print(f"❌ Ürün linkleri alınamadı: {e}", file=sys.stderr)
             return {"success": False, "error": f"Ürün linkleri alınamadı: {str(e)}"}
 
-        if not yorum_sayfalari:
-            print(f"❌ DEDUPE sonrası hiç ürün kalmadı. Potansiyel linkler: {len(candidate_links)}", file=sys.stderr)
-            print(f"❌ Canon_seen içeriği: {list(canon_seen)[:5]}", file=sys.stderr)
-            return {"success": False, "error": "Hiç ürün bulunamadı", "debug": {"potential_links": len(candidate_links), "seen_pids": list(canon_seen)[:5]}}
-
-        # Her ürün
-        for i, base_url in enumerate(yorum_sayfalari):
-            if time_is_up(max_seconds): break  # Süre kontrolü
-            product_idx = i  # i'yi güvenceye al
-            # Arama sayfasından çekilen ürün adını kullan
-            real_product_name = bulunan_urunler[i] if i < len(bulunan_urunler) else f"Ürün {i+1}"
-            print(f"\n📦 Ürün {i+1}/{len(yorum_sayfalari)}: {real_product_name}", file=sys.stderr)
-
-            # Fiyat & rating (her ürün için bir kez)
-            product_price = extract_price_from_product_page(driver, base_url)
-            product_rating = extract_product_rating_from_page(driver, base_url)
-            print(f"    💰 Fiyat: {product_price} | ⭐ Rating: {product_rating}", file=sys.stderr)
-
-            total_reviews_for_product = 0
-
-            # Sayfalar
-            for page in range(1, pages_per_product + 1):
-                if time_is_up(max_seconds): break  # Süre kontrolü
-                full_url = f"{base_url}?sayfa={page}"
-                print(f"  📄 Sayfa {page} yükleniyor: {full_url}", file=sys.stderr)
-                try:
-                    safe_get(driver, full_url, hard_timeout=5)  # 8 → 5
-                    time.sleep(0.2 + random.random()*0.3)  # 0.5-1.0 → 0.2-0.5
-                    if is_challenge_page(driver):
-                        time.sleep(1 + random.random())  # 2-4 → 1-2
-                        driver.refresh()
-                        time.sleep(0.6)  # 1.2 → 0.6
-
-                    yorum_elements = wait_reviews(driver, timeout=4)  # 6 → 4
-
-                    if not yorum_elements:
-                        # Generic fallback
-                        generic_selectors = [
-                            "[data-test-id*='review']",
-                            "[class*='ReviewCard']",
-                            "[class*='review']",
-                            "[class*='comment']",
-                            ".review", ".comment", "[id*='review']"
-                        ]
-                        for gs in generic_selectors:
-                            elems = driver.find_elements(By.CSS_SELECTOR, gs)
-                            if len(elems) >= 5:
-                                yorum_elements = elems
-                                break
-
-                    if yorum_elements:
-                        lazy_scroll(driver, times=3, step=1000, pause=0.2)  # Daha agresif
-                        driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-                        time.sleep(0.3)  # 0.5 → 0.3
-
-                    sayfa_yorum_sayisi = 0
-                    sayfa_yorumlari = set()  # Bu sayfa için duplike kontrolü
-                    
-                    # Sayfa başına maksimum 15 yorum
-                    max_per_page = 15
-                    yorum_elements_limited = (yorum_elements or [])[:max_per_page]
-                    
-                    for j, element in enumerate(yorum_elements_limited):
-                        if time_is_up(max_seconds): break  # Süre kontrolü
-                        if sayfa_yorum_sayisi >= max_per_page: break  # Sayfa limiti
-                        
-                        try:
-                            metin = (element.text or "").strip()
-                            if not metin or len(metin) <= 10:
-                                continue
-                                
-                            # Duplike kontrolü - yorum metninin ilk 100 karakteri
-                            yorum_hash = metin[:100].strip()
-                            if yorum_hash in sayfa_yorumlari:
-                                continue  # Duplike, atla
-                            sayfa_yorumlari.add(yorum_hash)
-                            
-                            likes = extract_likes_from_review(element)
-
-                            yorum_tarihi = None
-                            try:
-                                tarih_spans = element.find_elements(By.CSS_SELECTOR, "span[class*='hermes-ReviewCard-module-']")
-                                for span in tarih_spans:
-                                    content_attr = span.get_attribute('content')
-                                    if content_attr and re.match(r'\d{4}-\d{2}-\d{2}', content_attr):
-                                        yorum_tarihi = span.text.strip(); break
-                                    span_text = (span.text or "").strip().lower()
-                                    if span_text and any(k in span_text for k in [
-                                        'ocak','şubat','şubat','mart','nisan','mayıs','mayis','haziran',
-                                        'temmuz','ağustos','ağustos','eylül','eylul','ekim','kasım','kasim','aralık','aralik',
-                                        'gün önce','hafta önce','ay önce','yıl önce','gun once','hafta once','ay once','yil once'
-                                    ]):
-                                        yorum_tarihi = span.text.strip(); break
-                            except Exception:
-                                yorum_tarihi = None
-
-                            review_data = {
-                                'id': f"hepsiburada_{product_idx}_{page}_{j}",
-                                'collection_name': search_collection_name,
-                                'platform': 'hepsiburada',
-                                'product_name': real_product_name,
-                                'comment': metin,
-                                'comment_date': yorum_tarihi,
-                                'rating': product_rating,
-                                'timestamp': datetime.now().isoformat(),
-                                'product_url': base_url,
-                                'product_price': product_price,
-                                'total_reviews': None,
-                                'search_term': product_name,
-                                'page_number': page,
-                                'review_index': j,
-                                'likes': likes,
-                                'user_name': None,
-                                'verified_purchase': None,
-                                'created_at': datetime.now().isoformat(),
-                                'last_updated': datetime.now().isoformat()
-                            }
-                            all_results.append(review_data)
-                            sayfa_yorum_sayisi += 1
-                            total_reviews_for_product += 1
-                        except Exception:
-                            continue
-
-                    print(f"    ✅ Sayfa {page}: {sayfa_yorum_sayisi} yorum (max: {max_per_page})", file=sys.stderr)
-
-                    if sayfa_yorum_sayisi == 0:
-                        print(f"    🛑 Sayfa {page}'da yorum yok → sonraki ürüne geç", file=sys.stderr)
-                        break
+        for index, (yorum_url, name) in enumerate(items, 1):
+            emit_product_discovered('hepsiburada', yorum_url, name, index)
 
-                    if page < pages_per_product:
-                        time.sleep(0.05 + random.random()*0.1)  # 0.1-0.3 → 0.05-0.15
+        # Sonuçları ayır
+        yorum_sayfalari = [u for u, _ in items]
+        bulunan_urunler = [n for _, n in items]
 
-                except Exception as e:
-                    print(f"    ❌ Sayfa {page} atlandı: {e}", file=sys.stderr)
-                    if "timeout" in str(e).lower() or "timeoutexception" in str(e).lower():
-                        print(f"    ⏰ Timeout! Kalan sayfalar atlanıyor…", file=sys.stderr)
-                        break
-                    time.sleep(0.5)  # 1.5 → 0.5
-                    continue
-
-            print(f"  ✅ Ürün toplam yorum: {total_reviews_for_product}", file=sys.stderr)
-
-            if i < len(yorum_sayfalari) - 1:
-                time.sleep(0.2 + random.random()*0.3)  # 0.5-1.0 → 0.2-0.5
+        if not yorum_sayfalari:
+            print(f"❌ DEDUPE sonrası hiç ürün kalmadı", file=sys.stderr)
+            return {"success": False, "error": "Hiç ürün bulunamadı"}
+
+        # Arama oturumunu havuza bırak; ürünler paralel olarak kendi oturumlarında çekilir
+        release_driver(driver, "fast")
+        driver = None
+
+        # Parmak izi üzerinden upsert: tekrar çekimde yalnızca yeni yorumlar eklenir
+        with BulkWriter([collection]) as writer:
+            def urun_cek(i, base_url):
+                # Arama sayfasından çekilen ürün adını kullan
+                real_product_name = bulunan_urunler[i - 1] if i <= len(bulunan_urunler) else f"Ürün {i}"
+                return scrape_hepsiburada_search_product(i - 1, base_url, real_product_name, len(yorum_sayfalari),
+                                                         product_name, search_collection_name, pages_per_product,
+                                                         max_seconds, started_at, watermarks, writer)
+
+            # Ürün sırası korunarak özetlenir; yorumu çıkmayan ürünler özete girmez
+            for urun_ozeti in scrape_products_parallel(yorum_sayfalari, urun_cek, profile="fast"):
+                if urun_ozeti["success"] and urun_ozeti["total_reviews"]:
+                    results_by_product.append(urun_ozeti)
+                    total_reviews += urun_ozeti["total_reviews"]
 
     except Exception as e:
         print(f"❌ Genel hata: {e}", file=sys.stderr)
         return {"success": False, "error": str(e)}
     finally:
-        try:
-            driver.quit()
-        except Exception:
-            pass
+        release_driver(driver, "fast")
+        client.close()
 
-    print(f"🔒 Driver kapatıldı", file=sys.stderr)
+    print(f"🔒 Driver havuza bırakıldı", file=sys.stderr)
     print(f"✅ Hepsiburada arama scraping tamamlandı!", file=sys.stderr)
     print(f"📊 Toplam ürün: {len(bulunan_urunler)}", file=sys.stderr)
-    print(f"💬 Toplam yorum: {len(all_results)}", file=sys.stderr)
-
-    # Ürün bazında özet
-    results_by_product, current_product_results, current_product_name = [], [], None
-    for r in all_results:
-        if current_product_name != r['product_name']:
-            if current_product_results:
-                total_for_product = len(current_product_results)
-                for rr in current_product_results:
-                    rr['total_reviews'] = total_for_product
-                results_by_product.append({
-                    "success": True,
-                    "total_reviews": total_for_product,
-                    "collection_name": search_collection_name,
-                    "product_name": current_product_name,
-                    "platform": "hepsiburada",
-                    "price": current_product_results[0]['product_price'] if current_product_results else None
-                })
-            current_product_results = []
-            current_product_name = r['product_name']
-        current_product_results.append(r)
-
-    if current_product_results:
-        total_for_product = len(current_product_results)
-        for rr in current_product_results:
-            rr['total_reviews'] = total_for_product
-        results_by_product.append({
-            "success": True,
-            "total_reviews": total_for_product,
-            "collection_name": search_collection_name,
-            "product_name": current_product_name,
-            "platform": "hepsiburada",
-            "price": current_product_results[0]['product_price'] if current_product_results else None
-        })
-
-    # MongoDB kayıt
-    try:
-        client = MongoClient('mongodb://localhost:27017/')
-        db = client['ecommerce_analytics']
-        safe_search_term = re.sub(r'[^a-zA-Z0-9]', '_', product_name.lower())
-        collection_name = f"hepsiburada_reviews_{safe_search_term}"
-        collection = db[collection_name]
-        if all_results:
-            for review in all_results:
-                if not review.get('id'):
-                    review['id'] = f"hepsiburada_{review.get('product_name','unknown').replace(' ','_')[:20]}_{review.get('page_number',0)}_{review.get('review_index',0)}"
-            try:
-                collection.insert_many(all_results, ordered=False)
-                print(f"    ✅ {len(all_results)} yorum MongoDB'ye kaydedildi", file=sys.stderr)
-            except Exception as e:
-                print(f"    ⚠️ MongoDB insert uyarısı: {e}", file=sys.stderr)
-        client.close()
-    except Exception as e:
-        print(f"❌ MongoDB kayıt hatası: {e}", file=sys.stderr)
+    print(f"💬 Toplam yorum: {total_reviews}", file=sys.stderr)
+    print(f"    ✅ {writer.written} yeni yorum MongoDB'ye ({collection_name}) kaydedildi ({writer.existing} zaten vardı)", file=sys.stderr)
+
+    # Yorumlar yazıldı; sonraki çekim bu noktadan sonrasını çeker
+    if not writer.errors:
+        save_watermarks(watermarks)
 
     # --- Fonksiyon sonunda 'partial' bayrağı ekle ---
-    partial = (time.time() - START_TIME) >= (max_seconds - 0.5)
+    partial = (time.time() - started_at) >= (max_seconds - 0.5)
 
     return {
         "success": True,
         "partial": partial,            # ⬅️ kısmi çıktı mı?
-        "total_reviews": len(all_results),
+        "total_reviews": total_reviews,
         "products_processed": len(bulunan_urunler),
         "platform": "hepsiburada",
         "search_term": product_name,
-        "results": results_by_product,
-        "all_reviews": all_results
+        "results": results_by_product
     }
 
 # -------------------- CLI --------------------
 
 if __name__ == "__main__":
+    sys.argv[1:] = profile_from_argv(sys.argv[1:])
     if len(sys.argv) < 2:
-        print(json.dumps({"success": False, "error": "Ürün adı parametresi gerekli"}))
+        emit_summary({"success": False, "error": "Ürün adı parametresi gerekli"})
         sys.exit(1)
 
     product_name = sys.argv[1]
@@ -679,8 +605,4 @@ if __name__ == "__main__":
         max_seconds = 60
 
     result = scrape_hepsiburada_by_product_name(product_name, max_products, pages_per_product, max_seconds)
-    try:
-        print(json.dumps(result, ensure_ascii=False, indent=2, default=str))
-    except Exception as e:
-        print(f"JSON çıktı hatası: {e}", file=sys.stderr)
-        print(json.dumps({"success": True, "message": "Veri başarıyla işlendi"}))
\ No newline at end of file
+    emit_summary(result)
\ No newline at end of file
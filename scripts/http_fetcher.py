@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Sayfalı yorum sayfaları için tarayıcısız hızlı yol (n11 ?pg=, Hepsiburada ?sayfa=).
+
+Yorum sayfaları zaten sayfa numarasıyla adreslendiği için her biri için Chrome
+açıp time.sleep beklemek yerine sayfalar ortak bir requests oturumuyla eşzamanlı
+indirilir ve lxml ile ayrıştırılır. Kartlar review_extractors ile aynı
+{text, date, rating, likes, author} biçiminde döner.
+
+Bir sayfa için None dönerse o sayfa Selenium ile çekilmelidir:
+    - bot duvarı (captcha / doğrulama) algılandı,
+    - istek başarısız oldu,
+    - ilk sayfada hiç kart bulunamadı (sayfa istemci tarafında render ediliyor olabilir).
+
+Ayarlar (ortam değişkenleri):
+    SCRAPER_HTTP_CONCURRENCY  Ürün başına eşzamanlı sayfa isteği (varsayılan 6)
+    SCRAPER_HTTP_TIMEOUT      İstek zaman aşımı, saniye (varsayılan 10)
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from lxml import html as lxml_html
+import threading
+import requests
+import random
+import sys
+import os
+import re
+
+from driver_pool import USER_AGENTS
+from review_dates import looks_like_date
+from scrape_timing import span
+
+HTTP_CONCURRENCY = int(os.getenv("SCRAPER_HTTP_CONCURRENCY", "6"))
+HTTP_TIMEOUT = float(os.getenv("SCRAPER_HTTP_TIMEOUT", "10"))
+
+CHALLENGE_MARKERS = ("captcha", "doğrulama", "dogrulama", "perimeterx", "hcaptcha")
+
+def is_challenge_html(page_html):
+    """Bot duvarı / captcha sayfası mı (Selenium tarafındaki is_challenge_page ile aynı işaretler)"""
+    lowered = (page_html or "").lower()
+    return any(marker in lowered for marker in CHALLENGE_MARKERS)
+
+# -------------------- HTTP oturumu --------------------
+
+_session = None
+_session_lock = threading.Lock()
+
+def get_http_session():
+    """Süreç genelinde bağlantı havuzlu tek requests oturumu"""
+    global _session
+    with _session_lock:
+        if _session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=8, pool_maxsize=max(HTTP_CONCURRENCY, 10))
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            session.headers.update({
+                "User-Agent": random.choice(USER_AGENTS),
+                "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+                "Accept-Language": "tr-TR,tr;q=0.9,en;q=0.8",
+            })
+            _session = session
+        return _session
+
+def fetch_html(url):
+    """Sayfayı indir; bot duvarı veya hata varsa None döndür"""
+    try:
+        response = get_http_session().get(url, timeout=HTTP_TIMEOUT)
+    except requests.RequestException as e:
+        print(f"    ⚠️ HTTP hatası ({url}): {e}", file=sys.stderr)
+        return None
+    if response.status_code != 200:
+        print(f"    ⚠️ HTTP {response.status_code}: {url}", file=sys.stderr)
+        return None
+    if is_challenge_html(response.text):
+        print(f"    🧱 Bot duvarı algılandı, tarayıcıya dönülecek: {url}", file=sys.stderr)
+        return None
+    return response.text
+
+# -------------------- Ayrıştırıcılar --------------------
+
+def _text(element):
+    """Selenium .text'e yakın: blok metinlerini satır satır birleştir"""
+    if element is None:
+        return ""
+    parts = [part.strip() for part in element.itertext()]
+    return "\n".join(part for part in parts if part)
+
+def _first_number(value):
+    match = re.search(r'\d+', value or "")
+    return int(match.group(0)) if match else None
+
+def parse_n11_reviews(page_html):
+    tree = lxml_html.fromstring(page_html)
+    cards = []
+    for card in tree.xpath("//li[contains(concat(' ', normalize-space(@class), ' '), ' comment ')]"):
+        date_el = card.xpath(".//span[contains(concat(' ', normalize-space(@class), ' '), ' commentDate ')]")
+        rating_el = card.xpath(".//*[contains(@class, 'rating')]")
+        rating_match = re.search(r'r(\d{2,3})', rating_el[0].get('class', '')) if rating_el else None
+        author_el = card.xpath(".//*[contains(@class, 'userName') or contains(@class, 'userInfo')]")
+        cards.append({
+            "text": _text(card),
+            "date": _text(date_el[0]) if date_el else None,
+            "rating": int(rating_match.group(1)) / 20 if rating_match else None,
+            "likes": 0,
+            "author": _text(author_el[0]) if author_el else None,
+        })
+    return cards
+
+def parse_hepsiburada_reviews(page_html):
+    tree = lxml_html.fromstring(page_html)
+    card_elements = tree.xpath("//div[@data-test-id='review-card']")
+    if not card_elements:
+        card_elements = tree.xpath("//*[contains(@class, 'hermes-ReviewCard-module-dY_oaYMIo0DJcUiSeaVW')]")
+
+    cards = []
+    for card in card_elements:
+        date = None
+        for date_el in card.xpath(".//span[contains(@class, 'hermes-ReviewCard-module-')]"):
+            content = date_el.get('content')
+            if content and re.match(r'\d{4}-\d{2}-\d{2}', content):
+                date = _text(date_el)
+                break
+            if looks_like_date(_text(date_el)):
+                date = _text(date_el)
+                break
+
+        likes = 0
+        for like_el in card.xpath(".//button[contains(@class, 'helpful')] | .//span[contains(@class, 'helpful')]"):
+            value = _first_number(_text(like_el))
+            if value:
+                likes = value
+                break
+
+        rating_el = card.xpath(".//*[@itemprop='ratingValue']")
+        author_el = card.xpath(".//*[@itemprop='author' or contains(@class, 'author')]")
+        rating = None
+        if rating_el:
+            try:
+                rating = float(rating_el[0].get('content') or _text(rating_el[0]))
+            except ValueError:
+                rating = None
+        cards.append({
+            "text": _text(card),
+            "date": date,
+            "rating": rating,
+            "likes": likes,
+            "author": _text(author_el[0]) if author_el else None,
+        })
+    return cards
+
+PARSERS = {
+    'n11': parse_n11_reviews,
+    'hepsiburada': parse_hepsiburada_reviews,
+}
+
+# -------------------- Sayfa çekme --------------------
+
+def _fetch_and_parse(platform, url):
+    page_html = fetch_html(url)
+    if page_html is None:
+        return None
+    try:
+        return PARSERS[platform](page_html)
+    except Exception as e:
+        print(f"    ⚠️ HTML ayrıştırma hatası ({url}): {e}", file=sys.stderr)
+        return None
+
+def fetch_review_pages(platform, page_urls, max_workers=HTTP_CONCURRENCY, first_page=True):
+    """Bir ürünün tüm yorum sayfalarını eşzamanlı indir: {url: kartlar veya None}
+
+    None olan sayfalar (bot duvarı, hata, boş ilk sayfa) Selenium ile çekilmelidir.
+    first_page=False ise page_urls ürünün ilk sayfasıyla başlamaz (artımlı çekimde
+    sayfalar tek tek istenir); boş sayfa son sayfanın ötesi sayılır ve [] kalır.
+    """
+    platform = platform.lower()
+    if platform not in PARSERS:
+        raise ValueError(f"HTTP hızlı yolu desteklenmiyor: {platform}")
+    if not page_urls:
+        return {}
+
+    with span("http_fetch"), ThreadPoolExecutor(max_workers=min(max_workers, len(page_urls))) as executor:
+        results = list(executor.map(lambda url: _fetch_and_parse(platform, url), page_urls))
+
+    pages = dict(zip(page_urls, results))
+    # İlk sayfa boşsa yorumlar istemci tarafında render ediliyor olabilir; tarayıcıyla doğrula
+    if first_page and pages[page_urls[0]] == []:
+        print("    ℹ️ İlk sayfada HTML içinde yorum yok, tarayıcıyla doğrulanacak", file=sys.stderr)
+        pages[page_urls[0]] = None
+
+    fetched = sum(1 for cards in pages.values() if cards is not None)
+    print(f"    ⚡ HTTP ile {fetched}/{len(page_urls)} sayfa çekildi", file=sys.stderr)
+    return pages
@@ -1,17 +1,61 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
+"""data/reviews altındaki JSON/JSONL yedeklerini MongoDB'ye aktarma.
+
+Dosyalar json.load ile bütün olarak okunmaz: JSON dizileri eleman eleman
+(raw_decode ile), JSONL dosyaları satır satır akıtılır ve dokümanlar BulkWriter
+ile toplu yazılır. Dosyalar ayrı süreçlerde paralel işlenir, böylece ayrıştırma
+tek bir GIL'e takılmaz.
+
+Son içe aktarımdan beri değişmeyen dosyalar atlanır: dizindeki manifest
+(`.import_manifest.json`) her dosyanın yolunu, boyutunu, mtime'ını ve sha1
+özetini tutar. Boyut ve mtime aynıysa dosya açılmaz; mtime değişip içerik
+aynıysa yalnızca manifest güncellenir. Yazım hatası olan dosyalar manifeste
+eklenmez, sonraki çalıştırmada tekrar denenir.
+
+Yorum kayıtları parmak iziyle, yorum metni olmayan ürün özeti kayıtları `id`
+alanıyla upsert edilir (bkz. mongo_writer). Manifest kayıtları yazım anahtarını
+da tutar; anahtar değişince dosyalar --force gerekmeden yeniden aktarılır.
+
+Ayarlar (ortam değişkenleri):
+    SCRAPER_IMPORT_WORKERS  Paralel dosya işleyen süreç sayısı (varsayılan min(4, CPU))
+    SCRAPER_IMPORT_CHUNK    Toplu yazım başına doküman sayısı (varsayılan 1000)
+    MONGODB_URI             MongoDB adresi (varsayılan mongodb://localhost:27017/)
+
+Kullanım:
+    python3 import_json_to_mongodb.py           # değişen dosyalar
+    python3 import_json_to_mongodb.py --force   # manifest yok sayılır, tüm dosyalar
+"""
+
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import hashlib
 import json
 import os
+import sys
+import time
 from pymongo import MongoClient
+from mongo_writer import BulkWriter
 from datetime import datetime
-import re
+
+JSON_DIR = 'data/reviews/'
+MANIFEST_FILE = '.import_manifest.json'
+IMPORT_WORKERS = int(os.getenv("SCRAPER_IMPORT_WORKERS", str(min(4, os.cpu_count() or 1))))
+IMPORT_CHUNK_SIZE = int(os.getenv("SCRAPER_IMPORT_CHUNK", "1000"))
+READ_BLOCK_SIZE = 1 << 20
+
+# Manifest kaydının hangi yazım anahtarıyla üretildiği; değişince tüm dosyalar yeniden aktarılır.
+# v1 ürün özeti kayıtlarını da parmak iziyle birleştirip bir kısmını düşürüyordu.
+IMPORT_KEYING = "fingerprint-or-id"
+
+def get_mongodb_uri():
+    return os.getenv('MONGODB_URI', 'mongodb://localhost:27017/')
 
 def create_safe_collection_name(filename):
     """JSON dosya adından güvenli koleksiyon adı oluştur"""
-    # .json uzantısını kaldır
-    name = filename.replace('.json', '')
-    
+    # .json / .jsonl uzantısını kaldır
+    name = filename.replace('.jsonl', '').replace('.json', '')
+
     # Zaten güvenli format kullanılıyor, sadece kontrol et
     if '_reviews_' in name:
         return name
@@ -19,109 +63,204 @@ def create_safe_collection_name(filename):
         # Backup format
         return name.replace('_', '_reviews_', 1)
 
-def import_json_to_mongodb():
+# -------------------- Akış halinde okuma --------------------
+
+def iter_json_array(file_path):
+    """JSON dizisinin elemanlarını dosyayı bütün olarak belleğe almadan tek tek üret"""
+    decoder = json.JSONDecoder()
+    with open(file_path, 'r', encoding='utf-8') as f:
+        buffer = f.read(READ_BLOCK_SIZE).lstrip()
+        if not buffer.startswith('['):
+            raise ValueError("list formatında değil")
+        position = 1
+        eof = False
+        while True:
+            # Ayraçları ve boşlukları atla
+            while True:
+                while position < len(buffer) and buffer[position] in ' \t\r\n,':
+                    position += 1
+                if position < len(buffer) or eof:
+                    break
+                block = f.read(READ_BLOCK_SIZE)
+                buffer, position, eof = block, 0, not block
+            if position >= len(buffer):
+                raise ValueError("dizi kapanmadan dosya bitti")
+            if buffer[position] == ']':
+                return
+            try:
+                item, end = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                # Eleman bloğun sonunda bölünmüş: bir blok daha oku ve tekrar dene
+                block = f.read(READ_BLOCK_SIZE)
+                if not block:
+                    raise
+                buffer, position = buffer[position:] + block, 0
+                continue
+            yield item
+            position = end
+
+def iter_jsonl(file_path):
+    with open(file_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                yield json.loads(line)
+
+def iter_records(file_path):
+    return iter_jsonl(file_path) if file_path.endswith('.jsonl') else iter_json_array(file_path)
+
+# -------------------- Manifest --------------------
+
+def file_sha1(file_path):
+    digest = hashlib.sha1()
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(READ_BLOCK_SIZE), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def load_manifest(json_dir):
+    """Manifest kayıtları; başka bir yazım anahtarıyla içe aktarılmış dosyalar yeniden işlenir"""
+    try:
+        with open(os.path.join(json_dir, MANIFEST_FILE), 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return {name: entry for name, entry in manifest.items() if entry.get("keying") == IMPORT_KEYING}
+
+def save_manifest(json_dir, manifest):
+    path = os.path.join(json_dir, MANIFEST_FILE)
+    with open(path + '.tmp', 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2, sort_keys=True)
+    os.replace(path + '.tmp', path)
+
+def file_signature(file_path):
+    stat = os.stat(file_path)
+    return {"path": file_path, "size": stat.st_size, "mtime": stat.st_mtime}
+
+# -------------------- Dosya içe aktarımı (işçi süreçte) --------------------
+
+def import_json_file(file_path, previous=None):
+    """Tek dosyayı içe aktar; {"file", "status", "written", "existing", "errors", "manifest", "log"} döndür
+
+    Ayrı süreçte çalışır; log satırları dosyalar karışmasın diye toplu döndürülür.
+    """
+    json_file = os.path.basename(file_path)
+    log = []
+    result = {"file": json_file, "status": "skipped", "written": 0, "existing": 0, "errors": 0,
+              "manifest": None, "log": log}
+
+    entry = {**file_signature(file_path), "sha1": file_sha1(file_path), "keying": IMPORT_KEYING}
+    if previous and previous.get("sha1") == entry["sha1"]:
+        # mtime değişmiş ama içerik aynı
+        result.update(status="unchanged", manifest=entry)
+        return result
+
+    client = MongoClient(get_mongodb_uri())
+    try:
+        collection_name = create_safe_collection_name(json_file)
+        collection = client['ecommerce_analytics'][collection_name]
+        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S.%f")
+        started = time.perf_counter()
+        count = 0
+
+        # Yorumlar parmak iziyle, yorum metni olmayan ürün özetleri kendi id'leriyle upsert edilir
+        # (bkz. mongo_writer.write_operation); tekrar içe aktarım kopya üretmez
+        with BulkWriter([collection], batch_size=IMPORT_CHUNK_SIZE, flush_seconds=float('inf')) as writer:
+            for doc in iter_records(file_path):
+                if not isinstance(doc, dict):
+                    continue
+                if count == 0:
+                    log.append(f"  Platform: {doc.get('platform', 'Unknown')} | Ürün: {doc.get('product_name', 'Unknown Product')} | Koleksiyon: {collection_name}")
+                # Timestamp ve source bilgisi yoksa ekle
+                doc.setdefault('timestamp', timestamp)
+                doc.setdefault('source', 'json_import')
+                writer.add(doc)
+                count += 1
+
+        if count == 0:
+            log.append(f"  UYARI: {json_file} dosyası boş")
+        else:
+            log.append(f"  ✅ {count} dokümandan {writer.written} yeni doküman eklendi "
+                       f"({writer.existing} zaten vardı, {time.perf_counter() - started:.1f} sn)")
+        result.update(status="imported", written=writer.written, existing=writer.existing, errors=writer.errors)
+        if not writer.errors:
+            result["manifest"] = entry
+    except Exception as e:
+        log.append(f"  ❌ {json_file} işlenirken hata: {e}")
+        result.update(status="failed")
+    finally:
+        client.close()
+    return result
+
+# -------------------- Ana işlev --------------------
+
+def import_json_to_mongodb(json_dir=JSON_DIR, force=False, workers=IMPORT_WORKERS):
     # MongoDB bağlantısı
     try:
         # Environment variable'dan MongoDB URI'yi al
-        mongodb_uri = os.getenv('MONGODB_URI', 'mongodb://localhost:27017/')
+        mongodb_uri = get_mongodb_uri()
         client = MongoClient(mongodb_uri)
         db = client['ecommerce_analytics']
         print(f"MongoDB'ye başarıyla bağlanıldı: {mongodb_uri[:30]}...")
     except Exception as e:
         print(f"MongoDB bağlantı hatası: {e}")
         return
-    
-    # data/reviews/ dizinindeki JSON dosyalarını bul
-    json_dir = 'data/reviews/'
+
+    # data/reviews/ dizinindeki JSON/JSONL dosyalarını bul
     if not os.path.exists(json_dir):
         print(f"Dizin bulunamadı: {json_dir}")
         return
-    
-    json_files = [f for f in os.listdir(json_dir) if f.endswith('.json')]
-    
-    print(f"\nBulunan JSON dosyaları: {len(json_files)}")
-    for file in json_files:
-        print(f"  - {file}")
-    
-    total_imported = 0
-    
+
+    json_files = sorted(f for f in os.listdir(json_dir) if f.endswith(('.json', '.jsonl')) and f != MANIFEST_FILE)
+    manifest = {} if force else load_manifest(json_dir)
+
+    # Boyutu ve mtime'ı değişmeyen dosyalar hiç açılmaz
+    pending = []
     for json_file in json_files:
-        try:
-            print(f"\n{json_file} dosyası işleniyor...")
-            
-            file_path = os.path.join(json_dir, json_file)
-            
-            # JSON dosyasını oku
-            with open(file_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-            
-            if not isinstance(data, list):
-                print(f"  UYARI: {json_file} dosyası list formatında değil")
-                continue
-            
-            if len(data) == 0:
-                print(f"  UYARI: {json_file} dosyası boş")
-                continue
-            
-            # Koleksiyon adını belirle
-            collection_name = create_safe_collection_name(json_file)
-            collection = db[collection_name]
-            
-            # Mevcut doküman sayısını kontrol et
-            existing_count = collection.count_documents({})
-            
-            # İlk dokümandan bilgileri al
-            first_doc = data[0]
-            platform = first_doc.get('platform', 'Unknown')
-            product_name = first_doc.get('product_name', 'Unknown Product')
-            
-            print(f"  Platform: {platform}")
-            print(f"  Ürün: {product_name}")
-            print(f"  Koleksiyon: {collection_name}")
-            print(f"  Doküman sayısı: {len(data)}")
-            
-            if existing_count > 0:
-                print(f"  BİLGİ: Bu koleksiyonda zaten {existing_count} doküman var, ekleme yapılacak")
-            
-            # Verileri ekle
-            imported_count = 0
-            for doc in data:
-                try:
-                    # Timestamp ekle/güncelle
-                    if 'timestamp' not in doc:
-                        doc['timestamp'] = datetime.now().strftime("%Y-%m-%d %H:%M:%S.%f")
-                    
-                    # Source bilgisi ekle
-                    if 'source' not in doc:
-                        doc['source'] = 'json_import'
-                    
-                    # MongoDB'ye ekle
-                    collection.insert_one(doc)
-                    imported_count += 1
-                    
-                except Exception as e:
-                    print(f"    Doküman ekleme hatası: {e}")
-                    continue
-            
-            print(f"  ✅ {imported_count} doküman başarıyla eklendi")
-            total_imported += imported_count
-            
-        except Exception as e:
-            print(f"  ❌ {json_file} işlenirken hata: {e}")
+        signature = file_signature(os.path.join(json_dir, json_file))
+        previous = manifest.get(json_file)
+        if previous and previous.get("size") == signature["size"] and previous.get("mtime") == signature["mtime"]:
             continue
-    
-    print(f"\n🎉 Toplam {total_imported} doküman MongoDB'ye aktarıldı")
-    
-    # Son durum raporu
+        pending.append(json_file)
+
+    print(f"\nBulunan JSON dosyaları: {len(json_files)} ({len(json_files) - len(pending)} değişmemiş, atlanıyor)")
+    for file in pending:
+        print(f"  - {file}")
+
+    total_imported = 0
+    unchanged = len(json_files) - len(pending)
+    failed = 0
+    started = time.perf_counter()
+
+    if pending:
+        with ProcessPoolExecutor(max_workers=max(1, min(workers, len(pending)))) as executor:
+            futures = [executor.submit(import_json_file, os.path.join(json_dir, json_file), manifest.get(json_file))
+                       for json_file in pending]
+            for future in as_completed(futures):
+                result = future.result()
+                print(f"\n{result['file']} dosyası işlendi ({result['status']})")
+                for line in result["log"]:
+                    print(line)
+                total_imported += result["written"]
+                unchanged += result["status"] == "unchanged"
+                failed += result["status"] == "failed" or bool(result["errors"])
+                if result["manifest"]:
+                    manifest[result["file"]] = result["manifest"]
+        save_manifest(json_dir, manifest)
+
+    print(f"\n🎉 Toplam {total_imported} doküman MongoDB'ye aktarıldı "
+          f"({unchanged} dosya değişmemiş, {failed} dosya hatalı, {time.perf_counter() - started:.1f} sn)")
+
+    # Son durum raporu (yaklaşık sayılar; koleksiyonlar taranmaz)
     print("\n📊 Veritabanı durumu:")
     collections = db.list_collection_names()
     for col_name in sorted(collections):
-        count = db[col_name].count_documents({})
-        print(f"  {col_name}: {count} doküman")
-    
+        count = db[col_name].estimated_document_count()
+        print(f"  {col_name}: ~{count} doküman")
+
     client.close()
 
 if __name__ == "__main__":
     print("JSON dosyalarını MongoDB'ye aktarma işlemi başlatılıyor...")
-    import_json_to_mongodb()
-    print("İşlem tamamlandı!") 
\ No newline at end of file
+    import_json_to_mongodb(force='--force' in sys.argv[1:])
+    print("İşlem tamamlandı!")
@@ -1,13 +1,44 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
+"""Yorum XLSX dosyalarını MongoDB'ye aktarma.
+
+Satırlar tek tek iterrows ile değil sütun bazında işlenir: tarih ve rating
+derlenmiş desenlerle `str.extract`/`str.contains` ile çıkarılır, `comment_datetime`
+review_dates.parse_review_dates ile toplu hesaplanır, dokümanlar parça parça
+(IMPORT_CHUNK_SIZE) toplu yazılır. Büyük çalışma kitapları openpyxl read-only
+moduyla satır satır akıtılır, dosyanın tamamı belleğe alınmaz.
+
+Ayarlar (ortam değişkenleri):
+    SCRAPER_IMPORT_CHUNK      Parça başına doküman sayısı (varsayılan 1000)
+    SCRAPER_IMPORT_STREAM_MB  Bu boyuttan büyük dosyalar akış moduyla okunur, MB (varsayılan 20)
+
+Kullanım:
+    python3 import_xlsx_to_mongodb.py            # dizindeki *yorumlar*.xlsx dosyaları
+    python3 import_xlsx_to_mongodb.py --stream   # tüm dosyalar akış moduyla
+"""
+
+from openpyxl import load_workbook
 import pandas as pd
 from pymongo import MongoClient
+from mongo_writer import BulkWriter
+from review_dates import parse_review_dates
 from datetime import datetime
+import time
 import os
 import re
 import sys
 
+IMPORT_CHUNK_SIZE = int(os.getenv("SCRAPER_IMPORT_CHUNK", "1000"))
+STREAM_THRESHOLD_MB = float(os.getenv("SCRAPER_IMPORT_STREAM_MB", "20"))
+
+COMMENT_COLUMN = 'Yorum'
+
+# Yorumun ilk satırı tarih mi: 04/07/2025 ya da 17 Mayıs 2025
+DATE_LINE_RE = re.compile(r'\d{1,2}/\d{1,2}/\d{4}|\d{1,2}\s+\w+\s+\d{4}')
+# Parantez içindeki puan: (4) ya da (4.5)
+RATING_RE = re.compile(r'\((\d+(?:\.\d+)?)\)')
+
 def create_safe_collection_name(filename):
     """Dosya adından güvenli koleksiyon adı oluştur"""
     # Dosya uzantısını kaldır
@@ -68,46 +99,131 @@ def extract_product_from_filename(filename):
     
     return name if name else 'Ürün Adı Bilinmiyor'
 
-def parse_comment_text(comment_text):
-    """Yorum metnini parse et ve bilgileri çıkar"""
-    if not comment_text or pd.isna(comment_text):
-        return None
+def parse_comment_column(comments):
+    """Yorum sütunundan comment, comment_date, rating ve likes_count sütunlarını toplu çıkar
+
+    Boş yorumlar atılır; dönen DataFrame'in index'i kaynak satırlarınkidir.
+    """
+    comments = comments.dropna().astype(str)
+    comments = comments[comments.str.strip() != '']
+
+    first_lines = comments.str.split('\n', n=1).str[0].str.strip()
+    has_date = first_lines.str.contains(DATE_LINE_RE, na=False)
+
+    return pd.DataFrame({
+        'comment': comments,
+        'comment_date': first_lines.where(has_date, ''),
+        'rating': pd.to_numeric(comments.str.extract(RATING_RE)[0], errors='coerce'),
+        'likes_count': 0,
+    })
+
+def build_documents(comments, platform, product_name, collection_name, xlsx_file, timestamp, imported_at):
+    """Yorum sütunundan MongoDB dokümanlarını oluştur (satır döngüsü yok, yalnızca sonda to_dict)"""
+    parsed = parse_comment_column(comments)
+    if parsed.empty:
+        return []
+
+    # Göreli tarihler içe aktarım zamanına göre çözülür; NaT → None
+    comment_datetimes = parse_review_dates(parsed['comment_date'], imported_at)
+    parsed['comment_datetime'] = comment_datetimes.astype(object).where(comment_datetimes.notna(), None)
+    parsed['rating'] = parsed['rating'].astype(object).where(parsed['rating'].notna(), None)
+
+    parsed = parsed.assign(
+        platform=platform,
+        product_name=product_name,
+        product_price=None,
+        timestamp=timestamp,
+        product_url='',
+        search_term='',
+        source='xlsx_import',
+        collection_name=collection_name,
+        original_file=xlsx_file,
+    )
+    return parsed.to_dict('records')
+
+def read_comment_chunks(xlsx_file, stream=False, chunk_size=IMPORT_CHUNK_SIZE):
+    """'Yorum' sütununu chunk_size satırlık Series parçaları olarak üret
+
+    stream=False: pandas ile tek seferde okunur. stream=True: openpyxl read-only moduyla
+    satır satır okunur, büyük dosyalar belleğe alınmaz. Sütun yoksa KeyError.
+    """
+    if not stream:
+        df = pd.read_excel(xlsx_file, usecols=lambda column: column == COMMENT_COLUMN)
+        if COMMENT_COLUMN not in df.columns:
+            raise KeyError(COMMENT_COLUMN)
+        for start in range(0, len(df), chunk_size):
+            yield df[COMMENT_COLUMN].iloc[start:start + chunk_size]
+        return
+
+    workbook = load_workbook(xlsx_file, read_only=True, data_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = next(rows, None) or ()
+        if COMMENT_COLUMN not in header:
+            raise KeyError(COMMENT_COLUMN)
+        column = header.index(COMMENT_COLUMN)
+
+        buffer, offset = [], 0
+        for row in rows:
+            buffer.append(row[column] if column < len(row) else None)
+            if len(buffer) >= chunk_size:
+                yield pd.Series(buffer, index=range(offset, offset + len(buffer)), dtype=object)
+                offset += len(buffer)
+                buffer = []
+        if buffer:
+            yield pd.Series(buffer, index=range(offset, offset + len(buffer)), dtype=object)
+    finally:
+        workbook.close()
+
+def import_xlsx_file(db, xlsx_file, stream=None):
+    """Tek XLSX dosyasını içe aktar; eklenen yeni yorum sayısını döndür"""
+    if stream is None:
+        stream = os.path.getsize(xlsx_file) > STREAM_THRESHOLD_MB * 1024 * 1024
+
+    # Platform ve ürün bilgilerini çıkar
+    platform = extract_platform_from_filename(xlsx_file)
+    product_name = extract_product_from_filename(xlsx_file)
+    collection_name = create_safe_collection_name(xlsx_file)
     
-    lines = str(comment_text).strip().split('\n')
+    print(f"  Platform: {platform}")
+    print(f"  Ürün: {product_name}")
+    print(f"  Koleksiyon: {collection_name}")
+    print(f"  Okuma: {'akış (openpyxl read-only)' if stream else 'pandas'}")
     
-    # Temel veri yapısı
-    result = {
-        'comment': comment_text,
-        'comment_date': '',
-        'rating': None,
-        'likes_count': 0
-    }
+    # Koleksiyonu seç veya oluştur
+    collection = db[collection_name]
     
-    # İlk satır genellikle tarih olabilir
-    if lines and len(lines) > 0:
-        first_line = lines[0].strip()
-        # Tarih formatlarını kontrol et
-        date_patterns = [
-            r'\d{1,2}/\d{1,2}/\d{4}',  # 04/07/2025
-            r'\d{1,2}\s+\w+\s+\d{4}',  # 17 Mayıs 2025
-        ]
-        
-        for pattern in date_patterns:
-            if re.search(pattern, first_line):
-                result['comment_date'] = first_line
-                break
-    
-    # Rating bulma - parantez içindeki sayıları ara
-    rating_match = re.search(r'\((\d+(?:\.\d+)?)\)', comment_text)
-    if rating_match:
+    # Mevcut doküman sayısını kontrol et (koleksiyon meta verisinden, tarama yapmadan)
+    existing_count = collection.estimated_document_count()
+    if existing_count > 0:
+        print(f"  BİLGİ: Bu koleksiyonda zaten ~{existing_count} doküman var, yalnızca yeni yorumlar eklenecek")
+    
+    # Parmak izi üzerinden upsert edilir, tekrar içe aktarım kopya üretmez; her parça tek toplu yazım
+    imported_at = datetime.now()
+    timestamp = imported_at.strftime("%Y-%m-%d %H:%M:%S.%f")
+    started = time.perf_counter()
+    comment_count = 0
+    
+    with BulkWriter([collection], batch_size=IMPORT_CHUNK_SIZE, flush_seconds=float('inf')) as writer:
         try:
-            result['rating'] = float(rating_match.group(1))
-        except:
-            pass
+            for comments in read_comment_chunks(xlsx_file, stream=stream):
+                documents = build_documents(comments, platform, product_name, collection_name,
+                                            xlsx_file, timestamp, imported_at)
+                comment_count += len(documents)
+                writer.extend(documents)
+        except KeyError:
+            print(f"  UYARI: {xlsx_file} dosyasında '{COMMENT_COLUMN}' sütunu bulunamadı")
+            return 0
+    
+    if comment_count == 0:
+        print(f"  UYARI: {xlsx_file} dosyasında geçerli yorum bulunamadı")
+        return 0
     
-    return result
+    elapsed = time.perf_counter() - started
+    print(f"  ✅ {comment_count} yorumdan {writer.written} yeni yorum eklendi ({writer.existing} yorum zaten vardı, {elapsed:.1f} sn)")
+    return writer.written
 
-def import_xlsx_to_mongodb():
+def import_xlsx_to_mongodb(stream=None):
     # MongoDB bağlantısı
     try:
         client = MongoClient('mongodb://localhost:27017/')
@@ -129,95 +245,23 @@ def import_xlsx_to_mongodb():
     for xlsx_file in xlsx_files:
         try:
             print(f"\n{xlsx_file} dosyası işleniyor...")
-            
-            # Excel dosyasını oku
-            df = pd.read_excel(xlsx_file)
-            
-            if 'Yorum' not in df.columns:
-                print(f"  UYARI: {xlsx_file} dosyasında 'Yorum' sütunu bulunamadı")
-                continue
-            
-            # Boş yorumları filtrele
-            df = df.dropna(subset=['Yorum'])
-            df = df[df['Yorum'].str.strip() != '']
-            
-            if len(df) == 0:
-                print(f"  UYARI: {xlsx_file} dosyasında geçerli yorum bulunamadı")
-                continue
-            
-            # Platform ve ürün bilgilerini çıkar
-            platform = extract_platform_from_filename(xlsx_file)
-            product_name = extract_product_from_filename(xlsx_file)
-            collection_name = create_safe_collection_name(xlsx_file)
-            
-            print(f"  Platform: {platform}")
-            print(f"  Ürün: {product_name}")
-            print(f"  Koleksiyon: {collection_name}")
-            print(f"  Yorum sayısı: {len(df)}")
-            
-            # Koleksiyonu seç veya oluştur
-            collection = db[collection_name]
-            
-            # Mevcut doküman sayısını kontrol et
-            existing_count = collection.count_documents({})
-            if existing_count > 0:
-                print(f"  BİLGİ: Bu koleksiyonda zaten {existing_count} doküman var, ekleme yapılacak")
-            
-            # Her yorumu işle ve ekle
-            imported_count = 0
-            timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S.%f")
-            
-            for index, row in df.iterrows():
-                try:
-                    # Yorum verilerini parse et
-                    parsed_data = parse_comment_text(row['Yorum'])
-                    if not parsed_data:
-                        continue
-                    
-                    # Doküman oluştur
-                    document = {
-                        'platform': platform,
-                        'product_name': product_name,
-                        'comment': parsed_data['comment'],
-                        'comment_date': parsed_data['comment_date'],
-                        'rating': parsed_data['rating'],
-                        'likes_count': parsed_data['likes_count'],
-                        'product_price': None,
-                        'timestamp': timestamp,
-                        'product_url': '',
-                        'search_term': '',
-                        'source': 'xlsx_import',
-                        'collection_name': collection_name,
-                        'original_file': xlsx_file
-                    }
-                    
-                    # MongoDB'ye ekle
-                    collection.insert_one(document)
-                    imported_count += 1
-                    
-                except Exception as e:
-                    print(f"    Satır {index} işlenirken hata: {e}")
-                    continue
-            
-            print(f"  ✅ {imported_count} yorum başarıyla eklendi")
-            total_imported += imported_count
-            
+            total_imported += import_xlsx_file(db, xlsx_file, stream=stream)
         except Exception as e:
             print(f"  ❌ {xlsx_file} işlenirken hata: {e}")
             continue
     
     print(f"\n🎉 Toplam {total_imported} yorum MongoDB'ye aktarıldı")
     
-    # Son durum raporu
+    # Son durum raporu (yaklaşık sayılar; koleksiyonlar taranmaz)
     print("\n📊 Veritabanı durumu:")
     collections = db.list_collection_names()
     for col_name in collections:
-        count = db[col_name].count_documents({})
-        print(f"  {col_name}: {count} doküman")
+        count = db[col_name].estimated_document_count()
+        print(f"  {col_name}: ~{count} doküman")
     
     client.close()
 
 if __name__ == "__main__":
     print("XLSX dosyalarını MongoDB'ye aktarma işlemi başlatılıyor...")
-    import_xlsx_to_mongodb()
-    print("İşlem tamamlandı!") 
\ No newline at end of file
+    import_xlsx_to_mongodb(stream=True if '--stream' in sys.argv[1:] else None)
+    print("İşlem tamamlandı!")
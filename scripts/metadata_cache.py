@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Ürün bilgisi (ad, fiyat, rating, satıcı) için TTL'li önbellek.
+
+Aynı ürün farklı arama terimleriyle ("iphone 15", "iphone 15 128gb") dakikalar
+içinde tekrar çekildiğinde ürün sayfası yeniden açılmaz. Anahtar, URL'deki ürün
+kimliğidir (Trendyol/Hepsiburada -p-, Amazon ASIN, AliExpress item id; yoksa
+sorgusuz URL yolu). Kayıtlar süreç içinde bellekte, süreçler arasında
+`product_metadata_cache` koleksiyonunda tutulur.
+
+Tazelik:
+    yaş < TTL                 → önbellekten döner
+    TTL ≤ yaş < TTL + STALE   → eski değer hemen döner, ürün sayfası arka planda
+                                havuzdan alınan ayrı bir oturumla yeniden okunur
+    daha eski / yok           → ürün sayfası çağıranın oturumuyla okunur
+
+Tek seferlik CLI scraper'ları çıkmadan önce süren arka plan yenilemelerini en fazla
+REVALIDATE_EXIT_WAIT saniye bekler; yenilemesi bitmeyen kayıt bir sonraki çekimde
+tekrar yenilenir. fetched_at UTC olarak yazılır (TTL index'i BSON tarihini UTC sayar).
+
+Ayarlar (ortam değişkenleri):
+    SCRAPER_METADATA_CACHE  0 ise önbellek kullanılmaz (varsayılan 1)
+    SCRAPER_METADATA_TTL    Kaydın taze sayıldığı süre, saniye (varsayılan 21600 = 6 saat)
+    SCRAPER_METADATA_STALE  TTL sonrası eski değerin dönülüp arka planda yenilendiği süre, saniye (varsayılan 86400)
+
+Kullanım:
+    meta = cached_metadata(driver, 'amazon', url,
+                           lambda d: {'rating': extract_amazon_product_rating(d, url)}, fields=('rating',))
+"""
+
+from pymongo import MongoClient
+from pymongo.errors import PyMongoError
+from datetime import datetime, timezone
+import threading
+import atexit
+import time
+import sys
+import os
+
+from review_fingerprint import product_key
+from driver_pool import acquire_driver, release_driver
+
+CACHE_ENABLED = os.getenv("SCRAPER_METADATA_CACHE", "1") != "0"
+METADATA_TTL = float(os.getenv("SCRAPER_METADATA_TTL", "21600"))
+METADATA_STALE = float(os.getenv("SCRAPER_METADATA_STALE", "86400"))
+
+CACHE_COLLECTION = "product_metadata_cache"
+
+# MongoDB yoksa bağlantı denemesi bu kadar bekler (pymongo varsayılanı 30 sn)
+SERVER_SELECTION_TIMEOUT_MS = 2000
+
+# Arka plan yenilemesi havuzdan oturum için en fazla bu kadar bekler; alamazsa yenileme atlanır
+REVALIDATE_ACQUIRE_TIMEOUT = 30
+# Süreç kapanırken süren arka plan yenilemeleri en fazla bu kadar beklenir
+REVALIDATE_EXIT_WAIT = 30
+
+_memory = {}
+_memory_lock = threading.Lock()
+_revalidating = set()
+_revalidate_threads = []
+
+_collection = None
+_unavailable = False
+_collection_lock = threading.Lock()
+
+def get_cache_collection():
+    """Önbellek koleksiyonu (süreç genelinde tek bağlantı, ilk kullanımda açılır)
+
+    MongoDB'ye ulaşılamazsa None döner; hata hatırlanır, süreç boyunca tekrar denenmez.
+    """
+    global _collection, _unavailable
+    with _collection_lock:
+        if _collection is None and not _unavailable:
+            try:
+                client = MongoClient('mongodb://localhost:27017/', serverSelectionTimeoutMS=SERVER_SELECTION_TIMEOUT_MS)
+                collection = client['ecommerce_analytics'][CACHE_COLLECTION]
+                collection.create_index([("platform", 1), ("product_key", 1)], unique=True)
+                # Eski değer süresi de geçen kayıtları MongoDB kendisi siler
+                collection.create_index("fetched_at", expireAfterSeconds=int(METADATA_TTL + METADATA_STALE))
+                _collection = collection
+            except PyMongoError as e:
+                _unavailable = True
+                print(f"    ⚠️ Ürün bilgisi önbelleği için MongoDB'ye ulaşılamadı, bu süreçte önbellek kullanılmayacak: {e}", file=sys.stderr)
+        return _collection
+
+def cache_key(platform, product_url):
+    platform = (platform or '').lower()
+    return platform, product_key(platform, product_url)
+
+def _load(key):
+    """Kaydı bellekten, yoksa MongoDB'den oku: (fetched_at epoch, data) ya da None"""
+    with _memory_lock:
+        entry = _memory.get(key)
+    if entry is not None:
+        return entry
+    collection = get_cache_collection()
+    if collection is None:
+        return None
+    try:
+        doc = collection.find_one({"platform": key[0], "product_key": key[1]})
+    except PyMongoError as e:
+        print(f"    ⚠️ Ürün bilgisi önbelleği okunamadı: {e}", file=sys.stderr)
+        return None
+    if not doc:
+        return None
+    # pymongo tarihleri UTC ama saat dilimsiz döndürür
+    entry = (doc["fetched_at"].replace(tzinfo=timezone.utc).timestamp(), doc.get("data") or {})
+    with _memory_lock:
+        _memory.setdefault(key, entry)
+    return entry
+
+def _store(key, product_url, data):
+    """Yeni okunan alanları mevcut kaydın üzerine yazarak bellekte ve MongoDB'de sakla"""
+    now = time.time()
+    with _memory_lock:
+        previous = _memory.get(key)
+        merged = {**(previous[1] if previous else {}), **data}
+        _memory[key] = (now, merged)
+    collection = get_cache_collection()
+    if collection is None:
+        return merged
+    try:
+        collection.update_one(
+            {"platform": key[0], "product_key": key[1]},
+            {"$set": {"product_url": product_url, "data": merged, "fetched_at": datetime.fromtimestamp(now, timezone.utc)}},
+            upsert=True,
+        )
+    except PyMongoError as e:
+        print(f"    ⚠️ Ürün bilgisi önbelleğe yazılamadı: {e}", file=sys.stderr)
+    return merged
+
+def _usable(data):
+    # Sayfa açılamadıysa tüm alanlar boş gelir; bu sonuç önbelleğe alınmaz
+    return any(value not in (None, '', 0, 0.0) for value in data.values())
+
+def _revalidate(key, product_url, fetch, profile):
+    try:
+        driver = acquire_driver(profile, timeout=REVALIDATE_ACQUIRE_TIMEOUT)
+    except Exception as e:
+        print(f"    ⚠️ Ürün bilgisi arka planda yenilenemedi: {e}", file=sys.stderr)
+        with _memory_lock:
+            _revalidating.discard(key)
+        return
+    try:
+        data = fetch(driver)
+        if _usable(data):
+            _store(key, product_url, data)
+            print(f"    🔄 Ürün bilgisi arka planda yenilendi: {key[0]} {key[1]}", file=sys.stderr)
+    except Exception as e:
+        print(f"    ⚠️ Ürün bilgisi arka planda yenilenemedi: {e}", file=sys.stderr)
+    finally:
+        release_driver(driver, profile)
+        with _memory_lock:
+            _revalidating.discard(key)
+
+@atexit.register
+def wait_revalidations():
+    """Süren arka plan yenilemelerini (en fazla REVALIDATE_EXIT_WAIT saniye) bekle"""
+    deadline = time.time() + REVALIDATE_EXIT_WAIT
+    with _memory_lock:
+        threads = [thread for thread in _revalidate_threads if thread.is_alive()]
+        _revalidate_threads.clear()
+    if threads:
+        print(f"    ⏳ {len(threads)} ürün bilgisi yenilemesinin bitmesi bekleniyor...", file=sys.stderr)
+    for thread in threads:
+        thread.join(max(0.0, deadline - time.time()))
+
+def cached_metadata(driver, platform, product_url, fetch, fields=None, profile="default"):
+    """Ürün bilgisini önbellekten döndür; yoksa fetch(driver) ile ürün sayfasından okuyup sakla
+
+    fetch(driver) → {alan: değer}; arka plan yenilemesinde başka bir oturumla çağrılır, bu
+    yüzden verilen driver parametresini kullanmalıdır. fields verilirse kayıt yalnızca bu
+    alanların hepsini içeriyorsa kullanılır.
+    """
+    if not CACHE_ENABLED or not product_url:
+        return fetch(driver)
+
+    key = cache_key(platform, product_url)
+    entry = _load(key)
+    if entry is not None and all(field in entry[1] for field in (fields or ())):
+        age = time.time() - entry[0]
+        if age < METADATA_TTL:
+            print(f"    🗃️ Ürün bilgisi önbellekten ({age / 60:.0f} dk önce okundu)", file=sys.stderr)
+            return dict(entry[1])
+        if age < METADATA_TTL + METADATA_STALE:
+            with _memory_lock:
+                start = key not in _revalidating
+                _revalidating.add(key)
+            if start:
+                thread = threading.Thread(target=_revalidate, args=(key, product_url, fetch, profile), daemon=True)
+                with _memory_lock:
+                    _revalidate_threads[:] = [other for other in _revalidate_threads if other.is_alive()]
+                    _revalidate_threads.append(thread)
+                thread.start()
+            print(f"    🗃️ Ürün bilgisi önbellekten ({age / 3600:.1f} saat önce okundu, arka planda yenileniyor)", file=sys.stderr)
+            return dict(entry[1])
+
+    data = fetch(driver)
+    if _usable(data):
+        return dict(_store(key, product_url, data))
+    return data
@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Yorum kayıtları için tamponlu toplu MongoDB yazıcısı.
+
+Scraper'lar her yorum için bir (çoğu zaman üç) insert_one çağırmak yerine
+kayıtları bu yazıcıya ekler. Tampon belirli bir boyuta ulaşınca ya da son
+yazımdan beri belirli bir süre geçince her hedef koleksiyona tek bir sırasız
+bulk_write gönderilir. Kapanışta kalanlar yazılır ve yazım süreleri loglanır.
+
+Her kayda review_fingerprint ile parmak izi eklenir ve kayıt bu alan üzerinden
+UpdateOne(upsert=True) ile yazılır; koleksiyonda parmak izi için benzersiz index
+oluşturulur. Aynı yorum tekrar çekilirse koleksiyon büyümez. Yorum metni olmayan
+kayıtlar (JSON yedeklerindeki ürün özetleri) parmak izi almaz: `id` alanı varsa
+onunla upsert edilir, yoksa olduğu gibi eklenir. comment_date metni
+review_dates ile `comment_datetime` alanına gerçek tarih olarak çevrilir (göreli
+ifadeler kaydın timestamp'ine göre) ve bu alan da index'lenir.
+
+Ayarlar (ortam değişkenleri):
+    SCRAPER_WRITE_BATCH      Tampon bu kadar kayda ulaşınca yazılır (varsayılan 200)
+    SCRAPER_WRITE_FLUSH_SEC  Son yazımdan bu kadar saniye sonra yazılır (varsayılan 2)
+
+Kullanım:
+    with BulkWriter([urun_koleksiyonu, db['trendyol_reviews'], db['all_reviews']]) as writer:
+        for review in reviews:
+            writer.add(review)
+"""
+
+from pymongo.errors import BulkWriteError, PyMongoError
+from pymongo import InsertOne, UpdateOne
+import threading
+import time
+import sys
+import os
+
+from review_fingerprint import FINGERPRINT_FIELD, fingerprint_review
+from review_dates import parse_review_date
+from scrape_timing import record
+
+WRITE_BATCH_SIZE = int(os.getenv("SCRAPER_WRITE_BATCH", "200"))
+WRITE_FLUSH_SECONDS = float(os.getenv("SCRAPER_WRITE_FLUSH_SEC", "2"))
+
+# Süreç içinde index'i zaten oluşturulmuş koleksiyonlar: (veritabanı, koleksiyon)
+_indexed = set()
+_indexed_lock = threading.Lock()
+
+def ensure_fingerprint_index(collection):
+    """Parmak izi alanı için benzersiz index (eski, parmak izsiz kayıtlar için sparse) ve yorum tarihi index'i"""
+    key = (collection.database.name, collection.name)
+    with _indexed_lock:
+        if key in _indexed:
+            return
+        try:
+            collection.create_index(FINGERPRINT_FIELD, unique=True, sparse=True)
+            collection.create_index("comment_datetime", sparse=True)
+        except PyMongoError as e:
+            print(f"    ⚠️ {collection.name} parmak izi index'i oluşturulamadı: {e}", file=sys.stderr)
+        _indexed.add(key)
+
+def ensure_id_index(collection):
+    """Parmak izsiz kayıtların upsert anahtarı `id` için index"""
+    key = (collection.database.name, collection.name, 'id')
+    with _indexed_lock:
+        if key in _indexed:
+            return
+        try:
+            collection.create_index("id", sparse=True)
+        except PyMongoError as e:
+            print(f"    ⚠️ {collection.name} id index'i oluşturulamadı: {e}", file=sys.stderr)
+        _indexed.add(key)
+
+def write_operation(doc):
+    """Kaydın yazım işlemi: parmak iziyle, yoksa id ile upsert; ikisi de yoksa düz ekleme"""
+    fields = {key: value for key, value in doc.items() if key != '_id'}
+    if doc.get(FINGERPRINT_FIELD):
+        return UpdateOne({FINGERPRINT_FIELD: doc[FINGERPRINT_FIELD]}, {"$setOnInsert": fields}, upsert=True)
+    if doc.get('id') is not None:
+        return UpdateOne({'id': doc['id']}, {"$setOnInsert": fields}, upsert=True)
+    return InsertOne(fields)
+
+class BulkWriter:
+    """Kayıtları tamponlayıp hedef koleksiyonların her birine toplu yazan thread-safe yazıcı"""
+
+    def __init__(self, collections, batch_size=WRITE_BATCH_SIZE, flush_seconds=WRITE_FLUSH_SECONDS):
+        self.collections = [collection for collection in collections if collection is not None]
+        self.batch_size = max(1, batch_size)
+        self.flush_seconds = flush_seconds
+        self._buffer = []
+        self._lock = threading.Lock()
+        self._last_flush = time.time()
+        self.written = 0
+        self.existing = 0
+        self.batches = 0
+        self.errors = 0
+        self.write_seconds = 0.0
+        self.max_write_seconds = 0.0
+
+    def add(self, doc):
+        """Kaydı tampona ekle; boyut ya da süre dolduysa yaz"""
+        fingerprint_review(doc)
+        if 'comment_datetime' not in doc:
+            doc['comment_datetime'] = parse_review_date(doc.get('comment_date'), doc.get('timestamp'))
+        with self._lock:
+            self._buffer.append(doc)
+            due = (len(self._buffer) >= self.batch_size
+                   or time.time() - self._last_flush >= self.flush_seconds)
+        if due:
+            self.flush()
+
+    def extend(self, docs):
+        for doc in docs:
+            self.add(doc)
+
+    def flush(self):
+        """Tampondaki kayıtları her koleksiyona tek sırasız bulk_write ile yaz"""
+        with self._lock:
+            batch, self._buffer = self._buffer, []
+            self._last_flush = time.time()
+            if not batch:
+                return
+            # Koleksiyonda olmayan parmak izleri eklenir, olanlara dokunulmaz
+            operations = [write_operation(doc) for doc in batch]
+            keyed_by_id = any(not doc.get(FINGERPRINT_FIELD) and doc.get('id') is not None for doc in batch)
+            for collection in self.collections:
+                ensure_fingerprint_index(collection)
+                if keyed_by_id:
+                    ensure_id_index(collection)
+                started = time.perf_counter()
+                try:
+                    result = collection.bulk_write(operations, ordered=False)
+                    inserted = result.upserted_count + result.inserted_count
+                    self.written += inserted
+                    self.existing += len(operations) - inserted
+                except BulkWriteError as e:
+                    # Eşzamanlı iki upsert aynı parmak izine denk gelirse biri duplicate key (11000) alır
+                    upserted = e.details.get("nUpserted", 0) + e.details.get("nInserted", 0)
+                    duplicates = sum(1 for error in e.details.get("writeErrors", []) if error.get("code") == 11000)
+                    failed = len(e.details.get("writeErrors", [])) - duplicates
+                    self.written += upserted
+                    self.existing += len(operations) - upserted - failed
+                    self.errors += failed
+                    if failed:
+                        print(f"    ⚠️ {collection.name}: {failed} kayıt yazılamadı", file=sys.stderr)
+                except PyMongoError as e:
+                    self.errors += len(operations)
+                    print(f"    ❌ {collection.name} toplu yazım hatası: {e}", file=sys.stderr)
+                elapsed = time.perf_counter() - started
+                record("db_write", elapsed)
+                self.batches += 1
+                self.write_seconds += elapsed
+                self.max_write_seconds = max(self.max_write_seconds, elapsed)
+
+    def stats(self):
+        return {
+            "written": self.written,
+            "existing": self.existing,
+            "batches": self.batches,
+            "errors": self.errors,
+            "avg_write_ms": round(self.write_seconds / self.batches * 1000, 1) if self.batches else 0.0,
+            "max_write_ms": round(self.max_write_seconds * 1000, 1),
+        }
+
+    def close(self):
+        """Kalanları yaz ve yazım istatistiklerini logla"""
+        self.flush()
+        stats = self.stats()
+        if stats["batches"]:
+            print(f"💾 {stats['written']} yeni kayıt, {stats['existing']} zaten vardı; {stats['batches']} toplu yazım "
+                  f"(ort. {stats['avg_write_ms']} ms, en fazla {stats['max_write_ms']} ms)", file=sys.stderr)
+        return stats
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
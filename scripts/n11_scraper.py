@@ -1,19 +1,21 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
-from webdriver_manager.chrome import ChromeDriverManager
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
 import pandas as pd
 from pymongo import MongoClient
+from mongo_writer import BulkWriter
+from driver_pool import acquire_driver, release_driver
+from review_extractors import extract_review_cards
+from http_fetcher import fetch_review_pages
+from page_waits import wait_ready
+from product_metadata import first_price
+from selector_stats import match_first
+from metadata_cache import cached_metadata
+from scrape_timing import timed_job
+from scrape_profiler import profile_from_argv
+from scrape_events import emit_job_started, emit_page_scraped, emit_product_done, emit_summary
 from datetime import datetime
-import time
 import sys
-import json
 import re
 
 def create_safe_collection_name(product_name, platform):
@@ -86,6 +88,16 @@ def extract_product_name_from_url(url):
     
     return "bilinmeyen_urun"
 
+PRICE_SELECTORS = [
+    ".newPrice",
+    ".price",
+    ".product-price",
+    ".ins",
+    ".priceContainer .newPrice",
+    "[class*='price']",
+    "[class*='Price']"
+]
+
 def extract_price_from_product_page(driver, product_url):
     """N11 ürün sayfasından fiyat bilgisini çıkar"""
     price = None
@@ -98,38 +110,12 @@ def extract_price_from_product_page(driver, product_url):
         driver.switch_to.window(driver.window_handles[1])
         
         driver.get(main_product_url)
-        time.sleep(2)
-        
-        # N11 fiyat selectors
-        price_selectors = [
-            ".newPrice",
-            ".price",
-            ".product-price",
-            ".ins",
-            ".priceContainer .newPrice",
-            "[class*='price']",
-            "[class*='Price']"
-        ]
+        wait_ready(driver, 'n11', 'product', timeout=2)
         
-        for selector in price_selectors:
-            try:
-                price_elements = driver.find_elements(By.CSS_SELECTOR, selector)
-                for elem in price_elements:
-                    text = elem.text.strip()
-                    # Fiyat pattern'ini ara (TL, ₺ veya sadece rakam)
-                    price_match = re.search(r'([\d.,]+)\s*(?:TL|₺|)', text)
-                    if price_match:
-                        price_str = price_match.group(1).replace('.', '').replace(',', '.')
-                        try:
-                            price = float(price_str)
-                            print(f"    💰 Fiyat bulundu ({selector}): {price} TL", file=sys.stderr)
-                            break
-                        except ValueError:
-                            continue
-                if price:
-                    break
-            except Exception:
-                continue
+        # N11 fiyat selectors (sıra selector_stats ile öğrenilir)
+        price = match_first(driver, 'n11', 'price', PRICE_SELECTORS, first_price)
+        if price is not None:
+            print(f"    💰 Fiyat bulundu: {price} TL", file=sys.stderr)
         
         # Sekmeyi kapat ve ana sekmeye dön
         driver.close()
@@ -147,6 +133,7 @@ def extract_price_from_product_page(driver, product_url):
     
     return price
 
+@timed_job('n11')
 def scrape_n11_product(product_url, max_pages=8):
     """N11 ürününden yorumları çek"""
     
@@ -163,45 +150,15 @@ def scrape_n11_product(product_url, max_pages=8):
         print(f"❌ MongoDB bağlantı hatası: {e}", file=sys.stderr)
         return {"success": False, "error": f"MongoDB bağlantı hatası: {e}"}
 
-    # ChromeDriver ayarları (Apple Silicon M1/M2 optimizasyonu)
-    options = Options()
-    options.add_argument("--disable-gpu")
-    options.add_argument("--window-size=1920,1080")
-    options.add_argument("--no-sandbox")
-    options.add_argument("--disable-dev-shm-usage")
-    options.add_argument("--disable-blink-features=AutomationControlled")
-    options.add_argument("--disable-web-security")
-    options.add_argument("--allow-running-insecure-content")
-    options.add_argument("--disable-extensions")
-    options.add_argument("--disable-plugins")
-    # options.add_argument("--disable-images")  # Yorumlar için resimler gerekebilir
-    # options.add_argument("--disable-javascript")  # Yorumlar JavaScript ile yüklenebilir
-    options.add_experimental_option("excludeSwitches", ["enable-automation"])
-    options.add_experimental_option('useAutomationExtension', False)
-
+    # Havuzdan sıcak bir Chrome oturumu al
     try:
-        # ChromeDriverManager'da Apple Silicon için özel ayarlar
-        from webdriver_manager.chrome import ChromeDriverManager
-        from webdriver_manager.core.os_manager import PATTERN
-        
-        service = Service(ChromeDriverManager().install())
-        driver = webdriver.Chrome(service=service, options=options)
-        driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
-        print("✅ ChromeDriver başlatıldı (Apple Silicon)", file=sys.stderr)
+        driver = acquire_driver()
     except Exception as e:
         print(f"❌ ChromeDriver hatası: {e}", file=sys.stderr)
-        # Alternatif olarak sistem Chrome'unu kullanmayı dene
-        try:
-            print("🔄 Sistem Chrome'u deneniyor...", file=sys.stderr)
-            options.binary_location = "/Applications/Google Chrome.app/Contents/MacOS/Google Chrome"
-            service = Service("/usr/local/bin/chromedriver")  # Homebrew yolu
-            driver = webdriver.Chrome(service=service, options=options)
-            print("✅ Sistem Chrome'u başarılı", file=sys.stderr)
-        except Exception as e2:
-            print(f"❌ Sistem Chrome hatası: {e2}", file=sys.stderr)
-            return {"success": False, "error": f"ChromeDriver hatası: {e} | Sistem Chrome hatası: {e2}"}
+        return {"success": False, "error": str(e)}
 
     yorumlar = []
+    writer = None
     
     try:
         # Ürün adını URL'den çıkar
@@ -215,49 +172,49 @@ def scrape_n11_product(product_url, max_pages=8):
         # Koleksiyonu temizle
         collection = db[collection_name]
         collection.delete_many({})
+        writer = BulkWriter([collection])
         print(f"🗑️ Eski veriler temizlendi", file=sys.stderr)
+        emit_job_started('n11', product_url=product_url, product_name=product_name,
+                         collection_name=collection_name)
         
-        # Fiyat bilgisini al
-        price = extract_price_from_product_page(driver, product_url)
+        # Fiyat bilgisini al (önbellekte tazeyse ürün sayfası açılmaz)
+        price = cached_metadata(driver, 'n11', product_url,
+                                lambda d: {'price': extract_price_from_product_page(d, product_url)},
+                                fields=('price',))['price']
+        
+        # Sayfaları önce HTTP ile eşzamanlı çek; bot duvarına takılanlar tarayıcıyla çekilir
+        http_sayfalari = fetch_review_pages('n11', [f"{product_url}?pg={page}" for page in range(1, max_pages + 1)])
         
         for page in range(1, max_pages + 1):
             yorum_url = f"{product_url}?pg={page}"
             print(f"\n📄 Sayfa {page}/{max_pages} işleniyor...", file=sys.stderr)
             
             try:
-                driver.get(yorum_url)
-                time.sleep(3)
+                yorum_kartlari = http_sayfalari.get(yorum_url)
+                if yorum_kartlari is None:
+                    driver.get(yorum_url)
+
+                    # Yorumları bekle
+                    if not wait_ready(driver, 'n11', 'reviews', timeout=10):
+                        print(f"⚠️ Sayfa {page}: Yorum bulunamadı", file=sys.stderr)
+                        continue
 
-                # Yorumları bekle
-                try:
-                    WebDriverWait(driver, 10).until(
-                        EC.presence_of_element_located((By.CSS_SELECTOR, "li.comment"))
-                    )
-                except:
+                    # Yorumları tek execute_script ile oku
+                    yorum_kartlari = extract_review_cards(driver, 'n11', selector="li.comment")
+                elif not yorum_kartlari:
                     print(f"⚠️ Sayfa {page}: Yorum bulunamadı", file=sys.stderr)
                     continue
+                print(f"🔍 {len(yorum_kartlari)} yorum bulundu", file=sys.stderr)
+                sayfa_kayitlari = []
 
-                # Yorumları bul
-                yorum_ogeleri = driver.find_elements(By.CSS_SELECTOR, "li.comment")
-                print(f"🔍 {len(yorum_ogeleri)} yorum bulundu", file=sys.stderr)
-
-                for idx, item in enumerate(yorum_ogeleri):
+                for idx, kart in enumerate(yorum_kartlari):
                     try:
-                        yorum_text = item.text.strip()
+                        yorum_text = kart['text']
                         if yorum_text and len(yorum_text) > 10:
                             yorumlar.append(yorum_text)
                             
-                            # N11 yorum tarihi çek
-                            comment_date = None
-                            try:
-                                date_element = item.find_element(By.CSS_SELECTOR, "span.commentDate")
-                                if date_element:
-                                    date_text = date_element.text.strip()
-                                    if date_text:
-                                        comment_date = date_text
-                                        print(f"📅 N11 yorum tarihi bulundu: {comment_date}", file=sys.stderr)
-                            except:
-                                pass  # Tarih bulunamazsa devam et
+                            # N11 yorum tarihi (span.commentDate)
+                            comment_date = kart['date']
                             
                             # MongoDB'ye kaydet
                             review_data = {
@@ -273,7 +230,8 @@ def scrape_n11_product(product_url, max_pages=8):
                                 'likes': 0  # N11'de beğeni sistemi farklı, şimdilik 0
                             }
                             
-                            collection.insert_one(review_data)
+                            writer.add(review_data)
+                            sayfa_kayitlari.append(review_data)
                             
                             if len(yorumlar) % 10 == 0:
                                 print(f"    💾 {len(yorumlar)} yorum kaydedildi...", file=sys.stderr)
@@ -282,6 +240,8 @@ def scrape_n11_product(product_url, max_pages=8):
                         print(f"    ⚠️ Yorum işleme hatası: {inner_e}", file=sys.stderr)
                         continue
 
+                emit_page_scraped('n11', product_url, page, sayfa_kayitlari)
+
             except Exception as page_error:
                 print(f"🚫 Sayfa {page} hatası: {page_error}", file=sys.stderr)
                 continue
@@ -291,11 +251,10 @@ def scrape_n11_product(product_url, max_pages=8):
         return {"success": False, "error": str(e)}
     
     finally:
-        try:
-            driver.quit()
-            print("🔒 Driver kapatıldı", file=sys.stderr)
-        except:
-            pass
+        if writer is not None:
+            writer.close()
+        release_driver(driver)
+        print("🔒 Driver havuza bırakıldı", file=sys.stderr)
 
     # Excel çıktısı oluştur
     try:
@@ -310,6 +269,7 @@ def scrape_n11_product(product_url, max_pages=8):
     print(f"\n✅ N11 scraping tamamlandı!", file=sys.stderr)
     print(f"📊 Toplam yorum: {len(yorumlar)}", file=sys.stderr)
     print(f"🗄️ Koleksiyon: {collection_name}", file=sys.stderr)
+    emit_product_done('n11', product_url, product_name, len(yorumlar), price=price)
     
     return {
         "success": True,
@@ -321,6 +281,7 @@ def scrape_n11_product(product_url, max_pages=8):
     }
 
 if __name__ == "__main__":
+    sys.argv[1:] = profile_from_argv(sys.argv[1:])
     # Test için örnek URL
     if len(sys.argv) > 1:
         test_url = sys.argv[1]
@@ -330,4 +291,4 @@ if __name__ == "__main__":
         max_pages = 8
     
     result = scrape_n11_product(test_url, max_pages)
-    print(json.dumps(result, ensure_ascii=False, indent=2)) 
\ No newline at end of file
+    emit_summary(result) 
\ No newline at end of file
@@ -1,19 +1,28 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from webdriver_manager.chrome import ChromeDriverManager
 import time
 from datetime import datetime
 import sys
-import json
 import re
 from pymongo import MongoClient
+from mongo_writer import BulkWriter
+from review_fingerprint import fingerprint_review
+from driver_pool import LazyDriver, acquire_driver, release_driver
+from review_extractors import extract_review_cards
+from http_fetcher import fetch_review_pages
+from page_waits import wait_ready
+from product_metadata import extract_product_metadata, first_price
+from selector_stats import match_first
+from rating_resolver import resolve_rating
+from search_cache import cached_search
+from parallel_scrape import scrape_products_parallel
+from scrape_state import ProductWatermark, save_watermarks
+from scrape_timing import timed_job
+from scrape_profiler import profile_from_argv
+from site_urls import site_url
+from scrape_events import emit_job_started, emit_product_discovered, emit_page_scraped, emit_product_done, emit_summary
 
 def create_safe_collection_name(product_name, platform):
     """Ürün adından güvenli koleksiyon adı oluştur"""
@@ -85,158 +94,54 @@ def extract_product_name_from_url(url):
     
     return "bilinmeyen_urun"
 
-def extract_price_from_product_page(driver, product_url):
-    """N11 ürün sayfasından fiyat bilgisini çıkar"""
-    price = None
-    try:
-        # Yorumlar URL'sinden ana ürün URL'sine çevir
-        main_product_url = product_url.split('?')[0]
-        
-        # Yeni sekmede açarak mevcut scraping'i bozmayalım
-        driver.execute_script("window.open('');")
-        driver.switch_to.window(driver.window_handles[1])
-        
-        driver.get(main_product_url)
-        time.sleep(2)
-        
-        # N11 fiyat selectors
-        price_selectors = [
-            ".newPrice",
-            ".price",
-            ".product-price",
-            ".ins",
-            ".priceContainer .newPrice",
-            "[class*='price']",
-            "[class*='Price']"
-        ]
-        
-        for selector in price_selectors:
-            try:
-                price_elements = driver.find_elements(By.CSS_SELECTOR, selector)
-                for elem in price_elements:
-                    text = elem.text.strip()
-                    # Fiyat pattern'ini ara (TL, ₺ veya sadece rakam)
-                    price_match = re.search(r'([\d.,]+)\s*(?:TL|₺|)', text)
-                    if price_match:
-                        price_str = price_match.group(1).replace('.', '').replace(',', '.')
-                        try:
-                            price = float(price_str)
-                            print(f"    💰 Fiyat bulundu ({selector}): {price} TL", file=sys.stderr)
-                            break
-                        except ValueError:
-                            continue
-                if price:
-                    break
-            except Exception:
-                continue
-        
-        # Sekmeyi kapat ve ana sekmeye dön
-        driver.close()
-        driver.switch_to.window(driver.window_handles[0])
-        
-    except Exception as e:
-        print(f"    ⚠️ Fiyat çıkarma hatası: {e}", file=sys.stderr)
-        # Hata durumunda doğru sekmeye döndüğümüzden emin ol
-        try:
-            if len(driver.window_handles) > 1:
-                driver.close()
-            driver.switch_to.window(driver.window_handles[0])
-        except:
-            pass
-    
+# N11 fiyat seçicileri; sıra selector_stats ile öğrenilir
+PRICE_SELECTORS = [
+    ".newPrice",
+    ".price",
+    ".product-price",
+    ".ins",
+    ".priceContainer .newPrice",
+    "[class*='price']",
+    "[class*='Price']"
+]
+
+def read_price_from_page(driver):
+    """Açık N11 ürün sayfasından fiyat bilgisini çıkar (yapısal veri yoksa)"""
+    price = match_first(driver, 'n11', 'price', PRICE_SELECTORS, first_price)
+    if price is not None:
+        print(f"    💰 Fiyat bulundu: {price} TL", file=sys.stderr)
     return price
 
-def extract_n11_product_rating(driver, product_url):
-    """N11 ürün sayfasından ortalama rating skorunu çek"""
-    rating = 0.0
-    
-    try:
-        # Yeni sekme aç
-        driver.execute_script("window.open('');")
-        driver.switch_to.window(driver.window_handles[-1])
-        driver.get(product_url)
-        time.sleep(2)
-        
-        # Rating çıkarma denemeleri (öncelik sırasına göre)
-        rating_selectors = [
-            "span.reviews-summary-average-rating",  # Önerilen selector
-            ".ratingScore",
-            ".rating-score", 
-            ".review-score",
-            "span[class*='rating']",
-            "div[class*='rating']",
-            ".averageRating",
-            "span.rating",
-            "div.rating"
-        ]
-        
-        for selector in rating_selectors:
-            try:
-                rating_element = driver.find_element(By.CSS_SELECTOR, selector)
-                rating_text = rating_element.text.strip()
-                
-                # Rating'i sayıya çevir
-                if rating_text:
-                    # "4,5" veya "4.5" formatını çevir
-                    rating_text = rating_text.replace(',', '.')
-                    
-                    # Sadece sayı kısmını al (ör: "4.5/5" -> "4.5")
-                    import re
-                    rating_match = re.search(r'(\d+[.,]\d+|\d+)', rating_text)
-                    if rating_match:
-                        rating_val = float(rating_match.group(1).replace(',', '.'))
-                        if 0 <= rating_val <= 5:
-                            rating = rating_val
-                            print(f"    ⭐ N11 rating bulundu ({selector}): {rating}", file=sys.stderr)
-                            break
-                            
-            except Exception:
-                continue
-        
-        # Sekmeyi kapat ve ana sekmeye dön
-        driver.close()
-        driver.switch_to.window(driver.window_handles[0])
-        
-    except Exception as e:
-        print(f"    ⚠️ Rating çıkarma hatası: {e}", file=sys.stderr)
-        # Hata durumunda doğru sekmeye döndüğümüzden emin ol
-        try:
-            if len(driver.window_handles) > 1:
-                driver.close()
-            driver.switch_to.window(driver.window_handles[0])
-        except:
-            pass
-    
-    return rating
+# Rating seçicileri (öncelik sırasına göre)
+RATING_SELECTORS = [
+    "span.reviews-summary-average-rating",  # Önerilen selector
+    ".ratingScore",
+    ".rating-score",
+    ".review-score",
+    "span[class*='rating']",
+    "div[class*='rating']",
+    ".averageRating",
+    "span.rating",
+    "div.rating"
+]
 
-def scrape_n11_product_reviews(product_url, max_pages=8, search_term=None, reviews_list=None):
-    """Tek N11 ürününden yorumları çek"""
-    
-    # ChromeDriver ayarları
-    options = Options()
-    options.add_argument("--disable-gpu")
-    options.add_argument("--window-size=1920,1080")
-    options.add_argument("--no-sandbox")
-    options.add_argument("--disable-dev-shm-usage")
-    options.add_argument("--disable-blink-features=AutomationControlled")
-    options.add_experimental_option("excludeSwitches", ["enable-automation"])
-    options.add_experimental_option('useAutomationExtension', False)
+def read_n11_rating_from_page(driver):
+    """Açık N11 ürün sayfasından ortalama rating skorunu çek (yapısal veri yoksa)"""
+    # "4,5" ve "4.5/5" gibi metinler de kabul edilir
+    return resolve_rating(driver, 'n11', RATING_SELECTORS, loose=True)
 
-    try:
-        driver_path = "/opt/homebrew/bin/chromedriver"
-        driver = webdriver.Chrome(service=Service(driver_path), options=options)
-        driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
-        print(f"✅ ChromeDriver başlatıldı: {driver_path}", file=sys.stderr)
-    except Exception as e:
-        print(f"❌ Manuel path başarısız, otomatik indirme deneniyor: {e}", file=sys.stderr)
-        try:
-            driver = webdriver.Chrome(service=Service(ChromeDriverManager().install()), options=options)
-            driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
-        except Exception as e2:
-            print(f"❌ ChromeDriver hatası: {e2}", file=sys.stderr)
-        return {"success": False, "error": f"ChromeDriver hatası: {e}"}
+def scrape_n11_product_reviews(product_url, max_pages=8, search_term=None, writer=None, watermarks=None):
+    """Tek N11 ürününden yorumları çek; bilinen yorumlara ulaşınca kalan sayfaları atla
+
+    Her sayfanın kayıtları sayfa bitince writer'a (arama koleksiyonunun BulkWriter'ı) eklenir.
+    """
+    
+    # Havuz oturumu yalnızca ürün sayfası (önbellekte yoksa) ya da HTTP'nin okuyamadığı bir
+    # yorum sayfası için alınır (paralel çekimde her ürün kendi oturumunu alır)
+    driver = LazyDriver()
 
     yorumlar = []
+    gorulen_parmak_izleri = set()  # Ürünün tüm sayfaları için tekrar kontrolü
     
     try:
         # Ürün adını URL'den çıkar
@@ -247,50 +152,56 @@ def scrape_n11_product_reviews(product_url, max_pages=8, search_term=None, revie
         collection_name = create_safe_collection_name(product_name, "n11")
         print(f"🗄️ Koleksiyon adı: {collection_name}", file=sys.stderr)
         
-        # Fiyat bilgisini al
-        price = extract_price_from_product_page(driver, product_url)
+        # Fiyat, rating ve satıcı bilgisini tek ürün sayfası ziyaretinde al
+        urun_bilgisi = extract_product_metadata(driver, 'n11', product_url, timeout=2,
+                                                readers={'price': read_price_from_page, 'rating': read_n11_rating_from_page})
+        price = urun_bilgisi['price']
+        product_rating = urun_bilgisi['rating'] or 0.0
         
-        # Rating bilgisini al
-        product_rating = extract_n11_product_rating(driver, product_url)
+        # Daha önce çekilmiş ürünlerde bilinen yorumlara ulaşınca durulur (yorumlar yazıldıktan sonra kaydedilir)
+        watermark = ProductWatermark('n11', product_url, product_name)
+        if watermarks is not None:
+            watermarks.append(watermark)
+        
+        # Sayfaları önce HTTP ile eşzamanlı çek; bot duvarına takılanlar tarayıcıyla çekilir.
+        # Artımlı çekimde çoğu sayfaya gerek kalmaz, sayfalar sırayla tek tek indirilir
+        if watermark.incremental:
+            http_sayfalari = {}
+        else:
+            http_sayfalari = fetch_review_pages('n11', [f"{product_url}?pg={page}" for page in range(1, max_pages + 1)])
         
         for page in range(1, max_pages + 1):
             yorum_url = f"{product_url}?pg={page}"
             print(f"📄 Sayfa {page}/{max_pages} işleniyor...", file=sys.stderr)
             
             try:
-                driver.get(yorum_url)
-                time.sleep(3)
+                if watermark.incremental and yorum_url not in http_sayfalari:
+                    http_sayfalari.update(fetch_review_pages('n11', [yorum_url], first_page=page == 1))
+                yorum_kartlari = http_sayfalari.get(yorum_url)
+                if yorum_kartlari is None:
+                    driver.get(yorum_url)
 
-                # Yorumları bekle
-                try:
-                    WebDriverWait(driver, 10).until(
-                        EC.presence_of_element_located((By.CSS_SELECTOR, "li.comment"))
-                    )
-                except:
+                    # Yorumları bekle
+                    if not wait_ready(driver, 'n11', 'reviews', timeout=10):
+                        print(f"⚠️ Sayfa {page}: Yorum bulunamadı", file=sys.stderr)
+                        continue
+
+                    # Yorumları tek execute_script ile oku
+                    yorum_kartlari = extract_review_cards(driver, 'n11', selector="li.comment")
+                elif not yorum_kartlari:
                     print(f"⚠️ Sayfa {page}: Yorum bulunamadı", file=sys.stderr)
+                    if watermark.incremental:
+                        break  # Sayfalar sırayla istendi; boş sayfa son sayfanın ötesidir
                     continue
+                print(f"🔍 {len(yorum_kartlari)} yorum bulundu", file=sys.stderr)
+                sayfa_kayitlari = []
 
-                # Yorumları bul
-                yorum_ogeleri = driver.find_elements(By.CSS_SELECTOR, "li.comment")
-                print(f"🔍 {len(yorum_ogeleri)} yorum bulundu", file=sys.stderr)
-
-                for idx, item in enumerate(yorum_ogeleri):
+                for idx, kart in enumerate(yorum_kartlari):
                     try:
-                        yorum_text = item.text.strip()
+                        yorum_text = kart['text']
                         if yorum_text and len(yorum_text) > 10:
-                            yorumlar.append(yorum_text)
-                            
-                            # N11 yorum tarihi çek
-                            comment_date = None
-                            try:
-                                date_element = item.find_element(By.CSS_SELECTOR, "span.commentDate")
-                                if date_element:
-                                    date_text = date_element.text.strip()
-                                    if date_text:
-                                        comment_date = date_text
-                                        print(f"📅 N11 yorum tarihi bulundu: {comment_date}", file=sys.stderr)
-                            except:
-                                pass  # Tarih bulunamazsa devam et
+                            # N11 yorum tarihi (span.commentDate)
+                            comment_date = kart['date']
                             
                             # MongoDB'ye kaydet
                             review_data = {
@@ -305,15 +216,32 @@ def scrape_n11_product_reviews(product_url, max_pages=8, search_term=None, revie
                                 'page_number': page,
                                 'review_index': idx + 1,
                                 'price': price,
-                                'search_term': search_term  # Arama terimi eklendi
+                                'rating_count': urun_bilgisi['rating_count'],
+                                'seller': urun_bilgisi['seller'],
+                                'search_term': search_term,  # Arama terimi eklendi
+                                'id': f"n11_{len(yorumlar)}_{int(time.time())}"
                             }
                             
-                            reviews_list.append(review_data)
+                            # Tekrar kontrolü parmak iziyle (platform + ürün + normalize metin + tarih)
+                            parmak_izi = fingerprint_review(review_data)
+                            if parmak_izi in gorulen_parmak_izleri:
+                                continue
+                            gorulen_parmak_izleri.add(parmak_izi)
+                            yorumlar.append(yorum_text)
+                            sayfa_kayitlari.append(review_data)
                                 
                     except Exception as inner_e:
                         print(f"    ⚠️ Yorum işleme hatası: {inner_e}", file=sys.stderr)
                         continue
 
+                # Sayfa bitince arama koleksiyonuna yazılmak üzere ortak yazıcıya eklenir
+                bilinene_ulasildi = watermark.observe_records(sayfa_kayitlari)
+                if writer is not None:
+                    writer.extend(sayfa_kayitlari)
+                emit_page_scraped('n11', product_url, page, sayfa_kayitlari)
+                if bilinene_ulasildi:
+                    break
+
             except Exception as page_error:
                 print(f"🚫 Sayfa {page} hatası: {page_error}", file=sys.stderr)
                 continue
@@ -323,12 +251,12 @@ def scrape_n11_product_reviews(product_url, max_pages=8, search_term=None, revie
         return {"success": False, "error": str(e)}
     
     finally:
-        try:
-            driver.quit()
-        except:
-            pass
+        driver.release()
 
     print(f"✅ {product_name} için {len(yorumlar)} yorum çekildi", file=sys.stderr)
+    emit_product_done('n11', product_url, product_name, len(yorumlar),
+                      price=price, product_rating=product_rating,
+                      rating_count=urun_bilgisi['rating_count'], seller=urun_bilgisi['seller'])
     
     return {
         "success": True,
@@ -340,23 +268,23 @@ def scrape_n11_product_reviews(product_url, max_pages=8, search_term=None, revie
     }
 
 def find_n11_products(search_term, max_products=5):
-    """N11'de ürün arama yap ve ürün URL'lerini döndür"""
+    """N11'de ürün arama yap ve ürün URL'lerini döndür (aynı arama yakın zamanda yapıldıysa önbellekten)"""
+    product_urls = cached_search('n11', search_term, max_products,
+                                 lambda: search_n11_product_urls(search_term, max_products))
     
-    # ChromeDriver ayarları
-    options = Options()
-    options.add_argument("--disable-gpu")
-    options.add_argument("--window-size=1920,1080")
-    options.add_argument("--no-sandbox")
-    options.add_argument("--disable-dev-shm-usage")
-    options.add_argument("--disable-blink-features=AutomationControlled")
-    options.add_experimental_option("excludeSwitches", ["enable-automation"])
-    options.add_experimental_option('useAutomationExtension', False)
+    for i, url in enumerate(product_urls, 1):
+        product_name = extract_product_name_from_url(url)
+        print(f"    📦 Ürün {i}: {product_name}", file=sys.stderr)
+        emit_product_discovered('n11', url, product_name, i)
+    
+    return product_urls
 
+def search_n11_product_urls(search_term, max_products=5):
+    """N11 arama sayfasını açıp ilk max_products ürünün URL'lerini topla"""
+    
+    # Havuzdan sıcak bir Chrome oturumu al
     try:
-        driver_path = "/opt/homebrew/bin/chromedriver"
-        driver = webdriver.Chrome(service=Service(driver_path), options=options)
-        driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
-        print(f"✅ ChromeDriver başlatıldı: {driver_path}", file=sys.stderr)
+        driver = acquire_driver()
     except Exception as e:
         print(f"❌ ChromeDriver hatası: {e}", file=sys.stderr)
         return []
@@ -365,11 +293,11 @@ def find_n11_products(search_term, max_products=5):
     
     try:
         # N11 arama URL'si
-        search_url = f"https://www.n11.com/arama?q={search_term.replace(' ', '+')}"
+        search_url = site_url('n11', f"/arama?q={search_term.replace(' ', '+')}")
         print(f"🔍 N11 arama URL'si: {search_url}", file=sys.stderr)
         
         driver.get(search_url)
-        time.sleep(3)
+        wait_ready(driver, 'n11', 'search', timeout=3)
 
         # Ürün linklerini bul
         product_selectors = [
@@ -395,23 +323,17 @@ def find_n11_products(search_term, max_products=5):
         
         # İlk max_products kadar ürünü al
         product_urls = all_product_links[:max_products]
-        
-        for i, url in enumerate(product_urls, 1):
-            product_name = extract_product_name_from_url(url)
-            print(f"    📦 Ürün {i}: {product_name}", file=sys.stderr)
 
     except Exception as e:
         print(f"❌ N11 arama hatası: {e}", file=sys.stderr)
         return []
     
     finally:
-        try:
-            driver.quit()
-        except:
-            pass
+        release_driver(driver)
 
     return product_urls
 
+@timed_job('n11')
 def scrape_n11_by_product_name(product_name, max_products=5, pages_per_product=8):
     """N11'de ürün adına göre arama yap ve yorumları tek koleksiyonda topla"""
     
@@ -423,9 +345,10 @@ def scrape_n11_by_product_name(product_name, max_products=5, pages_per_product=8
     # Arama terimine göre tek koleksiyon oluştur
     search_collection_name = create_safe_collection_name(product_name, "n11")
     print(f"🗄️ Arama koleksiyonu: {search_collection_name}", file=sys.stderr)
+    emit_job_started('n11', search_term=product_name, max_products=max_products,
+                     pages_per_product=pages_per_product, collection_name=search_collection_name)
     
-    # Yorumları saklamak için liste
-    all_reviews = []
+    watermarks = []
 
     # Ürünleri ara
     print(f"\n🔍 N11'de '{product_name}' aranıyor...", file=sys.stderr)
@@ -436,62 +359,46 @@ def scrape_n11_by_product_name(product_name, max_products=5, pages_per_product=8
     
     print(f"✅ {len(product_urls)} ürün bulundu, yorumlar tek koleksiyonda toplanıyor...", file=sys.stderr)
     
-    # Her ürün için yorumları çek ve aynı koleksiyona kaydet
+    # Yorumlar sayfa sayfa arama koleksiyonuna yazılır; iş sonunda bellekte tutulmaz
+    client = MongoClient('mongodb://localhost:27017/')
+    safe_search_term = re.sub(r'[^a-zA-Z0-9]', '_', product_name.lower())
+    collection_name = f"n11_reviews_{safe_search_term}"
+    coll = client['ecommerce_analytics'][collection_name]
+
     all_results = []
     total_reviews = 0
     
-    for i, product_url in enumerate(product_urls, 1):
-        print(f"\n📦 Ürün {i}/{len(product_urls)} işleniyor...", file=sys.stderr)
-        
-        # Paylaşılan koleksiyon ve DB'yi geç
-        result = scrape_n11_product_reviews(
-            product_url, 
-            pages_per_product,
-            search_term=product_name,  # Arama terimi
-            reviews_list=all_reviews  # Ortak liste
-        )
-        
-        if result["success"]:
-            all_results.append(result)
-            total_reviews += result["total_reviews"]
-            print(f"    ✅ {result['product_name']}: {result['total_reviews']} yorum → {search_collection_name}", file=sys.stderr)
-        else:
-            print(f"    ❌ Ürün {i} hatası: {result.get('error', 'Bilinmeyen hata')}", file=sys.stderr)
-        
-        # Ürünler arası kısa bekleme
-        if i < len(product_urls):
-            time.sleep(2)
+    # Parmak izi üzerinden upsert: tekrar çekimde yalnızca yeni yorumlar eklenir
+    with BulkWriter([coll]) as writer:
+        # Ürünleri paralel çek (her ürün kendi oturumunda), yorumlar ortak yazıcıya eklenir
+        def urun_cek(i, product_url):
+            print(f"\n📦 Ürün {i}/{len(product_urls)} işleniyor...", file=sys.stderr)
+            return scrape_n11_product_reviews(
+                product_url, 
+                pages_per_product,
+                search_term=product_name,  # Arama terimi
+                writer=writer,  # Ortak yazıcı
+                watermarks=watermarks
+            )
+
+        for i, result in enumerate(scrape_products_parallel(product_urls, urun_cek), 1):
+            if result["success"]:
+                all_results.append(result)
+                total_reviews += result["total_reviews"]
+                print(f"    ✅ {result['product_name']}: {result['total_reviews']} yorum → {search_collection_name}", file=sys.stderr)
+            else:
+                print(f"    ❌ Ürün {i} hatası: {result.get('error', 'Bilinmeyen hata')}", file=sys.stderr)
+    client.close()
     
     print(f"\n✅ N11 scraping tamamlandı!", file=sys.stderr)
     print(f"📊 Toplam yorum: {total_reviews}", file=sys.stderr)
     print(f"📦 İşlenen ürün: {len(all_results)}", file=sys.stderr)
     print(f"🗄️ Tüm yorumlar tek koleksiyonda: {search_collection_name}", file=sys.stderr)
+    print(f"    ✅ {writer.written} yeni yorum MongoDB'ye ({collection_name}) kaydedildi ({writer.existing} zaten vardı)", file=sys.stderr)
     
-    # MongoDB'ye kaydet
-    try:
-        print(f"💾 MongoDB'ye kaydediliyor...", file=sys.stderr)
-        client = MongoClient('mongodb://localhost:27017/')
-        db = client['ecommerce_analytics']
-        
-        # Güvenli koleksiyon adı oluştur
-        safe_search_term = re.sub(r'[^a-zA-Z0-9]', '_', product_name.lower())
-        collection_name = f"n11_reviews_{safe_search_term}"
-        coll = db[collection_name]
-        
-        if all_reviews:
-            # Basit ID üret
-            for idx, review in enumerate(all_reviews):
-                if 'id' not in review:
-                    review['id'] = f"n11_{idx}_{int(time.time())}"
-                    
-            coll.insert_many(all_reviews, ordered=False)
-            print(f"    ✅ {len(all_reviews)} yorum MongoDB'ye kaydedildi", file=sys.stderr)
-        else:
-            print(f"    ⚠️ Kaydedilecek yorum yok", file=sys.stderr)
-            
-        client.close()
-    except Exception as e:
-        print(f"    ❌ MongoDB kaydetme hatası: {e}", file=sys.stderr)
+    # Yorumlar yazıldı; sonraki çekim bu noktadan sonrasını çeker
+    if not writer.errors:
+        save_watermarks(watermarks)
     
     return {
         "success": True,
@@ -500,11 +407,11 @@ def scrape_n11_by_product_name(product_name, max_products=5, pages_per_product=8
         "platform": "n11",
         "search_term": product_name,
         "collection_name": search_collection_name,
-        "results": all_results,
-        "all_reviews": all_reviews
+        "results": all_results
     }
 
 if __name__ == "__main__":
+    sys.argv[1:] = profile_from_argv(sys.argv[1:])
     # Test için örnek kullanım
     if len(sys.argv) > 1:
         search_term = sys.argv[1]
@@ -516,4 +423,4 @@ if __name__ == "__main__":
         pages_per_product = 8
     
     result = scrape_n11_by_product_name(search_term, max_products, pages_per_product)
-    print(json.dumps(result, ensure_ascii=False, indent=2, default=str)) 
\ No newline at end of file
+    emit_summary(result) 
\ No newline at end of file
@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Chrome DevTools performance log'u üzerinden yorum API yanıtlarını yakalama.
+
+Trendyol'un sonsuz scroll'u ve AliExpress'in yorum modalı yorumları JSON
+uç noktalarından yükler. DOM'u scroll edip seçicilerle okumak yerine bu yanıtlar
+CDP ağ olaylarından yakalanır, yorumlar doğrudan JSON'dan ayrıştırılır ve kalan
+sayfalar aynı isteğin `page` parametresi değiştirilerek requests ile istenir.
+
+Performance log yalnızca "capture" profilindeki oturumlarda açıktır:
+    driver = acquire_driver("capture")
+    capture = NetworkCapture(driver, 'trendyol')
+    driver.get(url)
+    kartlar = capture.collect_reviews(max_pages=20)   # boşsa DOM yoluna dön
+
+Kartlar review_extractors ile aynı {text, date, rating, likes, author} biçimindedir.
+"""
+
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+from datetime import datetime
+import base64
+import json
+import sys
+import re
+
+from http_fetcher import get_http_session, HTTP_TIMEOUT
+from scrape_timing import span
+
+# platform → yorum API'sini tanıyan URL deseni ve sayfa parametresi
+REVIEW_APIS = {
+    'trendyol': {
+        'pattern': re.compile(r'product-reviews|review-rating|/reviews', re.I),
+        'page_param': 'page',
+    },
+    'aliexpress': {
+        'pattern': re.compile(r'searchEvaluation|/feedback', re.I),
+        'page_param': 'page',
+    },
+}
+
+TEXT_KEYS = ('comment', 'buyerFeedback', 'reviewContent', 'reviewText')
+RATING_KEYS = ('rate', 'rating', 'star', 'buyerEval')
+DATE_KEYS = ('commentDateISOtype', 'commentDate', 'evalDate', 'createdDate', 'lastModifiedDate', 'date')
+LIKE_KEYS = ('reviewLikeCount', 'likeCount', 'upVoteCount', 'helpfulCount')
+AUTHOR_KEYS = ('userFullName', 'buyerName', 'userName', 'nickName')
+
+def _first(item, keys):
+    for key in keys:
+        value = item.get(key)
+        if value not in (None, ''):
+            return value
+    return None
+
+def _normalize_date(value):
+    # Epoch milisaniye / saniye gelirse okunur tarihe çevir, metinler olduğu gibi kalır
+    if isinstance(value, (int, float)):
+        seconds = value / 1000 if value > 10**11 else value
+        try:
+            return datetime.fromtimestamp(seconds).strftime('%Y-%m-%d')
+        except (OverflowError, OSError, ValueError):
+            return None
+    return value
+
+def _normalize_rating(value):
+    try:
+        rating = float(value)
+    except (TypeError, ValueError):
+        return None
+    # AliExpress buyerEval 0-100 ölçeğinde
+    return rating / 20 if rating > 5 else rating
+
+def find_reviews(payload):
+    """JSON içinde yorum metni taşıyan tüm nesneleri bul ve kart biçimine çevir"""
+    cards = []
+    stack = [payload]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, list):
+            stack.extend(reversed(node))
+            continue
+        if not isinstance(node, dict):
+            continue
+        text = _first(node, TEXT_KEYS)
+        if isinstance(text, str) and text.strip():
+            likes = _first(node, LIKE_KEYS)
+            cards.append({
+                'text': text.strip(),
+                'date': _normalize_date(_first(node, DATE_KEYS)),
+                'rating': _normalize_rating(_first(node, RATING_KEYS)),
+                'likes': int(likes) if isinstance(likes, (int, float)) else 0,
+                'author': _first(node, AUTHOR_KEYS),
+            })
+            continue
+        stack.extend(reversed(list(node.values())))
+    return cards
+
+def with_page(url, page_param, page):
+    """URL'deki sayfa parametresini değiştir (yoksa ekle)"""
+    parts = urlsplit(url)
+    query = [(key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True) if key != page_param]
+    query.append((page_param, str(page)))
+    return urlunsplit(parts._replace(query=urlencode(query)))
+
+def current_page(url, page_param):
+    for key, value in parse_qsl(urlsplit(url).query):
+        if key == page_param and value.isdigit():
+            return int(value)
+    return None
+
+class NetworkCapture:
+    """Bir sürücü oturumunda platformun yorum API yanıtlarını toplar"""
+
+    def __init__(self, driver, platform):
+        self.driver = driver
+        self.platform = platform
+        self.api = REVIEW_APIS[platform]
+        self.enabled = True
+        try:
+            driver.execute_cdp_cmd("Network.enable", {})
+            driver.get_log("performance")  # önceki işlerden kalan olayları at
+        except Exception as e:
+            print(f"ℹ️ Ağ yakalama kullanılamıyor ({platform}): {e}", file=sys.stderr)
+            self.enabled = False
+
+    def responses(self):
+        """Son çağrıdan bu yana tamamlanan yorum API yanıtları: [(url, payload)]"""
+        if not self.enabled:
+            return []
+        try:
+            entries = self.driver.get_log("performance")
+        except Exception:
+            return []
+
+        matched, finished = {}, []
+        for entry in entries:
+            try:
+                message = json.loads(entry["message"])["message"]
+            except (KeyError, ValueError):
+                continue
+            params = message.get("params", {})
+            if message.get("method") == "Network.responseReceived":
+                response = params.get("response", {})
+                if self.api['pattern'].search(response.get("url", "")) and "json" in response.get("mimeType", ""):
+                    matched[params.get("requestId")] = response["url"]
+            elif message.get("method") == "Network.loadingFinished" and params.get("requestId") in matched:
+                finished.append(params["requestId"])
+
+        results = []
+        for request_id in finished:
+            try:
+                body = self.driver.execute_cdp_cmd("Network.getResponseBody", {"requestId": request_id})
+                raw = base64.b64decode(body["body"]) if body.get("base64Encoded") else body["body"]
+                results.append((matched[request_id], json.loads(raw)))
+            except Exception:
+                continue
+        return results
+
+    def _replay_session(self):
+        """Tarayıcının çerezleri ve user-agent'ı ile requests oturumu başlıkları"""
+        cookies = {cookie['name']: cookie['value'] for cookie in self.driver.get_cookies()}
+        headers = {
+            "User-Agent": self.driver.execute_script("return navigator.userAgent;"),
+            "Accept": "application/json, text/plain, */*",
+            "Referer": self.driver.current_url,
+        }
+        return cookies, headers
+
+    def collect_reviews(self, max_pages=20, on_page=None):
+        """Yakalanan yanıtlardan yorumları çıkar, kalan sayfaları HTTP ile iste
+
+        Hiç yorum API yanıtı yakalanmadıysa boş liste döner; çağıran DOM yoluna döner.
+        on_page(sayfa_no, yeni_kartlar) verilirse yakalanan yorumlar ve HTTP ile gelen her
+        sayfa geldiği anda bildirilir (ilerleme olayları için).
+        """
+        captured = self.responses()
+        cards, seen = [], set()
+
+        def add(new_cards):
+            added = []
+            for card in new_cards:
+                key = (card['text'], card['author'], card['date'])
+                if key not in seen:
+                    seen.add(key)
+                    cards.append(card)
+                    added.append(card)
+            return added
+
+        last_url = None
+        for url, payload in captured:
+            if add(find_reviews(payload)):
+                last_url = url
+        if not cards:
+            return []
+        if on_page:
+            on_page(1, list(cards))
+
+        # Yorum dönen son isteğin sayfa parametresini artırarak kalan sayfaları iste
+        page_param = self.api['page_param']
+        page = current_page(last_url, page_param)
+        print(f"🛰️ {self.platform} yorum API'si yakalandı: {len(cards)} yorum", file=sys.stderr)
+        if page is None:
+            return cards
+
+        session = get_http_session()
+        cookies, headers = self._replay_session()
+        for next_page in range(page + 1, page + max_pages):
+            try:
+                with span("http_fetch"):
+                    response = session.get(with_page(last_url, page_param, next_page),
+                                           cookies=cookies, headers=headers, timeout=HTTP_TIMEOUT)
+                added = add(find_reviews(response.json())) if response.status_code == 200 else []
+            except Exception as e:
+                print(f"⚠️ API sayfası {next_page} alınamadı: {e}", file=sys.stderr)
+                break
+            if not added:
+                break
+            if on_page:
+                on_page(next_page - page + 1, added)
+
+        print(f"🛰️ API üzerinden toplam {len(cards)} yorum", file=sys.stderr)
+        return cards
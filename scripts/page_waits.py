@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Sabit time.sleep yerine koşula bağlı, üst sınırlı sayfa beklemeleri.
+
+`driver.get(url); time.sleep(3)` yerine sayfanın gerçekten hazır olduğu ilk anda
+devam edilir. Üç tür hazır olma koşulu vardır:
+    - platform/sayfa türüne göre seçici (yorum kutusu, fiyat alanı, arama sonucu)
+    - document.readyState
+    - ağ sessizliği (belirli bir süre yeni kaynak yüklenmemesi)
+
+Her beklemenin üst sınırı eski sleep süresidir; koşul gelmezse eskisi gibi devam
+edilir, yani en kötü durum değişmez. Gerçek bekleme süreleri etiket bazında bir
+histogramda toplanır, her WAIT_LOG_EVERY beklemede bir ve süreç sonunda loglanır.
+
+Kullanım:
+    driver.get(url)
+    wait_ready(driver, 'n11', 'reviews', timeout=3)
+    wait_network_idle(driver, timeout=0.3)
+"""
+
+from selenium.common.exceptions import TimeoutException
+from selenium.webdriver.support.ui import WebDriverWait
+import threading
+import atexit
+import time
+import sys
+import os
+
+from scrape_timing import record
+
+WAIT_LOG_EVERY = int(os.getenv("SCRAPER_WAIT_LOG_EVERY", "100"))
+POLL_SECONDS = 0.1
+
+# platform → sayfa türü → hazır sayılmak için en az birinin bulunması gereken CSS seçicileri
+READY_SELECTORS = {
+    'trendyol': {
+        'search': "a[href*='-p-'], .p-card-wrppr",
+        'product': ".prc-dsc, .product-price-container, h1.pr-new-br, .rating-line-count",
+        'reviews': ".comment",
+    },
+    'hepsiburada': {
+        'search': "a[href*='-p-'], li[class*='productListContent']",
+        'product': "h1, [data-test-id='price-current-price'], [data-test-id*='rating']",
+        'reviews': "div[data-test-id='review-card'], [data-test-id*='review'], .review-card",
+    },
+    'n11': {
+        'search': "a[href*='/urun/']",
+        'product': ".newPrice, .priceContainer, span.reviews-summary-average-rating, .ratingScore, h1",
+        'reviews': "li.comment",
+    },
+    'amazon': {
+        'home': "#twotabsearchtextbox",
+        'search': "div[data-component-type='s-search-result']",
+        'product': "#productTitle, #acrPopover, .a-price",
+        'reviews': "span[data-hook='review-body'], #cm_cr-review_list",
+        'signed_in': "#nav-link-accountList, #auth-error-message-box, #auth-warning-message-box",
+    },
+    'aliexpress': {
+        'search': "a[href*='/item/']",
+        'product': "h1, [data-pl='product-title'], .pdp-product-title",
+        'reviews': ".comet-v2-modal-body, div[class^='list--itemBox--'], div[class^='list--itemReview--']",
+    },
+}
+
+# Son idle_ms boyunca yeni kaynak yüklenmediyse ve belge tamamsa true (en fazla timeout_ms)
+_NETWORK_IDLE_JS = """
+const idleMs = arguments[0];
+const timeoutMs = arguments[1];
+const done = arguments[arguments.length - 1];
+const started = performance.now();
+let last = started;
+let observer = null;
+try {
+    observer = new PerformanceObserver(() => { last = performance.now(); });
+    observer.observe({type: 'resource'});
+} catch (e) {}
+const tick = () => {
+    const now = performance.now();
+    const idle = document.readyState === 'complete' && now - last >= idleMs;
+    if (idle || now - started >= timeoutMs) {
+        if (observer) observer.disconnect();
+        done(idle);
+    } else {
+        setTimeout(tick, 50);
+    }
+};
+tick();
+"""
+
+# -------------------- Histogram --------------------
+
+HISTOGRAM_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.0, 4.0)
+
+_stats = {}
+_stats_lock = threading.Lock()
+_total_waits = 0
+
+def record_wait(label, seconds, ready):
+    """Bekleme süresini etiketin histogramına ekle"""
+    global _total_waits
+    record("page_wait", seconds)
+    with _stats_lock:
+        stat = _stats.setdefault(label, {"count": 0, "timeouts": 0, "seconds": 0.0,
+                                         "buckets": [0] * (len(HISTOGRAM_BUCKETS) + 1)})
+        stat["count"] += 1
+        stat["seconds"] += seconds
+        if not ready:
+            stat["timeouts"] += 1
+        index = next((i for i, limit in enumerate(HISTOGRAM_BUCKETS) if seconds <= limit), len(HISTOGRAM_BUCKETS))
+        stat["buckets"][index] += 1
+        _total_waits += 1
+        due = WAIT_LOG_EVERY > 0 and _total_waits % WAIT_LOG_EVERY == 0
+    if due:
+        log_wait_histogram()
+
+def wait_histogram():
+    with _stats_lock:
+        return {label: {**stat, "buckets": list(stat["buckets"])} for label, stat in _stats.items()}
+
+def log_wait_histogram():
+    stats = wait_histogram()
+    if not stats:
+        return
+    headers = [f"≤{limit:g}s" for limit in HISTOGRAM_BUCKETS] + [f">{HISTOGRAM_BUCKETS[-1]:g}s"]
+    print(f"⏱️ Bekleme histogramı ({' / '.join(headers)}):", file=sys.stderr)
+    for label, stat in sorted(stats.items()):
+        average = stat["seconds"] / stat["count"] * 1000
+        print(f"    {label}: {stat['count']} bekleme, ort. {average:.0f} ms, {stat['timeouts']} zaman aşımı | "
+              f"{' / '.join(str(count) for count in stat['buckets'])}", file=sys.stderr)
+
+atexit.register(log_wait_histogram)
+
+# -------------------- Beklemeler --------------------
+
+def wait_until(driver, condition, timeout, label):
+    """condition(driver) doğru olana kadar en fazla timeout saniye bekle; hazır olduysa True"""
+    started = time.perf_counter()
+    try:
+        WebDriverWait(driver, timeout, poll_frequency=POLL_SECONDS).until(condition)
+        ready = True
+    except TimeoutException:
+        ready = False
+    except Exception:
+        # Sayfa geçişi sırasında script hatası: beklemeyi bitmiş say
+        ready = False
+    record_wait(label, time.perf_counter() - started, ready)
+    return ready
+
+def wait_for_selector(driver, css, timeout, label=None):
+    """css seçicilerinden biri DOM'da görünene kadar bekle"""
+    return wait_until(driver, lambda d: d.execute_script("return !!document.querySelector(arguments[0]);", css),
+                      timeout, label or css)
+
+def wait_document_ready(driver, timeout, state="interactive", label="document"):
+    """document.readyState en az state olana kadar bekle ('interactive' ya da 'complete')"""
+    accepted = ("complete",) if state == "complete" else ("interactive", "complete")
+    return wait_until(driver, lambda d: d.execute_script("return document.readyState;") in accepted,
+                      timeout, f"{label}.{state}")
+
+def wait_ready(driver, platform, kind, timeout):
+    """Platformun sayfa türü için hazır olma seçicisini bekle; tanımsızsa document.readyState"""
+    css = READY_SELECTORS.get((platform or '').lower(), {}).get(kind)
+    label = f"{(platform or '').lower()}.{kind}"
+    if css is None:
+        return wait_document_ready(driver, timeout, label=label)
+    return wait_for_selector(driver, css, timeout, label)
+
+def wait_network_idle(driver, timeout, idle_ms=200, label="network_idle"):
+    """Sayfada idle_ms boyunca yeni kaynak yüklenmeyene kadar bekle (lazy load / scroll sonrası)"""
+    started = time.perf_counter()
+    previous_timeout = None
+    try:
+        previous_timeout = driver.timeouts.script
+        driver.set_script_timeout(timeout + 5)
+        ready = bool(driver.execute_async_script(_NETWORK_IDLE_JS, idle_ms, int(timeout * 1000)))
+    except Exception:
+        ready = False
+    finally:
+        if previous_timeout is not None:
+            try:
+                driver.set_script_timeout(previous_timeout)
+            except Exception:
+                pass
+    record_wait(label, time.perf_counter() - started, ready)
+    return ready
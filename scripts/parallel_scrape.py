@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Arama scraper'larında bulunan ürünleri eşzamanlı çekme.
+
+Arama sonuçlarındaki ilk N ürün sırayla ve aralarında time.sleep ile işlenmek
+yerine sınırlı bir thread havuzunda paralel çekilir; her ürün havuzdan kendi
+Chrome oturumunu alır. 5 ürünlü bir arama yaklaşık en yavaş ürün kadar sürer.
+
+Nezaket sınırı alan adı bazındadır ve süreç geneli paylaşılır (worker'da aynı
+anda çalışan işler de bu sınıra tabidir): bir alan adında aynı anda en fazla
+SCRAPER_DOMAIN_CONCURRENCY ürün çekilir ve iki ürünün başlangıcı arasında en az
+SCRAPER_DOMAIN_INTERVAL saniye bırakılır.
+
+Ayarlar (ortam değişkenleri):
+    SCRAPER_PRODUCT_CONCURRENCY  Bir aramada aynı anda çekilen ürün sayısı (varsayılan 5)
+    SCRAPER_DOMAIN_CONCURRENCY   Alan adı başına aynı anda çekilen ürün sayısı (varsayılan 3)
+    SCRAPER_DOMAIN_INTERVAL      Aynı alan adında ürün başlangıçları arası saniye (varsayılan 1.0)
+
+Kullanım:
+    sonuclar = scrape_products_parallel(urls, lambda i, url: scrape_product(url))
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from urllib.parse import urlsplit
+import contextvars
+import threading
+import time
+import sys
+import os
+
+from driver_pool import get_driver_pool
+from scrape_profiler import profile_thread
+
+PRODUCT_CONCURRENCY = int(os.getenv("SCRAPER_PRODUCT_CONCURRENCY", "5"))
+DOMAIN_CONCURRENCY = int(os.getenv("SCRAPER_DOMAIN_CONCURRENCY", "3"))
+DOMAIN_INTERVAL = float(os.getenv("SCRAPER_DOMAIN_INTERVAL", "1.0"))
+
+# -------------------- Alan adı nezaket sınırı --------------------
+
+_domains = {}
+_domains_lock = threading.Lock()
+
+def _domain_state(domain):
+    with _domains_lock:
+        state = _domains.get(domain)
+        if state is None:
+            state = {
+                "slots": threading.BoundedSemaphore(max(1, DOMAIN_CONCURRENCY)),
+                "lock": threading.Lock(),
+                "last_start": 0.0,
+            }
+            _domains[domain] = state
+        return state
+
+def domain_of(url):
+    host = (urlsplit(url).hostname or "").lower()
+    return host[4:] if host.startswith("www.") else host
+
+@contextmanager
+def domain_slot(url):
+    """Alan adında yer açılana ve başlangıç aralığı dolana kadar bekle"""
+    state = _domain_state(domain_of(url))
+    state["slots"].acquire()
+    try:
+        with state["lock"]:
+            wait = state["last_start"] + DOMAIN_INTERVAL - time.time()
+            if wait > 0:
+                time.sleep(wait)
+            state["last_start"] = time.time()
+        yield
+    finally:
+        state["slots"].release()
+
+# -------------------- Paralel ürün çekme --------------------
+
+def scrape_products_parallel(items, scrape_one, profile="default", url_of=None, max_workers=None):
+    """items içindeki her ürün için scrape_one(index, item) çağrısını paralel çalıştır
+
+    index 1'den başlar; sonuçlar items sırasıyla döner. Hata fırlatan ürün için
+    {"success": False, "error": ...} döner. Sürücü havuzu en az eşzamanlı iş kadar
+    oturuma izin verecek şekilde büyütülür; url_of verilmezse item URL kabul edilir.
+    """
+    if not items:
+        return []
+    url_of = url_of or (lambda item: item)
+    workers = max(1, min(max_workers or PRODUCT_CONCURRENCY, len(items)))
+    get_driver_pool(profile).ensure_size(workers)
+    print(f"⚡ {len(items)} ürün {workers} paralel oturumla çekiliyor", file=sys.stderr)
+
+    @profile_thread
+    def run(index, item):
+        with domain_slot(url_of(item)):
+            try:
+                return scrape_one(index, item)
+            except Exception as e:
+                print(f"❌ Ürün {index} hatası: {e}", file=sys.stderr)
+                return {"success": False, "error": str(e)}
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        # Her görev çağıranın context'inin kopyasında çalışır; event_sink (worker akışı) thread'lere taşınır
+        futures = [
+            executor.submit(contextvars.copy_context().run, run, index, item)
+            for index, item in enumerate(items, 1)
+        ]
+        return [future.result() for future in futures]
@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Ürün sayfasını tek kez açıp ad, fiyat, rating, rating sayısı ve satıcıyı birlikte okuma.
+
+Fiyat ve rating yardımcıları ürün sayfasını ayrı ayrı yeni sekmede açıyordu; ürün
+başına 2-3 tam sayfa yüklemesi demekti. Burada sayfa bir kez açılır ve tek
+execute_script ile gömülü JSON-LD (schema.org Product) blokları ile sayfanın
+başlangıç durumu (ör. Trendyol __PRODUCT_DETAIL_APP_INITIAL_STATE__) okunur.
+Yapısal veride bulunmayan alanlar için scraper'ın verdiği DOM okuyucuları aynı
+sayfada çalıştırılır. Sonuç metadata_cache ile önbelleğe alınır; aynı ürün TTL
+içinde tekrar istenirse sayfa hiç açılmaz.
+
+Kullanım:
+    meta = extract_product_metadata(driver, 'trendyol', url,
+                                    readers={'price': read_price_from_page, 'rating': read_rating_from_page})
+    meta['price'], meta['rating'], meta['rating_count'], meta['seller'], meta['name']
+"""
+
+from contextlib import contextmanager
+from collections import deque
+import json
+import sys
+import re
+
+from page_waits import wait_ready
+from metadata_cache import cached_metadata
+from scrape_timing import span
+
+METADATA_FIELDS = ('name', 'price', 'rating', 'rating_count', 'seller')
+
+# Sayfanın başlangıç durumunu taşıyan global değişkenler (ilk bulunan okunur)
+INITIAL_STATE_GLOBALS = (
+    '__PRODUCT_DETAIL_APP_INITIAL_STATE__',
+    '__INITIAL_STATE__',
+    '__REACT_APP_STATE__',
+    '__NEXT_DATA__',
+)
+
+# Başlangıç durumunda alan → aday anahtarlar (ilk eşleşen kullanılır)
+STATE_KEYS = {
+    'rating': ('averageRating', 'averageRate', 'ratingValue', 'ratingScore'),
+    'rating_count': ('totalRatingCount', 'ratingCount', 'reviewCount'),
+    'price': ('sellingPrice', 'discountedPrice', 'finalPrice', 'currentPrice'),
+    'seller': ('merchantName', 'sellerName', 'merchant', 'seller'),
+}
+
+_METADATA_JS = """
+const globals = arguments[0];
+const ld = Array.from(document.querySelectorAll('script[type="application/ld+json"]')).map(s => s.textContent);
+let state = null;
+for (const name of globals) {
+    try {
+        if (window[name]) { state = JSON.stringify(window[name]); break; }
+    } catch (e) {}
+}
+const og = document.querySelector('meta[property="og:title"]');
+const h1 = document.querySelector('h1');
+return {ld: ld, state: state, og_title: og ? og.content : null, h1: h1 ? h1.innerText.trim() : null};
+"""
+
+def product_page_url(product_url):
+    """Yorum sayfası URL'sinden ana ürün sayfası URL'si"""
+    return product_url.replace('/yorumlar', '').replace('-yorumlari', '').split('?')[0]
+
+@contextmanager
+def product_tab(driver, platform, product_url, timeout=3, load=None):
+    """Ürün sayfasını yeni sekmede aç; çıkışta sekmeyi kapatıp ana sekmeye dön"""
+    driver.execute_script("window.open('');")
+    driver.switch_to.window(driver.window_handles[-1])
+    try:
+        (load or (lambda d, url: d.get(url)))(driver, product_page_url(product_url))
+        wait_ready(driver, platform, 'product', timeout=timeout)
+        yield driver
+    finally:
+        try:
+            if len(driver.window_handles) > 1:
+                driver.close()
+            driver.switch_to.window(driver.window_handles[0])
+        except Exception:
+            pass
+
+# -------------------- Yapısal veri ayrıştırma --------------------
+
+def to_number(value):
+    """'1.299,90', '1299.90', 1299.9 → 1299.9; sayı değilse None"""
+    if isinstance(value, bool) or value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, dict):
+        return to_number(value.get('value', value.get('amount')))
+    match = re.search(r'\d[\d.,]*', str(value))
+    if not match:
+        return None
+    text = match.group(0)
+    if ',' in text:
+        text = text.replace('.', '').replace(',', '.')
+    elif text.count('.') > 1 or re.search(r'\.\d{3}$', text):
+        text = text.replace('.', '')
+    try:
+        return float(text)
+    except ValueError:
+        return None
+
+# DOM fiyat metinleri: "1.299,90 TL", "₺899" ya da yalnızca rakam
+PRICE_TEXT_PATTERN = r'([\d.,]+)\s*(?:TL|₺|)'
+
+def first_price(texts, pattern=PRICE_TEXT_PATTERN):
+    """Eleman metinlerinden ilk pozitif fiyat (binlik nokta, ondalık virgül); bulunamazsa None"""
+    for text in texts:
+        match = re.search(pattern, text or '')
+        if match:
+            try:
+                price = float(match.group(1).replace('.', '').replace(',', '.'))
+            except ValueError:
+                continue
+            if price > 0:
+                return price
+    return None
+
+def _walk(node):
+    # Genişlik öncelikli: sayfanın ana ürününe ait değerler genelde üst seviyededir
+    queue = deque([node])
+    while queue:
+        current = queue.popleft()
+        if isinstance(current, dict):
+            yield current
+            queue.extend(current.values())
+        elif isinstance(current, list):
+            queue.extend(current)
+
+def _is_product(node):
+    kind = node.get('@type')
+    return kind == 'Product' or (isinstance(kind, list) and 'Product' in kind)
+
+def parse_json_ld(blocks):
+    """JSON-LD metinlerindeki ilk schema.org Product nesnesinden alanları çıkar"""
+    for block in blocks or []:
+        try:
+            data = json.loads(block)
+        except (TypeError, ValueError):
+            continue
+        for node in _walk(data):
+            if not _is_product(node):
+                continue
+            offers = node.get('offers') or {}
+            if isinstance(offers, list):
+                offers = offers[0] if offers else {}
+            rating = node.get('aggregateRating') or {}
+            seller = offers.get('seller') if isinstance(offers, dict) else None
+            if isinstance(seller, dict):
+                seller = seller.get('name')
+            return {
+                'name': node.get('name'),
+                'price': to_number(offers.get('price') or offers.get('lowPrice')) if isinstance(offers, dict) else None,
+                'rating': to_number(rating.get('ratingValue')) if isinstance(rating, dict) else None,
+                'rating_count': to_number(rating.get('ratingCount') or rating.get('reviewCount')) if isinstance(rating, dict) else None,
+                'seller': seller,
+            }
+    return {}
+
+def parse_initial_state(state_json):
+    """Sayfanın başlangıç durumunda STATE_KEYS anahtarlarının ilk geçerli değerlerini bul"""
+    try:
+        state = json.loads(state_json) if state_json else None
+    except ValueError:
+        return {}
+    if state is None:
+        return {}
+    found = {}
+    for node in _walk(state):
+        for field, keys in STATE_KEYS.items():
+            if field in found:
+                continue
+            for key in keys:
+                value = node.get(key)
+                if value in (None, '', [], {}):
+                    continue
+                if field == 'seller':
+                    value = value.get('name') if isinstance(value, dict) else value
+                    if isinstance(value, str) and value.strip():
+                        found[field] = value.strip()
+                        break
+                    continue
+                number = to_number(value)
+                if number is None:
+                    continue
+                if field == 'rating' and not 0 < number <= 5:
+                    continue
+                found[field] = int(number) if field == 'rating_count' else number
+                break
+        if len(found) == len(STATE_KEYS):
+            break
+    return found
+
+def read_structured_metadata(driver):
+    """Açık sayfadaki JSON-LD ve başlangıç durumundan alanları tek execute_script ile oku"""
+    try:
+        raw = driver.execute_script(_METADATA_JS, list(INITIAL_STATE_GLOBALS)) or {}
+    except Exception as e:
+        print(f"    ⚠️ Yapısal ürün verisi okunamadı: {e}", file=sys.stderr)
+        return {}
+    meta = {key: value for key, value in parse_json_ld(raw.get('ld')).items() if value not in (None, '')}
+    for field, value in parse_initial_state(raw.get('state')).items():
+        meta.setdefault(field, value)
+    name = raw.get('og_title') or raw.get('h1')
+    if name:
+        meta.setdefault('name', name.strip())
+    if meta.get('rating_count') is not None:
+        meta['rating_count'] = int(meta['rating_count'])
+    return meta
+
+# -------------------- Tek ziyaret --------------------
+
+def extract_product_metadata(driver, platform, product_url, readers=None, timeout=3, load=None):
+    """Ürün sayfasını bir kez açıp ad, fiyat, rating, rating sayısı ve satıcıyı döndür
+
+    readers: {alan: okuyucu(driver)}; yapısal veride bulunmayan alanlar için aynı sayfada
+    çalıştırılan DOM okuyucuları. load(driver, url) verilirse sayfa onunla açılır.
+    Önbellekte taze kayıt varsa sayfa açılmaz.
+    """
+    meta = cached_metadata(driver, platform, product_url,
+                           lambda d: visit_product_page(d, platform, product_url, readers, timeout, load),
+                           fields=METADATA_FIELDS)
+    return {field: meta.get(field) for field in METADATA_FIELDS}
+
+def visit_product_page(driver, platform, product_url, readers=None, timeout=3, load=None):
+    """Ürün sayfasını yeni sekmede açıp alanları oku (önbelleksiz)"""
+    meta = dict.fromkeys(METADATA_FIELDS)
+    try:
+        with span("product_metadata"), product_tab(driver, platform, product_url, timeout=timeout, load=load):
+            meta.update(read_structured_metadata(driver))
+            sources = sorted(field for field in METADATA_FIELDS if meta[field] is not None)
+            for field, reader in (readers or {}).items():
+                if meta.get(field) in (None, 0, 0.0):
+                    try:
+                        meta[field] = reader(driver)
+                    except Exception as e:
+                        print(f"    ⚠️ {field} okunamadı: {e}", file=sys.stderr)
+    except Exception as e:
+        print(f"    ⚠️ Ürün sayfası okunamadı: {e}", file=sys.stderr)
+        return meta
+
+    print(f"    🧾 Ürün bilgisi: fiyat {meta['price']} | ⭐ {meta['rating']} ({meta['rating_count']} değerlendirme) | "
+          f"satıcı {meta['seller']} [yapısal veri: {', '.join(sources) or 'yok'}]", file=sys.stderr)
+    return meta
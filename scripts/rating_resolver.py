@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Ürün sayfasındaki ortalama rating'i tek execute_script çağrısıyla bulan çözücü.
+
+Seçici başına find_elements ve eleman başına .text çağrıları chromedriver'a ayrı
+HTTP istekleri gönderir; 20 seçicilik bir listede ıskalanan her seçici bir tur
+daha demektir. Buradaki betik tüm aday seçicileri sırayla tarayıcı içinde dener
+ve 1-5 aralığındaki ilk sayısal değeri (hangi seçiciden geldiğiyle) döndürür.
+
+Aday sırası platform başına öğrenilir (selector_stats, grup 'rating'): son
+sayfalarda tutan seçici listenin başına geçer; aynı platformun sayfaları
+genellikle aynı şablonu kullandığı için betik çoğunlukla ilk seçicide durur.
+
+Kullanım:
+    rating = resolve_rating(driver, 'trendyol', TRENDYOL_RATING_SELECTORS)
+    rating = resolve_rating(driver, 'n11', N11_RATING_SELECTORS, loose=True)
+"""
+
+import sys
+
+from selenium.common.exceptions import WebDriverException
+
+from selector_stats import ordered, record
+
+# arguments[0]: seçiciler (sırayla), arguments[1]: loose — metnin tamamı sayı değilse içindeki "4,5" gibi
+# değeri de kabul et ("4.5/5", "4,5 (120 değerlendirme)")
+_RATING_JS = """
+const selectors = arguments[0];
+const loose = arguments[1];
+const exact = /^(\\d+(?:[.,]\\d+)?)$/;
+const inText = /\\b([1-5][.,][0-9])\\b/;
+for (let index = 0; index < selectors.length; index++) {
+    let nodes;
+    try {
+        nodes = document.querySelectorAll(selectors[index]);
+    } catch (e) {
+        continue;  // Geçersiz seçici
+    }
+    for (const node of nodes) {
+        const text = (node.innerText || '').trim();
+        const match = text.match(exact) || (loose ? text.match(inText) : null);
+        if (!match) continue;
+        const value = parseFloat(match[1].replace(',', '.'));
+        if (value >= 1 && value <= 5) return {index: index, value: value};
+    }
+}
+return null;
+"""
+
+def resolve_rating(driver, platform, selectors, loose=False):
+    """Açık sayfadaki ortalama rating'i (1-5) döndür; bulunamazsa 0.0"""
+    candidates = ordered(platform, 'rating', selectors)
+    try:
+        hit = driver.execute_script(_RATING_JS, candidates, loose)
+    except WebDriverException as e:
+        print(f"    ⚠️ {platform} rating okunamadı: {e.msg}", file=sys.stderr)
+        return 0.0
+    if not hit:
+        record(platform, 'rating', candidates, None)
+        return 0.0
+    record(platform, 'rating', candidates[:hit["index"] + 1], candidates[hit["index"]])
+    return float(hit["value"])
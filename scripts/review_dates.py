@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Yorum tarihi metinlerini gerçek datetime'a çeviren ortak normalleştirici.
+
+Scraper'lar `comment_date` alanını sitede görüldüğü gibi metin olarak kaydeder:
+"12 Ocak 2024", "2 gün önce", "04/07/2025", "2024-01-12", "12 Oca 2024",
+"Reviewed in Turkey on 12 January 2024". Bu modül bunları derlenmiş desenlerle
+ayrıştırır; göreli ifadeler çekim zamanına (kaydın `timestamp` alanı) göre
+hesaplanır. Sonuç `comment_datetime` alanına yazılır, böylece MongoDB'de yorum
+tarihine göre index'li aralık sorgusu yapılabilir. `comment_date` metni ve
+parmak izi değişmez.
+
+Ay adları ilk üç harflerine göre eşlenir (Türkçe/İngilizce, tam ya da kısaltma).
+Sayısal tarihler Türkçe sırayla gün/ay/yıl okunur. Yılsız tarihler ("12 Ocak") çekim
+yılına, çekim zamanından sonraya düşüyorsa bir önceki yıla yerleştirilir. Göreli
+ifadelerde sayı rakamla ya da "on"a kadar yazıyla ("üç gün önce", "two weeks ago")
+verilebilir; "ay" 30, "yıl" 365 gün sayılır.
+
+İki yol aynı desenleri kullanır:
+    parse_review_date("2 gün önce", now)         → datetime (tek değer, scraper'lar)
+    parse_review_dates(df['comment_date'], now)  → datetime64 Series (toplu, importer'lar)
+"""
+
+from datetime import datetime, timedelta
+import re
+
+# Ayın ilk üç harfi (küçük harf, Türkçe karakterler ASCII'ye çevrilmiş) → ay numarası
+MONTHS = {
+    'oca': 1, 'sub': 2, 'mar': 3, 'nis': 4, 'may': 5, 'haz': 6,
+    'tem': 7, 'agu': 8, 'eyl': 9, 'eki': 10, 'kas': 11, 'ara': 12,
+    'jan': 1, 'feb': 2, 'apr': 4, 'jun': 6, 'jul': 7, 'aug': 8,
+    'sep': 9, 'oct': 10, 'nov': 11, 'dec': 12,
+}
+
+# Göreli birim → saniye
+UNIT_SECONDS = {
+    'saniye': 1, 'second': 1,
+    'dakika': 60, 'minute': 60,
+    'saat': 3600, 'hour': 3600,
+    'gun': 86400, 'day': 86400,
+    'hafta': 7 * 86400, 'week': 7 * 86400,
+    'ay': 30 * 86400, 'month': 30 * 86400,
+    'yil': 365 * 86400, 'year': 365 * 86400,
+}
+
+# Göreli ifadelerde yazıyla sayılar (ASCII'ye çevrilmiş) → değer; sayı yoksa 1 sayılır
+NUMBER_WORDS = {
+    'bir': 1, 'iki': 2, 'uc': 3, 'dort': 4, 'bes': 5, 'alti': 6, 'yedi': 7, 'sekiz': 8, 'dokuz': 9, 'on': 10,
+    'a': 1, 'an': 1, 'one': 1, 'two': 2, 'three': 3, 'four': 4, 'five': 5, 'six': 6, 'seven': 7,
+    'eight': 8, 'nine': 9, 'ten': 10,
+}
+
+# Tek kelimelik göreli ifadeler → kaç gün önce
+RELATIVE_WORDS = {'bugun': 0, 'today': 0, 'az once': 0, 'just now': 0, 'dun': 1, 'yesterday': 1}
+
+_ASCII = str.maketrans('çğıöşüâî', 'cgiosuai')
+
+_MONTH_NAMES = r'(?:ocak|oca|subat|sub|mart|mar|nisan|nis|mayis|may|haziran|haz|temmuz|tem|agustos|agu|eylul|eyl|ekim|eki|kasim|kas|aralik|ara' \
+               r'|january|jan|february|feb|march|april|apr|june|jun|july|jul|august|aug|september|sept|sep|october|oct|november|nov|december|dec)\.?'
+_UNITS = r'(?:saniye|dakika|saat|gun|hafta|ay|yil|seconds?|minutes?|hours?|days?|weeks?|months?|years?)'
+
+# Desenler ASCII'ye çevrilmiş küçük harfli metin üzerinde çalışır
+TEXTUAL_RE = re.compile(r'\b(\d{1,2})\s+(' + _MONTH_NAMES + r')\s*,?\s*(\d{4})?\b')
+TEXTUAL_US_RE = re.compile(r'\b(' + _MONTH_NAMES + r')\s+(\d{1,2}),?\s+(\d{4})\b')
+NUMERIC_RE = re.compile(r'\b(\d{1,2})[./](\d{1,2})[./](\d{4})\b')
+ISO_RE = re.compile(r'\b(\d{4})-(\d{2})-(\d{2})')
+_NUMBER_WORDS = '|'.join(sorted(NUMBER_WORDS, key=len, reverse=True))
+RELATIVE_RE = re.compile(r'\b(\d+|' + _NUMBER_WORDS + r')?\s*(' + _UNITS + r')\s+(?:once|ago)\b')
+RELATIVE_WORD_RE = re.compile(r'\b(' + '|'.join(RELATIVE_WORDS) + r')\b')
+
+# Kart içindeki metnin tarih olup olmadığını anlamak için (tarayıcı tarafında da kullanılır,
+# bu yüzden JavaScript RegExp ile uyumludur ve Türkçe karakterli küçük harf metinde çalışır)
+DATE_HINT_PATTERN = (
+    r'\d{1,2}\s+(ocak|şubat|mart|nisan|mayıs|haziran|temmuz|ağustos|eylül|ekim|kasım|aralık'
+    r'|oca|şub|mar|nis|may|haz|tem|ağu|eyl|eki|kas|ara)(?![a-zçğıöşü])'
+    r'|\d{1,2}[./]\d{1,2}[./]\d{4}|\d{4}-\d{2}-\d{2}'
+    r'|(gün|gun|hafta|ay|yıl|yil|saat|dakika)\s+(önce|once)'
+)
+DATE_HINT_RE = re.compile(DATE_HINT_PATTERN)
+
+def _fold(value):
+    return str(value).replace('İ', 'i').replace('I', 'ı').lower().translate(_ASCII)
+
+def looks_like_date(value):
+    """Metin bir yorum tarihi gibi mi görünüyor (ay adı, sayısal tarih ya da "x gün önce")"""
+    return bool(value) and DATE_HINT_RE.search(str(value).replace('İ', 'i').lower()) is not None
+
+def _month(name):
+    return MONTHS.get((name or '')[:3])
+
+def _safe_datetime(year, month, day):
+    try:
+        return datetime(int(year), int(month), int(day))
+    except (TypeError, ValueError):
+        return None
+
+def parse_review_date(value, now=None):
+    """Yorum tarihi metnini datetime'a çevir; anlaşılamazsa None. now: göreli ifadelerin referansı"""
+    if value is None:
+        return None
+    if isinstance(value, datetime):
+        return value
+    text = _fold(value).strip()
+    if not text:
+        return None
+    now = now if isinstance(now, datetime) else datetime.now()
+
+    match = ISO_RE.search(text)
+    if match:
+        return _safe_datetime(match.group(1), match.group(2), match.group(3))
+    match = TEXTUAL_RE.search(text)
+    if match and _month(match.group(2)):
+        date = _safe_datetime(match.group(3) or now.year, _month(match.group(2)), match.group(1))
+        if date is not None and match.group(3) is None and date > now:
+            date = _safe_datetime(now.year - 1, _month(match.group(2)), match.group(1))
+        return date
+    match = TEXTUAL_US_RE.search(text)
+    if match and _month(match.group(1)):
+        return _safe_datetime(match.group(3), _month(match.group(1)), match.group(2))
+    match = NUMERIC_RE.search(text)
+    if match:
+        return _safe_datetime(match.group(3), match.group(2), match.group(1))
+    match = RELATIVE_RE.search(text)
+    if match:
+        count = match.group(1)
+        count = int(count) if count and count.isdigit() else NUMBER_WORDS.get(count, 1)
+        return now - timedelta(seconds=count * UNIT_SECONDS[match.group(2).rstrip('s')])
+    match = RELATIVE_WORD_RE.search(text)
+    if match:
+        return (now - timedelta(days=RELATIVE_WORDS[match.group(1)])).replace(hour=0, minute=0, second=0, microsecond=0)
+    return None
+
+# -------------------- Toplu (pandas) --------------------
+
+def _dates_from_parts(year, month, day):
+    import pandas as pd
+    return pd.to_datetime(pd.DataFrame({'year': year, 'month': month, 'day': day}).astype('float'), errors='coerce')
+
+def parse_review_dates(values, now=None):
+    """parse_review_date'in pandas Series üzerinde vektörel karşılığı; datetime64 Series döner
+
+    now tek bir zaman ya da satır başına çekim zamanı içeren Series olabilir.
+    """
+    import pandas as pd  # yalnızca toplu yolda gerekli; scraper'lar pandas yüklemeden kullanır
+
+    values = pd.Series(values)
+    if now is None:
+        now = pd.Timestamp.now()
+    now = pd.to_datetime(now)
+    if not isinstance(now, pd.Series):
+        now = pd.Series(now, index=values.index)
+    text = (values.astype('string').fillna('')
+            .str.replace('İ', 'i', regex=False).str.replace('I', 'ı', regex=False)
+            .str.lower().str.translate(_ASCII))
+    result = pd.Series(pd.NaT, index=values.index, dtype='datetime64[ns]')
+
+    parts = text.str.extract(ISO_RE)
+    result = result.fillna(_dates_from_parts(parts[0], parts[1], parts[2]))
+
+    parts = text.str.extract(TEXTUAL_RE)
+    month = parts[1].str[:3].map(MONTHS)
+    year = pd.to_numeric(parts[2], errors='coerce').fillna(now.dt.year.where(parts[0].notna()))
+    dates = _dates_from_parts(year, month, parts[0])
+    # Yılsız tarih çekim zamanından sonraya düşüyorsa geçen yıla aittir
+    future = parts[2].isna() & (dates > now)
+    if future.any():
+        dates = dates.where(~future, _dates_from_parts(year - 1, month, parts[0]))
+    result = result.fillna(dates)
+
+    parts = text.str.extract(TEXTUAL_US_RE)
+    result = result.fillna(_dates_from_parts(parts[2], parts[0].str[:3].map(MONTHS), parts[1]))
+
+    parts = text.str.extract(NUMERIC_RE)
+    result = result.fillna(_dates_from_parts(parts[2], parts[1], parts[0]))
+
+    parts = text.str.extract(RELATIVE_RE)
+    count = pd.to_numeric(parts[0], errors='coerce').fillna(parts[0].map(NUMBER_WORDS)).fillna(1)
+    seconds = parts[1].str.rstrip('s').map(UNIT_SECONDS)
+    result = result.fillna(now - pd.to_timedelta(count * seconds, unit='s'))
+
+    words = text.str.extract(RELATIVE_WORD_RE)[0]
+    result = result.fillna((now - pd.to_timedelta(words.map(RELATIVE_WORDS), unit='D')).dt.normalize())
+    return result
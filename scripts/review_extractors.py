@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Yorum kartlarını tek execute_script çağrısıyla okuyan platform betikleri.
+
+Kart başına .text, find_elements ve get_attribute çağrıları chromedriver'a ayrı
+HTTP istekleri gönderir; yüzlerce yorumlu bir sayfada bu saniyeler sürer. Buradaki
+betikler tüm kartları tarayıcı içinde okuyup tek seferde
+[{text, date, rating, likes, author}] listesi döndürür.
+
+Kullanım:
+    cards = extract_review_cards(driver, 'n11', selector="li.comment")
+    cards = extract_review_cards(driver, 'hepsiburada', cards=yorum_elements)
+"""
+
+from review_dates import DATE_HINT_PATTERN
+from scrape_timing import span
+
+# Tüm platformların ortak yardımcıları; platform betiği `readCard(card)` tanımlar
+_COMMON_JS = """
+const cards = (arguments[0] || Array.from(document.querySelectorAll(arguments[1]))).slice(arguments[3] || 0);
+const datePattern = new RegExp(arguments[2]);  // review_dates.DATE_HINT_PATTERN
+const text = (el) => el ? (el.innerText || '').trim() : '';
+const firstNumber = (value) => {
+    const match = (value || '').match(/\\d+/);
+    return match ? parseInt(match[0], 10) : null;
+};
+const looksLikeDate = (value) => datePattern.test((value || '').toLowerCase());
+"""
+
+_RUN_JS = """
+return cards.map((card) => {
+    try {
+        return readCard(card);
+    } catch (e) {
+        return {text: text(card), date: null, rating: null, likes: 0, author: null};
+    }
+});
+"""
+
+TRENDYOL_JS = """
+const readCard = (card) => {
+    const infoItems = Array.from(card.querySelectorAll('.comment-info-item')).map(text);
+    let date = infoItems.find(looksLikeDate) || null;
+    if (!date) {
+        date = infoItems.find((item) => /\\d+/.test(item) && item.length > 3) || null;
+    }
+    const fullStars = Array.from(card.querySelectorAll('.comment-rating .full'))
+        .filter((star) => (star.style.width || '100%') === '100%').length;
+    const author = infoItems.find((item) => item.includes('*')) || null;
+    return {text: text(card), date: date, rating: fullStars || null, likes: 0, author: author};
+};
+"""
+
+HEPSIBURADA_JS = """
+const readCard = (card) => {
+    let date = null;
+    for (const span of card.querySelectorAll("span[class*='hermes-ReviewCard-module-']")) {
+        const content = span.getAttribute('content');
+        if (content && /^\\d{4}-\\d{2}-\\d{2}/.test(content)) { date = text(span); break; }
+        const spanText = text(span);
+        if (spanText && looksLikeDate(spanText)) { date = spanText; break; }
+    }
+
+    let likes = 0;
+    const likeSources = [
+        "button[class*='helpful'], span[class*='helpful']",
+        ".hermes-AverageRateBox-module-hA0lI9riLKFi7OKbEnBV",
+    ];
+    for (const selector of likeSources) {
+        for (const el of card.querySelectorAll(selector)) {
+            const value = firstNumber(text(el));
+            if (value) { likes = value; break; }
+        }
+        if (likes) break;
+    }
+    const cardText = text(card);
+    if (!likes) {
+        const bildir = cardText.match(/(\\d+)\\s*\\n\\s*\\d+\\s*\\n\\s*Bildir/);
+        if (bildir) likes = parseInt(bildir[1], 10);
+    }
+
+    const ratingEl = card.querySelector("[itemprop='ratingValue']");
+    const rating = ratingEl ? parseFloat(ratingEl.getAttribute('content') || text(ratingEl)) || null : null;
+    const authorEl = card.querySelector("[itemprop='author'], [class*='author']");
+    return {text: cardText, date: date, rating: rating, likes: likes, author: text(authorEl) || null};
+};
+"""
+
+N11_JS = """
+const readCard = (card) => {
+    const ratingEl = card.querySelector("[class*='rating']");
+    const ratingMatch = ratingEl ? (ratingEl.className || '').match(/r(\\d{2,3})/) : null;
+    return {
+        text: text(card),
+        date: text(card.querySelector('span.commentDate')) || null,
+        rating: ratingMatch ? parseInt(ratingMatch[1], 10) / 20 : null,
+        likes: 0,
+        author: text(card.querySelector('.userName, .userInfo')) || null,
+    };
+};
+"""
+
+EXTRACTORS = {
+    'trendyol': TRENDYOL_JS,
+    'hepsiburada': HEPSIBURADA_JS,
+    'n11': N11_JS,
+}
+
+def extract_review_cards(driver, platform, cards=None, selector=None, start=0):
+    """Sayfadaki yorum kartlarını tek execute_script ile [{text, date, rating, likes, author}] olarak döndür
+
+    cards verilirse (WebElement listesi) o kartlar okunur, yoksa selector ile sayfada aranır.
+    start verilirse ilk start kart atlanır (scroll sırasında yalnızca yeni yüklenenleri okumak için).
+    """
+    script = EXTRACTORS.get(platform.lower())
+    if script is None:
+        raise ValueError(f"Bilinmeyen platform: {platform}")
+    if cards is None and selector is None:
+        raise ValueError("cards veya selector verilmeli")
+    with span("extraction"):
+        return driver.execute_script(_COMMON_JS + script + _RUN_JS, cards, selector, DATE_HINT_PATTERN, start) or []
+
+def read_card_texts(driver, selector, start=0):
+    """selector'a uyan kartların metnini tek execute_script ile döndür (ilk start kart atlanır)"""
+    with span("extraction"):
+        return driver.execute_script(
+            "return Array.from(document.querySelectorAll(arguments[0])).slice(arguments[1])"
+            ".map((el) => (el.innerText || '').trim());",
+            selector, start,
+        ) or []
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Yorumlar için kararlı parmak izi (platform + ürün kimliği + normalize metin + tarih).
+
+Aynı yorum tekrar çekildiğinde aynı parmak izini üretir. Scraper'lar bellekteki
+tekrar kontrolünü bu parmak izleriyle bir set üzerinden yapar; mongo_writer aynı
+alanı benzersiz index ve upsert anahtarı olarak kullanır, böylece yeniden çekilen
+bir ürün yalnızca yeni yorumlarını ekler.
+
+Kullanım:
+    fp = fingerprint_review(review_data)      # review_data['fingerprint'] da ayarlanır
+    if fp not in goruldu: ...
+"""
+
+from urllib.parse import urlsplit
+import unicodedata
+import hashlib
+import re
+
+FINGERPRINT_FIELD = "fingerprint"
+
+# "3 gün önce" gibi göreli tarihler her gün değişir; parmak izine katılmaz
+RELATIVE_DATE_MARKERS = ('önce', 'once', 'ago')
+
+# platform → ürün kimliğini URL'den çıkaran desen
+PRODUCT_ID_PATTERNS = {
+    'trendyol': re.compile(r'-p-(\d+)', re.I),
+    'hepsiburada': re.compile(r'-p-([A-Z0-9]+)', re.I),
+    'amazon': re.compile(r'/(?:dp|product-reviews)/([A-Z0-9]{10})', re.I),
+    'aliexpress': re.compile(r'/item/(\d+)', re.I),
+}
+
+def normalize_text(value):
+    """Büyük/küçük harf, Unicode biçimi ve boşluk farklarını yok say"""
+    text = unicodedata.normalize('NFKC', str(value or ''))
+    text = text.replace('İ', 'i').casefold()
+    return re.sub(r'\s+', ' ', text).strip()
+
+def normalize_date(value):
+    date = normalize_text(value)
+    if any(marker in date for marker in RELATIVE_DATE_MARKERS):
+        return ''
+    return date
+
+def product_key(platform, product_url=None, product_name=None):
+    """Ürünü tanımlayan anahtar: URL'deki ürün kimliği, yoksa sorgusuz URL yolu, yoksa ürün adı"""
+    platform = (platform or '').lower()
+    if product_url:
+        pattern = PRODUCT_ID_PATTERNS.get(platform)
+        match = pattern.search(product_url) if pattern else None
+        if match:
+            return match.group(1).upper()
+        path = urlsplit(product_url).path.rstrip('/')
+        path = re.sub(r'(/yorumlar|-yorumlari)$', '', path)
+        if path:
+            return path.lower()
+    return normalize_text(product_name)
+
+def review_fingerprint(platform, product, text, date=None):
+    """Yorumun sha1 parmak izi; product, product_key ile üretilmiş ürün anahtarıdır"""
+    parts = [(platform or '').lower(), product or '', normalize_text(text), normalize_date(date)]
+    return hashlib.sha1('\x1f'.join(parts).encode('utf-8')).hexdigest()
+
+def fingerprint_review(doc):
+    """Yorum kaydının parmak izini hesapla, kayda yaz ve döndür
+
+    Yorum metni olmayan kayıtlar (ör. ürün özeti yedekleri) yorum değildir; parmak izi
+    yalnızca platform + ürüne indirgenip farklı kayıtları birleştireceği için None döner
+    ve kayda alan yazılmaz.
+    """
+    fingerprint = doc.get(FINGERPRINT_FIELD)
+    if not fingerprint:
+        if not normalize_text(doc.get('comment')):
+            return None
+        product = product_key(doc.get('platform'), doc.get('product_url'), doc.get('product_name'))
+        fingerprint = review_fingerprint(doc.get('platform'), product, doc.get('comment'), doc.get('comment_date'))
+        doc[FINGERPRINT_FIELD] = fingerprint
+    return fingerprint
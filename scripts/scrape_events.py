@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Scraper'lar ile /api/scrape arasındaki NDJSON olay protokolü.
+
+Her olay stdout'a tek satırlık JSON olarak yazılır ve hemen flush edilir:
+
+    {"event": "job_started", "platform": "n11", "search_term": "iphone 15", ...}
+    {"event": "product_discovered", "platform": "n11", "product_url": "...", "index": 1}
+    {"event": "page_scraped", "platform": "n11", "product_url": "...", "page": 2, "reviews": [...]}
+    {"event": "product_done", "platform": "n11", "product_url": "...", "total_reviews": 64}
+    {"event": "summary", "result": {...}}
+
+Yorumlar page_scraped olaylarıyla parça parça gider; summary yalnızca sayıları
+ve ürün özetlerini taşır. Log'lar eskisi gibi stderr'e yazılmaya devam eder.
+Kalıcı worker'da olaylar stdout yerine event_sink ile işin kuyruğuna yönlenir.
+"""
+
+from contextlib import contextmanager
+import contextvars
+import threading
+import json
+import time
+import sys
+
+# Tek satırın aşırı büyümemesi için page_scraped başına en fazla yorum
+REVIEW_BATCH_SIZE = 50
+
+_sink = contextvars.ContextVar("scrape_event_sink", default=None)
+_stdout_lock = threading.Lock()
+
+def emit(event, **data):
+    """Olayı aktif hedefe (worker kuyruğu veya stdout) tek satır JSON olarak gönder"""
+    payload = {"event": event, "ts": time.time(), **data}
+    sink = _sink.get()
+    if sink is not None:
+        sink(payload)
+        return
+    line = json.dumps(payload, ensure_ascii=False, default=str)
+    with _stdout_lock:
+        sys.stdout.write(line + "\n")
+        sys.stdout.flush()
+
+@contextmanager
+def event_sink(callback):
+    """Bu context içindeki olayları stdout yerine callback'e yönlendir"""
+    token = _sink.set(callback)
+    try:
+        yield
+    finally:
+        _sink.reset(token)
+
+def emit_job_started(platform, **info):
+    emit("job_started", platform=platform, **info)
+
+def emit_product_discovered(platform, product_url, product_name=None, index=None):
+    emit("product_discovered", platform=platform, product_url=product_url,
+         product_name=product_name, index=index)
+
+def emit_page_scraped(platform, product_url, page, reviews):
+    """Bir sayfanın (veya scroll grubunun) yorumlarını REVIEW_BATCH_SIZE'lık parçalarla gönder"""
+    if not reviews:
+        emit("page_scraped", platform=platform, product_url=product_url, page=page, reviews=[])
+        return
+    # Kopyala: scraper kayıtları sonradan değiştirebilir; insert_one/insert_many'ın eklediği _id gönderilmez
+    reviews = [{key: value for key, value in review.items() if key != "_id"} if isinstance(review, dict) else review
+               for review in reviews]
+    for start in range(0, len(reviews), REVIEW_BATCH_SIZE):
+        emit("page_scraped", platform=platform, product_url=product_url, page=page,
+             reviews=reviews[start:start + REVIEW_BATCH_SIZE])
+
+def emit_product_done(platform, product_url, product_name=None, total_reviews=0, **extra):
+    emit("product_done", platform=platform, product_url=product_url,
+         product_name=product_name, total_reviews=total_reviews, **extra)
+
+def emit_summary(result):
+    """Son özeti gönder; yorum listeleri page_scraped ile zaten gittiği için çıkarılır"""
+    summary = {key: value for key, value in result.items() if key != "all_reviews"}
+    if isinstance(summary.get("results"), list):
+        summary["results"] = [
+            {key: value for key, value in item.items() if key != "reviews"} if isinstance(item, dict) else item
+            for item in summary["results"]
+        ]
+    emit("summary", result=summary)
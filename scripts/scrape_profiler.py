@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Scrape işleri için isteğe bağlı Python profili.
+
+Yavaşlığın tarayıcıda değil Python tarafında olduğu işleri (eleman başına
+WebDriver çağrıları, tüm DOM'u dolaşan döngüler) üretime yakın çalıştırmalarda
+yakalamak için. Profil açıkken timed_job ile sarılı her scrape işi iki dosya
+üretir:
+
+    <platform>_<arama terimi>_<iş kimliği>_<zaman>.pstats     cProfile çıktısı (python -m pstats, snakeviz)
+    <platform>_<arama terimi>_<iş kimliği>_<zaman>.collapsed  örneklenmiş yığınlar, satır başına
+                                                             "çerçeve;çerçeve;... sayı" (flamegraph.pl, speedscope)
+
+cProfile her thread'de ayrı çalışır; parallel_scrape ve tüm platformlar araması
+iş thread'lerini profile_thread ile sararak kendi profillerini işin profiline
+ekler. Örnekleyici işin tüm thread'lerinin yığınını SCRAPER_PROFILE_INTERVAL_MS
+aralıklarla okur. Dosya yolları sonucun `profile` alanına eklenir.
+
+Modlar:
+    cprofile  cProfile (deterministik) + örneklenmiş yığınlar; "1" aynı anlama gelir
+    sample    yalnızca örneklenmiş yığınlar (düşük ek yük, .pstats yazılmaz)
+
+Açma yolları:
+    SCRAPER_PROFILE=cprofile python3 n11_search_scraper.py "iphone 15"
+    python3 n11_search_scraper.py "iphone 15" --profile[=sample]
+    worker iş gövdesinde "profile": true | "sample" (bkz. scrape_worker, /api/scrape)
+
+Ayarlar (ortam değişkenleri):
+    SCRAPER_PROFILE              Profil modu (varsayılan kapalı)
+    SCRAPER_PROFILE_DIR          Profil dosyalarının dizini (varsayılan data/profiles)
+    SCRAPER_PROFILE_INTERVAL_MS  Yığın örnekleme aralığı, ms (varsayılan 5)
+"""
+
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime
+import contextvars
+import functools
+import threading
+import cProfile
+import pstats
+import uuid
+import time
+import sys
+import os
+import re
+
+PROFILE_DIR = os.getenv("SCRAPER_PROFILE_DIR", "data/profiles")
+SAMPLE_INTERVAL = float(os.getenv("SCRAPER_PROFILE_INTERVAL_MS", "5")) / 1000
+
+MODES = ("cprofile", "sample")
+
+_requested = contextvars.ContextVar("scrape_profile_request", default=None)
+_session = contextvars.ContextVar("scrape_profile_session", default=None)
+
+def normalize_mode(value):
+    """"1"/true → cprofile; boş/0/false → None; bilinmeyen mod uyarıyla kapalı sayılır"""
+    if value is True:
+        return "cprofile"
+    mode = str(value or "").strip().lower()
+    if mode in ("", "0", "false", "none"):
+        return None
+    if mode in ("1", "true", "yes"):
+        return "cprofile"
+    if mode not in MODES:
+        print(f"⚠️ Bilinmeyen profil modu '{value}', profil kapalı (seçenekler: {', '.join(MODES)})", file=sys.stderr)
+        return None
+    return mode
+
+def requested_mode():
+    request = _requested.get()
+    if request is not None:
+        return request[0]
+    return normalize_mode(os.getenv("SCRAPER_PROFILE"))
+
+@contextmanager
+def profile_request(mode, job_id=None):
+    """Bu context içindeki scrape işini mode ile, job_id kimliğiyle profille
+
+    mode None ise SCRAPER_PROFILE geçerlidir; false/"0" profili bu iş için kapatır.
+    """
+    mode = requested_mode() if mode is None else normalize_mode(mode)
+    token = _requested.set((mode, job_id))
+    try:
+        yield
+    finally:
+        _requested.reset(token)
+
+def profile_from_argv(argv):
+    """--profile / --profile=<mod> bayrağını argv'den çıkar ve süreç için profili aç"""
+    remaining = []
+    for arg in argv:
+        if arg == "--profile" or arg.startswith("--profile="):
+            os.environ["SCRAPER_PROFILE"] = arg.partition("=")[2] or "cprofile"
+        else:
+            remaining.append(arg)
+    return remaining
+
+def _frame_label(frame):
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+def _slug(value, limit=40):
+    slug = re.sub(r'[^a-z0-9]+', '-', str(value or '').lower()).strip('-')
+    return slug[:limit].rstrip('-') or 'job'
+
+class ProfileSession:
+    """Bir scrape işinin thread'lerini cProfile ve yığın örnekleyiciyle profiller"""
+
+    def __init__(self, mode, platform, search_term, job_id=None):
+        self.mode = mode
+        self.platform = platform
+        self.search_term = search_term
+        self.job_id = job_id or uuid.uuid4().hex[:12]
+        self.started_at = datetime.now()
+        self._profiles = []
+        self._threads = set()
+        self._stacks = Counter()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._sampler = threading.Thread(target=self._sample_loop, name="scrape-profiler", daemon=True)
+
+    # ---- thread kaydı ----
+
+    def enter_thread(self):
+        """Çağıran thread'i profile dahil et; kapatırken exit_thread'e verilecek profili döndür"""
+        with self._lock:
+            self._threads.add(threading.get_ident())
+        if self.mode != "cprofile":
+            return None
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            # Python 3.12+: cProfile süreç genelidir, ilk profil bu thread'i de kapsar
+            return None
+        return profile
+
+    def exit_thread(self, profile):
+        with self._lock:
+            self._threads.discard(threading.get_ident())
+        if profile is not None:
+            profile.disable()
+            with self._lock:
+                self._profiles.append(profile)
+
+    # ---- örnekleme ----
+
+    def _sample_loop(self):
+        while not self._stop.wait(SAMPLE_INTERVAL):
+            frames = sys._current_frames()
+            with self._lock:
+                threads = list(self._threads)
+            for ident in threads:
+                frame = frames.get(ident)
+                stack = []
+                while frame is not None:
+                    stack.append(_frame_label(frame))
+                    frame = frame.f_back
+                if stack:
+                    self._stacks[";".join(reversed(stack))] += 1
+
+    def start(self):
+        self._sampler.start()
+
+    def stop(self):
+        self._stop.set()
+        self._sampler.join()
+
+    # ---- çıktı ----
+
+    def save(self):
+        """Profil dosyalarını yaz; {"pstats": yol veya None, "collapsed": yol, "samples": sayı}"""
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        base = os.path.join(PROFILE_DIR, f"{_slug(self.platform, 20)}_{_slug(self.search_term)}_{self.job_id}_"
+                                         f"{self.started_at.strftime('%Y%m%d-%H%M%S')}")
+        paths = {"mode": self.mode, "job_id": self.job_id, "pstats": None, "collapsed": base + ".collapsed",
+                 "samples": sum(self._stacks.values())}
+        if self._profiles:
+            stats = pstats.Stats(self._profiles[0])
+            for profile in self._profiles[1:]:
+                stats.add(profile)
+            stats.dump_stats(base + ".pstats")
+            paths["pstats"] = base + ".pstats"
+        with open(paths["collapsed"], "w", encoding="utf-8") as f:
+            for stack, count in self._stacks.most_common():
+                f.write(f"{stack} {count}\n")
+        return paths
+
+@contextmanager
+def profiled_job(platform, search_term):
+    """Profil istendiyse ve üstte profillenen bir iş yoksa işi profille; oturumu (ya da None) verir"""
+    mode = requested_mode()
+    if mode is None or _session.get() is not None:
+        yield None
+        return
+    request = _requested.get()
+    session = ProfileSession(mode, platform, search_term, request[1] if request else None)
+    token = _session.set(session)
+    session.start()
+    profile = session.enter_thread()
+    try:
+        yield session
+    finally:
+        session.exit_thread(profile)
+        session.stop()
+        _session.reset(token)
+
+def save_profile(session, result):
+    """Profil dosyalarını yaz ve yollarını sonucun profile alanına ekle"""
+    started = time.perf_counter()
+    try:
+        paths = session.save()
+    except OSError as e:
+        print(f"⚠️ Profil yazılamadı: {e}", file=sys.stderr)
+        return
+    print(f"🔬 Profil yazıldı ({paths['samples']} örnek, {time.perf_counter() - started:.1f} sn): "
+          f"{paths['pstats'] or '-'} | {paths['collapsed']}", file=sys.stderr)
+    if isinstance(result, dict):
+        result["profile"] = paths
+
+def profile_thread(func):
+    """Thread'de çalışacak fonksiyonu aktif işin profiline dahil eden sarmalayıcı
+
+    Context kopyasıyla çalışan thread'lerde (parallel_scrape, tüm platformlar) kullanılır;
+    profil yoksa fonksiyonu olduğu gibi çağırır.
+    """
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        session = _session.get()
+        if session is None:
+            return func(*args, **kwargs)
+        profile = session.enter_thread()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            session.exit_thread(profile)
+    return wrapper
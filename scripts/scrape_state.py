@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Ürün bazında artımlı çekim durumu (watermark).
+
+Her ürün için `scrape_state` koleksiyonunda tek bir durum dokümanı tutulur: son
+görülen yorumların parmak izleri (en yenisi başta), en yeni yorum tarihi ve son
+çekimde kaç sayfa/scroll gezildiği. Sonraki çekimde scraper her sayfanın
+yorumlarını watermark'a gösterir; bilinen bir yoruma ulaşıldığında kalan
+sayfalar gezilmez. Yorum sayfaları en yeniden eskiye sıralandığı için bilinen ilk
+yorumdan sonrası zaten koleksiyondadır; gecelik yenilemede yalnızca yeni yorumlar
+indirilir.
+
+Durum, yorumlar yazıldıktan sonra save() ile kaydedilmelidir; yazım başarısız
+olursa bir sonraki çekim aynı yorumları tekrar dener.
+
+Ayarlar (ortam değişkenleri):
+    SCRAPER_INCREMENTAL         0 ise watermark'lar okunmaz, her ürün baştan çekilir (varsayılan 1)
+    SCRAPER_STATE_FINGERPRINTS  Ürün başına saklanan parmak izi sayısı (varsayılan 500)
+
+Kullanım:
+    watermark = ProductWatermark('n11', product_url)
+    for page in ...:
+        if watermark.observe_records(sayfa_kayitlari):
+            break
+    ...yorumları yaz...
+    watermark.save()
+"""
+
+from pymongo import MongoClient
+from pymongo.errors import PyMongoError
+from datetime import datetime
+import threading
+import sys
+import os
+
+from review_fingerprint import fingerprint_review, product_key, review_fingerprint
+
+INCREMENTAL = os.getenv("SCRAPER_INCREMENTAL", "1") != "0"
+MAX_FINGERPRINTS = int(os.getenv("SCRAPER_STATE_FINGERPRINTS", "500"))
+
+STATE_COLLECTION = "scrape_state"
+
+# MongoDB yoksa bağlantı denemesi bu kadar bekler (pymongo varsayılanı 30 sn)
+SERVER_SELECTION_TIMEOUT_MS = 2000
+
+_collection = None
+_unavailable = False
+_collection_lock = threading.Lock()
+
+def get_state_collection():
+    """Durum koleksiyonu (süreç genelinde tek bağlantı, ilk kullanımda açılır)
+
+    MongoDB'ye ulaşılamazsa None döner; hata hatırlanır, süreç boyunca tekrar denenmez.
+    """
+    global _collection, _unavailable
+    with _collection_lock:
+        if _collection is None and not _unavailable:
+            try:
+                client = MongoClient('mongodb://localhost:27017/', serverSelectionTimeoutMS=SERVER_SELECTION_TIMEOUT_MS)
+                collection = client['ecommerce_analytics'][STATE_COLLECTION]
+                collection.create_index([("platform", 1), ("product_key", 1)], unique=True)
+                _collection = collection
+            except PyMongoError as e:
+                _unavailable = True
+                print(f"    ⚠️ Çekim durumu için MongoDB'ye ulaşılamadı, bu süreçte ürünler baştan çekilecek: {e}", file=sys.stderr)
+        return _collection
+
+class ProductWatermark:
+    """Tek ürünün artımlı çekim durumu"""
+
+    def __init__(self, platform, product_url=None, product_name=None):
+        self.platform = (platform or '').lower()
+        self.product_url = product_url
+        self.product = product_key(platform, product_url, product_name)
+        self.known = set()
+        self.previous = []
+        self.previous_pages = 0
+        self.newest_date = None
+        self.seen = []
+        self._seen_set = set()
+        self.pages = 0
+        self.new_reviews = 0
+        self.reached = False
+
+        collection = get_state_collection() if INCREMENTAL else None
+        if collection is not None:
+            try:
+                state = collection.find_one({"platform": self.platform, "product_key": self.product})
+            except PyMongoError as e:
+                print(f"    ⚠️ Çekim durumu okunamadı, ürün baştan çekilecek: {e}", file=sys.stderr)
+                state = None
+            if state:
+                self.previous = state.get("fingerprints") or []
+                self.known = set(self.previous)
+                self.previous_pages = state.get("pages") or 0
+                self.newest_date = state.get("newest_date")
+                print(f"    🔖 Watermark: {len(self.known)} bilinen yorum, son çekim {self.previous_pages} sayfa", file=sys.stderr)
+
+    @property
+    def incremental(self):
+        """Daha önce çekilmiş ürün mü (bilinen yoruma ulaşınca durulabilir mi)"""
+        return bool(self.known)
+
+    def fingerprint(self, text, date=None):
+        return review_fingerprint(self.platform, self.product, text, date)
+
+    def observe(self, fingerprints):
+        """Bir sayfanın (ya da scroll'un) parmak izlerini işle; bilinen yoruma ulaşıldıysa True"""
+        self.pages += 1
+        reached = False
+        for fingerprint in fingerprints:
+            if fingerprint in self.known:
+                reached = True
+            elif fingerprint not in self._seen_set:
+                self.new_reviews += 1
+            if fingerprint not in self._seen_set:
+                self._seen_set.add(fingerprint)
+                self.seen.append(fingerprint)
+        if reached and not self.reached:
+            self.reached = True
+            print(f"    🔖 Bilinen yorumlara ulaşıldı ({self.pages}. sayfa, {self.new_reviews} yeni yorum), kalan sayfalar atlanıyor", file=sys.stderr)
+        return reached
+
+    def observe_records(self, records):
+        """Yorum kayıtlarının parmak izlerini hesapla (kayda da yazılır) ve observe et"""
+        if records and not self.seen and records[0].get('comment_date'):
+            self.newest_date = records[0]['comment_date']
+        fingerprints = (fingerprint_review(record) for record in records)
+        return self.observe([fingerprint for fingerprint in fingerprints if fingerprint])
+
+    def save(self):
+        """Bu çekimde görülen parmak izlerini öne ekleyerek durum dokümanını güncelle"""
+        if not self.seen:
+            return
+        fingerprints = self.seen + [fp for fp in self.previous if fp not in self._seen_set]
+        # Erken durulduysa ürünün toplam sayfa sayısı bilinmez; önceki değer korunur
+        pages = max(self.pages, self.previous_pages) if self.reached else self.pages
+        collection = get_state_collection()
+        if collection is None:
+            return
+        try:
+            collection.update_one(
+                {"platform": self.platform, "product_key": self.product},
+                {"$set": {
+                    "product_url": self.product_url,
+                    "fingerprints": fingerprints[:MAX_FINGERPRINTS],
+                    "newest_fingerprint": fingerprints[0],
+                    "newest_date": self.newest_date,
+                    "pages": pages,
+                    "last_new_reviews": self.new_reviews,
+                    "last_scraped_at": datetime.now(),
+                }},
+                upsert=True,
+            )
+        except PyMongoError as e:
+            print(f"    ⚠️ Çekim durumu kaydedilemedi: {e}", file=sys.stderr)
+
+def save_watermarks(watermarks):
+    for watermark in watermarks:
+        watermark.save()
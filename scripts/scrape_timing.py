@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Scrape işlerinin aşama bazında süre ölçümü.
+
+Her scrape işi (arama ya da tek ürün) kendi zamanlayıcısını açar; ortak
+yardımcılar (sürücü havuzu, sayfa beklemeleri, scroll, kart okuma, arama,
+ürün sayfası, toplu yazım) süreyi aktif işin zamanlayıcısına aşama adıyla
+ekler. İş bitince aşama başına sayı, toplam/ortalama/en uzun süre ve toplam
+süreye oranı sonucun `timing` alanına eklenir ve stderr'e tek satır özet
+yazılır. SCRAPER_METRICS=1 ise aynı döküm `scrape_metrics` koleksiyonuna da
+eklenir.
+
+Aşamalar:
+    driver_start      havuzdan Chrome oturumu alma (gerekirse başlatma)
+    search_page       arama sayfasından ürün listesini toplama (önbellek isabetinde ölçülmez)
+    product_metadata  ürün sayfasından ad/fiyat/rating/satıcı okuma
+    page_load         driver.get ile sayfa yükleme
+    page_wait         sayfa hazır olma beklemeleri (wait_ready vb.)
+    review_page       bir yorum sayfasının tarayıcıyla okunması (yükleme, bekleme, okuma)
+    scroll_batch      bir scroll + yeni kart beklemesi
+    http_fetch        yorum sayfalarının HTTP ile indirilmesi
+    extraction        yorum kartlarının okunması
+    db_write          MongoDB toplu yazımı
+
+Aşamalar iç içe olabilir (ör. product_metadata içindeki page_load her ikisine de
+sayılır); oranlar bu yüzden toplamda 1'i geçebilir. Zamanlayıcı context
+değişkeninde tutulur, parallel_scrape'in thread'lerine context kopyasıyla geçer.
+Aktif iş yoksa span hiçbir şey yapmaz. Profil istendiyse (bkz. scrape_profiler)
+timed_job en dıştaki işi profiller ve dosya yollarını sonucun `profile` alanına ekler.
+
+Ayarlar (ortam değişkenleri):
+    SCRAPER_METRICS  1 ise her işin dökümü scrape_metrics koleksiyonuna yazılır (varsayılan 0)
+
+Kullanım:
+    @timed_job('n11')
+    def scrape_n11_by_product_name(...): ...
+
+    with span('page_load'):
+        driver.get(url)
+"""
+
+from pymongo import MongoClient
+from pymongo.errors import PyMongoError
+from contextlib import contextmanager
+from datetime import datetime
+import contextvars
+import functools
+import threading
+import time
+import sys
+import os
+
+from scrape_profiler import profiled_job, save_profile
+
+METRICS_ENABLED = os.getenv("SCRAPER_METRICS", "0") == "1"
+
+METRICS_COLLECTION = "scrape_metrics"
+
+_current = contextvars.ContextVar("scrape_job_timer", default=None)
+
+_collection = None
+_collection_lock = threading.Lock()
+
+class JobTimer:
+    """Bir işin aşama sürelerini toplayan thread-safe zamanlayıcı"""
+
+    def __init__(self, platform, job, args=()):
+        self.platform = platform
+        self.job = job
+        self.args = [str(arg) for arg in args]
+        self.started_at = time.time()
+        self._started = time.perf_counter()
+        self._phases = {}
+        self._lock = threading.Lock()
+
+    def add(self, phase, seconds):
+        with self._lock:
+            stat = self._phases.setdefault(phase, {"count": 0, "seconds": 0.0, "max": 0.0})
+            stat["count"] += 1
+            stat["seconds"] += seconds
+            stat["max"] = max(stat["max"], seconds)
+
+    def report(self):
+        """Makinece okunur döküm: toplam süre ve en uzun süren aşamadan başlayarak aşamalar"""
+        total = time.perf_counter() - self._started
+        with self._lock:
+            phases = sorted(self._phases.items(), key=lambda item: item[1]["seconds"], reverse=True)
+        return {
+            "platform": self.platform,
+            "job": self.job,
+            "total_seconds": round(total, 3),
+            "phases": {
+                phase: {
+                    "count": stat["count"],
+                    "seconds": round(stat["seconds"], 3),
+                    "avg_ms": round(stat["seconds"] / stat["count"] * 1000, 1),
+                    "max_ms": round(stat["max"] * 1000, 1),
+                    "share": round(stat["seconds"] / total, 3) if total else 0.0,
+                }
+                for phase, stat in phases
+            },
+        }
+
+def current_timer():
+    return _current.get()
+
+def record(phase, seconds):
+    """Başka yerde ölçülmüş süreyi aktif işin aşamasına ekle"""
+    timer = _current.get()
+    if timer is not None:
+        timer.add(phase, seconds)
+
+@contextmanager
+def span(phase):
+    """Bloğun süresini aktif işin phase aşamasına ekle (aktif iş yoksa yalnızca çalıştırır)"""
+    timer = _current.get()
+    if timer is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timer.add(phase, time.perf_counter() - started)
+
+def timed(phase):
+    """Fonksiyonun her çağrısını phase aşamasına ekleyen dekoratör"""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(phase):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def log_timing(report):
+    parts = [f"{phase} {stat['seconds']:.1f}s/{stat['count']}" for phase, stat in report["phases"].items()]
+    print(f"⏱️ {report['platform']} süre dökümü ({report['total_seconds']:.1f} sn): "
+          f"{', '.join(parts) or 'ölçüm yok'}", file=sys.stderr)
+
+# -------------------- scrape_metrics --------------------
+
+def get_metrics_collection():
+    """Metrik koleksiyonu (süreç genelinde tek bağlantı, ilk kullanımda açılır)"""
+    global _collection
+    with _collection_lock:
+        if _collection is None:
+            client = MongoClient('mongodb://localhost:27017/')
+            collection = client['ecommerce_analytics'][METRICS_COLLECTION]
+            collection.create_index([("platform", 1), ("started_at", -1)])
+            _collection = collection
+        return _collection
+
+def save_metrics(timer, report, result):
+    try:
+        get_metrics_collection().insert_one({
+            **report,
+            "args": timer.args,
+            "started_at": datetime.fromtimestamp(timer.started_at),
+            "success": bool(result.get("success")) if isinstance(result, dict) else False,
+            "total_reviews": result.get("total_reviews") if isinstance(result, dict) else None,
+        })
+    except PyMongoError as e:
+        print(f"    ⚠️ Süre dökümü scrape_metrics'e yazılamadı: {e}", file=sys.stderr)
+
+# -------------------- İş sarmalayıcı --------------------
+
+def timed_job(platform):
+    """Scrape fonksiyonunu kendi zamanlayıcısıyla çalıştır ve dökümü sonucun timing alanına ekle
+
+    İç içe işlerde (tüm platformlar araması) her iş kendi dökümünü üretir.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            timer = JobTimer(platform, func.__name__, args)
+            token = _current.set(timer)
+            result = session = None
+            try:
+                with profiled_job(platform, args[0] if args else func.__name__) as session:
+                    result = func(*args, **kwargs)
+            finally:
+                _current.reset(token)
+                if session is not None:
+                    save_profile(session, result)
+            report = timer.report()
+            log_timing(report)
+            if isinstance(result, dict):
+                result["timing"] = report
+            if METRICS_ENABLED:
+                save_metrics(timer, report, result)
+            return result
+        return wrapper
+    return decorator
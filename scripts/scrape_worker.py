@@ -0,0 +1,299 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Kalıcı scraping worker'ı.
+
+Her /api/scrape isteğinde yeni bir python3 süreci başlatmak yerine scraper
+fonksiyonlarını tek bir süreçte yerel HTTP üzerinden sunar. selenium, pymongo
+ve pandas bir kez import edilir, Chrome oturumları driver_pool'da sıcak kalır.
+
+Uç noktalar:
+    GET  /health         Kuyruk ve çalışan iş sayısı
+    POST /jobs           İşi kuyruğa al, {"job_id": ...} döndür
+    GET  /jobs/<id>      İş durumu ve (bittiyse) sonucu
+    POST /jobs/run       İşi kuyruğa al ve olayları NDJSON olarak akıt
+
+/jobs/run akışı scraper'ların stdout'a yazdığı olaylarla aynıdır (bkz. scrape_events):
+job_started, product_discovered, page_scraped, product_done ve en sonda summary.
+
+İş gövdesi: {"script": "n11_search_scraper", "args": ["iphone 15", "5", "8"], "timeout": 300}
+args, script'in komut satırı argümanlarıyla aynıdır. timeout (saniye) işin kuyruktan çıkıp
+başladığı andan ölçülür; dolunca /jobs/run akışı timeout sonucuyla kapanır, iş arka planda
+biter ve sonucu /jobs/<id> ile alınabilir. "refresh": true verilirse arama
+sonucu önbelleği atlanır (bkz. search_cache). "profile": true | "sample" verilirse iş
+profillenir ve dosya yolları sonucun `profile` alanına eklenir (bkz. scrape_profiler).
+
+Ayarlar (ortam değişkenleri):
+    SCRAPER_WORKER_HOST         Dinlenecek adres (varsayılan 127.0.0.1)
+    SCRAPER_WORKER_PORT         Dinlenecek port (varsayılan 8765)
+    SCRAPER_WORKER_CONCURRENCY  Aynı anda çalışacak iş sayısı (varsayılan 4)
+    SCRAPER_WORKER_WARM         Başlangıçta ısıtılacak Chrome oturumu sayısı (varsayılan 0)
+"""
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from concurrent.futures import ThreadPoolExecutor
+import importlib
+import threading
+import queue
+import uuid
+import time
+import json
+import sys
+import os
+
+from scrape_events import event_sink, emit_summary
+from search_cache import search_refresh
+from scrape_profiler import profile_request
+
+HOST = os.getenv("SCRAPER_WORKER_HOST", "127.0.0.1")
+PORT = int(os.getenv("SCRAPER_WORKER_PORT", "8765"))
+CONCURRENCY = int(os.getenv("SCRAPER_WORKER_CONCURRENCY", "4"))
+WARM_SESSIONS = int(os.getenv("SCRAPER_WORKER_WARM", "0"))
+DEFAULT_JOB_TIMEOUT = 300
+# Kuyruktaki işin başlayıp başlamadığının yoklanma aralığı (/jobs/run akışı)
+QUEUE_POLL_SECONDS = 1.0
+MAX_FINISHED_JOBS = 200
+
+# Her eşzamanlı iş kendi Chrome oturumunu alabilsin
+os.environ.setdefault("SCRAPER_POOL_SIZE", str(CONCURRENCY))
+
+def _parse_bool(value):
+    return str(value).lower() == 'true'
+
+# script adı → (fonksiyon adı, argüman dönüştürücüleri, CLI'daki varsayılan değerler)
+JOBS = {
+    'trendyol_scraper': ('scrape_trendyol_reviews', [str, int], ['40']),
+    'trendyol_search_scraper': ('scrape_trendyol_by_product_name', [str, int], ['5']),
+    'hepsiburada_scraper': ('scrape_hepsiburada_reviews', [str, int], ['5']),
+    'hepsiburada_search_scraper': ('scrape_hepsiburada_by_product_name', [str, int, int, int],
+                                   ['5', '6', os.getenv("SCRAPER_BUDGET_SEC", "300")]),
+    'n11_scraper': ('scrape_n11_product', [str, int], ['8']),
+    'n11_search_scraper': ('scrape_n11_by_product_name', [str, int, int], ['5', '8']),
+    'aliexpress_scraper': ('scrape_aliexpress_product', [str, int], ['10']),
+    'aliexpress_search_scraper': ('scrape_aliexpress_by_search_term', [str, int, int], ['5', '10']),
+    'amazon_scraper': ('scrape_amazon_product', [str, int, _parse_bool], ['10', 'true']),
+    'amazon_search_scraper': ('amazon_search_scrape', [str, int, int], ['5', '3']),
+    'all_platforms_search_scraper': ('scrape_all_platforms_by_search_term', [str, int, int],
+                                     ['5', os.getenv("SCRAPER_BUDGET_SEC", "300")]),
+}
+
+def resolve_job(script, args):
+    """İş tanımını çağrılabilir fonksiyon ve dönüştürülmüş argümanlara çevir"""
+    if script not in JOBS:
+        raise ValueError(f"Bilinmeyen script: {script}")
+    if not args:
+        raise ValueError("En az bir argüman gerekli")
+    func_name, converters, defaults = JOBS[script]
+    raw_args = list(args) + defaults[len(args) - 1:]
+    call_args = [convert(value) for convert, value in zip(converters, raw_args)]
+    module = importlib.import_module(script)
+    return getattr(module, func_name), call_args
+
+# -------------------- İş kaydı --------------------
+
+class ScrapeJob:
+    def __init__(self, script, args, timeout, refresh=False, profile=None):
+        self.id = uuid.uuid4().hex[:12]
+        self.script = script
+        self.args = args
+        self.timeout = timeout
+        self.refresh = refresh
+        self.profile = profile
+        self.status = 'queued'
+        self.result = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.events = queue.Queue()
+
+    def publish(self, event, **data):
+        self.events.put({"event": event, "job_id": self.id, **data})
+
+    def snapshot(self):
+        return {
+            "job_id": self.id,
+            "script": self.script,
+            "args": self.args,
+            "refresh": self.refresh,
+            "profile": self.profile,
+            "status": self.status,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "result": self.result,
+        }
+
+_executor = ThreadPoolExecutor(max_workers=CONCURRENCY, thread_name_prefix="scrape")
+_jobs = {}
+_jobs_lock = threading.Lock()
+
+def _forget_old_jobs():
+    finished = [job for job in _jobs.values() if job.finished_at]
+    if len(finished) <= MAX_FINISHED_JOBS:
+        return
+    finished.sort(key=lambda job: job.finished_at)
+    for job in finished[:len(finished) - MAX_FINISHED_JOBS]:
+        del _jobs[job.id]
+
+def _run_job(job):
+    job.status = 'running'
+    job.started_at = time.time()
+    job.publish('started', script=job.script)
+    print(f"▶️ İş {job.id} başladı: {job.script} {job.args}", file=sys.stderr)
+    # Scraper'ın emit ettiği olaylar stdout yerine bu işin kuyruğuna gider
+    with event_sink(lambda payload: job.events.put({**payload, "job_id": job.id})), search_refresh(job.refresh), \
+            profile_request(job.profile, job.id):
+        try:
+            func, call_args = resolve_job(job.script, job.args)
+            result = func(*call_args)
+            if result is None:
+                result = {"success": False, "error": "Scraper sonuç döndürmedi"}
+        except Exception as e:
+            print(f"❌ İş {job.id} hatası: {e}", file=sys.stderr)
+            result = {"success": False, "error": str(e)}
+        job.result = result
+        job.status = 'done' if result.get("success") else 'failed'
+        job.finished_at = time.time()
+        emit_summary(result)
+    job.events.put(None)
+    print(f"⏹️ İş {job.id} bitti ({job.finished_at - job.started_at:.1f} sn)", file=sys.stderr)
+
+def submit_job(script, args, timeout=DEFAULT_JOB_TIMEOUT, refresh=False, profile=None):
+    if script not in JOBS:
+        raise ValueError(f"Bilinmeyen script: {script}")
+    job = ScrapeJob(script, [str(a) for a in args], timeout, refresh, profile)
+    with _jobs_lock:
+        _forget_old_jobs()
+        _jobs[job.id] = job
+    job.publish('queued', script=script)
+    _executor.submit(_run_job, job)
+    return job
+
+def get_job(job_id):
+    with _jobs_lock:
+        return _jobs.get(job_id)
+
+def job_counts():
+    with _jobs_lock:
+        statuses = [job.status for job in _jobs.values()]
+    return {"queued": statuses.count('queued'), "running": statuses.count('running')}
+
+# -------------------- HTTP --------------------
+
+class WorkerHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        print(f"🌐 {self.address_string()} {format % args}", file=sys.stderr)
+
+    def _send_json(self, status, payload):
+        body = json.dumps(payload, ensure_ascii=False, default=str).encode('utf-8')
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _read_json(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        return json.loads(self.rfile.read(length) or b"{}")
+
+    def _write_chunk(self, payload):
+        data = (json.dumps(payload, ensure_ascii=False, default=str) + "\n").encode('utf-8')
+        self.wfile.write(f"{len(data):x}\r\n".encode('ascii') + data + b"\r\n")
+        self.wfile.flush()
+
+    def do_GET(self):
+        if self.path == '/health':
+            self._send_json(200, {"success": True, "concurrency": CONCURRENCY, **job_counts()})
+            return
+        if self.path.startswith('/jobs/'):
+            job = get_job(self.path[len('/jobs/'):])
+            if job is None:
+                self._send_json(404, {"success": False, "error": "İş bulunamadı"})
+            else:
+                self._send_json(200, {"success": True, **job.snapshot()})
+            return
+        self._send_json(404, {"success": False, "error": "Bulunamadı"})
+
+    def do_POST(self):
+        if self.path not in ('/jobs', '/jobs/run'):
+            self._send_json(404, {"success": False, "error": "Bulunamadı"})
+            return
+        try:
+            body = self._read_json()
+            job = submit_job(body.get("script"), body.get("args") or [],
+                             float(body.get("timeout") or DEFAULT_JOB_TIMEOUT), bool(body.get("refresh")),
+                             body.get("profile"))
+        except (ValueError, json.JSONDecodeError) as e:
+            self._send_json(400, {"success": False, "error": str(e)})
+            return
+
+        if self.path == '/jobs':
+            self._send_json(202, {"success": True, "job_id": job.id})
+            return
+        self._stream_job(job)
+
+    def _stream_job(self, job):
+        """İş olaylarını chunked NDJSON olarak yaz; süre dolarsa timeout sonucu gönder
+
+        Süre işin kuyruktan çıkıp başladığı andan ölçülür. Çalışan thread durdurulamaz:
+        zaman aşımında yalnızca akış kapanır, iş arka planda (slotunu tutarak) biter ve
+        sonucu /jobs/<id> ile alınabilir.
+        """
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson; charset=utf-8")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+        try:
+            while True:
+                # Kuyrukta beklerken süre işlemez; 'started' olayıyla started_at dolar
+                if job.started_at is None:
+                    wait = QUEUE_POLL_SECONDS
+                else:
+                    wait = max(job.started_at + job.timeout - time.time(), 0.01)
+                try:
+                    event = job.events.get(timeout=wait)
+                except queue.Empty:
+                    if job.started_at is None:
+                        continue
+                    self._write_chunk({"event": "summary", "job_id": job.id, "result": {
+                        "success": False,
+                        "error": f"Scraping işlemi zaman aşımına uğradı ({int(job.timeout)} saniye); "
+                                 f"iş arka planda devam ediyor, sonucu /jobs/{job.id} ile alınabilir",
+                        "timeout": True,
+                        "background": True,
+                        "status": job.status,
+                        "job_id": job.id,
+                    }})
+                    print(f"⏱️ İş {job.id} akış süresini aştı, arka planda devam ediyor", file=sys.stderr)
+                    break
+                if event is None:
+                    break
+                self._write_chunk(event)
+            self.wfile.write(b"0\r\n\r\n")
+            self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            print(f"⚠️ İstemci bağlantısı koptu, iş {job.id} arka planda devam ediyor", file=sys.stderr)
+
+def serve(host=HOST, port=PORT):
+    if WARM_SESSIONS > 0:
+        from driver_pool import get_driver_pool
+        print(f"🔥 {WARM_SESSIONS} Chrome oturumu ısıtılıyor...", file=sys.stderr)
+        get_driver_pool().warm(WARM_SESSIONS)
+
+    server = ThreadingHTTPServer((host, port), WorkerHandler)
+    server.daemon_threads = True
+    print(f"🚀 Scrape worker dinleniyor: http://{host}:{port} ({CONCURRENCY} eşzamanlı iş)", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        _executor.shutdown(wait=False, cancel_futures=True)
+
+if __name__ == "__main__":
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else PORT
+    serve(port=port)
@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Arama sonucu (bulunan ürün listesi) önbelleği.
+
+Arama scraper'ları her istekte arama sayfasını açıp ürün linklerini topluyordu.
+Arayüzden aynı arama tekrarlandığında ürün listesi önbellekten gelir, arama
+sayfası hiç açılmadan doğrudan yorumlara geçilir. Anahtar (platform, normalize
+arama terimi, max_products) üçlüsüdür; kayıtlar süreç içinde bellekte, süreçler
+arasında `search_results_cache` koleksiyonunda tutulur. Boş sonuçlar saklanmaz.
+
+Yenileme: search_refresh() context'i (worker'da iş gövdesindeki "refresh": true)
+ya da SCRAPER_SEARCH_REFRESH=1 ile çalışan süreçlerde önbellek okunmaz, arama
+yeniden yapılır ve sonuç önbelleğe yazılır.
+
+Ayarlar (ortam değişkenleri):
+    SCRAPER_SEARCH_CACHE    0 ise önbellek kullanılmaz (varsayılan 1)
+    SCRAPER_SEARCH_TTL      Arama sonucunun geçerli sayıldığı süre, saniye (varsayılan 3600)
+    SCRAPER_SEARCH_REFRESH  1 ise bu süreçteki aramalar önbelleği atlar (varsayılan 0)
+
+Kullanım:
+    product_urls = cached_search('n11', search_term, max_products,
+                                 lambda: search_n11_product_urls(search_term, max_products))
+"""
+
+from pymongo import MongoClient
+from pymongo.errors import PyMongoError
+from contextlib import contextmanager
+from datetime import datetime, timezone
+import contextvars
+import threading
+import time
+import sys
+import os
+
+from review_fingerprint import normalize_text
+from scrape_timing import span
+
+CACHE_ENABLED = os.getenv("SCRAPER_SEARCH_CACHE", "1") != "0"
+SEARCH_TTL = float(os.getenv("SCRAPER_SEARCH_TTL", "3600"))
+REFRESH_ALL = os.getenv("SCRAPER_SEARCH_REFRESH", "0") == "1"
+
+CACHE_COLLECTION = "search_results_cache"
+
+# MongoDB yoksa bağlantı denemesi bu kadar bekler (pymongo varsayılanı 30 sn)
+SERVER_SELECTION_TIMEOUT_MS = 2000
+
+_refresh = contextvars.ContextVar("search_cache_refresh", default=False)
+
+_memory = {}
+_memory_lock = threading.Lock()
+
+_collection = None
+_unavailable = False
+_collection_lock = threading.Lock()
+
+@contextmanager
+def search_refresh(enabled=True):
+    """Bu context içindeki aramalar önbelleği atlayıp arama sayfasını yeniden açar"""
+    token = _refresh.set(bool(enabled))
+    try:
+        yield
+    finally:
+        _refresh.reset(token)
+
+def refresh_requested():
+    return REFRESH_ALL or _refresh.get()
+
+def get_cache_collection():
+    """Önbellek koleksiyonu (süreç genelinde tek bağlantı, ilk kullanımda açılır)
+
+    MongoDB'ye ulaşılamazsa None döner; hata hatırlanır, süreç boyunca tekrar denenmez.
+    """
+    global _collection, _unavailable
+    with _collection_lock:
+        if _collection is None and not _unavailable:
+            try:
+                client = MongoClient('mongodb://localhost:27017/', serverSelectionTimeoutMS=SERVER_SELECTION_TIMEOUT_MS)
+                collection = client['ecommerce_analytics'][CACHE_COLLECTION]
+                collection.create_index([("platform", 1), ("search_term", 1), ("max_products", 1)], unique=True)
+                collection.create_index("fetched_at", expireAfterSeconds=int(SEARCH_TTL))
+                _collection = collection
+            except PyMongoError as e:
+                _unavailable = True
+                print(f"    ⚠️ Arama önbelleği için MongoDB'ye ulaşılamadı, bu süreçte önbellek kullanılmayacak: {e}", file=sys.stderr)
+        return _collection
+
+def cache_key(platform, search_term, max_products):
+    return (platform or '').lower(), normalize_text(search_term), int(max_products)
+
+def _query(key):
+    return {"platform": key[0], "search_term": key[1], "max_products": key[2]}
+
+def _load(key):
+    """Kaydı bellekten, yoksa MongoDB'den oku: (fetched_at epoch, products) ya da None"""
+    with _memory_lock:
+        entry = _memory.get(key)
+    if entry is not None:
+        return entry
+    collection = get_cache_collection()
+    if collection is None:
+        return None
+    try:
+        doc = collection.find_one(_query(key))
+    except PyMongoError as e:
+        print(f"    ⚠️ Arama önbelleği okunamadı: {e}", file=sys.stderr)
+        return None
+    if not doc:
+        return None
+    # pymongo tarihleri UTC ama saat dilimsiz döndürür
+    entry = (doc["fetched_at"].replace(tzinfo=timezone.utc).timestamp(), doc.get("products") or [])
+    with _memory_lock:
+        _memory.setdefault(key, entry)
+    return entry
+
+def _store(key, products):
+    now = time.time()
+    with _memory_lock:
+        _memory[key] = (now, products)
+    collection = get_cache_collection()
+    if collection is None:
+        return
+    try:
+        collection.update_one(
+            _query(key),
+            {"$set": {"products": products, "fetched_at": datetime.fromtimestamp(now, timezone.utc)}},
+            upsert=True,
+        )
+    except PyMongoError as e:
+        print(f"    ⚠️ Arama sonucu önbelleğe yazılamadı: {e}", file=sys.stderr)
+
+def cached_search(platform, search_term, max_products, search):
+    """Arama sonucunu önbellekten döndür; yoksa, süresi dolduysa ya da yenileme istendiyse search() çağır
+
+    search() ürün listesini (URL'ler ya da URL/ad/fiyat demetleri) döndürür. Önbellekten dönen
+    demetler MongoDB'den geldiyse liste olarak gelir.
+    """
+    if not CACHE_ENABLED:
+        with span("search_page"):
+            return search()
+
+    key = cache_key(platform, search_term, max_products)
+    if not refresh_requested():
+        entry = _load(key)
+        if entry is not None and entry[1]:
+            age = time.time() - entry[0]
+            if age < SEARCH_TTL:
+                print(f"🗃️ Arama sonucu önbellekten: {len(entry[1])} ürün ({age / 60:.0f} dk önce arandı)", file=sys.stderr)
+                return list(entry[1])
+    else:
+        print("🔄 Arama önbelleği atlanıyor (yenileme istendi)", file=sys.stderr)
+
+    with span("search_page"):
+        products = search()
+    if products:
+        _store(key, [list(product) if isinstance(product, tuple) else product for product in products])
+    return products
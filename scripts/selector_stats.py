@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Çok seçicili geri dönüş listeleri için öğrenilen seçici sırası.
+
+Fiyat, yorum kartı ve arama sonucu okuyucuları uzun seçici listelerini sırayla
+dener; ıskalanan her seçici chromedriver'a bir tur daha demektir. Burada her
+(platform, grup) için seçici başına isabet/deneme sayıları tutulur ve liste
+yakın geçmişteki başarı oranına göre sıralanır. match_first önce en iyi
+seçiciyi okur; ıskalarsa kalan adayların hepsini tek execute_script ile okuyup
+sırayla dener.
+
+Sayılar her gözlemde SCRAPER_SELECTOR_DECAY ile sönümlenir, böylece site
+şablonu değişince eski kazanan birkaç ıskadan sonra geriye düşer. İstatistikler
+süreç içinde bellekte, süreçler arasında `selector_stats` koleksiyonunda
+(platform + grup başına bir belge) tutulur; her SCRAPER_SELECTOR_FLUSH gözlemde
+bir ve süreç kapanırken toplu yazılır. Aynı anda çalışan süreçlerde son yazan
+kazanır; sıralama yalnızca bir öncelik ipucudur, sonucu değiştirmez.
+
+Ayarlar (ortam değişkenleri):
+    SCRAPER_SELECTOR_STATS  0 ise öğrenilen sıra kullanılmaz, listeler verildiği sırayla denenir (varsayılan 1)
+    SCRAPER_SELECTOR_DECAY  Gözlem başına sönümleme çarpanı (varsayılan 0.95)
+    SCRAPER_SELECTOR_FLUSH  Kaç gözlemde bir MongoDB'ye yazılacağı (varsayılan 20)
+
+Kullanım:
+    price = match_first(driver, 'n11', 'price', PRICE_SELECTORS, first_price)
+    cards = match_first(driver, 'hepsiburada', 'review_cards', selectors,
+                        lambda cards: cards if len(cards) >= 5 else None, read='element')
+"""
+
+from pymongo import MongoClient, UpdateOne
+from pymongo.errors import PyMongoError
+from selenium.common.exceptions import WebDriverException
+from datetime import datetime
+import threading
+import atexit
+import sys
+import os
+
+STATS_ENABLED = os.getenv("SCRAPER_SELECTOR_STATS", "1") != "0"
+STATS_DECAY = float(os.getenv("SCRAPER_SELECTOR_DECAY", "0.95"))
+FLUSH_EVERY = int(os.getenv("SCRAPER_SELECTOR_FLUSH", "20"))
+
+STATS_COLLECTION = "selector_stats"
+
+# MongoDB yoksa bağlantı denemesi bu kadar bekler (pymongo varsayılanı 30 sn)
+SERVER_SELECTION_TIMEOUT_MS = 2000
+
+# arguments[0]: kök eleman (yoksa document), arguments[1]: seçiciler, arguments[2]: okunacak değer
+# ('text' → innerText, 'element' → eleman, diğer → özellik/attribute), arguments[3]: seçici başına üst sınır
+_READ_JS = """
+const root = arguments[0] || document;
+const read = arguments[2];
+const limit = arguments[3];
+return arguments[1].map((selector) => {
+    let nodes;
+    try {
+        nodes = Array.from(root.querySelectorAll(selector)).slice(0, limit);
+    } catch (e) {
+        return [];  // Geçersiz seçici
+    }
+    if (read === 'element') return nodes;
+    if (read === 'text') return nodes.map((node) => (node.innerText || '').trim());
+    return nodes.map((node) => {
+        const value = node[read];
+        return value == null ? node.getAttribute(read) : String(value);
+    });
+});
+"""
+
+_stats = {}        # (platform, grup) → {seçici: [isabet, deneme]}
+_dirty = set()
+_pending = 0
+_lock = threading.Lock()
+
+_collection = None
+_unavailable = False
+_collection_lock = threading.Lock()
+
+def get_stats_collection():
+    """İstatistik koleksiyonu (süreç genelinde tek bağlantı, ilk kullanımda açılır)
+
+    MongoDB'ye ulaşılamazsa None döner; hata hatırlanır, süreç boyunca tekrar denenmez.
+    """
+    global _collection, _unavailable
+    with _collection_lock:
+        if _collection is None and not _unavailable:
+            try:
+                client = MongoClient('mongodb://localhost:27017/', serverSelectionTimeoutMS=SERVER_SELECTION_TIMEOUT_MS)
+                collection = client['ecommerce_analytics'][STATS_COLLECTION]
+                collection.create_index([("platform", 1), ("group", 1)], unique=True)
+                _collection = collection
+            except PyMongoError as e:
+                _unavailable = True
+                print(f"    ⚠️ Seçici istatistikleri için MongoDB'ye ulaşılamadı, bu süreçte listeler verildiği sırayla denenecek: {e}", file=sys.stderr)
+        return _collection
+
+def _group_stats(key):
+    """Grubun istatistikleri; ilk kullanımda MongoDB'den yüklenir (çağıran _lock'u tutmaz)"""
+    with _lock:
+        stats = _stats.get(key)
+    if stats is not None:
+        return stats
+    loaded = {}
+    collection = get_stats_collection()
+    try:
+        doc = collection.find_one({"platform": key[0], "group": key[1]}) if collection is not None else None
+    except PyMongoError as e:
+        print(f"    ⚠️ Seçici istatistikleri okunamadı: {e}", file=sys.stderr)
+        doc = None
+    for entry in (doc or {}).get("selectors", []):
+        loaded[entry["selector"]] = [float(entry.get("hits", 0)), float(entry.get("tries", 0))]
+    with _lock:
+        return _stats.setdefault(key, loaded)
+
+def _score(entry):
+    # Hiç denenmemiş seçici 0.5 ile başlar: bir kez ıskalayanın önünde, bir kez tutanın arkasında
+    hits, tries = entry or (0.0, 0.0)
+    return (hits + 1) / (tries + 2)
+
+def ordered(platform, group, selectors):
+    """Seçicileri yakın geçmişteki başarı oranına göre sırala (eşitlikte verilen sıra korunur)"""
+    if not STATS_ENABLED:
+        return list(selectors)
+    stats = _group_stats((platform, group))
+    with _lock:
+        scores = {selector: _score(stats.get(selector)) for selector in selectors}
+    return sorted(selectors, key=lambda selector: -scores[selector])
+
+def record(platform, group, tried, winner):
+    """Denenen seçicileri (sırayla) ve eşleşeni (yoksa None) istatistiğe işle"""
+    global _pending
+    if not STATS_ENABLED:
+        return
+    key = (platform, group)
+    stats = _group_stats(key)
+    with _lock:
+        for entry in stats.values():
+            entry[0] *= STATS_DECAY
+            entry[1] *= STATS_DECAY
+        for selector in tried:
+            stats.setdefault(selector, [0.0, 0.0])[1] += 1
+        if winner is not None:
+            stats[winner][0] += 1
+        _dirty.add(key)
+        _pending += 1
+        flush_now = _pending >= FLUSH_EVERY
+    if flush_now:
+        flush()
+
+@atexit.register
+def flush():
+    """Değişen grupları MongoDB'ye toplu yaz"""
+    global _pending
+    with _lock:
+        if not _dirty:
+            return
+        snapshot = {key: [{"selector": selector, "hits": round(hits, 4), "tries": round(tries, 4)}
+                          for selector, (hits, tries) in _stats[key].items()]
+                    for key in _dirty}
+        _dirty.clear()
+        _pending = 0
+    collection = get_stats_collection()
+    if collection is None:
+        return
+    now = datetime.now()
+    try:
+        collection.bulk_write([
+            UpdateOne({"platform": platform, "group": group},
+                      {"$set": {"selectors": selectors, "updated_at": now}}, upsert=True)
+            for (platform, group), selectors in snapshot.items()
+        ], ordered=False)
+    except PyMongoError as e:
+        print(f"    ⚠️ Seçici istatistikleri yazılamadı: {e}", file=sys.stderr)
+
+def read_candidates(driver, selectors, read='text', root=None, limit=50):
+    """Her seçici için eşleşen düğümlerin değerlerini tek execute_script ile oku"""
+    return driver.execute_script(_READ_JS, root, list(selectors), read, limit) or [[] for _ in selectors]
+
+def match_first(driver, platform, group, selectors, accept, read='text', root=None, limit=50):
+    """Öğrenilen sırayla ilk kabul edilen sonucu döndür; hiçbiri tutmazsa None
+
+    accept(değerler) seçicinin okunan değerlerinden sonucu üretir ya da None döndürür.
+    En iyi seçici tek başına okunur; ıskalarsa kalan adaylar tek çağrıda okunur.
+    """
+    candidates = ordered(platform, group, selectors)
+    if not candidates:
+        return None
+    try:
+        values = read_candidates(driver, candidates[:1], read, root, limit)[0]
+        result = accept(values) if values else None
+        if result is not None:
+            record(platform, group, candidates[:1], candidates[0])
+            return result
+        rest = candidates[1:]
+        batches = read_candidates(driver, rest, read, root, limit) if rest else []
+    except WebDriverException as e:
+        print(f"    ⚠️ {platform} {group} seçicileri okunamadı: {e.msg}", file=sys.stderr)
+        return None
+    for index, (selector, values) in enumerate(zip(rest, batches), 2):
+        result = accept(values) if values else None
+        if result is not None:
+            record(platform, group, candidates[:index], selector)
+            return result
+    record(platform, group, candidates, None)
+    return None
@@ -0,0 +1,32 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Platformların kök adresleri.
+
+Scraper'lar arama sayfası gibi sabit giriş adreslerini buradan alır. Ürün ve yorum
+linkleri arama sayfasından okunduğu için kök değiştirildiğinde bütün akış yeni
+köke gider; benchmark_scrape bu yolla scraper'ları yerel sahte mağazaya yönlendirir.
+Adres her çağrıda okunur, süreç içinde değiştirilebilir.
+
+Ayarlar (ortam değişkenleri):
+    SCRAPER_SITE_URL_<PLATFORM>  Platformun kök adresi (ör. SCRAPER_SITE_URL_N11=http://127.0.0.1:8901)
+
+Kullanım:
+    search_url = site_url('n11', f"/arama?q={term}")
+"""
+
+import os
+
+SITE_URLS = {
+    'trendyol': 'https://www.trendyol.com',
+    'hepsiburada': 'https://www.hepsiburada.com',
+    'n11': 'https://www.n11.com',
+    'aliexpress': 'https://tr.aliexpress.com',
+    'amazon': 'https://www.amazon.com.tr',
+}
+
+def site_url(platform, path=''):
+    """Platform kökü + path; SCRAPER_SITE_URL_<PLATFORM> verilmişse o kök kullanılır"""
+    platform = platform.lower()
+    base = os.getenv(f"SCRAPER_SITE_URL_{platform.upper()}") or SITE_URLS[platform]
+    return base.rstrip('/') + path
@@ -1,18 +1,19 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from webdriver_manager.chrome import ChromeDriverManager
 from pymongo import MongoClient
+from mongo_writer import BulkWriter
+from review_fingerprint import product_key, review_fingerprint
+from driver_pool import acquire_driver, release_driver
+from adaptive_scroll import scroll_until_stable
+from review_extractors import extract_review_cards
+from network_capture import NetworkCapture
+from page_waits import wait_ready
+from scrape_timing import timed_job
+from scrape_profiler import profile_from_argv
+from scrape_events import emit_job_started, emit_page_scraped, emit_product_done, emit_summary
 from datetime import datetime
-import time
 import sys
-import json
 import re
 
 def extract_product_name_from_url(url):
@@ -69,6 +70,7 @@ def create_safe_collection_name(product_name, platform):
     
     return collection_name
 
+@timed_job('trendyol')
 def scrape_trendyol_reviews(product_url, scroll_count=40):
     # MongoDB bağlantısı
     client = MongoClient('mongodb://localhost:27017/')
@@ -86,46 +88,20 @@ def scrape_trendyol_reviews(product_url, scroll_count=40):
     all_reviews_collection = db['all_reviews']
     
     print(f"📦 Koleksiyon adı: {collection_name}", file=sys.stderr)
+    emit_job_started('Trendyol', product_url=product_url, product_name=product_name, collection_name=collection_name)
     
-    # ChromeDriver ayarları (Apple Silicon M1/M2 optimizasyonu)
-    options = Options()
-    options.add_argument("--disable-gpu")
-    options.add_argument("--window-size=1920,1080")
-    options.add_argument("--no-sandbox")
-    options.add_argument("--disable-dev-shm-usage")
-    options.add_argument("--disable-blink-features=AutomationControlled")
-    options.add_argument("--disable-web-security")
-    options.add_argument("--allow-running-insecure-content")
-    options.add_argument("--disable-extensions")
-    options.add_argument("--disable-plugins")
-    options.add_experimental_option("excludeSwitches", ["enable-automation"])
-    options.add_experimental_option('useAutomationExtension', False)
-    
-    # WebDriver başlat (Apple Silicon için güvenli metod)
+    # Havuzdan sıcak bir Chrome oturumu al (ağ yakalama için performance log açık profil)
     try:
-        service = Service(ChromeDriverManager().install())
-        driver = webdriver.Chrome(service=service, options=options)
-        driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
-        print("✅ ChromeDriver başlatıldı (Apple Silicon)", file=sys.stderr)
+        driver = acquire_driver("capture")
     except Exception as e:
         print(f"❌ ChromeDriver hatası: {e}", file=sys.stderr)
-        try:
-            print("🔄 Sistem Chrome'u deneniyor...", file=sys.stderr)
-            options.binary_location = "/Applications/Google Chrome.app/Contents/MacOS/Google Chrome"
-            service = Service("/usr/local/bin/chromedriver")
-            driver = webdriver.Chrome(service=service, options=options)
-            print("✅ Sistem Chrome'u başarılı", file=sys.stderr)
-        except Exception as e2:
-            print(f"❌ Sistem Chrome hatası: {e2}", file=sys.stderr)
-            try:
-                driver_path = "/Users/helinaydin/Desktop/chromedriver"
-                service = Service(driver_path)
-                driver = webdriver.Chrome(service=service, options=options)
-                print("✅ Manuel path başarılı", file=sys.stderr)
-            except Exception as e3:
-                return {"success": False, "error": f"ChromeDriver hatası: {e} | Sistem Chrome: {e2} | Manuel: {e3}"}
+        return {"success": False, "error": str(e)}
     
     yorumlar = []
+    gorulen_parmak_izleri = set()
+    urun_anahtari = product_key('trendyol', product_url)
+    # Her yorum 3 koleksiyona gider; tek tek insert_one yerine toplu yazılır
+    writer = BulkWriter([product_collection, trendyol_collection, all_reviews_collection])
     
     try:
         # URL'yi yorum sayfasına dönüştür
@@ -137,110 +113,106 @@ def scrape_trendyol_reviews(product_url, scroll_count=40):
         else:
             base_url = product_url
             
+        capture = NetworkCapture(driver, 'trendyol')
         driver.get(base_url)
-        time.sleep(3)
         
         # Yorum div'leri yüklenene kadar bekle
-        WebDriverWait(driver, 10).until(
-            EC.presence_of_element_located((By.CLASS_NAME, "comment"))
-        )
-        
-        # === SCROLL (Jupyter notebook ile aynı mantık) ===
-        for i in range(scroll_count):
-            driver.execute_script("window.scrollBy(0, 500);")
-            time.sleep(1)
-            print(f"📜 Scroll {i+1}/{scroll_count} tamamlandı.", file=sys.stderr)
+        if not wait_ready(driver, 'trendyol', 'reviews', timeout=10):
+            raise Exception("Yorumlar 10 saniyede yüklenmedi")
         
-        # === Yorumları Çek (Jupyter notebook mantığı) ===
-        yorum_divleri = driver.find_elements(By.CLASS_NAME, "comment")
-        for yorum in yorum_divleri:
-            try:
-                # Yorum metnini al
-                metin = yorum.text.strip()
-                if not metin or len(metin) <= 5:
-                    continue
-                    
-                # Yorum tarihini al (comment-info-item class'ından)
-                yorum_tarihi = None
+        def yorumlari_isle(yorum_kartlari, sayfa):
+            """Kartları ayıkla, yazıcıya ekle ve bu grubu hemen page_scraped olarak gönder"""
+            grup = []
+            for kart in yorum_kartlari:
                 try:
-                    tarih_elements = yorum.find_elements(By.CLASS_NAME, "comment-info-item")
-                    for element in tarih_elements:
-                        element_text = element.text.strip()
-                        # Tarih formatlarını kontrol et (örn: "12 Ocak 2024", "2 gün önce", "1 hafta önce")
-                        if any(keyword in element_text.lower() for keyword in ['ocak', 'şubat', 'mart', 'nisan', 'mayıs', 'haziran', 
-                                                                              'temmuz', 'ağustos', 'eylül', 'ekim', 'kasım', 'aralık',
-                                                                              'gün önce', 'hafta önce', 'ay önce', 'yıl önce']):
-                            yorum_tarihi = element_text
-                            break
-                    
-                    # Eğer tarih bulunamazsa, comment-info-item'ların içeriğini kontrol et
-                    if not yorum_tarihi and tarih_elements:
-                        for element in tarih_elements:
-                            element_text = element.text.strip()
-                            # Sayı içeren ve tarih benzeri metinleri kontrol et
-                            if re.search(r'\d+', element_text) and len(element_text) > 3:
-                                yorum_tarihi = element_text
-                                break
-                except Exception as tarih_hatasi:
-                    print(f"⚠️ Tarih çekme hatası: {tarih_hatasi}", file=sys.stderr)
-                    yorum_tarihi = None
-                
-                # Dublika kontrolü
-                if metin not in yorumlar:
-                    yorumlar.append(metin)
-                    
-                    # MongoDB'ye kaydet - artık 3 koleksiyona da kaydet
-                    review_data = {
-                        'platform': 'Trendyol',
-                        'product_name': product_name,
-                        'comment': metin,
-                        'comment_date': yorum_tarihi,  # Gerçek yorum tarihi
-                        'timestamp': datetime.now(),   # Çekilme tarihi
-                        'product_url': product_url,
-                        'source': 'web_scraper',
-                        'collection_name': collection_name
-                    }
-                    
-                    # 1. Ürüne özel koleksiyon
-                    product_collection.insert_one(review_data.copy())
-                    
-                    # 2. Genel Trendyol koleksiyonu (eski sistem uyumluluğu)
-                    trendyol_collection.insert_one(review_data.copy())
-                    
-                    # 3. Tüm yorumlar koleksiyonu
-                    all_reviews_collection.insert_one(review_data.copy())
+                    # Yorum metnini al
+                    metin = (kart['text'] or "").strip()
+                    if not metin or len(metin) <= 5:
+                        continue
+                        
+                    # Yorum tarihi (API alanı ya da comment-info-item)
+                    yorum_tarihi = kart['date']
                     
-                    # Debug: Tarih bilgisini yazdır
-                    if yorum_tarihi:
-                        print(f"📅 Yorum tarihi bulundu: {yorum_tarihi}", file=sys.stderr)
+                    # Dublika kontrolü (platform + ürün + normalize metin + tarih parmak izi)
+                    parmak_izi = review_fingerprint('trendyol', urun_anahtari, metin, yorum_tarihi)
+                    if parmak_izi not in gorulen_parmak_izleri:
+                        gorulen_parmak_izleri.add(parmak_izi)
+                        yorumlar.append(metin)
+                        
+                        # MongoDB'ye kaydet - artık 3 koleksiyona da kaydet
+                        review_data = {
+                            'platform': 'Trendyol',
+                            'product_name': product_name,
+                            'comment': metin,
+                            'comment_date': yorum_tarihi,  # Gerçek yorum tarihi
+                            'rating': kart['rating'],
+                            'likes_count': kart['likes'] or 0,
+                            'timestamp': datetime.now(),   # Çekilme tarihi
+                            'product_url': product_url,
+                            'source': 'web_scraper',
+                            'collection_name': collection_name,
+                            'fingerprint': parmak_izi
+                        }
+                        
+                        # Ürüne özel, genel Trendyol (eski sistem uyumluluğu) ve tüm yorumlar koleksiyonları
+                        writer.add(review_data)
+                        grup.append(review_data)
                         
-            except Exception as yorum_hatasi:
-                print(f"⚠️ Yorum işleme hatası: {yorum_hatasi}", file=sys.stderr)
-                continue
+                        # Debug: Tarih bilgisini yazdır
+                        if yorum_tarihi:
+                            print(f"📅 Yorum tarihi bulundu: {yorum_tarihi}", file=sys.stderr)
+                            
+                except Exception as yorum_hatasi:
+                    print(f"⚠️ Yorum işleme hatası: {yorum_hatasi}", file=sys.stderr)
+                    continue
+            if grup:
+                emit_page_scraped('Trendyol', product_url, sayfa, grup)
+        
+        # === Önce yorum API yanıtları: yakalandıysa kalan sayfalar HTTP ile, scroll gerekmez ===
+        api_kartlari = capture.collect_reviews(max_pages=scroll_count, on_page=yorumlari_isle)
+        scrolls_used = 0
+        if not api_kartlari:
+            # === SCROLL: yeni yorum gelmeyince dur (scroll_count üst sınır) ===
+            okunan_kart = 0  # Önceki scroll'larda okunmuş kart sayısı
+
+            def yeni_kartlari_isle(scroll_no, kart_sayisi):
+                # Yalnızca bu scroll'da eklenen kartlar okunur ve hemen gönderilir
+                nonlocal okunan_kart
+                if kart_sayisi > okunan_kart:
+                    yorumlari_isle(extract_review_cards(driver, 'trendyol', selector=".comment", start=okunan_kart),
+                                   scroll_no)
+                    okunan_kart = kart_sayisi
+
+            scrolls_used, _ = scroll_until_stable(driver, ".comment", max_scrolls=scroll_count,
+                                                  on_scroll=yeni_kartlari_isle)
         
         print(f"Toplam {len(yorumlar)} yorum çekildi", file=sys.stderr)
+        emit_product_done('Trendyol', product_url, product_name, len(yorumlar))
         
     except Exception as e:
         print(f"❌ Yorum çekme hatası: {e}", file=sys.stderr)
         return {"success": False, "error": str(e)}
     finally:
-        driver.quit()
+        writer.close()
+        release_driver(driver, "capture")
     
     return {
         "success": True,
         "product_name": product_name,
         "total_reviews": len(yorumlar),
         "platform": "Trendyol",
-        "collection_name": collection_name
+        "collection_name": collection_name,
+        "scrolls_used": scrolls_used
     }
 
 if __name__ == "__main__":
+    sys.argv[1:] = profile_from_argv(sys.argv[1:])
     if len(sys.argv) < 2:
-        print(json.dumps({"success": False, "error": "URL parametresi gerekli"}))
+        emit_summary({"success": False, "error": "URL parametresi gerekli"})
         sys.exit(1)
     
     url = sys.argv[1]
     scroll_count = int(sys.argv[2]) if len(sys.argv) > 2 else 40
     
     result = scrape_trendyol_reviews(url, scroll_count)
-    print(json.dumps(result, ensure_ascii=False))
\ No newline at end of file
+    emit_summary(result)
\ No newline at end of file
@@ -1,18 +1,26 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from webdriver_manager.chrome import ChromeDriverManager
-import time
 from pymongo import MongoClient
+from mongo_writer import BulkWriter
+from review_fingerprint import fingerprint_review
+from scrape_state import ProductWatermark
+from driver_pool import acquire_driver, release_driver
+from adaptive_scroll import scroll_until_stable
+from review_extractors import extract_review_cards
+from page_waits import wait_ready
+from product_metadata import extract_product_metadata, first_price
+from selector_stats import match_first
+from rating_resolver import resolve_rating
+from search_cache import cached_search
+from parallel_scrape import scrape_products_parallel
+from scrape_timing import timed_job
+from scrape_profiler import profile_from_argv
+from site_urls import site_url
+from scrape_events import emit_job_started, emit_product_discovered, emit_page_scraped, emit_product_done, emit_summary
 from datetime import datetime
 import sys
-import json
 import re
 
 def create_safe_collection_name(product_name, platform):
@@ -162,212 +170,199 @@ def extract_likes_from_review(element):
     # Rating puanını float olarak döndür (4.1, 5.0 formatında)
     return float(rating_score)
 
-def extract_price_from_product_page(driver, product_url):
-    """Trendyol ürün sayfasından fiyat bilgisini çıkar"""
-    price = None
-    try:
-        # Yorumlar sayfasından ana ürün sayfasına git
-        main_product_url = product_url.replace('/yorumlar', '').split('?')[0]
-        
-        # Yeni sekmede açarak mevcut scraping'i bozmayalım
-        driver.execute_script("window.open('');")
-        driver.switch_to.window(driver.window_handles[1])
-        
-        driver.get(main_product_url)
-        time.sleep(2)
-        
-        # Trendyol fiyat selectors - YENİ SELECTOR'LAR EKLENDİ
-        price_selectors = [
-            ".pr-bx-nm.with-org-prc",  # 🆕 YENİ: Kullanıcının verdiği CSS selector
-            ".prc-dsc",
-            ".prc-org", 
-            ".price-current",
-            ".price",
-            ".product-price",
-            "[data-testid='price-current-price']",
-            ".discounted-price",
-            ".selling-price",
-            ".pr-bx-nm",  # 🆕 YENİ: Ek varyasyon
-            ".with-org-prc"  # 🆕 YENİ: Ek varyasyon
-        ]
-        
-        for selector in price_selectors:
-            try:
-                price_elements = driver.find_elements(By.CSS_SELECTOR, selector)
-                for elem in price_elements:
-                    text = elem.text.strip()
-                    # Fiyat pattern'ini ara (TL, ₺ veya sadece rakam)
-                    price_match = re.search(r'([\d.,]+)\s*(?:TL|₺|)', text)
-                    if price_match:
-                        price_str = price_match.group(1).replace('.', '').replace(',', '.')
-                        try:
-                            price = float(price_str)
-                            print(f"    💰 Fiyat bulundu ({selector}): {price} TL", file=sys.stderr)
-                            break
-                        except ValueError:
-                            continue
-                if price:
-                    break
-            except Exception:
-                continue
-        
-        # Sekmeyi kapat ve ana sekmeye dön
-        driver.close()
-        driver.switch_to.window(driver.window_handles[0])
-        
-    except Exception as e:
-        print(f"    ⚠️ Fiyat çıkarma hatası: {e}", file=sys.stderr)
-        # Hata durumunda doğru sekmeye döndüğümüzden emin ol
-        try:
-            if len(driver.window_handles) > 1:
-                driver.close()
-            driver.switch_to.window(driver.window_handles[0])
-        except:
-            pass
-    
+# Trendyol fiyat seçicileri; sıra selector_stats ile platform başına öğrenilir
+PRICE_SELECTORS = [
+    ".pr-bx-nm.with-org-prc",  # 🆕 YENİ: Kullanıcının verdiği CSS selector
+    ".prc-dsc",
+    ".prc-org",
+    ".price-current",
+    ".price",
+    ".product-price",
+    "[data-testid='price-current-price']",
+    ".discounted-price",
+    ".selling-price",
+    ".pr-bx-nm",  # 🆕 YENİ: Ek varyasyon
+    ".with-org-prc"  # 🆕 YENİ: Ek varyasyon
+]
+
+def read_price_from_page(driver):
+    """Açık Trendyol ürün sayfasından fiyat bilgisini çıkar (yapısal veri yoksa)"""
+    price = match_first(driver, 'trendyol', 'price', PRICE_SELECTORS, first_price)
+    if price is not None:
+        print(f"    💰 Fiyat bulundu: {price} TL", file=sys.stderr)
     return price
 
-def extract_product_rating_from_page(driver, product_url):
-    """Trendyol ürün sayfasından ana rating puanını çıkar"""
-    rating_score = 0
+# Trendyol rating seçicileri (öncelik sırasına göre); resolve_rating hepsini tek betikte dener
+RATING_SELECTORS = [
+    ".ps-ratings__count-text",  # 🎯 İSTENEN: 4.1 gibi değerler
+    ".rating-score",
+    ".product-rating",
+    ".rate-point",
+    ".rating-value",
+    "[data-testid='rating-score']",
+    ".rating",
+    ".score",
+    ".star-rating",
+    ".review-score",
+    ".product-score",
+    ".rating-text",
+    ".rate-value",
+    ".puan",
+    "[class*='rating']",
+    "[class*='score']",
+    "[class*='puan']",
+    "[class*='rate']"
+]
+
+def read_rating_from_page(driver):
+    """Açık Trendyol ürün sayfasından ana rating puanını çıkar (yapısal veri yoksa)"""
+    rating_score = resolve_rating(driver, 'trendyol', RATING_SELECTORS)
+    if rating_score:
+        return rating_score
+
+    # Hiçbir seçici çalışmadıysa sayfanın HTML'ini kısaca incele
     try:
-        # Yorumlar sayfasından ana ürün sayfasına git
-        main_product_url = product_url.replace('/yorumlar', '').split('?')[0]
-        
-        # Yeni sekmede açarak mevcut scraping'i bozmayalım
-        driver.execute_script("window.open('');")
-        driver.switch_to.window(driver.window_handles[1])
-        
-        driver.get(main_product_url)
-        time.sleep(3)  # Daha fazla bekleme
+        page_html = driver.page_source[:2000]  # İlk 2000 karakter
+        rating_matches = re.findall(r'\b[1-5]\.[0-9]\b', page_html)
+        if rating_matches:
+            rating_score = float(rating_matches[0])
+            print(f"    ⭐ HTML'den rating alındı: {rating_score}", file=sys.stderr)
+    except Exception as html_error:
+        print(f"    ⚠️ HTML inceleme hatası: {html_error}", file=sys.stderr)
+    return rating_score
+
+def scrape_trendyol_search_product(i, url, product_name_from_url, total_products, search_term,
+                                   search_collection_name, collections):
+    """Arama sonucundaki tek ürünün yorumlarını kendi havuz oturumunda çek"""
+    # Arama terimi, genel Trendyol ve tüm yorumlar koleksiyonlarına toplu yazılır
+    writer = BulkWriter(collections)
+    driver = acquire_driver()
+    urun_yorumlari = []
+    try:
+        print(f"\n📦 Ürün {i}/{total_products} yorum sayfası açılıyor: {product_name_from_url}", file=sys.stderr)
         
-        print(f"    🔍 Debug: {main_product_url}", file=sys.stderr)
+        # Ürün fiyatı, rating'i ve satıcısı tek ürün sayfası ziyaretinde (önce JSON-LD / başlangıç durumu)
+        urun_bilgisi = extract_product_metadata(driver, 'trendyol', url,
+                                                readers={'price': read_price_from_page, 'rating': read_rating_from_page})
+        product_price = urun_bilgisi['price']
+        product_rating = urun_bilgisi['rating'] or 0
         
-        # DETAYLI DEBUG: Sayfadaki tüm rating benzeri elementleri bul
         try:
-            all_elements = driver.find_elements(By.CSS_SELECTOR, "*")
-            rating_keywords = ['rating', 'rate', 'score', 'puan', 'yıldız', 'star']
+            driver.get(url)
+            wait_ready(driver, 'trendyol', 'reviews', timeout=3)
+            
+            # Daha önce çekilmiş üründe görünen kartlarda bilinen yorum çıkınca scroll bırakılır
+            watermark = ProductWatermark('trendyol', url, product_name_from_url)
+
+            okunan_kart = 0  # Önceki scroll'larda kontrol edilmiş kart sayısı
+
+            def bilinene_ulasildi(scroll_no, kart_sayisi):
+                # Yalnızca son scroll'da eklenen kartlar okunur; her scroll'da tümünü okumak karesel büyür
+                nonlocal okunan_kart
+                if not watermark.incremental or kart_sayisi <= okunan_kart:
+                    return False
+                yeni_kartlar = extract_review_cards(driver, 'trendyol', selector=".comment", start=okunan_kart)
+                okunan_kart = kart_sayisi
+                return any(watermark.fingerprint(kart['text'], kart['date']) in watermark.known
+                           for kart in yeni_kartlar)
+
+            # Scroll ile yorumların yüklenmesini sağla (en fazla 40 scroll, yeni yorum gelmeyince dur)
+            scroll_until_stable(driver, ".comment", max_scrolls=40, on_scroll=bilinene_ulasildi)
             
-            print(f"    🐛 Sayfada rating arama yapılıyor...", file=sys.stderr)
-            potential_ratings = []
+            # Yorumları tek execute_script ile oku (class 'comment' kullanılıyor)
+            yorum_kartlari = extract_review_cards(driver, 'trendyol', selector=".comment")
+            print(f"🔍 {len(yorum_kartlari)} yorum bulundu", file=sys.stderr)
             
-            for elem in all_elements[:100]:  # İlk 100 element
+            urun_yorum_sayisi = 0
+            gorulen_parmak_izleri = set()
+            for kart in yorum_kartlari:
                 try:
-                    class_name = elem.get_attribute('class') or ''
-                    text_content = elem.text.strip()
+                    yorum_metni = kart['text']
+                    if not yorum_metni or len(yorum_metni) <= 10:
+                        continue
+                        
+                    # Yorum tarihi comment-info-item'lardan tarayıcı içinde seçildi
+                    yorum_tarihi = kart['date']
                     
-                    # Rating benzeri class veya text kontrol et
-                    if any(keyword in class_name.lower() for keyword in rating_keywords):
-                        potential_ratings.append(f"Class: {class_name}, Text: {text_content[:50]}")
+                    # ÜRÜN RATING'INI KULLAN (her ürün için sabit)
+                    # product_rating zaten ürün sayfasından alındı
                     
-                    # 4.x pattern'i ara
-                    if re.search(r'\b[1-5]\.[0-9]\b', text_content):
-                        potential_ratings.append(f"Rating Pattern: {text_content[:50]} - Class: {class_name}")
+                    # MongoDB kaydı - GELİŞTİRİLMİŞ VERİ YAPISI
+                    review_data = {
+                        'platform': 'Trendyol',
+                        'product_name': product_name_from_url,
+                        'comment': yorum_metni,
+                        'comment_date': yorum_tarihi,  # Gerçek yorum tarihi
+                        'rating': product_rating,  # ⭐ DÜZELTME: Doğru alan adı
+                        'likes_count': 0,  # Gerçek beğeni sayısı (şimdilik 0)
+                        'product_price': product_price,  # 💰 YENİ: Ürün fiyatı
+                        'rating_count': urun_bilgisi['rating_count'],
+                        'seller': urun_bilgisi['seller'],
+                        'timestamp': datetime.now(),    # Çekilme tarihi
+                        'product_url': url,
+                        'search_term': search_term,
+                        'source': 'search_scraper',
+                        'collection_name': search_collection_name
+                    }
+                    
+                    # Dublika kontrolü (platform + ürün + normalize metin + tarih parmak izi)
+                    parmak_izi = fingerprint_review(review_data)
+                    if parmak_izi in gorulen_parmak_izleri:
+                        continue
+                    gorulen_parmak_izleri.add(parmak_izi)
+                    urun_yorum_sayisi += 1
+                    
+                    writer.add(review_data)
+                    urun_yorumlari.append(review_data)
+                    
+                    # Debug: Tarih bilgisini yazdır
+                    if yorum_tarihi:
+                        print(f"    ✅ Yorum: {product_rating} rating, Fiyat: {product_price} TL, Tarih: {yorum_tarihi}", file=sys.stderr)
+                    else:
+                        print(f"    ✅ Yorum: {product_rating} rating, Fiyat: {product_price} TL", file=sys.stderr)
                         
-                except:
+                except Exception as yorum_hatasi:
+                    print(f"⚠️ Yorum işleme hatası: {yorum_hatasi}", file=sys.stderr)
                     continue
             
-            # Sonuçları yazdır
-            for i, rating_info in enumerate(potential_ratings[:10]):  # İlk 10 sonuç
-                print(f"    🎯 Rating {i+1}: {rating_info}", file=sys.stderr)
-                
-        except Exception as debug_error:
-            print(f"    ⚠️ Debug hatası: {debug_error}", file=sys.stderr)
-        
-        # GENİŞLETİLMİŞ Trendyol rating selectors
-        rating_selectors = [
-            ".ps-ratings__count-text",  # 🎯 İSTENEN: 4.1 gibi değerler
-            ".rating-score",
-            ".product-rating", 
-            ".rate-point",
-            ".rating-value",
-            "[data-testid='rating-score']",
-            ".rating",
-            ".score",
-            ".star-rating",
-            ".review-score",
-            ".product-score",
-            ".rating-text",
-            ".rate-value",
-            ".puan",
-            "[class*='rating']",
-            "[class*='score']",
-            "[class*='puan']",
-            "[class*='rate']"
-        ]
-        
-        for selector in rating_selectors:
-            try:
-                rating_elements = driver.find_elements(By.CSS_SELECTOR, selector)
-                print(f"    🔍 {selector} için {len(rating_elements)} element bulundu", file=sys.stderr)
-                
-                for elem in rating_elements:
-                    text = elem.text.strip()
-                    print(f"    📝 Element text: '{text}'", file=sys.stderr)
-                    
-                    # Rating pattern'ini ara (1.0-5.0 arası değerler)
-                    rating_match = re.search(r'^(\d+\.?\d*)$', text)
-                    if rating_match:
-                        try:
-                            rating_value = float(rating_match.group(1))
-                            if 1.0 <= rating_value <= 5.0:  # Geçerli rating aralığı
-                                rating_score = rating_value  # 4.1 olarak tut
-                                print(f"    ⭐ Rating bulundu ({selector}): {rating_value} → {rating_score}", file=sys.stderr)
-                                break
-                        except ValueError:
-                            continue
-                            
-                    # Alternatif format: "4,2" (virgüllü)
-                    rating_match2 = re.search(r'^(\d+),(\d+)$', text)
-                    if rating_match2:
-                        try:
-                            rating_value = float(f"{rating_match2.group(1)}.{rating_match2.group(2)}")
-                            if 1.0 <= rating_value <= 5.0:
-                                rating_score = rating_value
-                                print(f"    ⭐ Rating bulundu (virgüllü) ({selector}): {rating_value} → {rating_score}", file=sys.stderr)
-                                break
-                        except ValueError:
-                            continue
-                            
-                if rating_score > 0:
-                    break
-            except Exception as e:
-                print(f"    ⚠️ {selector} hatası: {e}", file=sys.stderr)
-                continue
-        
-        # Eğer hiçbir selector çalışmadıysa, sayfanın HTML'ini kısaca incele
-        if rating_score == 0:
-            try:
-                page_html = driver.page_source[:2000]  # İlk 2000 karakter
-                rating_matches = re.findall(r'\b[1-5]\.[0-9]\b', page_html)
-                if rating_matches:
-                    print(f"    🔎 HTML'de bulunan rating pattern'leri: {rating_matches[:5]}", file=sys.stderr)
-                    # İlk bulduğunu kullan
-                    try:
-                        rating_value = float(rating_matches[0])
-                        rating_score = rating_value
-                        print(f"    ⭐ HTML'den rating alındı: {rating_value} → {rating_score}", file=sys.stderr)
-                    except:
-                        pass
-            except Exception as html_error:
-                print(f"    ⚠️ HTML inceleme hatası: {html_error}", file=sys.stderr)
-        
-        # Sekmeyi kapat ve ana sekmeye dön
-        driver.close()
-        driver.switch_to.window(driver.window_handles[0])
-        
-    except Exception as e:
-        print(f"    ⚠️ Rating çıkarma hatası: {e}", file=sys.stderr)
-        # Hata durumunda doğru sekmeye döndüğümüzden emin ol
-        try:
-            if len(driver.window_handles) > 1:
-                driver.close()
-            driver.switch_to.window(driver.window_handles[0])
-        except:
-            pass
+            print(f"✅ Ürün {i}: {urun_yorum_sayisi} yorum eklendi", file=sys.stderr)
+            watermark.observe_records(urun_yorumlari)
+            emit_page_scraped('Trendyol', url, 1, urun_yorumlari)
+            emit_product_done('Trendyol', url, product_name_from_url, urun_yorum_sayisi,
+                              product_price=product_price, product_rating=product_rating,
+                              rating_count=urun_bilgisi['rating_count'], seller=urun_bilgisi['seller'])
+            
+        except Exception as e:
+            print(f"❌ Ürün {i} yorumları alınamadı: {e}", file=sys.stderr)
+            return {"success": False, "error": str(e), "product_name": product_name_from_url}
+    finally:
+        writer.close()
+        release_driver(driver)
+
+    # Yorumlar yazıldı; sonraki çekim bu noktadan sonrasını çeker
+    if not writer.errors:
+        watermark.save()
+    return {"success": True, "product_name": product_name_from_url, "total_reviews": len(urun_yorumlari)}
+
+def get_review_urls_from_search(driver, product_name, max_products=5):
+    """Trendyol arama sayfasından ilk max_products ürünün yorum sayfası URL'lerini al"""
+    search_url = site_url('trendyol', f"/sr?q={product_name.replace(' ', '+')}")
+    print(f"🔍 Arama yapılıyor: {search_url}", file=sys.stderr)
+    driver.get(search_url)
+    wait_ready(driver, 'trendyol', 'search', timeout=3)
     
-    return rating_score
+    urunler = driver.find_elements(By.CSS_SELECTOR, "div.p-card-wrppr a")[:max_products]
+    print(f"📦 {len(urunler)} ürün bulundu", file=sys.stderr)
+    
+    yorum_sayfalari = []
+    for urun in urunler:
+        href = urun.get_attribute("href")
+        if href:
+            temiz_href = href.split("?")[0]  # URL'den parametreleri temizle
+            yorum_sayfalari.append(temiz_href + "/yorumlar")
+    return yorum_sayfalari
 
+@timed_job('trendyol')
 def scrape_trendyol_by_product_name(product_name, max_products=5):
     # MongoDB bağlantısı
     client = MongoClient('mongodb://localhost:27017/')
@@ -382,176 +377,62 @@ def scrape_trendyol_by_product_name(product_name, max_products=5):
     all_reviews_collection = db['all_reviews']
     
     print(f"📦 Search koleksiyonu: {search_collection_name}", file=sys.stderr)
+    emit_job_started('Trendyol', search_term=product_name, max_products=max_products,
+                     collection_name=search_collection_name)
     
-    # Tarayıcı ayarları
-    options = Options()
-    options.add_argument("--disable-gpu")
-    options.add_argument("--window-size=1920,1080")
-    options.add_argument("--no-sandbox")
-    options.add_argument("--disable-dev-shm-usage")
-    
-    # WebDriver başlat (güncellenmiş ChromeDriver path)
+    # Havuzdan sıcak bir Chrome oturumu al
     try:
-        driver_path = "/opt/homebrew/bin/chromedriver"
-        driver = webdriver.Chrome(service=Service(driver_path), options=options)
-        print(f"✅ ChromeDriver başlatıldı: {driver_path}", file=sys.stderr)
+        driver = acquire_driver()
     except Exception as e:
-        print(f"❌ Manuel path başarısız, otomatik indirme deneniyor: {e}", file=sys.stderr)
-        try:
-            driver = webdriver.Chrome(service=Service(ChromeDriverManager().install()), options=options)
-        except Exception as e2:
-            print(f"❌ Otomatik indirme de başarısız: {e2}", file=sys.stderr)
-            raise Exception("ChromeDriver başlatılamadı")
+        print(f"❌ ChromeDriver başlatılamadı: {e}", file=sys.stderr)
+        raise Exception("ChromeDriver başlatılamadı")
     
-    tum_yorumlar = []
+    toplam_yorum = 0
     bulunan_urunler = []
     
     try:
-        # Arama sayfasına git
-        search_url = f"https://www.trendyol.com/sr?q={product_name.replace(' ', '+')}"
-        print(f"🔍 Arama yapılıyor: {search_url}", file=sys.stderr)
-        driver.get(search_url)
-        time.sleep(3)
-        
-        # İlk 5 ürünün yorum sayfası URL'lerini al
-        yorum_sayfalari = []
-        
+        # İlk 5 ürünün yorum sayfası URL'lerini al (aynı arama yakın zamanda yapıldıysa önbellekten)
         try:
-            urunler = driver.find_elements(By.CSS_SELECTOR, "div.p-card-wrppr a")[:max_products]
-            print(f"📦 {len(urunler)} ürün bulundu", file=sys.stderr)
-            
-            for i, urun in enumerate(urunler):
-                href = urun.get_attribute("href")
-                if href:
-                    temiz_href = href.split("?")[0]  # URL'den parametreleri temizle
-                    yorum_url = temiz_href + "/yorumlar"
-                    yorum_sayfalari.append(yorum_url)
-                    
-                    # Ürün adını URL'den çıkar
-                    urun_adi = extract_product_name_from_url(temiz_href)
-                    bulunan_urunler.append(urun_adi)
-                    print(f"✅ Ürün {i+1}: {urun_adi}", file=sys.stderr)
-                    
+            yorum_sayfalari = cached_search('trendyol', product_name, max_products,
+                                            lambda: get_review_urls_from_search(driver, product_name, max_products))
         except Exception as e:
             print(f"❌ Ürün linkleri alınamadı: {e}", file=sys.stderr)
             return {"success": False, "error": f"Ürün linkleri alınamadı: {str(e)}"}
         
+        for i, yorum_url in enumerate(yorum_sayfalari):
+            # Ürün adını URL'den çıkar
+            urun_adi = extract_product_name_from_url(yorum_url[:-len("/yorumlar")])
+            bulunan_urunler.append(urun_adi)
+            print(f"✅ Ürün {i+1}: {urun_adi}", file=sys.stderr)
+            emit_product_discovered('Trendyol', yorum_url, urun_adi, i + 1)
+        
         if not yorum_sayfalari:
             return {"success": False, "error": "Hiç ürün bulunamadı"}
         
-        # Her ürünün yorumlarını çek
-        for i, url in enumerate(yorum_sayfalari):
-            product_name_from_url = bulunan_urunler[i] if i < len(bulunan_urunler) else f"Ürün {i+1}"
-            print(f"\n📦 Ürün {i+1}/{len(yorum_sayfalari)} yorum sayfası açılıyor: {product_name_from_url}", file=sys.stderr)
-            
-            # Ürün fiyatını ve rating'ini al (sadece ilk sayfada bir kez)
-            product_price = extract_price_from_product_page(driver, url)
-            product_rating = extract_product_rating_from_page(driver, url)
-            
-            try:
-                driver.get(url)
-                time.sleep(3)
-                
-                # Scroll ile yorumların yüklenmesini sağla (40 scroll)
-                for scroll in range(40):
-                    driver.execute_script("window.scrollBy(0, 500);")
-                    time.sleep(0.5)
-                    if scroll % 10 == 0:
-                        print(f"📜 Scroll {scroll}/40", file=sys.stderr)
-                
-                # Yorumları çek (class 'comment' kullanılıyor)
-                yorum_divleri = driver.find_elements(By.CLASS_NAME, "comment")
-                print(f"🔍 {len(yorum_divleri)} yorum bulundu", file=sys.stderr)
-                
-                urun_yorum_sayisi = 0
-                for yorum_div in yorum_divleri:
-                    try:
-                        yorum_metni = yorum_div.text.strip()
-                        if not yorum_metni or len(yorum_metni) <= 10:
-                            continue
-                            
-                        # Yorum tarihini al (comment-info-item class'ından)
-                        yorum_tarihi = None
-                        try:
-                            tarih_elements = yorum_div.find_elements(By.CLASS_NAME, "comment-info-item")
-                            for element in tarih_elements:
-                                element_text = element.text.strip()
-                                # Tarih formatlarını kontrol et (örn: "12 Ocak 2024", "2 gün önce", "1 hafta önce")
-                                if any(keyword in element_text.lower() for keyword in ['ocak', 'şubat', 'mart', 'nisan', 'mayıs', 'haziran', 
-                                                                                      'temmuz', 'ağustos', 'eylül', 'ekim', 'kasım', 'aralık',
-                                                                                      'gün önce', 'hafta önce', 'ay önce', 'yıl önce']):
-                                    yorum_tarihi = element_text
-                                    break
-                            
-                            # Eğer tarih bulunamazsa, comment-info-item'ların içeriğini kontrol et
-                            if not yorum_tarihi and tarih_elements:
-                                for element in tarih_elements:
-                                    element_text = element.text.strip()
-                                    # Sayı içeren ve tarih benzeri metinleri kontrol et
-                                    if re.search(r'\d+', element_text) and len(element_text) > 3:
-                                        yorum_tarihi = element_text
-                                        break
-                        except Exception as tarih_hatasi:
-                            print(f"⚠️ Tarih çekme hatası: {tarih_hatasi}", file=sys.stderr)
-                            yorum_tarihi = None
-                        
-                        # ÜRÜN RATING'INI KULLAN (her ürün için sabit)
-                        # product_rating zaten ürün sayfasından alındı
-                        
-                        tum_yorumlar.append(yorum_metni)
-                        urun_yorum_sayisi += 1
-                        
-                        # MongoDB kaydı - GELİŞTİRİLMİŞ VERİ YAPISI
-                        review_data = {
-                            'platform': 'Trendyol',
-                            'product_name': product_name_from_url,
-                            'comment': yorum_metni,
-                            'comment_date': yorum_tarihi,  # Gerçek yorum tarihi
-                            'rating': product_rating,  # ⭐ DÜZELTME: Doğru alan adı
-                            'likes_count': 0,  # Gerçek beğeni sayısı (şimdilik 0)
-                            'product_price': product_price,  # 💰 YENİ: Ürün fiyatı
-                            'timestamp': datetime.now(),    # Çekilme tarihi
-                            'product_url': url,
-                            'search_term': product_name,
-                            'source': 'search_scraper',
-                            'collection_name': search_collection_name
-                        }
-                        
-                        # 1. Search terimi özel koleksiyonu
-                        search_collection.insert_one(review_data.copy())
-                        
-                        # 2. Genel Trendyol koleksiyonu
-                        trendyol_collection.insert_one(review_data.copy())
-                        
-                        # 3. Tüm yorumlar koleksiyonu
-                        all_reviews_collection.insert_one(review_data.copy())
-                        
-                        # Debug: Tarih bilgisini yazdır
-                        if yorum_tarihi:
-                            print(f"    ✅ Yorum: {product_rating} rating, Fiyat: {product_price} TL, Tarih: {yorum_tarihi}", file=sys.stderr)
-                        else:
-                            print(f"    ✅ Yorum: {product_rating} rating, Fiyat: {product_price} TL", file=sys.stderr)
-                            
-                    except Exception as yorum_hatasi:
-                        print(f"⚠️ Yorum işleme hatası: {yorum_hatasi}", file=sys.stderr)
-                        continue
-                
-                print(f"✅ Ürün {i+1}: {urun_yorum_sayisi} yorum eklendi", file=sys.stderr)
-                
-            except Exception as e:
-                print(f"❌ Ürün {i+1} yorumları alınamadı: {e}", file=sys.stderr)
-                continue
+        # Arama oturumunu havuza bırak; ürünler paralel olarak kendi oturumlarında çekilir
+        release_driver(driver)
+        driver = None
+
+        collections = (search_collection, trendyol_collection, all_reviews_collection)
+        def urun_cek(i, url):
+            product_name_from_url = bulunan_urunler[i - 1] if i <= len(bulunan_urunler) else f"Ürün {i}"
+            return scrape_trendyol_search_product(i, url, product_name_from_url, len(yorum_sayfalari),
+                                                  product_name, search_collection_name, collections)
+
+        for sonuc in scrape_products_parallel(yorum_sayfalari, urun_cek):
+            if sonuc["success"]:
+                toplam_yorum += sonuc["total_reviews"]
     
     except Exception as e:
         print(f"❌ Genel hata: {e}", file=sys.stderr)
         return {"success": False, "error": str(e)}
     finally:
-        driver.quit()
+        release_driver(driver)
     
     return {
         "success": True,
         "search_term": product_name,
-        "total_reviews": len(tum_yorumlar),
+        "total_reviews": toplam_yorum,
         "total_products": len(bulunan_urunler),
         "platform": "Trendyol",
         "products": bulunan_urunler,
@@ -577,11 +458,13 @@ def extract_product_name_from_url(url):
         return "Trendyol Ürünü"
 
 if __name__ == "__main__":
+    sys.argv[1:] = profile_from_argv(sys.argv[1:])
     if len(sys.argv) < 2:
-        print(json.dumps({"success": False, "error": "Ürün adı parametresi gerekli"}))
+        emit_summary({"success": False, "error": "Ürün adı parametresi gerekli"})
         sys.exit(1)
     
     product_name = sys.argv[1]
     max_products = int(sys.argv[2]) if len(sys.argv) > 2 else 5
     
-    result = scrape_trendyol_by_product_name(product_name, max_products)
\ No newline at end of file
+    result = scrape_trendyol_by_product_name(product_name, max_products)
+    emit_summary(result)